@@ -61,6 +61,7 @@ fi
 # Run migrations
 echo "Running database migrations..."
 python manage.py migrate
+python manage.py createcachetable
 
 # Collect static files
 echo "Collecting static files..."
@@ -90,11 +91,30 @@ ExecStart=$VENV_DIR/bin/gunicorn \\
 WantedBy=multi-user.target
 EOF
 
-# Start Gunicorn
+# Set up the background import worker
+echo "Setting up import worker service..."
+sudo tee /etc/systemd/system/imh-ims-import-worker.service > /dev/null << EOF
+[Unit]
+Description=IMH IMS import worker
+After=network.target
+
+[Service]
+User=ubuntu
+Group=www-data
+WorkingDirectory=$APP_DIR
+Environment="PATH=$VENV_DIR/bin"
+ExecStart=$VENV_DIR/bin/python manage.py run_import_worker
+Restart=always
+
+[Install]
+WantedBy=multi-user.target
+EOF
+
+# Start Gunicorn and the import worker
 echo "Starting Gunicorn service..."
 sudo systemctl daemon-reload
-sudo systemctl start imh-ims
-sudo systemctl enable imh-ims
+sudo systemctl start imh-ims imh-ims-import-worker
+sudo systemctl enable imh-ims imh-ims-import-worker
 
 # Configure Nginx
 echo "Configuring Nginx..."
@@ -129,5 +149,5 @@ echo "Next steps:"
 echo "1. Update DNS to point to this server's IP"
 echo "2. Install SSL certificate: sudo certbot --nginx -d your-domain.com"
 echo "3. Update ALLOWED_HOSTS in .env with your domain"
-echo "4. Restart services: sudo systemctl restart imh-ims nginx"
+echo "4. Restart services: sudo systemctl restart imh-ims imh-ims-import-worker nginx"
 
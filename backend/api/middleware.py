@@ -12,8 +12,9 @@ class NoCacheMiddleware(MiddlewareMixin):
     """Add no-cache headers to API responses to prevent browser caching"""
     
     def process_response(self, request, response):
-        # Only apply to API endpoints
-        if request.path.startswith('/api/'):
+        # Only apply to API endpoints; responses with an ETag set their own
+        # caching so browsers can revalidate them
+        if request.path.startswith('/api/') and not response.has_header('ETag'):
             response['Cache-Control'] = 'no-cache, no-store, must-revalidate'
             response['Pragma'] = 'no-cache'
             response['Expires'] = '0'
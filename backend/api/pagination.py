@@ -0,0 +1,169 @@
+import base64
+import binascii
+import json
+from collections import OrderedDict
+from datetime import date, datetime
+from decimal import Decimal
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset (cursor) pagination over a view's `cursor_ordering`, e.g.
+    ('name', 'id') or ('-created_at', '-id'). The last field must be unique.
+
+    Each page is one indexed range query ("after this (name, id) tuple")
+    instead of OFFSET, so deep pages cost the same as the first one. The
+    next/previous links carry an opaque cursor. The total count is only
+    computed when the client passes ?include_count=true.
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    count_query_param = 'include_count'
+    page_size = 50
+    max_page_size = 500
+
+    def __init__(self, ordering, page_size=None):
+        self.ordering = tuple(ordering)
+        if page_size:
+            self.page_size = page_size
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(size, 1), self.max_page_size)
+
+    @staticmethod
+    def _field(ordering_field):
+        return ordering_field.lstrip('-')
+
+    def encode_cursor(self, values, reverse):
+        payload = json.dumps({'v': values, 'r': int(reverse)}, separators=(',', ':'), default=self._json_value)
+        return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+    @staticmethod
+    def _json_value(value):
+        if isinstance(value, (datetime, date)):
+            return value.isoformat()
+        if isinstance(value, Decimal):
+            return str(value)
+        raise TypeError(f"Unsupported cursor value: {value!r}")
+
+    def decode_cursor(self, cursor):
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+            values, reverse = payload['v'], bool(payload['r'])
+        except (binascii.Error, ValueError, KeyError, TypeError, UnicodeError):
+            raise NotFound('Invalid cursor')
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            raise NotFound('Invalid cursor')
+        return values, reverse
+
+    def _after(self, values, reverse):
+        """Q selecting rows strictly after `values` in the (possibly reversed) ordering"""
+        condition = Q()
+        equal = Q()
+        for ordering_field, value in zip(self.ordering, values):
+            field = self._field(ordering_field)
+            descending = ordering_field.startswith('-') != reverse
+            condition |= equal & Q(**{f'{field}__{"lt" if descending else "gt"}': value})
+            equal &= Q(**{field: value})
+        return condition
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        cursor = request.query_params.get(self.cursor_query_param)
+        values, self.reverse = self.decode_cursor(cursor) if cursor else (None, False)
+
+        self.count = None
+        if request.query_params.get(self.count_query_param) == 'true':
+            self.count = queryset.count()
+
+        ordering = self.ordering
+        if self.reverse:
+            ordering = tuple(field[1:] if field.startswith('-') else f'-{field}' for field in ordering)
+        queryset = queryset.order_by(*ordering)
+        if values is not None:
+            queryset = queryset.filter(self._after(values, self.reverse))
+
+        rows = list(queryset[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if self.reverse:
+            rows.reverse()
+
+        # Moving forward there is a previous page whenever we started from a cursor;
+        # moving backward there is always a next page (the one we came from)
+        self.has_next = (has_more and not self.reverse) or self.reverse
+        self.has_previous = (has_more and self.reverse) or (values is not None and not self.reverse)
+        self.first_values = self._values(rows[0]) if rows else values
+        self.last_values = self._values(rows[-1]) if rows else values
+        return rows
+
+    def _values(self, obj):
+        return [getattr(obj, self._field(field)) for field in self.ordering]
+
+    def _link(self, values, reverse):
+        if values is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(values, reverse))
+
+    def get_next_link(self):
+        return self._link(self.last_values, False) if self.has_next else None
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        return self._link(self.first_values, True)
+
+    def get_paginated_response(self, data):
+        body = OrderedDict()
+        if self.count is not None:
+            body['count'] = self.count
+        body['next'] = self.get_next_link()
+        body['previous'] = self.get_previous_link()
+        body['results'] = data
+        return Response(body)
+
+
+class StandardPagination(PageNumberPagination):
+    """
+    Page-number pagination (?page=, ?page_size= up to 500) that switches to
+    KeysetPagination with ?paginate=cursor on views declaring `cursor_ordering`
+    (or a get_cursor_ordering() that may return None to opt out per request).
+    """
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+    mode_query_param = 'paginate'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+        if request.query_params.get(self.mode_query_param) == 'cursor':
+            ordering = self.get_cursor_ordering(view)
+            if ordering:
+                self.keyset = KeysetPagination(ordering, page_size=self.page_size)
+                return self.keyset.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    @staticmethod
+    def get_cursor_ordering(view):
+        if view is None:
+            return None
+        if hasattr(view, 'get_cursor_ordering'):
+            return view.get_cursor_ordering()
+        return getattr(view, 'cursor_ordering', None)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
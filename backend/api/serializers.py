@@ -6,11 +6,66 @@ from imh_ims.models import (
     CountSession, CountLine, PurchaseRequest, PurchaseRequestLine,
     UserProfile, ModulePermission, UserPermission,
     Department, PhysicalChangeRequest, PhysicalChangeRequestLine,
-    RequestedItem
+    RequestedItem, ImportJob
 )
 
 
-class CategorySerializer(serializers.ModelSerializer):
+class SparseFieldsetMixin:
+    """
+    Lets clients trim a serializer's output on read requests:
+
+        ?fields=id,name      only these fields
+        ?omit=lines          everything except these
+        ?profile=slim        a named field set from `field_profiles`
+
+    Fields are dropped before serialization, so omitted method fields (and
+    the queries behind them) are never evaluated. Only the top-level
+    serializer of a response is trimmed; nested serializers are left whole.
+    Unknown names are ignored.
+    """
+    field_profiles = {}
+
+    def _is_root(self):
+        parent = self.parent
+        if isinstance(parent, serializers.ListSerializer):
+            parent = parent.parent
+        return parent is None
+
+    @staticmethod
+    def _names(value):
+        return {name.strip() for name in value.split(',') if name.strip()}
+
+    @classmethod
+    def selected_fields(cls, request, names):
+        """The subset of `names` a read request asks for"""
+        params = request.query_params
+        keep = None
+        profile = cls.field_profiles.get(params.get('profile', ''))
+        if profile:
+            keep = set(profile)
+        if params.get('fields'):
+            requested = cls._names(params['fields'])
+            keep = requested if keep is None else keep & requested
+        omit = cls._names(params.get('omit', ''))
+        return [name for name in names if (keep is None or name in keep) and name not in omit]
+
+    @classmethod
+    def includes(cls, request, name) -> bool:
+        """Whether a list view should fetch what `name` needs (e.g. prefetch nested lines)"""
+        if request.method not in ('GET', 'HEAD'):
+            return True
+        return bool(cls.selected_fields(request, [name]))
+
+    def get_fields(self):
+        fields = super().get_fields()
+        request = self.context.get('request')
+        if request is None or request.method not in ('GET', 'HEAD') or not self._is_root():
+            return fields
+        selected = set(self.selected_fields(request, fields))
+        return type(fields)((name, field) for name, field in fields.items() if name in selected)
+
+
+class CategorySerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     subcategories = serializers.SerializerMethodField()
     parent_category = serializers.PrimaryKeyRelatedField(
         queryset=Category.objects.all(),
@@ -54,15 +109,16 @@ class CategorySerializer(serializers.ModelSerializer):
             raise
 
 
-class VendorSerializer(serializers.ModelSerializer):
+class VendorSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = Vendor
         fields = ['id', 'name', 'contact_info', 'phone', 'email', 'is_active', 'created_at', 'updated_at']
         read_only_fields = ['created_at', 'updated_at']
 
 
-class LocationSerializer(serializers.ModelSerializer):
+class LocationSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     parent_location_name = serializers.CharField(source='parent_location.name', read_only=True)
+    department_name = serializers.CharField(source='department.name', read_only=True, allow_null=True)
     full_path = serializers.CharField(read_only=True)
     child_locations = serializers.SerializerMethodField()
 
@@ -70,7 +126,7 @@ class LocationSerializer(serializers.ModelSerializer):
         model = Location
         fields = [
             'id', 'property_id', 'name', 'type', 'parent_location', 'parent_location_name',
-            'floorplan_id', 'coordinates', 'is_active', 'full_path', 'child_locations',
+            'department', 'department_name', 'floorplan_id', 'coordinates', 'is_active', 'full_path', 'child_locations',
             'created_at', 'updated_at'
         ]
         read_only_fields = ['created_at', 'updated_at']
@@ -81,13 +137,18 @@ class LocationSerializer(serializers.ModelSerializer):
         return []
 
 
-class ItemSerializer(serializers.ModelSerializer):
+class ItemSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     category_name = serializers.CharField(source='category.name', read_only=True)
     default_vendor_name = serializers.CharField(source='default_vendor.name', read_only=True)
     property_on_hand = serializers.SerializerMethodField()
     property_id = serializers.SerializerMethodField()
     is_below_par_anywhere = serializers.SerializerMethodField()
 
+    # Mobile scanner lists
+    field_profiles = {
+        'slim': ('id', 'short_code', 'name', 'unit_of_measure', 'property_on_hand', 'is_below_par_anywhere'),
+    }
+
     class Meta:
         model = Item
         fields = [
@@ -98,24 +159,32 @@ class ItemSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['created_at', 'updated_at', 'property_on_hand', 'property_id', 'is_below_par_anywhere']
 
+    # The catalog list annotates these in SQL (CatalogService.annotate); other
+    # callers fall back to computing them per item.
     def get_property_on_hand(self, obj):
         """Calculate total on-hand quantity for the primary property"""
+        if hasattr(obj, 'catalog_property_on_hand'):
+            return obj.catalog_property_on_hand
         from imh_ims.services.stock_service import StockService
         on_hand, _ = StockService.get_property_on_hand(obj)
         return on_hand
 
     def get_property_id(self, obj):
         """Get the primary property_id for this item"""
+        if hasattr(obj, 'catalog_property_id'):
+            return obj.catalog_property_id
         from imh_ims.services.stock_service import StockService
         _, property_id = StockService.get_property_on_hand(obj)
         return property_id
 
     def get_is_below_par_anywhere(self, obj):
         """Check if item is below par at any location"""
+        if hasattr(obj, 'catalog_below_par'):
+            return obj.catalog_below_par
         return any(stock.is_below_par for stock in obj.stock_levels.all())
 
 
-class StockLevelSerializer(serializers.ModelSerializer):
+class StockLevelSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     item_name = serializers.CharField(source='item.name', read_only=True)
     item_short_code = serializers.CharField(source='item.short_code', read_only=True)
     item_photo_url = serializers.CharField(source='item.photo_url', read_only=True)
@@ -128,6 +197,10 @@ class StockLevelSerializer(serializers.ModelSerializer):
     is_below_par = serializers.BooleanField(read_only=True)
     is_at_risk = serializers.BooleanField(read_only=True)
 
+    field_profiles = {
+        'slim': ('id', 'item', 'item_short_code', 'item_name', 'location', 'on_hand_qty', 'par', 'is_below_par'),
+    }
+
     class Meta:
         model = StockLevel
         fields = [
@@ -139,7 +212,7 @@ class StockLevelSerializer(serializers.ModelSerializer):
         read_only_fields = ['created_at', 'updated_at', 'available_qty', 'is_below_par', 'is_at_risk']
 
 
-class InventoryTransactionSerializer(serializers.ModelSerializer):
+class InventoryTransactionSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     item_name = serializers.CharField(source='item.name', read_only=True)
     from_location_name = serializers.CharField(source='from_location.name', read_only=True, allow_null=True)
     to_location_name = serializers.CharField(source='to_location.name', read_only=True, allow_null=True)
@@ -149,14 +222,14 @@ class InventoryTransactionSerializer(serializers.ModelSerializer):
         model = InventoryTransaction
         fields = [
             'id', 'item', 'item_name', 'from_location', 'from_location_name',
-            'to_location', 'to_location_name', 'qty', 'type', 'timestamp',
+            'to_location', 'to_location_name', 'qty', 'qty_delta', 'type', 'timestamp',
             'user', 'user_name', 'cost', 'notes', 'requisition', 'receipt_id',
             'work_order_id', 'count_session'
         ]
-        read_only_fields = ['timestamp']
+        read_only_fields = ['timestamp', 'qty_delta']
 
 
-class RequisitionLineSerializer(serializers.ModelSerializer):
+class RequisitionLineSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     item_name = serializers.CharField(source='item.name', read_only=True)
     item_short_code = serializers.CharField(source='item.short_code', read_only=True)
     item_photo_url = serializers.CharField(source='item.photo_url', read_only=True)
@@ -182,7 +255,7 @@ class RequisitionLineSerializer(serializers.ModelSerializer):
             return 0
 
 
-class RequisitionSerializer(serializers.ModelSerializer):
+class RequisitionSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     from_location_name = serializers.CharField(source='from_location.name', read_only=True)
     to_location_name = serializers.CharField(source='to_location.name', read_only=True)
     requested_by_name = serializers.CharField(source='requested_by.username', read_only=True)
@@ -190,6 +263,13 @@ class RequisitionSerializer(serializers.ModelSerializer):
     denied_by_name = serializers.CharField(source='denied_by.username', read_only=True, allow_null=True)
     lines = RequisitionLineSerializer(many=True, read_only=True)
 
+    field_profiles = {
+        'slim': (
+            'id', 'status', 'from_location', 'from_location_name', 'to_location', 'to_location_name',
+            'created_at', 'needed_by'
+        ),
+    }
+
     class Meta:
         model = Requisition
         fields = [
@@ -201,7 +281,7 @@ class RequisitionSerializer(serializers.ModelSerializer):
         read_only_fields = ['created_at', 'completed_at', 'approved_at', 'denied_at']
 
 
-class CountLineSerializer(serializers.ModelSerializer):
+class CountLineSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     item_name = serializers.CharField(source='item.name', read_only=True)
     item_short_code = serializers.CharField(source='item.short_code', read_only=True)
     item_photo_url = serializers.CharField(source='item.photo_url', read_only=True)
@@ -214,12 +294,16 @@ class CountLineSerializer(serializers.ModelSerializer):
         ]
 
 
-class CountSessionSerializer(serializers.ModelSerializer):
+class CountSessionSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     location_name = serializers.CharField(source='location.name', read_only=True)
     counted_by_name = serializers.CharField(source='counted_by.username', read_only=True)
     approved_by_name = serializers.CharField(source='approved_by.username', read_only=True, allow_null=True)
     lines = CountLineSerializer(many=True, read_only=True)
 
+    field_profiles = {
+        'slim': ('id', 'location', 'location_name', 'status', 'started_at', 'completed_at'),
+    }
+
     class Meta:
         model = CountSession
         fields = [
@@ -230,7 +314,7 @@ class CountSessionSerializer(serializers.ModelSerializer):
         read_only_fields = ['started_at', 'completed_at', 'approved_at']
 
 
-class PurchaseRequestLineSerializer(serializers.ModelSerializer):
+class PurchaseRequestLineSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     item_name = serializers.CharField(source='item.name', read_only=True)
     item_short_code = serializers.CharField(source='item.short_code', read_only=True)
 
@@ -239,7 +323,7 @@ class PurchaseRequestLineSerializer(serializers.ModelSerializer):
         fields = ['id', 'item', 'item_name', 'item_short_code', 'qty', 'unit_cost']
 
 
-class PurchaseRequestSerializer(serializers.ModelSerializer):
+class PurchaseRequestSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     vendor_name = serializers.CharField(source='vendor.name', read_only=True)
     requested_by_name = serializers.CharField(source='requested_by.username', read_only=True)
     approved_by_name = serializers.CharField(source='approved_by.username', read_only=True, allow_null=True)
@@ -256,7 +340,7 @@ class PurchaseRequestSerializer(serializers.ModelSerializer):
         read_only_fields = ['created_at', 'submitted_at', 'approved_at', 'denied_at']
 
 
-class DepartmentSerializer(serializers.ModelSerializer):
+class DepartmentSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     member_count = serializers.SerializerMethodField()
 
     class Meta:
@@ -268,7 +352,7 @@ class DepartmentSerializer(serializers.ModelSerializer):
         return obj.members.count()
 
 
-class UserProfileSerializer(serializers.ModelSerializer):
+class UserProfileSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     department = DepartmentSerializer(read_only=True)
     department_id = serializers.IntegerField(write_only=True, required=False, allow_null=True)
 
@@ -278,14 +362,14 @@ class UserProfileSerializer(serializers.ModelSerializer):
         read_only_fields = ['created_at', 'updated_at']
 
 
-class PermissionSerializer(serializers.ModelSerializer):
+class PermissionSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = ModulePermission
         fields = ['id', 'module', 'action', 'name']
         read_only_fields = ['name']
 
 
-class UserPermissionSerializer(serializers.ModelSerializer):
+class UserPermissionSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     permission = PermissionSerializer(read_only=True)
     permission_id = serializers.IntegerField(write_only=True, required=False)
 
@@ -295,7 +379,7 @@ class UserPermissionSerializer(serializers.ModelSerializer):
         read_only_fields = ['granted_at']
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     profile = UserProfileSerializer(read_only=True)
     role = serializers.SerializerMethodField()
     permissions = serializers.SerializerMethodField()
@@ -330,7 +414,7 @@ class UserSerializer(serializers.ModelSerializer):
             return []
 
 
-class PhysicalChangeRequestLineSerializer(serializers.ModelSerializer):
+class PhysicalChangeRequestLineSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     item_name = serializers.CharField(source='item.name', read_only=True)
     item_short_code = serializers.CharField(source='item.short_code', read_only=True)
     line_cost = serializers.DecimalField(max_digits=10, decimal_places=2, read_only=True)
@@ -340,7 +424,7 @@ class PhysicalChangeRequestLineSerializer(serializers.ModelSerializer):
         fields = ['id', 'item', 'item_name', 'item_short_code', 'qty', 'unit_cost', 'line_cost', 'notes']
 
 
-class PhysicalChangeRequestSerializer(serializers.ModelSerializer):
+class PhysicalChangeRequestSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     location_name = serializers.CharField(source='location.name', read_only=True)
     requested_by_name = serializers.CharField(source='requested_by.username', read_only=True)
     approved_by_name = serializers.CharField(source='approved_by.username', read_only=True, allow_null=True)
@@ -361,7 +445,7 @@ class PhysicalChangeRequestSerializer(serializers.ModelSerializer):
         read_only_fields = ['created_at', 'completed_at', 'approved_at', 'denied_at', 'printed_at']
 
 
-class RequestedItemSerializer(serializers.ModelSerializer):
+class RequestedItemSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     item_name = serializers.CharField(source='item.name', read_only=True)
     item_short_code = serializers.CharField(source='item.short_code', read_only=True)
     item_cost = serializers.DecimalField(source='item.cost', max_digits=10, decimal_places=2, read_only=True, allow_null=True)
@@ -378,3 +462,40 @@ class RequestedItemSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['requested_at', 'ordered_at', 'received_at', 'cancelled_at']
 
+
+class ImportJobSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    """Progress of a background spreadsheet import; `results` holds the import counters"""
+    # Row errors returned inline; error_count always covers all of them
+    ERROR_LIMIT = 500
+
+    created_by_name = serializers.CharField(source='created_by.username', read_only=True, allow_null=True)
+    progress = serializers.SerializerMethodField()
+    error_count = serializers.IntegerField(read_only=True)
+    errors = serializers.SerializerMethodField()
+    results = serializers.SerializerMethodField()
+    rows_per_second = serializers.FloatField(read_only=True)
+
+    field_profiles = {
+        'slim': ('id', 'status', 'total_rows', 'rows_done', 'progress', 'error_count', 'rows_per_second'),
+    }
+
+    class Meta:
+        model = ImportJob
+        fields = [
+            'id', 'original_name', 'status', 'created_by', 'created_by_name', 'total_rows',
+            'rows_done', 'progress', 'error_count', 'errors', 'results', 'rows_per_second',
+            'processing_seconds', 'failure', 'created_at', 'started_at', 'finished_at'
+        ]
+        read_only_fields = fields
+
+    def get_progress(self, obj):
+        """Percent of file rows committed, once the file has been parsed"""
+        if not obj.total_rows:
+            return 100.0 if obj.status == 'COMPLETED' else None
+        return round(100.0 * obj.rows_done / obj.total_rows, 1)
+
+    def get_errors(self, obj):
+        return obj.results.get('errors', [])[:self.ERROR_LIMIT]
+
+    def get_results(self, obj):
+        return {key: value for key, value in obj.results.items() if key != 'errors'}
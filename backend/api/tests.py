@@ -1,3 +1,706 @@
-from django.test import TestCase
+from django.test import TestCase, override_settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+from django.conf import settings
+from django.core.cache import cache
+from django.core.cache.backends.db import DatabaseCache
+from django.contrib.auth.models import User
+from django.utils import timezone
+from decimal import Decimal
+import csv
+import io
+import tempfile
+import openpyxl
+from rest_framework.test import APIClient
 
-# Create your tests here.
+from imh_ims.models import (
+    Category, Vendor, Item, Location, StockLevel, Requisition, RequisitionLine, UserProfile, DemandForecast, Department
+)
+from imh_ims.services.rollup_service import StockRollupService
+from imh_ims.services.import_job_service import ImportJobService
+from imh_ims.services.stock_service import StockService
+from imh_ims.services.stock_version_service import STOCK_VERSION_KEY, StockVersionService
+from imh_ims.services.export_service import ExportService, ITEM_COLUMNS
+from imh_ims.services.qr_service import QRCodeCache, build_qr_matrix, generate_qr_code, qr_cache
+from imh_ims.services.label_service import LabelSheetService
+from api.serializers import ItemSerializer, StockLevelSerializer
+
+
+class ItemListQueryBudgetTests(TestCase):
+    """The catalog list must run a fixed number of queries, whatever the page size"""
+
+    # count + annotated page of items, with slack for auth/permission lookups
+    QUERY_BUDGET = 4
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_superuser(username="budgetadmin", password="testpass")
+        category = Category.objects.create(name="Linen")
+        vendor = Vendor.objects.create(name="Acme Supply")
+        locations = [
+            Location.objects.create(name="Main Storeroom", type="STOREROOM", property_id="P1"),
+            Location.objects.create(name="3W Closet", type="CLOSET", property_id="P1"),
+        ]
+        items = Item.objects.bulk_create([
+            Item(name=f"Item {n:04d}", short_code=f"BUDGET-{n:04d}", category=category, default_vendor=vendor)
+            for n in range(600)
+        ])
+        StockLevel.objects.bulk_create([
+            StockLevel(item=item, location=location, on_hand_qty=Decimal(n % 7), par=Decimal("5"))
+            for n, item in enumerate(items)
+            for location in locations
+        ])
+        StockRollupService.rebuild()
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def list_queries(self, params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/api/items/", params)
+        self.assertEqual(response.status_code, 200)
+        return response, len(queries)
+
+    def test_page_of_50(self):
+        response, queries = self.list_queries({"page_size": 50})
+        self.assertEqual(len(response.data["results"]), 50)
+        self.assertEqual(response.data["count"], 600)
+        self.assertLessEqual(queries, self.QUERY_BUDGET)
+
+    def test_page_of_500(self):
+        response, queries = self.list_queries({"page_size": 500})
+        self.assertEqual(len(response.data["results"]), 500)
+        self.assertEqual(response.data["results"][0]["category_name"], "Linen")
+        self.assertLessEqual(queries, self.QUERY_BUDGET)
+
+    def test_below_par_filter(self):
+        response, queries = self.list_queries({"page_size": 500, "below_par": "true"})
+        # on-hand cycles 0..6 against a par of 5
+        self.assertEqual(response.data["count"], len([n for n in range(600) if n % 7 < 5]))
+        self.assertTrue(all(item["is_below_par_anywhere"] for item in response.data["results"]))
+        self.assertLessEqual(queries, self.QUERY_BUDGET)
+
+    def test_page_size_does_not_change_query_count(self):
+        _, small = self.list_queries({"page_size": 50})
+        _, large = self.list_queries({"page_size": 500})
+        self.assertEqual(small, large)
+
+    def test_annotations_match_per_item_serializer(self):
+        Item.objects.create(name="Item 0000 unstocked", short_code="BUDGET-NEW")
+        response, _ = self.list_queries({"page_size": 20})
+        fields = ("property_on_hand", "property_id", "is_below_par_anywhere")
+        for row in response.data["results"]:
+            expected = ItemSerializer(Item.objects.get(pk=row["id"])).data
+            self.assertEqual([row[f] for f in fields], [expected[f] for f in fields], row["short_code"])
+
+    def test_search_is_ranked(self):
+        match = Item.objects.create(name="Zinc Cream", short_code="ZINC-1")
+        response, queries = self.list_queries({"search": "zin"})
+        self.assertEqual([row["id"] for row in response.data["results"]], [match.id])
+        self.assertLessEqual(queries, self.QUERY_BUDGET + 1)
+
+    def test_cursor_pagination_skips_count(self):
+        response, queries = self.list_queries({"paginate": "cursor", "page_size": 500})
+        self.assertNotIn("count", response.data)
+        self.assertLessEqual(queries, self.QUERY_BUDGET - 1)
+
+
+class KeysetPaginationTests(TestCase):
+    """?paginate=cursor walks lists by (sort key, id) without OFFSET"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_superuser(username="cursoradmin", password="testpass")
+        # Repeated names force the id tie-breaker
+        Item.objects.bulk_create([
+            Item(name=f"Item {n % 40:02d}", short_code=f"CURSOR-{n:03d}") for n in range(130)
+        ])
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def walk(self, url, params):
+        pages = []
+        response = self.client.get(url, params)
+        while True:
+            self.assertEqual(response.status_code, 200)
+            pages.append(response.data)
+            if not response.data["next"]:
+                return pages
+            response = self.client.get(response.data["next"])
+
+    def test_walk_matches_page_numbers(self):
+        expected = list(Item.objects.order_by("name", "id").values_list("id", flat=True))
+        pages = self.walk("/api/items/", {"paginate": "cursor", "page_size": 50})
+        self.assertEqual([len(page["results"]) for page in pages], [50, 50, 30])
+        self.assertEqual([row["id"] for page in pages for row in page["results"]], expected)
+        self.assertIsNone(pages[0]["previous"])
+
+        # Walking back from the last page returns the middle page
+        previous = self.client.get(pages[-1]["previous"]).data
+        self.assertEqual(previous["results"], pages[1]["results"])
+        self.assertIsNotNone(previous["previous"])
+        self.assertIsNone(self.client.get(previous["previous"]).data["previous"])
+
+    def test_count_on_request(self):
+        response = self.client.get("/api/items/", {"paginate": "cursor", "include_count": "true"})
+        self.assertEqual(response.data["count"], 130)
+
+    def test_invalid_cursor(self):
+        response = self.client.get("/api/items/", {"paginate": "cursor", "cursor": "not-a-cursor"})
+        self.assertEqual(response.status_code, 404)
+
+
+class SparseFieldsetTests(TestCase):
+    """?fields=, ?omit= and ?profile= trim serializer output"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_superuser(username="sparseadmin", password="testpass")
+        cls.storeroom = Location.objects.create(name="Main Storeroom", type="STOREROOM")
+        cls.closet = Location.objects.create(name="3W Closet", type="CLOSET")
+        cls.item = Item.objects.create(name="Soap", short_code="SPARSE-1")
+        StockLevel.objects.create(item=cls.item, location=cls.storeroom, on_hand_qty=Decimal("4"), par=Decimal("10"))
+        requisition = Requisition.objects.create(from_location=cls.storeroom, to_location=cls.closet, requested_by=cls.user)
+        RequisitionLine.objects.create(requisition=requisition, item=cls.item, qty_requested=Decimal("2"))
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_fields_and_omit(self):
+        row = self.client.get("/api/items/", {"fields": "id,name,bogus"}).data["results"][0]
+        self.assertEqual(set(row), {"id", "name"})
+        row = self.client.get("/api/items/", {"omit": "photo_url,created_at"}).data["results"][0]
+        self.assertNotIn("photo_url", row)
+        self.assertIn("property_on_hand", row)
+
+    def test_slim_profile(self):
+        row = self.client.get("/api/stock/", {"profile": "slim"}).data["results"][0]
+        self.assertEqual(set(row), set(StockLevelSerializer.field_profiles["slim"]))
+        self.assertEqual(row["item_short_code"], "SPARSE-1")
+        # ?fields narrows a profile further
+        row = self.client.get("/api/stock/", {"profile": "slim", "fields": "id,par"}).data["results"][0]
+        self.assertEqual(set(row), {"id", "par"})
+
+    def test_omitted_fields_skip_their_queries(self):
+        with CaptureQueriesContext(connection) as full:
+            self.assertIn("lines", self.client.get("/api/requisitions/").data["results"][0])
+        with CaptureQueriesContext(connection) as trimmed:
+            self.assertNotIn("lines", self.client.get("/api/requisitions/", {"profile": "slim"}).data["results"][0])
+        self.assertLess(len(trimmed), len(full))
+
+    def test_writes_use_every_field(self):
+        response = self.client.post("/api/items/?fields=id", {"name": "Towel", "short_code": "SPARSE-2"}, format="json")
+        self.assertEqual(response.status_code, 201)
+        self.assertIn("short_code", response.data)
+
+
+
+
+class ImportJobApiTests(TestCase):
+    """Uploads are queued and followed through the import-jobs endpoint"""
+
+    def setUp(self):
+        media_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(media_dir.cleanup)
+        settings_override = override_settings(MEDIA_ROOT=media_dir.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.admin = User.objects.create_user(username="importadmin", password="testpass")
+        UserProfile.objects.update_or_create(user=self.admin, defaults={'role': 'ADMIN'})
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def test_upload_returns_job_and_reports_progress(self):
+        upload = SimpleUploadedFile("items.csv", b"short_code,name,location_name,on_hand_qty\nAPI-1,Towel,Closet,1\nAPI-2,Soap,Closet,2\n", "text/csv")
+        response = self.client.post('/api/items/bulk_import/', {'file': upload}, format='multipart')
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data['status'], 'QUEUED')
+        self.assertFalse(Item.objects.filter(short_code="API-1").exists())
+
+        ImportJobService.run(ImportJobService.claim_next("test:1"))
+        response = self.client.get(f"/api/items/import-jobs/{response.data['id']}/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['status'], 'COMPLETED')
+        self.assertEqual((response.data['rows_done'], response.data['progress']), (2, 100.0))
+        self.assertEqual(response.data['results']['items_created'], 2)
+        self.assertEqual(response.data['error_count'], 0)
+
+    @override_settings(IMPORT_PREVIEW_LIMIT=2)
+    def test_preview_limits_rows_but_counts_whole_file(self):
+        lines = ["short_code,name,cost"] + [f"P-{n},Item {n},{'x' if n % 2 else '1'}" for n in range(9)]
+        upload = SimpleUploadedFile("items.csv", "\n".join(lines).encode(), "text/csv")
+        response = self.client.post('/api/items/bulk_import/?preview=true', {'file': upload}, format='multipart')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data['total_rows'], response.data['valid_rows'], response.data['invalid_rows']), (9, 5, 4))
+        self.assertEqual([row['row_number'] for row in response.data['rows']], [2, 4])
+        self.assertEqual([row['row_number'] for row in response.data['errors']], [3, 5])
+        self.assertEqual(response.data['diff']['items_created'], 5)
+        self.assertFalse(Item.objects.filter(short_code__startswith="P-").exists())
+
+    def test_job_status_requires_admin(self):
+        self.client.force_authenticate(User.objects.create_user(username="staff", password="testpass"))
+        self.assertEqual(self.client.get('/api/items/import-jobs/1/').status_code, 403)
+
+
+class ExportTests(TestCase):
+    """CSV and XLSX downloads of the item, stock and transaction lists"""
+
+    def setUp(self):
+        self.admin = User.objects.create_user(username="exportadmin", password="testpass")
+        UserProfile.objects.update_or_create(user=self.admin, defaults={'role': 'ADMIN'})
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+        self.linen = Category.objects.create(name="Linen")
+        self.closet = Location.objects.create(name="Closet 1", type="CLOSET")
+        self.towel = Item.objects.create(short_code="TWL", name="Towel", category=self.linen, cost=Decimal("2.50"))
+        self.soap = Item.objects.create(short_code="SOAP", name="=HYPERLINK(\"x\")")
+        StockService.receive_stock(self.towel, self.closet, Decimal("5"), self.admin)
+        StockService.issue_stock(self.towel, self.closet, Decimal("2"), self.admin)
+
+    def csv_rows(self, response):
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        body = b''.join(response.streaming_content).decode('utf-8-sig')
+        return list(csv.DictReader(io.StringIO(body)))
+
+    def test_items_csv_uses_list_filters(self):
+        rows = self.csv_rows(self.client.get('/api/export/items/'))
+        self.assertEqual([row['short_code'] for row in rows], ["SOAP", "TWL"])
+        # Text that a spreadsheet would run as a formula is escaped
+        self.assertEqual(rows[0]['name'], "'=HYPERLINK(\"x\")")
+
+        rows = self.csv_rows(self.client.get(f'/api/export/items/?category={self.linen.id}'))
+        self.assertEqual([(row['short_code'], row['category'], row['cost']) for row in rows], [("TWL", "Linen", "2.50")])
+
+    def test_stock_xlsx(self):
+        response = self.client.get('/api/export/stock/?file_format=xlsx')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('stock-', response['Content-Disposition'])
+        sheet = openpyxl.load_workbook(io.BytesIO(b''.join(response.streaming_content))).active
+        rows = list(sheet.values)
+        self.assertEqual(rows[0][:5], ('short_code', 'name', 'location_name', 'location_property_id', 'on_hand_qty'))
+        self.assertEqual(rows[1][:3], ('TWL', 'Towel', 'Closet 1'))
+        self.assertEqual(rows[1][4], 3)
+
+    def test_xlsx_splits_sheets_at_row_limit(self):
+        file = io.BytesIO()
+        ExportService.write_xlsx(Item.objects.order_by('name'), ITEM_COLUMNS[:2], file, 'items', sheet_rows=1)
+        workbook = openpyxl.load_workbook(file)
+        self.assertEqual(workbook.sheetnames, ['items', 'items 2'])
+        self.assertEqual(list(workbook['items 2'].values), [('short_code', 'name'), ('TWL', 'Towel')])
+
+    def test_transactions_filters(self):
+        rows = self.csv_rows(self.client.get('/api/export/transactions/?type=issue'))
+        self.assertEqual([(row['type'], row['from_location'], row['qty']) for row in rows], [("ISSUE", "Closet 1", "2.00")])
+        rows = self.csv_rows(self.client.get(f'/api/export/transactions/?location_id={self.closet.id}'))
+        self.assertEqual([row['type'] for row in rows], ["ISSUE", "RECEIVE"])
+        self.assertEqual(self.csv_rows(self.client.get('/api/export/transactions/?end_date=2000-01-01')), [])
+        self.assertEqual(self.client.get('/api/export/transactions/?start_date=yesterday').status_code, 400)
+        self.assertEqual(self.client.get('/api/export/items/?file_format=pdf').status_code, 400)
+
+    def test_requires_permission(self):
+        self.client.force_authenticate(User.objects.create_user(username="nobody", password="testpass"))
+        self.assertEqual(self.client.get('/api/export/transactions/').status_code, 403)
+
+
+class QRCodeCacheTests(TestCase):
+    """QR endpoints serve cached renders with ETags"""
+
+    def setUp(self):
+        cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(cache_dir.cleanup)
+        settings_override = override_settings(QR_CACHE_ROOT=cache_dir.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        qr_cache.clear()
+        self.addCleanup(qr_cache.clear)
+
+        admin = User.objects.create_user(username="qradmin", password="testpass")
+        UserProfile.objects.update_or_create(user=admin, defaults={'role': 'ADMIN'})
+        self.client = APIClient()
+        self.client.force_authenticate(admin)
+        self.item = Item.objects.create(short_code="QR-1", name="Towel")
+
+    def test_png_is_cached_and_revalidated(self):
+        url = f'/api/items/{self.item.id}/qr-code/?size=120'
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'image/png')
+        self.assertTrue(response.content.startswith(b'\x89PNG'))
+        self.assertIn('max-age', response['Cache-Control'])
+        key = QRCodeCache.key("QR-1", 120, 'M')
+        self.assertEqual(QRCodeCache.path(key).read_bytes(), response.content)
+
+        # A new process (empty memory tier) reads the file instead of rendering
+        qr_cache.clear()
+        self.assertEqual(self.client.get(url).content, response.content)
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+        self.assertNotEqual(self.client.get(f'/api/items/{self.item.id}/qr-code/?size=121')['ETag'], response['ETag'])
+
+    def test_short_code_change_evicts(self):
+        self.client.get(f'/api/items/{self.item.id}/qr-code/')
+        old_dir = QRCodeCache.data_dir("QR-1")
+        self.assertTrue(old_dir.exists())
+        self.item.short_code = "QR-2"
+        self.item.save()
+        self.assertFalse(old_dir.exists())
+        self.assertFalse([key for key in qr_cache._entries if key[0] == "QR-1"])
+
+    def test_data_endpoint_etag_covers_name(self):
+        url = f'/api/items/{self.item.id}/qr-code-data/'
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        Item.objects.filter(id=self.item.id).update(name="Bath Towel")
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['item_name'], "Bath Towel")
+
+    def test_rejects_sizes_out_of_range(self):
+        self.assertEqual(self.client.get(f'/api/items/{self.item.id}/qr-code/?size=99999').status_code, 400)
+        self.assertEqual(self.client.get(f'/api/items/{self.item.id}/qr-code/?size=big').status_code, 400)
+        self.assertEqual(self.client.get(f'/api/items/{self.item.id}/qr-code/?file_format=gif').status_code, 400)
+
+    def test_modules_are_whole_pixels(self):
+        matrix = build_qr_matrix("QR-1")
+        modules = len(matrix)
+        image = generate_qr_code("QR-1", 250)
+        self.assertEqual(image.size, (250, 250))
+        box = 250 // modules
+        offset = (250 - modules * box) // 2
+        # Every pixel of every module has the module's colour
+        for y, row in enumerate(matrix):
+            for x, dark in enumerate(row):
+                left, top = offset + x * box, offset + y * box
+                block = image.crop((left, top, left + box, top + box))
+                self.assertEqual(block.getextrema(), (0, 0) if dark else (255, 255))
+
+    def test_svg(self):
+        url = f'/api/items/{self.item.id}/qr-code/?file_format=svg&size=300'
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'image/svg+xml')
+        modules = len(build_qr_matrix("QR-1"))
+        self.assertIn(f'viewBox="0 0 {modules} {modules}"'.encode(), response.content)
+        self.assertIn(b'width="300"', response.content)
+        png_etag = self.client.get(f'/api/items/{self.item.id}/qr-code/?size=300')['ETag']
+        self.assertNotEqual(response['ETag'], png_etag)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+
+
+class LabelSheetTests(TestCase):
+    """/items/labels/ prints QR label sheets"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.linen = Category.objects.create(name="Linen")
+        cls.closet = Location.objects.create(name="3W Closet", type="CLOSET")
+        cls.items = [
+            Item.objects.create(short_code=f"LBL-{n:02d}", name=f"Towel {n:02d}", category=cls.linen)
+            for n in range(35)
+        ]
+        cls.other = Item.objects.create(short_code="LBL-X", name="Soap")
+        Item.objects.create(short_code="LBL-OLD", name="Old Towel", category=cls.linen, is_active=False)
+        StockLevel.objects.create(item=cls.other, location=cls.closet, on_hand_qty=1, par=1)
+
+    def setUp(self):
+        admin = User.objects.create_user(username="labeladmin", password="testpass")
+        UserProfile.objects.update_or_create(user=admin, defaults={'role': 'ADMIN'})
+        self.client = APIClient()
+        self.client.force_authenticate(admin)
+
+    def test_pdf_has_a_page_per_sheet(self):
+        response = self.client.get(f'/api/items/labels/?category={self.linen.id}')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        self.assertTrue(response.content.startswith(b'%PDF'))
+        # 35 active items on 30-label sheets; the inactive one is left out
+        self.assertEqual(response.content.count(b'/Type /Page\n'), 2)
+
+    def test_png_page_by_ids(self):
+        ids = ','.join(str(item.id) for item in self.items[:12])
+        response = self.client.post(
+            '/api/items/labels/',
+            {'ids': ids, 'layout': 'avery-5163', 'file_format': 'png', 'page': 2},
+            format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.content.startswith(b'\x89PNG'))
+        self.assertEqual(response['X-Label-Pages'], '2')
+
+    def test_location_filter(self):
+        response = self.client.get(f'/api/items/labels/?location={self.closet.id}&file_format=png')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Label-Pages'], '1')
+
+    def test_rejects_bad_requests(self):
+        self.assertEqual(self.client.get('/api/items/labels/').status_code, 400)
+        self.assertEqual(self.client.get('/api/items/labels/?category=abc').status_code, 400)
+        self.assertEqual(self.client.get('/api/items/labels/?location=abc').status_code, 400)
+        self.assertEqual(self.client.get(f'/api/items/labels/?category={self.linen.id}&layout=nope').status_code, 400)
+        self.assertEqual(self.client.get(f'/api/items/labels/?category={self.linen.id}&file_format=svg').status_code, 400)
+        self.assertEqual(self.client.get(
+            f'/api/items/labels/?category={self.linen.id}&file_format=png&page=9'
+        ).status_code, 400)
+        with override_settings(LABEL_MAX=10):
+            self.assertEqual(self.client.get(f'/api/items/labels/?category={self.linen.id}').status_code, 400)
+
+    @override_settings(LABEL_PARALLEL_PAGES=1)
+    def test_pool_pages_match_serial_pages(self):
+        labels = [(item.name, item.short_code) for item in self.items]
+        layout = LabelSheetService.layout('avery-22806')
+        pages = LabelSheetService.paginate(labels, layout)
+        serial = [page.tobytes() for page in LabelSheetService._render_pages(layout, pages, 100, workers=1)]
+        pooled = [page.tobytes() for page in LabelSheetService._render_pages(layout, pages, 100, workers=2)]
+        self.assertEqual(len(pooled), 3)
+        self.assertEqual(pooled, serial)
+
+
+class AlertsViewTests(TestCase):
+    """/reports/alerts/ counts in one aggregate, pages lists by severity and caches per stock version"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.linen = Category.objects.create(name="Linen")
+        cls.storeroom = Location.objects.create(name="Main Storeroom", type="STOREROOM")
+        cls.closet = Location.objects.create(name="3W Closet", type="CLOSET")
+        towel = Item.objects.create(short_code="ALT-1", name="Towel", category=cls.linen)
+        sheet = Item.objects.create(short_code="ALT-2", name="Sheet", category=cls.linen)
+        soap = Item.objects.create(short_code="ALT-3", name="Soap")
+        retired = Item.objects.create(short_code="ALT-4", name="Retired", is_active=False)
+        cls.towel_closet = StockLevel.objects.create(item=towel, location=cls.closet, on_hand_qty=1, par=10)  # 0.9
+        StockLevel.objects.create(item=sheet, location=cls.closet, on_hand_qty=9, par=10)  # 0.1, at risk
+        StockLevel.objects.create(item=soap, location=cls.storeroom, on_hand_qty=5, par=20)  # 0.75
+        StockLevel.objects.create(item=towel, location=cls.storeroom, on_hand_qty=50, par=10)  # fine
+        StockLevel.objects.create(item=sheet, location=cls.storeroom, on_hand_qty=0, par=0)  # no par
+        StockLevel.objects.create(item=retired, location=cls.storeroom, on_hand_qty=0, par=5)  # inactive
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.admin = User.objects.create_user(username="alertadmin", password="testpass")
+        UserProfile.objects.update_or_create(user=self.admin, defaults={'role': 'ADMIN'})
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def test_counts_summary_and_severity_order(self):
+        data = self.client.get('/api/reports/alerts/').data
+        self.assertEqual(data['below_par_count'], 3)
+        self.assertEqual(data['at_risk_count'], 1)
+        self.assertEqual(data['below_par_shortfall'], 25.0)
+        self.assertEqual(
+            [(row['location_name'], row['below_par'], row['at_risk']) for row in data['locations']],
+            [("3W Closet", 2, 1), ("Main Storeroom", 1, 0)]
+        )
+        self.assertEqual([row['item_short_code'] for row in data['below_par']], ["ALT-1", "ALT-3", "ALT-2"])
+        self.assertEqual([row['severity'] for row in data['below_par']], [0.9, 0.75, 0.1])
+        self.assertEqual([row['item_short_code'] for row in data['at_risk']], ["ALT-2"])
+
+        ascending = self.client.get('/api/reports/alerts/?ordering=severity&status=below_par').data
+        self.assertEqual([row['item_short_code'] for row in ascending['below_par']], ["ALT-2", "ALT-3", "ALT-1"])
+        self.assertNotIn('at_risk', ascending)
+
+    def test_pages_and_filters(self):
+        data = self.client.get('/api/reports/alerts/?page=2&page_size=2').data
+        self.assertEqual([row['item_short_code'] for row in data['below_par']], ["ALT-2"])
+        self.assertEqual(data['below_par_count'], 3)
+
+        data = self.client.get(f'/api/reports/alerts/?location_id={self.storeroom.id}').data
+        self.assertEqual((data['below_par_count'], data['at_risk_count']), (1, 0))
+        data = self.client.get(f'/api/reports/alerts/?category_id={self.linen.id}').data
+        self.assertEqual([row['item_short_code'] for row in data['below_par']], ["ALT-1", "ALT-2"])
+
+        self.assertEqual(self.client.get('/api/reports/alerts/?ordering=price').status_code, 400)
+        self.assertEqual(self.client.get('/api/reports/alerts/?status=fine').status_code, 400)
+        self.assertEqual(self.client.get('/api/reports/alerts/?page=x').status_code, 400)
+
+    def test_cached_until_stock_changes(self):
+        first = self.client.get('/api/reports/alerts/').data
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.client.get('/api/reports/alerts/').data, first)
+        self.assertFalse([q for q in queries.captured_queries if 'imh_ims_stocklevel' in q['sql']])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            StockService.receive_stock(self.towel_closet.item, self.closet, Decimal('20'), self.admin)
+        data = self.client.get('/api/reports/alerts/').data
+        self.assertEqual(data['below_par_count'], 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            StockLevel.objects.filter(pk=self.towel_closet.pk).update(par=100)
+            self.towel_closet.refresh_from_db()
+            self.towel_closet.save(update_fields=['par'])
+        self.assertEqual(self.client.get('/api/reports/alerts/').data['below_par_count'], 3)
+
+
+class LowParTrendsViewTests(TestCase):
+    """/reports/low-par-trends/ rejects malformed parameters with 400"""
+
+    def setUp(self):
+        self.admin = User.objects.create_user(username="trendadmin", password="testpass")
+        UserProfile.objects.update_or_create(user=self.admin, defaults={'role': 'ADMIN'})
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def test_parameters(self):
+        department = Department.objects.create(name="Housekeeping", code="HK")
+        self.assertEqual(self.client.get(f'/api/reports/low-par-trends/?department_id={department.id}').status_code, 200)
+        self.assertEqual(self.client.get('/api/reports/low-par-trends/?granularity=day&days=30').status_code, 200)
+        for query in ('department_id=abc', 'granularity=day&days=x', 'granularity=day&days=99999999999'):
+            self.assertEqual(self.client.get(f'/api/reports/low-par-trends/?{query}').status_code, 400, query)
+
+
+class ItemForecastTests(TestCase):
+    """/items/{id}/forecast/ projects each stock line from its forecast, or the average without one"""
+
+    def setUp(self):
+        self.admin = User.objects.create_user(username="forecastadmin", password="testpass")
+        UserProfile.objects.update_or_create(user=self.admin, defaults={'role': 'ADMIN'})
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+        self.item = Item.objects.create(short_code="FCA-1", name="Towel")
+        self.closet = Location.objects.create(name="3W Closet", type="CLOSET")
+        self.storeroom = Location.objects.create(name="Main Storeroom", type="STOREROOM")
+        StockLevel.objects.create(item=self.item, location=self.closet, on_hand_qty=10, par=8)
+        StockLevel.objects.create(item=self.item, location=self.storeroom, on_hand_qty=40, par=0)
+        DemandForecast.objects.create(
+            item=self.item, location=self.closet, method='HOLT_WINTERS', start_day=timezone.localdate(),
+            forecast=[2.0] * 28, lower=[1.0] * 28, upper=[3.0] * 28, sigma=0.8, demand_days=100,
+            generated_at=timezone.now()
+        )
+
+    def test_forecast(self):
+        response = self.client.get(f'/api/items/{self.item.id}/forecast/?days_ahead=3')
+        self.assertEqual(response.status_code, 200)
+        closet, storeroom = response.data['locations']
+        self.assertEqual(closet['usage_basis'], 'forecast')
+        self.assertEqual(
+            (closet['projected_qty'], closet['projected_low'], closet['projected_high']), (4.0, 1.0, 7.0)
+        )
+        self.assertTrue(closet['will_go_below_par'])
+        self.assertEqual(closet['daily_forecast'], [2.0, 2.0, 2.0])
+        self.assertEqual(storeroom['usage_basis'], 'average')
+        self.assertEqual(storeroom['projected_qty'], 40.0)
+
+        self.assertEqual(self.client.get(f'/api/items/{self.item.id}/forecast/?days_ahead=0').status_code, 400)
+        self.assertEqual(self.client.get(f'/api/items/{self.item.id}/forecast/?days_ahead=x').status_code, 400)
+
+
+class UsageReportsTests(TestCase):
+    """Usage reports read the daily usage rollup that stock writes maintain"""
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.admin = User.objects.create_user(username="usageadmin", password="testpass")
+        UserProfile.objects.update_or_create(user=self.admin, defaults={'role': 'ADMIN'})
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+        self.soap = Item.objects.create(short_code="USG-1", name="Soap")
+        self.towel = Item.objects.create(short_code="USG-2", name="Towel")
+        self.storeroom = Location.objects.create(name="Main Storeroom", type="STOREROOM")
+        for item in (self.soap, self.towel):
+            StockService.receive_stock(item, self.storeroom, Decimal("50"), self.admin, cost=Decimal("2.00"))
+        StockService.issue_stock(self.soap, self.storeroom, Decimal("4"), self.admin)
+        StockService.issue_stock(self.soap, self.storeroom, Decimal("3"), self.admin)
+        StockService.issue_stock(self.towel, self.storeroom, Decimal("1"), self.admin)
+
+    def test_reports(self):
+        usage = self.client.get(f'/api/items/{self.soap.id}/usage/?days=7').data
+        self.assertEqual([(str(row['day']), row['total_qty']) for row in usage['usage_by_day']],
+                         [(timezone.localdate().isoformat(), Decimal("7"))])
+
+        general = self.client.get('/api/reports/general-usage/').data
+        self.assertEqual([(row['total_qty'], row['item_count']) for row in general['usage_by_period']], [(8.0, 2)])
+
+        dashboard = self.client.get('/api/dashboard/stats/').data
+        self.assertEqual(
+            [(row['item_short_code'], row['total_qty_used'], row['transaction_count']) for row in dashboard['top_5_items_used']],
+            [("USG-1", 7.0, 2), ("USG-2", 1.0, 1)]
+        )
+        self.assertEqual(dashboard['overall_inventory_usage']['total_transactions'], 3)
+
+        impact = self.client.get('/api/reports/environmental-impact/').data
+        self.assertEqual(impact['paper_savings']['total_transactions'], 5)
+        self.assertEqual(impact['transportation']['total_receipts'], 2)
+
+
+class DashboardStatsTests(TestCase):
+    """/dashboard/stats/ values stock in SQL, keeps to the user's department and caches per stock version"""
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.housekeeping = Department.objects.create(name="Housekeeping", code="HK")
+        self.closet = Location.objects.create(name="3W Closet", type="CLOSET", department=self.housekeeping)
+        self.kitchen = Location.objects.create(name="Kitchen", type="STOREROOM")
+        self.soap = Item.objects.create(short_code="DSH-1", name="Soap", cost=Decimal("2.50"))
+        self.towel = Item.objects.create(short_code="DSH-2", name="Towel")  # no cost
+        retired = Item.objects.create(short_code="DSH-3", name="Retired", cost=Decimal("9.00"), is_active=False)
+
+        self.admin = User.objects.create_user(username="dashadmin", password="testpass")
+        UserProfile.objects.update_or_create(user=self.admin, defaults={'role': 'ADMIN'})
+        self.staff = User.objects.create_user(username="dashstaff", password="testpass")
+        UserProfile.objects.update_or_create(
+            user=self.staff, defaults={'role': 'ADMIN', 'department': self.housekeeping}
+        )
+        for item, location, qty in ((self.soap, self.closet, "10"), (self.soap, self.kitchen, "4"),
+                                    (self.towel, self.closet, "6"), (retired, self.kitchen, "3")):
+            StockService.receive_stock(item, location, Decimal(qty), self.admin)
+        StockLevel.objects.filter(item=self.towel).update(par=10)
+        StockService.issue_stock(self.soap, self.closet, Decimal("2"), self.admin)
+        StockService.issue_stock(self.soap, self.kitchen, Decimal("4"), self.admin)
+
+    def stats(self, user):
+        client = APIClient()
+        client.force_authenticate(user)
+        response = client.get('/api/dashboard/stats/')
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_all_locations_and_department(self):
+        overall = self.stats(self.admin)['overall_inventory_usage']
+        # Soap: 8 in the closet at 2.50; the kitchen line is empty, towels have no cost, Retired is inactive
+        self.assertEqual(overall['current_inventory_value'], 20.0)
+        self.assertEqual((overall['total_items_in_stock'], overall['items_below_par']), (2, 1))
+        self.assertEqual((overall['total_qty_used'], overall['total_transactions']), (6.0, 2))
+
+        data = self.stats(self.staff)
+        self.assertEqual(data['department_filter'], "Housekeeping")
+        self.assertEqual(data['top_5_items_used'][0]['total_qty_used'], 2.0)
+        overall = data['overall_inventory_usage']
+        self.assertEqual((overall['total_qty_used'], overall['unique_items_used']), (2.0, 1))
+        self.assertEqual((overall['current_inventory_value'], overall['total_items_in_stock']), (20.0, 2))
+
+    def test_cached_until_stock_changes(self):
+        first = self.stats(self.staff)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.stats(self.staff), first)
+        self.assertFalse([q for q in queries.captured_queries if 'imh_ims_stocklevel' in q['sql']])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            StockService.issue_stock(self.soap, self.closet, Decimal("1"), self.admin)
+        overall = self.stats(self.staff)['overall_inventory_usage']
+        self.assertEqual((overall['total_qty_used'], overall['current_inventory_value']), (3.0, 17.5))
+
+    def test_version_shared_between_processes(self):
+        """A stock change committed by another worker reaches this one through the shared cache"""
+        self.stats(self.staff)
+        StockLevel.objects.filter(item=self.soap, location=self.closet).update(on_hand_qty=4)
+        other_worker = DatabaseCache(settings.CACHES['default']['LOCATION'], {})
+        other_worker.set(STOCK_VERSION_KEY, StockVersionService.current() + 1, timeout=None)
+        self.assertEqual(self.stats(self.staff)['overall_inventory_usage']['current_inventory_value'], 10.0)
+
+    def test_rejects_bad_days(self):
+        client = APIClient()
+        client.force_authenticate(self.admin)
+        for days in ('x', '0', '99999999999'):
+            self.assertEqual(client.get(f'/api/dashboard/stats/?days={days}').status_code, 400, days)
@@ -2,13 +2,13 @@ from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from api.views import (
     ItemViewSet, LocationViewSet, StockViewSet,
-    StockTransferView, StockIssueView, StockAdjustView,
+    StockTransferView, StockIssueView, StockAdjustView, StockBatchView,
     RequisitionViewSet, RequisitionPickView, RequisitionCompleteView,
     RequisitionApproveView, RequisitionDenyView,
     ReceiveView, ReceivingHistoryView,
     CountSessionViewSet, CountLineView, CountCompleteView, CountApproveView,
     AlertsView, SuggestedOrdersView, UsageTrendsView, GeneralUsageView, LowParTrendsView, EnvironmentalImpactView,
-    DashboardStatsView,
+    DashboardStatsView, ItemExportView, StockExportView, TransactionExportView,
     CategoriesViewSet, VendorsViewSet, ParLevelsView, CategoryParLevelsView, BulkApplyCategoryParLevelsView,
     LoginView, LogoutView, UserInfoView, CSRFTokenView,
     UserViewSet, PurchaseRequestViewSet, PurchaseRequestApproveView, PurchaseRequestDenyView,
@@ -36,6 +36,7 @@ urlpatterns = [
     path('stock/transfer/', StockTransferView.as_view(), name='stock-transfer'),
     path('stock/issue/', StockIssueView.as_view(), name='stock-issue'),
     path('stock/adjust/', StockAdjustView.as_view(), name='stock-adjust'),
+    path('stock/batch/', StockBatchView.as_view(), name='stock-batch'),
     
     # Router URLs (includes stock ViewSet)
     path('', include(router.urls)),
@@ -71,6 +72,11 @@ urlpatterns = [
     
     # Dashboard
     path('dashboard/stats/', DashboardStatsView.as_view(), name='dashboard-stats'),
+
+    # Exports (?file_format=csv|xlsx)
+    path('export/items/', ItemExportView.as_view(), name='export-items'),
+    path('export/stock/', StockExportView.as_view(), name='export-stock'),
+    path('export/transactions/', TransactionExportView.as_view(), name='export-transactions'),
     
     # Settings
     path('settings/par-levels/', ParLevelsView.as_view(), name='par-levels'),
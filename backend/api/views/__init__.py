@@ -1,11 +1,12 @@
 from .items import ItemViewSet
 from .locations import LocationViewSet
-from .stock import StockViewSet, StockTransferView, StockIssueView, StockAdjustView
+from .stock import StockViewSet, StockTransferView, StockIssueView, StockAdjustView, StockBatchView
 from .requisitions import RequisitionViewSet, RequisitionPickView, RequisitionCompleteView, RequisitionApproveView, RequisitionDenyView
 from .receiving import ReceiveView, ReceivingHistoryView
 from .counts import CountSessionViewSet, CountLineView, CountCompleteView, CountApproveView
 from .reports import AlertsView, SuggestedOrdersView, UsageTrendsView, GeneralUsageView, LowParTrendsView, EnvironmentalImpactView
 from .dashboard import DashboardStatsView
+from .exports import ItemExportView, StockExportView, TransactionExportView
 from .departments import DepartmentViewSet
 from .physical_change_requests import PhysicalChangeRequestViewSet
 from .requested_items import RequestedItemViewSet
@@ -23,6 +24,7 @@ __all__ = [
     'StockTransferView',
     'StockIssueView',
     'StockAdjustView',
+    'StockBatchView',
     'RequisitionViewSet',
     'RequisitionPickView',
     'RequisitionCompleteView',
@@ -41,6 +43,9 @@ __all__ = [
     'LowParTrendsView',
     'EnvironmentalImpactView',
     'DashboardStatsView',
+    'ItemExportView',
+    'StockExportView',
+    'TransactionExportView',
     'CategoriesViewSet',
     'VendorsViewSet',
     'ParLevelsView',
@@ -8,6 +8,7 @@ from imh_ims.models import CountSession, CountLine, Location, Item
 from api.serializers import CountSessionSerializer, CountLineSerializer
 from imh_ims.services.count_service import CountService
 from api.permissions import create_permission_class
+from api.pagination import StandardPagination
 
 
 class CountSessionViewSet(viewsets.ModelViewSet):
@@ -15,6 +16,8 @@ class CountSessionViewSet(viewsets.ModelViewSet):
     queryset = CountSession.objects.all()
     serializer_class = CountSessionSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = StandardPagination
+    cursor_ordering = ('-started_at', '-id')
 
     def get_permissions(self):
         """Apply permission checks based on action"""
@@ -29,7 +32,10 @@ class CountSessionViewSet(viewsets.ModelViewSet):
         return super().get_permissions()
 
     def get_queryset(self):
-        queryset = CountSession.objects.all()
+        queryset = CountSession.objects.select_related('location', 'counted_by', 'approved_by')
+        # Nested lines are skipped entirely when the client omits them (?omit=lines, ?profile=slim)
+        if CountSessionSerializer.includes(self.request, 'lines'):
+            queryset = queryset.prefetch_related('lines__item')
         
         status_filter = self.request.query_params.get('status', None)
         location_id = self.request.query_params.get('location_id', None)
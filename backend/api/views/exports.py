@@ -0,0 +1,120 @@
+from rest_framework import status
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework.permissions import IsAuthenticated
+from django.http import FileResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from datetime import datetime, time
+import tempfile
+from imh_ims.models import InventoryTransaction
+from imh_ims.services.export_service import ExportService, ITEM_COLUMNS, STOCK_COLUMNS, TRANSACTION_COLUMNS
+from api.permissions import create_permission_class
+from .items import ItemViewSet
+from .stock import StockViewSet
+
+
+XLSX_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+
+class ExportView(APIView):
+    """
+    Download a list as CSV (default) or XLSX (?file_format=xlsx).
+
+    Subclasses name the permission module, the columns and the queryset,
+    which takes the same filters as the matching list endpoint. CSV is
+    streamed as rows are read; XLSX is built in a temporary file first.
+    """
+    permission_module = None
+    columns = None
+    filename = None
+
+    def get_permissions(self):
+        return [IsAuthenticated(), create_permission_class(self.permission_module, 'view')()]
+
+    def get_queryset(self, request):
+        raise NotImplementedError
+
+    def get(self, request):
+        file_format = request.query_params.get('file_format', 'csv').lower()
+        if file_format not in ('csv', 'xlsx'):
+            return Response({'error': 'file_format must be csv or xlsx'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            queryset = self.get_queryset(request)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        filename = f"{self.filename}-{timezone.localdate().isoformat()}.{file_format}"
+        if file_format == 'xlsx':
+            file = tempfile.TemporaryFile()
+            ExportService.write_xlsx(queryset, self.columns, file, title=self.filename)
+            file.seek(0)
+            return FileResponse(file, as_attachment=True, filename=filename, content_type=XLSX_CONTENT_TYPE)
+
+        response = StreamingHttpResponse(
+            ExportService.csv_stream(queryset, self.columns),
+            content_type='text/csv; charset=utf-8'
+        )
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+    @staticmethod
+    def list_queryset(viewset_class, request):
+        """The filtered queryset the viewset's list endpoint pages through"""
+        view = viewset_class(request=request, args=(), kwargs={}, format_kwarg=None, action='list')
+        return view.filter_queryset(view.get_queryset())
+
+
+class ItemExportView(ExportView):
+    """Active items, with the /items/ filters (category, vendor, search, below_par, critical)"""
+    permission_module = 'catalog'
+    columns = ITEM_COLUMNS
+    filename = 'items'
+
+    def get_queryset(self, request):
+        return self.list_queryset(ItemViewSet, request)
+
+
+class StockExportView(ExportView):
+    """Stock levels, with the /stock/ filters (item_id, location_id)"""
+    permission_module = 'stock'
+    columns = STOCK_COLUMNS
+    filename = 'stock'
+
+    def get_queryset(self, request):
+        return self.list_queryset(StockViewSet, request).order_by('location__name', 'item__name')
+
+
+class TransactionExportView(ExportView):
+    """
+    The live ledger, newest first. Filters: item_id, location_id (either
+    side of a transfer), type, and start_date/end_date (YYYY-MM-DD, inclusive).
+    Months moved out by archive_ledger are not included.
+    """
+    permission_module = 'reports'
+    columns = TRANSACTION_COLUMNS
+    filename = 'transactions'
+
+    def get_queryset(self, request):
+        queryset = InventoryTransaction.objects.all()
+        params = request.query_params
+
+        if params.get('item_id'):
+            queryset = queryset.filter(item_id=params['item_id'])
+        if params.get('location_id'):
+            location_id = params['location_id']
+            queryset = queryset.filter(from_location_id=location_id) | queryset.filter(to_location_id=location_id)
+        if params.get('type'):
+            queryset = queryset.filter(type=params['type'].upper())
+        if params.get('start_date'):
+            queryset = queryset.filter(timestamp__gte=self.day_bound(params['start_date'], time.min))
+        if params.get('end_date'):
+            queryset = queryset.filter(timestamp__lte=self.day_bound(params['end_date'], time.max))
+        return queryset.order_by('-timestamp', '-id')
+
+    @staticmethod
+    def day_bound(value, at):
+        day = parse_date(value)
+        if day is None:
+            raise ValueError(f"Invalid date: {value}. Use YYYY-MM-DD")
+        return timezone.make_aware(datetime.combine(day, at))
@@ -3,18 +3,34 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.parsers import MultiPartParser, FormParser
-from django.db.models import Q, Sum, F
-from django.db import transaction
+from django.db.models import Q, Sum, F, Exists, OuterRef
+from django.conf import settings
 from datetime import timedelta
+from decimal import Decimal
 from django.utils import timezone
-from decimal import Decimal, InvalidOperation
-import pandas as pd
+from django.utils.dateparse import parse_datetime
+from django.http import HttpResponse
 import io
-from imh_ims.models import Item, StockLevel, InventoryTransaction, Category, Vendor, Location
-from api.serializers import ItemSerializer
+import logging
+from imh_ims.models import Item, StockLevel, InventoryTransaction, ImportJob, DailyUsage
+from api.serializers import ItemSerializer, ImportJobSerializer
 from imh_ims.services.stock_service import StockService
-from imh_ims.services.qr_service import generate_qr_code_response, generate_qr_code_base64
+from imh_ims.services.catalog_service import CatalogService
+from imh_ims.services.search_service import ItemSearchService
+from imh_ims.services.archive_service import LedgerArchiveService
+from imh_ims.services.import_service import ItemImportService, SpreadsheetReader, validate_rows
+from imh_ims.services.import_job_service import ImportJobService
+from imh_ims.services.qr_service import (
+    QR_CONTENT_TYPES, QRCodeCache, cached_qr_code_response, generate_qr_code_base64, if_none_match,
+    normalize_qr_params
+)
+from imh_ims.services.label_service import LabelSheetService
+from imh_ims.services.order_service import OrderSuggestionService
+from imh_ims.services.usage_service import DailyUsageService
 from api.permissions import create_permission_class
+from api.pagination import StandardPagination
+
+logger = logging.getLogger(__name__)
 
 
 class ItemViewSet(viewsets.ModelViewSet):
@@ -22,10 +38,12 @@ class ItemViewSet(viewsets.ModelViewSet):
     queryset = Item.objects.all()
     serializer_class = ItemSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = StandardPagination
+    cursor_ordering = ('name', 'id')
 
     def get_permissions(self):
         """Apply permission checks based on action"""
-        if self.action in ['list', 'retrieve']:
+        if self.action in ['list', 'retrieve', 'labels']:
             self.permission_classes = [IsAuthenticated, create_permission_class('catalog', 'view')]
         elif self.action == 'create':
             self.permission_classes = [IsAuthenticated, create_permission_class('catalog', 'create')]
@@ -45,12 +63,9 @@ class ItemViewSet(viewsets.ModelViewSet):
             queryset = Item.objects.all()
         else:
             queryset = Item.objects.filter(is_active=True)
-        
-        # Debug logging
-        import logging
-        logger = logging.getLogger(__name__)
-        initial_count = queryset.count()
-        logger.info(f'Items queryset initial count: {initial_count}, action: {self.action}, user: {self.request.user.username}')
+        # Names, on-hand figures and the below-par flag come from the same query
+        queryset = CatalogService.annotate(queryset)
+        self._log_count('initial', queryset)
         
         # Filters
         category = self.request.query_params.get('category', None)
@@ -61,94 +76,73 @@ class ItemViewSet(viewsets.ModelViewSet):
         
         if category:
             queryset = queryset.filter(category_id=category)
-            logger.info(f'After category filter: {queryset.count()}')
+            self._log_count('category filter', queryset)
         
         if vendor:
             queryset = queryset.filter(default_vendor_id=vendor)
-            logger.info(f'After vendor filter: {queryset.count()}')
+            self._log_count('vendor filter', queryset)
         
+        ordering = None
         if search:
-            queryset = queryset.filter(
-                Q(name__icontains=search) | Q(short_code__icontains=search)
-            )
-            logger.info(f'After search filter: {queryset.count()}')
+            ranked_ids = ItemSearchService.ranked_ids(search)
+            if ranked_ids is None:
+                queryset = queryset.filter(ItemSearchService.fallback_filter(search))
+            else:
+                # Best matches first, in the order the search index ranked them
+                queryset = queryset.filter(id__in=ranked_ids)
+                ordering = ItemSearchService.rank_expression(ranked_ids)
+            self._log_count('search filter', queryset)
         
         if below_par == 'true':
             # Filter items that are below par at any location
-            item_ids = StockLevel.objects.filter(
+            queryset = queryset.filter(Exists(StockLevel.objects.filter(
+                item=OuterRef('pk'),
                 on_hand_qty__lt=F('par'),
                 par__gt=0
-            ).values_list('item_id', flat=True).distinct()
-            queryset = queryset.filter(id__in=item_ids)
-            logger.info(f'After below_par filter: {queryset.count()}, item_ids count: {len(item_ids)}')
+            )))
+            self._log_count('below_par filter', queryset)
         
         if critical == 'true':
             # Items that are below par and have low stock (below par AND less than 10 units)
-            item_ids = StockLevel.objects.filter(
+            queryset = queryset.filter(Exists(StockLevel.objects.filter(
                 Q(on_hand_qty__lt=F('par')) & Q(on_hand_qty__lt=10),
+                item=OuterRef('pk'),
                 par__gt=0
-            ).values_list('item_id', flat=True).distinct()
-            queryset = queryset.filter(id__in=item_ids)
-            logger.info(f'After critical filter: {queryset.count()}')
-        
-        final_count = queryset.count()
-        logger.info(f'Items queryset final count: {final_count}')
+            )))
+            self._log_count('critical filter', queryset)
         
+        if ordering is not None:
+            return queryset.order_by(ordering, 'name')
         return queryset.order_by('name')
-    
-    def list(self, request, *args, **kwargs):
-        """Override list to add debugging and ensure proper response"""
-        import logging
-        logger = logging.getLogger(__name__)
-        
-        # Set action for get_queryset
-        self.action = 'list'
-        
-        # Get queryset
-        queryset = self.get_queryset()
-        logger.info(f'[ITEMS API] get_queryset count: {queryset.count()}, user: {request.user.username}')
-        
-        # Apply filters
-        queryset = self.filter_queryset(queryset)
-        logger.info(f'[ITEMS API] After filter_queryset count: {queryset.count()}')
-        
-        # Check permissions
-        logger.info(f'[ITEMS API] User permissions check - is_superuser: {request.user.is_superuser}')
-        try:
-            if hasattr(request.user, 'profile'):
-                logger.info(f'[ITEMS API] User profile role: {request.user.profile.role}, is_admin: {request.user.profile.is_admin}')
-        except:
-            logger.warning(f'[ITEMS API] User has no profile')
-        
-        # Paginate
-        page = self.paginate_queryset(queryset)
-        if page is not None:
-            logger.info(f'[ITEMS API] Paginated - page items count: {len(page)}')
-            serializer = self.get_serializer(page, many=True)
-            logger.info(f'[ITEMS API] Serialized items count: {len(serializer.data)}')
-            response = self.get_paginated_response(serializer.data)
-            logger.info(f'[ITEMS API] Response data count: {response.data.get("count", 0)}, results length: {len(response.data.get("results", []))}')
-            return response
-        
-        serializer = self.get_serializer(queryset, many=True)
-        logger.info(f'[ITEMS API] Non-paginated response: count={len(serializer.data)}')
-        return Response(serializer.data)
 
+    def get_cursor_ordering(self):
+        # Search results are ordered by rank, which has no stable keyset
+        if self.request.query_params.get('search'):
+            return None
+        return self.cursor_ordering
+
+    def _log_count(self, stage, queryset):
+        """
+        Log the queryset size after a filter stage. Each call is a full COUNT,
+        so it only runs with settings.API_QUERY_DIAGNOSTICS enabled.
+        """
+        if getattr(settings, 'API_QUERY_DIAGNOSTICS', False):
+            logger.info(
+                f'Items queryset after {stage}: {queryset.count()}, '
+                f'action: {self.action}, user: {self.request.user.username}'
+            )
+    
     @action(detail=True, methods=['get'])
     def usage(self, request, pk=None):
         """Get usage history for an item"""
         item = self.get_object()
         days = int(request.query_params.get('days', 30))
         
-        cutoff_date = timezone.now() - timedelta(days=days)
-        
-        # Get transactions grouped by day
-        transactions = InventoryTransaction.objects.filter(
+        # Site-local days from the daily usage rollup
+        usage_by_day = DailyUsage.objects.filter(
             item=item,
             type='ISSUE',
-            timestamp__gte=cutoff_date
-        ).extra(
-            select={'day': 'date(timestamp)'}
+            day__gte=DailyUsageService.today() - timedelta(days=days)
         ).values('day').annotate(
             total_qty=Sum('qty')
         ).order_by('day')
@@ -157,7 +151,7 @@ class ItemViewSet(viewsets.ModelViewSet):
             'item_id': item.id,
             'item_name': item.name,
             'period_days': days,
-            'usage_by_day': list(transactions)
+            'usage_by_day': list(usage_by_day)
         })
 
     @action(detail=True, methods=['get'])
@@ -181,37 +175,115 @@ class ItemViewSet(viewsets.ModelViewSet):
             'stock_by_location': serializer.data
         })
 
+    @action(detail=True, methods=['get'])
+    def forecast(self, request, pk=None):
+        """
+        Projected stock per location over the next ?days_ahead= days (default
+        7), from the nightly demand forecast where one is fresh and the 30-day
+        average otherwise; forecast lines add daily means and bounds.
+        """
+        item = self.get_object()
+        try:
+            days_ahead = int(request.query_params.get('days_ahead', 7))
+        except ValueError:
+            return Response({'error': 'days_ahead must be a whole number'}, status=status.HTTP_400_BAD_REQUEST)
+        if not 1 <= days_ahead <= 365:
+            return Response({'error': 'days_ahead must be between 1 and 365'}, status=status.HTTP_400_BAD_REQUEST)
+
+        forecasts = {forecast.location_id: forecast for forecast in item.demand_forecasts.all()}
+        locations = []
+        for stock in item.stock_levels.select_related('location').order_by('location__name'):
+            projection = OrderSuggestionService.project_stock_levels(item, stock.location, days_ahead)
+            row = {
+                'location_id': stock.location_id,
+                'location_name': stock.location.name,
+                'par': float(stock.par),
+                **{name: float(value) if isinstance(value, Decimal) else value for name, value in projection.items()}
+            }
+            forecast = forecasts.get(stock.location_id)
+            if projection['usage_basis'] == 'forecast' and forecast is not None:
+                offset = max((DailyUsageService.today() - forecast.start_day).days, 0)
+                row.update({
+                    'method': forecast.method,
+                    'generated_at': forecast.generated_at,
+                    'daily_forecast': forecast.forecast[offset:offset + days_ahead],
+                    'daily_lower': forecast.lower[offset:offset + days_ahead],
+                    'daily_upper': forecast.upper[offset:offset + days_ahead],
+                })
+            locations.append(row)
+
+        return Response({
+            'item_id': item.id,
+            'item_name': item.name,
+            'days_ahead': days_ahead,
+            'locations': locations
+        })
+
     @action(detail=True, methods=['get'])
     def transactions(self, request, pk=None):
-        """Get recent transactions for this item"""
+        """
+        Get recent transactions for this item, newest first.
+        ?before=<ISO datetime> pages back in time; once the hot ledger runs out
+        the remaining rows are read from the ledger archive.
+        """
         item = self.get_object()
         limit = int(request.query_params.get('limit', 50))
+        before = request.query_params.get('before')
+        if before:
+            before = parse_datetime(before)
+            if before is None:
+                return Response(
+                    {'error': 'before must be an ISO datetime'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            if timezone.is_naive(before):
+                before = timezone.make_aware(before)
         
         transactions = InventoryTransaction.objects.filter(
             item=item
-        ).select_related('from_location', 'to_location', 'user').order_by('-timestamp')[:limit]
+        ).select_related('item', 'from_location', 'to_location', 'user').order_by('-timestamp', '-id')
+        if before:
+            transactions = transactions.filter(timestamp__lt=before)
+        transactions = list(transactions[:limit])
+
+        archived = []
+        if len(transactions) < limit:
+            oldest = transactions[-1].timestamp if transactions else before
+            archived = LedgerArchiveService.to_transactions(
+                LedgerArchiveService.item_transactions(item.id, before=oldest, limit=limit - len(transactions))
+            )
         
         from api.serializers import InventoryTransactionSerializer
-        serializer = InventoryTransactionSerializer(transactions, many=True)
+        serializer = InventoryTransactionSerializer(transactions + archived, many=True)
         
         return Response({
             'item_id': item.id,
             'item_name': item.name,
-            'transactions': serializer.data
+            'transactions': serializer.data,
+            'archived_count': len(archived)
         })
 
     @action(detail=True, methods=['get'], url_path='qr-code')
     def get_qr_code(self, request, pk=None):
         """
         Generate and return QR code image for item's short_code.
-        Returns PNG image that can be displayed or downloaded.
+        Returns a PNG image (or SVG with ?file_format=svg, for print) that can
+        be displayed or downloaded; rendered codes are cached, and a matching
+        If-None-Match gets 304 Not Modified.
         """
         item = self.get_object()
         # QR code contains the short_code for scanning
         qr_data = item.short_code
-        size = int(request.query_params.get('size', 200))
-        error_correction = request.query_params.get('error_correction', 'M')
-        return generate_qr_code_response(qr_data, size, error_correction)
+        file_format = request.query_params.get('file_format', 'png').lower()
+        if file_format not in QR_CONTENT_TYPES:
+            return Response({'error': 'file_format must be png or svg'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            size, error_correction = normalize_qr_params(
+                request.query_params.get('size', 200), request.query_params.get('error_correction', 'M')
+            )
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return cached_qr_code_response(request, qr_data, size, error_correction, file_format)
 
     @action(detail=True, methods=['get'], url_path='qr-code-data')
     def get_qr_code_data(self, request, pk=None):
@@ -221,18 +293,96 @@ class ItemViewSet(viewsets.ModelViewSet):
         """
         item = self.get_object()
         qr_data = item.short_code
-        size = int(request.query_params.get('size', 200))
-        error_correction = request.query_params.get('error_correction', 'M')
-        qr_base64 = generate_qr_code_base64(qr_data, size, error_correction)
-        
-        return Response({
-            'item_id': item.id,
-            'item_name': item.name,
-            'short_code': item.short_code,
-            'qr_code': qr_base64,
-            'qr_data': qr_data,  # The data encoded in QR code
-            'size': size
-        })
+        try:
+            size, error_correction = normalize_qr_params(
+                request.query_params.get('size', 200), request.query_params.get('error_correction', 'M')
+            )
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        # The body also carries the item's name, so it is part of the validator
+        qr_etag = QRCodeCache.etag(QRCodeCache.key(qr_data, size, error_correction, 'png') + (item.id, item.name))
+        if if_none_match(request, qr_etag):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = Response({
+                'item_id': item.id,
+                'item_name': item.name,
+                'short_code': item.short_code,
+                'qr_code': generate_qr_code_base64(qr_data, size, error_correction),
+                'qr_data': qr_data,  # The data encoded in QR code
+                'size': size
+            })
+        response['ETag'] = qr_etag
+        response['Cache-Control'] = 'private, max-age=3600'
+        return response
+
+    @action(detail=False, methods=['get', 'post'])
+    def labels(self, request):
+        """
+        Printable QR label sheets for active items, ordered by name.
+
+        Items: ids (list or comma-separated), or category and/or location
+        (items stocked there). Options: layout (see LABEL_LAYOUTS, default
+        avery-5160), file_format pdf (default, every page) or png (one page,
+        chosen with page; the page count is in X-Label-Pages). Parameters
+        come from the query string, or from the body of a POST.
+        """
+        params = request.data if request.method == 'POST' else request.query_params
+        file_format = str(params.get('file_format', 'pdf')).lower()
+        if file_format not in ('pdf', 'png'):
+            return Response({'error': 'file_format must be pdf or png'}, status=status.HTTP_400_BAD_REQUEST)
+
+        items = Item.objects.filter(is_active=True)
+        ids = params.get('ids')
+        if hasattr(params, 'getlist') and len(params.getlist('ids')) > 1:
+            ids = params.getlist('ids')
+        if ids:
+            if isinstance(ids, str):
+                ids = [value for value in ids.split(',') if value.strip()]
+            try:
+                items = items.filter(id__in=[int(value) for value in ids])
+            except (TypeError, ValueError):
+                return Response({'error': 'ids must be item ids'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            category_id = int(params['category']) if params.get('category') else None
+            location_id = int(params['location']) if params.get('location') else None
+        except (TypeError, ValueError):
+            return Response({'error': 'category and location must be ids'}, status=status.HTTP_400_BAD_REQUEST)
+        if category_id is not None:
+            items = items.filter(category_id=category_id)
+        if location_id is not None:
+            items = items.filter(stock_levels__location_id=location_id).distinct()
+        if not (ids or category_id is not None or location_id is not None):
+            return Response(
+                {'error': 'Choose items with ids, category or location'}, status=status.HTTP_400_BAD_REQUEST
+            )
+
+        limit = getattr(settings, 'LABEL_MAX', 5000)
+        labels = list(items.order_by('name', 'id').values_list('name', 'short_code')[:limit + 1])
+        if not labels:
+            return Response({'error': 'No active items match'}, status=status.HTTP_404_NOT_FOUND)
+        if len(labels) > limit:
+            return Response(
+                {'error': f'At most {limit} labels can be printed at once'}, status=status.HTTP_400_BAD_REQUEST
+            )
+
+        layout = params.get('layout')
+        try:
+            if file_format == 'png':
+                content, page_count = LabelSheetService.render_png(labels, layout, int(params.get('page', 1)))
+            else:
+                content = LabelSheetService.render_pdf(labels, layout)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        if file_format == 'png':
+            response = HttpResponse(content, content_type='image/png')
+            response['X-Label-Pages'] = page_count
+        else:
+            response = HttpResponse(content, content_type='application/pdf')
+        response['Content-Disposition'] = f'attachment; filename="labels-{timezone.localdate().isoformat()}.{file_format}"'
+        return response
 
     @action(detail=False, methods=['get'], url_path='lookup/(?P<short_code>[^/.]+)')
     def lookup_by_code(self, request, short_code=None):
@@ -250,18 +400,30 @@ class ItemViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_404_NOT_FOUND
             )
 
-    @action(detail=False, methods=['post'], parser_classes=[MultiPartParser, FormParser])
-    def bulk_import(self, request):
-        """Bulk import items from CSV/Excel spreadsheet"""
-        # Check admin permission
+    def _require_import_admin(self, request):
+        """Error response unless the user may run imports"""
         if not request.user.is_authenticated:
             return Response({'error': 'Authentication required'}, status=status.HTTP_401_UNAUTHORIZED)
-        
         try:
             if not request.user.profile.is_admin:
                 return Response({'error': 'Admin permission required'}, status=status.HTTP_403_FORBIDDEN)
         except AttributeError:
             return Response({'error': 'Admin permission required'}, status=status.HTTP_403_FORBIDDEN)
+        return None
+
+    @action(detail=False, methods=['post'], parser_classes=[MultiPartParser, FormParser])
+    def bulk_import(self, request):
+        """
+        Bulk import items from CSV/Excel spreadsheet.
+        With ?preview=true the rows are parsed, validated and diffed against
+        the catalog (new, changed, unchanged, removed) in the request;
+        otherwise the file is queued as an ImportJob and 202 is returned
+        with the job, to be followed at /items/import-jobs/<id>/.
+        """
+        # Check admin permission
+        denied = self._require_import_admin(request)
+        if denied:
+            return denied
         
         if 'file' not in request.FILES:
             return Response({'error': 'No file provided'}, status=status.HTTP_400_BAD_REQUEST)
@@ -282,47 +444,62 @@ class ItemViewSet(viewsets.ModelViewSet):
             except:
                 pass
         
+        if not preview_mode:
+            job = ImportJobService.submit(file, request.user, column_mapping)
+            return Response(ImportJobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
+
         try:
-            # Parse spreadsheet
-            rows, errors, original_columns = parse_spreadsheet(file, column_mapping)
-            if errors:
-                return Response({'error': f'Failed to parse file: {errors}'}, status=status.HTTP_400_BAD_REQUEST)
-            
-            # Validate all rows
+            reader = SpreadsheetReader(file, column_mapping)
+        except ValueError as e:
+            return Response({'error': f'Failed to parse file: {e}'}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            # Validate rows as they are read and diff the valid ones against the
+            # catalog without writing; only the first rows and errors are
+            # returned, the counts cover the whole file
+            limit = getattr(settings, 'IMPORT_PREVIEW_LIMIT', 100)
             validated_rows = []
             validation_errors = []
-            
-            for idx, row in enumerate(rows, start=2):  # Start at 2 (row 1 is header)
-                validation_result = validate_row(row, idx)
-                if validation_result['valid']:
-                    validated_rows.append({
-                        'row_number': idx,
-                        'data': validation_result['data'],
-                        'errors': []
-                    })
-                else:
-                    validation_errors.append({
-                        'row_number': idx,
-                        'errors': validation_result['errors'],
-                        'data': row
-                    })
-            
-            if preview_mode:
-                # Return preview with validation results and column info
-                return Response({
-                    'preview': True,
-                    'total_rows': len(rows),
-                    'valid_rows': len(validated_rows),
-                    'invalid_rows': len(validation_errors),
-                    'rows': validated_rows,
-                    'errors': validation_errors,
-                    'original_columns': original_columns,
-                    'detected_columns': list(rows[0].keys()) if rows else []
-                })
-            else:
-                # Process import
-                result = process_import_rows(validated_rows, request.user)
-                return Response(result)
+            counts = {'total': 0, 'valid': 0, 'invalid': 0}
+
+            def valid_rows():
+                for idx, row, validation_result in validate_rows(reader):
+                    counts['total'] += 1
+                    if validation_result['valid']:
+                        counts['valid'] += 1
+                        if len(validated_rows) < limit:
+                            validated_rows.append({
+                                'row_number': idx,
+                                'data': validation_result['data'],
+                                'errors': []
+                            })
+                        yield {'row_number': idx, 'data': validation_result['data']}
+                    else:
+                        counts['invalid'] += 1
+                        if len(validation_errors) < limit:
+                            validation_errors.append({
+                                'row_number': idx,
+                                'errors': validation_result['errors'],
+                                'data': row
+                            })
+
+            with reader:
+                diff = ItemImportService.import_rows(valid_rows(), request.user, dry_run=True)
+            del diff['errors']
+            total_rows = counts['total']
+
+            # Return preview with validation results and column info
+            return Response({
+                'preview': True,
+                'total_rows': total_rows,
+                'valid_rows': counts['valid'],
+                'invalid_rows': counts['invalid'],
+                'rows': validated_rows,
+                'errors': validation_errors,
+                'diff': diff,
+                'original_columns': reader.original_columns,
+                'detected_columns': list(dict.fromkeys(reader.columns)) if total_rows else []
+            })
                 
         except Exception as e:
             import traceback
@@ -331,491 +508,17 @@ class ItemViewSet(viewsets.ModelViewSet):
                 'traceback': traceback.format_exc() if request.user.is_superuser else None
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-
-def parse_spreadsheet(file, column_mapping=None):
-    """Parse CSV or Excel file into list of dictionaries
-    
-    Args:
-        file: Uploaded file object
-        column_mapping: Optional dict mapping user column names to system column names
-                       e.g., {'Product Name': 'name', 'SKU': 'short_code'}
-    """
-    errors = []
-    rows = []
-    original_columns = []
-    
-    try:
-        # Determine file type
-        file_extension = file.name.lower().split('.')[-1]
-        
-        if file_extension in ['xlsx', 'xls']:
-            # Excel file
-            df = pd.read_excel(file, engine='openpyxl')
-        elif file_extension == 'csv':
-            # CSV file - try different encodings
-            try:
-                df = pd.read_csv(file, encoding='utf-8')
-            except UnicodeDecodeError:
-                try:
-                    file.seek(0)  # Reset file pointer
-                    df = pd.read_csv(file, encoding='latin-1')
-                except:
-                    file.seek(0)
-                    df = pd.read_csv(file, encoding='cp1252')
-        else:
-            errors.append(f'Unsupported file type: {file_extension}. Supported: CSV, XLSX, XLS')
-            return rows, errors, original_columns
-        
-        # Store original column names
-        original_columns = list(df.columns)
-        
-        # Apply column mapping if provided
-        if column_mapping:
-            df = df.rename(columns=column_mapping)
-        
-        # Convert to list of dictionaries, handling NaN values
-        df = df.fillna('')  # Replace NaN with empty string
-        rows = df.to_dict('records')
-        
-        # Normalize column names (strip whitespace, lowercase, handle common variations)
-        normalized_rows = []
-        for row in rows:
-            normalized_row = {}
-            for key, value in row.items():
-                # More flexible normalization for foreign system exports
-                normalized_key = str(key).strip().lower()
-                # Remove common prefixes/suffixes
-                normalized_key = normalized_key.replace(' ', '_').replace('-', '_').replace('.', '_')
-                # Handle common variations
-                column_aliases = {
-                    'item_name': 'name',
-                    'product_name': 'name',
-                    'description': 'name',
-                    'item_code': 'short_code',
-                    'sku': 'short_code',
-                    'product_code': 'short_code',
-                    'item_number': 'short_code',
-                    'part_number': 'short_code',
-                    'qty': 'on_hand_qty',
-                    'quantity': 'on_hand_qty',
-                    'stock': 'on_hand_qty',
-                    'inventory': 'on_hand_qty',
-                    'on_hand': 'on_hand_qty',
-                    'par_level': 'par',
-                    'min_stock': 'par',
-                    'reorder_point': 'par',
-                    'reorder_level': 'par',
-                    'location': 'location_name',
-                    'warehouse': 'location_name',
-                    'store': 'location_name',
-                    'bin': 'location_name',
-                    'supplier': 'default_vendor',
-                    'vendor_name': 'default_vendor',
-                    'manufacturer': 'default_vendor',
-                }
-                # Check aliases
-                if normalized_key in column_aliases:
-                    normalized_key = column_aliases[normalized_key]
-                normalized_row[normalized_key] = value
-            normalized_rows.append(normalized_row)
-        
-        return normalized_rows, errors, original_columns
-        
-    except Exception as e:
-        errors.append(f'Failed to parse file: {str(e)}')
-        return rows, errors, original_columns
-
-
-def validate_row(row, row_number):
-    """Validate a single row of import data"""
-    errors = []
-    data = {}
-    
-    # Debug: Log available keys for troubleshooting (first row only)
-    if row_number == 2:
-        print(f"DEBUG: Available columns in row: {list(row.keys())}")
-        print(f"DEBUG: Sample row data: {row}")
-    
-    # Required fields
-    name = str(row.get('name', '')).strip()
-    short_code = str(row.get('short_code', '')).strip()
-    
-    if not name:
-        errors.append('name is required')
-    else:
-        data['name'] = name
-    
-    if not short_code:
-        errors.append('short_code is required')
-    else:
-        data['short_code'] = short_code
-    
-    # Optional item fields
-    category = str(row.get('category', '')).strip()
-    if category:
-        data['category'] = category
-    
-    default_vendor = str(row.get('default_vendor', '')).strip()
-    if default_vendor:
-        data['default_vendor'] = default_vendor
-        # Also extract optional vendor details if provided
-        vendor_email = str(row.get('vendor_email', '')).strip()
-        if vendor_email:
-            data['vendor_email'] = vendor_email
-        
-        vendor_phone = str(row.get('vendor_phone', '')).strip()
-        if vendor_phone:
-            data['vendor_phone'] = vendor_phone
-        
-        vendor_contact_info = str(row.get('vendor_contact_info', '')).strip()
-        if vendor_contact_info:
-            data['vendor_contact_info'] = vendor_contact_info
-    
-    photo_url = str(row.get('photo_url', '')).strip()
-    if photo_url:
-        data['photo_url'] = photo_url
-    
-    unit_of_measure = str(row.get('unit_of_measure', '')).strip() or 'ea'
-    data['unit_of_measure'] = unit_of_measure
-    
-    cost = str(row.get('cost', '')).strip()
-    if cost:
+    @action(detail=False, methods=['get'], url_path=r'import-jobs/(?P<job_id>\d+)')
+    def import_job(self, request, job_id=None):
+        """Progress of a queued bulk import: rows done, errors so far and throughput"""
+        denied = self._require_import_admin(request)
+        if denied:
+            return denied
         try:
-            data['cost'] = Decimal(str(cost))
-        except (InvalidOperation, ValueError):
-            errors.append(f'Invalid cost value: {cost}')
-    
-    lead_time_days = str(row.get('lead_time_days', '')).strip()
-    if lead_time_days:
-        try:
-            data['lead_time_days'] = int(lead_time_days)
-            if data['lead_time_days'] < 0:
-                errors.append('lead_time_days must be >= 0')
-        except ValueError:
-            errors.append(f'Invalid lead_time_days value: {lead_time_days}')
-    else:
-        data['lead_time_days'] = 0
-    
-    is_active = str(row.get('is_active', '')).strip().lower()
-    if is_active in ['true', '1', 'yes']:
-        data['is_active'] = True
-    elif is_active in ['false', '0', 'no']:
-        data['is_active'] = False
-    else:
-        data['is_active'] = True  # Default
-    
-    # Location fields - always try to extract, even if empty (for preview)
-    # Try multiple possible column name variations
-    location_name = ''
-    for key in ['location_name', 'location', 'locationname', 'loc_name']:
-        if key in row:
-            location_name = str(row.get(key, '')).strip()
-            if location_name:
-                break
-    
-    if location_name:
-        data['location_name'] = location_name
-        
-        location_type = str(row.get('location_type', '')).strip().upper()
-        valid_types = ['STOREROOM', 'CLOSET', 'CART', 'ROOM', 'OTHER']
-        if location_type in valid_types:
-            data['location_type'] = location_type
-        else:
-            data['location_type'] = 'STOREROOM'  # Default
-        
-        location_property_id = str(row.get('location_property_id', '')).strip()
-        if location_property_id:
-            data['location_property_id'] = location_property_id
-        
-        parent_location_name = str(row.get('parent_location_name', '')).strip()
-        if parent_location_name:
-            data['parent_location_name'] = parent_location_name
-    else:
-        # Still add empty location_name for preview display
-        data['location_name'] = ''
-    
-    # Stock fields - try multiple column name variations and always extract for preview
-    # Try various possible column names (prioritize common variations like 'qty' and 'min_par')
-    on_hand_qty_str = ''
-    for key in ['qty', 'quantity', 'on_hand_qty', 'on_hand', 'qty_on_hand', 'onhand_qty', 'stock', 'current_stock']:
-        if key in row:
-            val = str(row.get(key, '')).strip()
-            if val:  # Check if not empty
-                on_hand_qty_str = val
-                break
-    
-    par_str = ''
-    for key in ['par', 'par_level', 'min_par', 'par_min', 'parmin', 'minimum_par', 'par_minimum', 'min', 'minimum']:
-        if key in row:
-            val = str(row.get(key, '')).strip()
-            if val:  # Check if not empty
-                par_str = val
-                break
-    
-    has_location = bool(location_name)
-    has_stock_data = any([on_hand_qty_str, par_str])
-    
-    # Always add stock fields to data for preview (even if empty)
-    if has_stock_data and not has_location:
-        errors.append('location_name is required when stock fields (on_hand_qty, par) are provided')
-    
-    # Process on_hand_qty
-    if on_hand_qty_str:
-        try:
-            qty = Decimal(str(on_hand_qty_str))
-            if qty < 0:
-                errors.append('on_hand_qty must be >= 0')
-            else:
-                data['on_hand_qty'] = qty
-        except (InvalidOperation, ValueError):
-            errors.append(f'Invalid on_hand_qty value: {on_hand_qty_str}')
-    else:
-        # Add empty for preview
-        data['on_hand_qty'] = None
-    
-    # Process par
-    if par_str:
-        try:
-            par_val = Decimal(str(par_str))
-            if par_val < 0:
-                errors.append('par must be >= 0')
-            else:
-                data['par'] = par_val
-        except (InvalidOperation, ValueError):
-            errors.append(f'Invalid par value: {par_str}')
-    else:
-        # Add empty for preview
-        data['par'] = None
-    
-    return {
-        'valid': len(errors) == 0,
-        'data': data,
-        'errors': errors
-    }
-
-
-def get_or_create_location(location_data, user):
-    """Get existing location or create new one"""
-    location_name = location_data.get('location_name')
-    if not location_name:
-        return None, None
-    
-    # Try to find existing location by name
-    location = Location.objects.filter(name=location_name, is_active=True).first()
-    
-    if location:
-        return location, None
-    
-    # Create new location
-    try:
-        location = Location.objects.create(
-            name=location_name,
-            type=location_data.get('location_type', 'STOREROOM'),
-            property_id=location_data.get('location_property_id', ''),
-            is_active=True
-        )
-        
-        # Handle parent location if specified
-        parent_location_name = location_data.get('parent_location_name')
-        if parent_location_name:
-            parent_location = Location.objects.filter(name=parent_location_name, is_active=True).first()
-            if parent_location:
-                location.parent_location = parent_location
-                location.save()
-            else:
-                # Create parent location if it doesn't exist
-                parent_location = Location.objects.create(
-                    name=parent_location_name,
-                    type='STOREROOM',
-                    is_active=True
-                )
-                location.parent_location = parent_location
-                location.save()
-        
-        return location, 'created'
-    except Exception as e:
-        return None, f'Failed to create location: {str(e)}'
+            job = ImportJob.objects.select_related('created_by').get(id=job_id)
+        except ImportJob.DoesNotExist:
+            return Response({'error': 'Import job not found'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(ImportJobSerializer(job, context={'request': request}).data)
 
 
-def get_or_create_vendor(vendor_name_or_id, vendor_data=None):
-    """Get existing vendor or create new one"""
-    if not vendor_name_or_id:
-        return None, None
-    
-    # Try as ID first
-    vendor = None
-    try:
-        vendor_id = int(vendor_name_or_id)
-        vendor = Vendor.objects.filter(id=vendor_id, is_active=True).first()
-    except (ValueError, TypeError):
-        pass
-    
-    # If not found, try as name
-    if not vendor:
-        vendor = Vendor.objects.filter(name__iexact=vendor_name_or_id, is_active=True).first()
-    
-    if vendor:
-        return vendor, None
-    
-    # Create new vendor
-    try:
-        vendor = Vendor.objects.create(
-            name=str(vendor_name_or_id),
-            contact_info=vendor_data.get('vendor_contact_info', '') if vendor_data else '',
-            phone=vendor_data.get('vendor_phone', '') if vendor_data else '',
-            email=vendor_data.get('vendor_email', '') if vendor_data else '',
-            is_active=True
-        )
-        return vendor, 'created'
-    except Exception as e:
-        return None, f'Failed to create vendor: {str(e)}'
-
-
-@transaction.atomic
-def process_import_rows(validated_rows, user):
-    """Process validated rows and create/update items, locations, and stock levels"""
-    results = {
-        'items_created': 0,
-        'items_updated': 0,
-        'vendors_created': 0,
-        'locations_created': 0,
-        'stock_levels_created': 0,
-        'stock_levels_updated': 0,
-        'errors': []
-    }
-    
-    for row_info in validated_rows:
-        row_number = row_info['row_number']
-        data = row_info['data']
-        row_errors = []
-        
-        try:
-            # Get or create category
-            category = None
-            if 'category' in data:
-                category_name_or_id = data['category']
-                # Try as ID first
-                try:
-                    category_id = int(category_name_or_id)
-                    category = Category.objects.filter(id=category_id, is_active=True).first()
-                except (ValueError, TypeError):
-                    pass
-                
-                # If not found, try as name
-                if not category:
-                    category = Category.objects.filter(name__iexact=category_name_or_id, is_active=True).first()
-            
-            # Get or create vendor
-            vendor = None
-            if 'default_vendor' in data:
-                vendor_name_or_id = data['default_vendor']
-                vendor, vendor_status = get_or_create_vendor(vendor_name_or_id, data)
-                
-                if vendor and vendor_status == 'created':
-                    results['vendors_created'] += 1
-                elif vendor_status and 'Failed' in vendor_status:
-                    row_errors.append(f'Vendor creation failed: {vendor_status}')
-            
-            # Get or create/update item
-            item, created = Item.objects.get_or_create(
-                short_code=data['short_code'],
-                defaults={
-                    'name': data['name'],
-                    'category': category,
-                    'default_vendor': vendor,
-                    'photo_url': data.get('photo_url', ''),
-                    'unit_of_measure': data.get('unit_of_measure', 'ea'),
-                    'cost': data.get('cost'),
-                    'lead_time_days': data.get('lead_time_days', 0),
-                    'is_active': data.get('is_active', True)
-                }
-            )
-            
-            if created:
-                results['items_created'] += 1
-            else:
-                # Update existing item
-                item.name = data['name']
-                if category:
-                    item.category = category
-                if vendor:
-                    item.default_vendor = vendor
-                if 'photo_url' in data:
-                    item.photo_url = data.get('photo_url', '')
-                item.unit_of_measure = data.get('unit_of_measure', 'ea')
-                if 'cost' in data:
-                    item.cost = data.get('cost')
-                item.lead_time_days = data.get('lead_time_days', 0)
-                if 'is_active' in data:
-                    item.is_active = data.get('is_active', True)
-                item.save()
-                results['items_updated'] += 1
-            
-            # Handle location and stock level if provided
-            # Check if we have location_name or stock data
-            has_location_name = 'location_name' in data and data.get('location_name')
-            has_stock_data = any([
-                'on_hand_qty' in data,
-                'par' in data
-            ])
-            
-            if has_stock_data and not has_location_name:
-                # Stock data provided but no location - error
-                row_errors.append('location_name is required when stock fields (on_hand_qty, par) are provided')
-            elif has_location_name:
-                # Process location and stock (if provided)
-                location, location_status = get_or_create_location(data, user)
-                
-                if location:
-                    if location_status == 'created':
-                        results['locations_created'] += 1
-                    
-                    # Create or update stock level (only if stock data is provided)
-                    if has_stock_data:
-                        # Get stock values, defaulting to 0 if None
-                        on_hand = data.get('on_hand_qty')
-                        if on_hand is None:
-                            on_hand = Decimal('0')
-                        par_val = data.get('par')
-                        # Support both 'par' and 'par_min' for backward compatibility
-                        if par_val is None:
-                            par_val = data.get('par_min')
-                        if par_val is None:
-                            par_val = Decimal('0')
-                        
-                        stock_level, stock_created = StockLevel.objects.get_or_create(
-                            item=item,
-                            location=location,
-                            defaults={
-                                'on_hand_qty': on_hand,
-                                'par': par_val
-                            }
-                        )
-                        
-                        if stock_created:
-                            results['stock_levels_created'] += 1
-                        else:
-                            # Update existing stock level
-                            if 'on_hand_qty' in data and data['on_hand_qty'] is not None:
-                                stock_level.on_hand_qty = data['on_hand_qty']
-                            if 'par' in data and data['par'] is not None:
-                                stock_level.par = data['par']
-                            elif 'par_min' in data and data['par_min'] is not None:
-                                # Backward compatibility
-                                stock_level.par = data['par_min']
-                        stock_level.save()
-                        results['stock_levels_updated'] += 1
-                elif location_status and 'Failed' in location_status:
-                    row_errors.append(f'Location creation failed: {location_status}')
-            
-        except Exception as e:
-            row_errors.append(f'Row {row_number}: {str(e)}')
-        
-        if row_errors:
-            results['errors'].append({
-                'row_number': row_number,
-                'errors': row_errors
-            })
-    
-    return results
 
@@ -1,59 +1,65 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from django.db.models import F, Q, Sum, Count, CharField, Avg
+from django.db.models import F, Q, Sum, Count, CharField, Avg, Min
 from django.db.models.functions import TruncMonth, TruncQuarter, Extract
 from django.utils import timezone
-from datetime import timedelta, datetime
-from imh_ims.models import StockLevel, Item, InventoryTransaction
+from datetime import timedelta, datetime, time
+from imh_ims.models import StockLevel, Item, Location, DailyUsage
 from api.serializers import StockLevelSerializer, ItemSerializer
 from imh_ims.services.order_service import OrderSuggestionService
+from imh_ims.services.alert_snapshot_service import AlertSnapshotService
+from imh_ims.services.alert_service import ALERT_ORDERINGS, ALERT_STATUSES, AlertService
+from imh_ims.services.usage_service import DailyUsageService
 from api.permissions import create_permission_class
 
 
 class AlertsView(APIView):
-    """Get alerts for below-par items and unusual usage"""
+    """
+    Get alerts for below-par items and unusual usage.
+
+    Counts (overall and per location) cover every matching stock line; the
+    below_par and at_risk lists are paged. Parameters: location_id,
+    category_id, status (below_par or at_risk: return only that list),
+    ordering (-severity (default), severity, item, location), page and
+    page_size. Responses are cached until stock changes.
+    """
     permission_classes = [IsAuthenticated, create_permission_class('reports', 'view')]
-    
+    default_page_size = 50
+    max_page_size = 500
+
     def get(self, request):
-        # Below par alerts - items that are below the par level
-        # Only include items with par > 0 to avoid false positives
-        below_par_stock = StockLevel.objects.filter(
-            on_hand_qty__lt=F('par'),
-            par__gt=0
-        ).select_related('item', 'location')
-        
-        # Optionally filter to only active items
-        below_par_stock = below_par_stock.filter(item__is_active=True)
-        
-        below_par_count = below_par_stock.count()
-        
-        below_par_serializer = StockLevelSerializer(below_par_stock, many=True)
-        
-        # At risk items - items that are at or near par level (80-100% of par)
-        # These are items that are close to going below par but not yet below
-        # Formula: on_hand_qty >= par * 0.8 AND on_hand_qty < par AND par > 0
-        at_risk_stock = StockLevel.objects.filter(
-            on_hand_qty__gte=F('par') * 0.8,
-            on_hand_qty__lt=F('par'),
-            par__gt=0
-        ).select_related('item', 'location')
-        
-        # Only active items
-        at_risk_stock = at_risk_stock.filter(item__is_active=True)
-        
-        at_risk_count = at_risk_stock.count()
-        
-        at_risk_serializer = StockLevelSerializer(at_risk_stock, many=True)
-        
-        response_data = {
-            'below_par': below_par_serializer.data,
-            'at_risk': at_risk_serializer.data,
-            'below_par_count': below_par_count,
-            'at_risk_count': at_risk_count
+        params = request.query_params
+        status = params.get('status')
+        if status and status not in ALERT_STATUSES:
+            return Response({'error': f"status must be one of: {', '.join(ALERT_STATUSES)}"}, status=400)
+        ordering = params.get('ordering', '-severity')
+        if ordering not in ALERT_ORDERINGS:
+            return Response({'error': f"ordering must be one of: {', '.join(ALERT_ORDERINGS)}"}, status=400)
+        try:
+            page = max(int(params.get('page', 1)), 1)
+            page_size = min(max(int(params.get('page_size', self.default_page_size)), 1), self.max_page_size)
+            location_id = int(params['location_id']) if params.get('location_id') else None
+            category_id = int(params['category_id']) if params.get('category_id') else None
+        except ValueError:
+            return Response({'error': 'page, page_size, location_id and category_id must be numbers'}, status=400)
+
+        def build():
+            queryset = AlertService.queryset(location_id, category_id)
+            data = AlertService.summary(queryset)
+            for name in ([status] if status else ALERT_STATUSES):
+                rows = AlertService.page(queryset, name, ordering, (page - 1) * page_size, page_size)
+                data[name] = StockLevelSerializer(rows, many=True).data
+                for row, item in zip(rows, data[name]):
+                    item['severity'] = round(row.severity, 4)
+            data.update({'page': page, 'page_size': page_size, 'ordering': ordering})
+            return data
+
+        cache_params = {
+            'status': status, 'ordering': ordering, 'page': page, 'page_size': page_size,
+            'location_id': location_id, 'category_id': category_id,
         }
-        
-        return Response(response_data)
+        return Response(AlertService.cached('alerts', cache_params, build))
 
 
 class SuggestedOrdersView(APIView):
@@ -67,27 +73,9 @@ class SuggestedOrdersView(APIView):
             vendor=vendor_id
         )
         
-        # Format suggestions for response
-        formatted_suggestions = []
-        for suggestion in suggestions:
-            formatted_suggestions.append({
-                'item_id': suggestion['item'].id,
-                'item_name': suggestion['item'].name,
-                'item_short_code': suggestion['item'].short_code,
-                'location_id': suggestion['location'].id,
-                'location_name': suggestion['location'].name,
-                'current_on_hand': float(suggestion['current_on_hand']),
-                'par': float(suggestion['par']),
-                'avg_daily_usage': float(suggestion['avg_daily_usage']),
-                'lead_time_days': suggestion['lead_time_days'],
-                'projected_on_hand': float(suggestion['projected_on_hand']),
-                'suggested_order_qty': float(suggestion['suggested_order_qty']),
-                'days_until_below_par': suggestion['days_until_below_par']
-            })
-        
         return Response({
-            'suggestions': formatted_suggestions,
-            'count': len(formatted_suggestions)
+            'suggestions': suggestions,
+            'count': len(suggestions)
         })
 
 
@@ -128,55 +116,48 @@ class GeneralUsageView(APIView):
     def get(self, request):
         period = request.query_params.get('period', 'year')  # month, quarter, year
         
-        # Calculate date range
-        cutoff_date = timezone.now() - timedelta(days=365)
-        
-        base_query = InventoryTransaction.objects.filter(
+        # Site-local days from the daily usage rollup, which also covers archived months
+        base_query = DailyUsage.objects.filter(
             type='ISSUE',
-            timestamp__gte=cutoff_date
+            day__gte=DailyUsageService.today() - timedelta(days=365)
         )
         
         if period == 'year' or period == 'month':
             # Last 12 months - group by month using Django ORM
             transactions = base_query.annotate(
-                period=TruncMonth('timestamp')
+                period=TruncMonth('day')
             ).values('period').annotate(
                 total_qty=Sum('qty'),
                 item_count=Count('item', distinct=True)
             ).order_by('period')
             
-            # Format period as YYYY-MM string
-            usage_by_period = []
-            for entry in transactions:
-                # Handle both datetime and date objects
-                period_value = entry['period']
-                if hasattr(period_value, 'strftime'):
-                    period_str = period_value.strftime('%Y-%m')
-                else:
-                    period_str = str(period_value)[:7]  # Take first 7 chars (YYYY-MM)
-                usage_by_period.append({
-                    'period': period_str,
+            usage_by_period = [
+                {
+                    'period': entry['period'].strftime('%Y-%m'),
                     'total_qty': float(entry['total_qty'] or 0),
                     'item_count': entry['item_count']
-                })
+                }
+                for entry in transactions
+            ]
         else:  # quarter
             # Last 4 quarters - group by quarter
             transactions = base_query.annotate(
-                year=Extract('timestamp', 'year'),
-                quarter=Extract('timestamp', 'quarter')
+                year=Extract('day', 'year'),
+                quarter=Extract('day', 'quarter')
             ).values('year', 'quarter').annotate(
                 total_qty=Sum('qty'),
                 item_count=Count('item', distinct=True)
             ).order_by('year', 'quarter')
             
-            usage_by_period = []
-            for entry in transactions:
-                usage_by_period.append({
+            usage_by_period = [
+                {
                     'year': entry['year'],
                     'quarter': entry['quarter'],
                     'total_qty': float(entry['total_qty'] or 0),
                     'item_count': entry['item_count']
-                })
+                }
+                for entry in transactions
+            ]
         
         total_usage = sum(float(entry['total_qty'] or 0) for entry in usage_by_period)
         average_per_period = total_usage / len(usage_by_period) if usage_by_period else 0
@@ -191,83 +172,68 @@ class GeneralUsageView(APIView):
 
 class LowParTrendsView(APIView):
     permission_classes = [IsAuthenticated, create_permission_class('reports', 'view')]
-    """Get low par usage trends over annual timeline"""
+    """
+    Get low par usage trends from the daily alert snapshots.
+    Monthly by default (last snapshot of each of the past 12 months);
+    ?granularity=day&days=365 returns one point per snapshot day.
+    Optional ?department_id= limits the trend to one department's locations.
+    """
+    max_days = 3650
+
     def get(self, request):
-        # Get monthly snapshots of below par items for the last 12 months
-        trends = []
-        current_date = timezone.now()
-        
-        for i in range(12):
-            month_date = current_date - timedelta(days=30 * i)
-            month_start = month_date.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-            
-            # For historical data, we'll use current stock levels as approximation
-            # In a real system, you'd store historical snapshots
-            if i == 0:
-                # Current month - use actual data
-                below_par_stock = StockLevel.objects.filter(
-                    on_hand_qty__lt=F('par'),
-                    par__gt=0,
-                    item__is_active=True
-                )
-                at_risk_stock = StockLevel.objects.filter(
-                    on_hand_qty__gte=F('par') * 0.8,
-                    on_hand_qty__lt=F('par'),
-                    par__gt=0,
-                    item__is_active=True
-                )
-                below_par_count = below_par_stock.count()
-                at_risk_count = at_risk_stock.count()
-            else:
-                # Historical months - estimate based on current data with slight variation
-                # This is a simplified approach - in production you'd want historical snapshots
-                current_below_par = StockLevel.objects.filter(
-                    on_hand_qty__lt=F('par'),
-                    par__gt=0,
-                    item__is_active=True
-                ).count()
-                current_at_risk = StockLevel.objects.filter(
-                    on_hand_qty__gte=F('par') * 0.8,
-                    on_hand_qty__lt=F('par'),
-                    par__gt=0,
-                    item__is_active=True
-                ).count()
-                # Add some variation for historical months
-                variation = 1 + (i * 0.05)  # Slight increase going back in time
-                below_par_count = max(0, int(current_below_par * variation))
-                at_risk_count = max(0, int(current_at_risk * variation))
-            
-            trends.append({
-                'period': month_start.strftime('%Y-%m'),
-                'below_par_count': below_par_count,
-                'at_risk_count': at_risk_count,
-                'total_alerts': below_par_count + at_risk_count
-            })
-        
-        trends.reverse()  # Oldest to newest
-        
-        # Get current counts (same as month 0)
-        current_below_par = StockLevel.objects.filter(
-            on_hand_qty__lt=F('par'),
-            par__gt=0,
-            item__is_active=True
-        ).count()
-        current_at_risk = StockLevel.objects.filter(
-            on_hand_qty__gte=F('par') * 0.8,
-            on_hand_qty__lt=F('par'),
-            par__gt=0,
-            item__is_active=True
-        ).count()
-        
-        # Calculate averages
+        granularity = request.query_params.get('granularity', 'month')
+        try:
+            department_id = int(request.query_params['department_id']) if request.query_params.get('department_id') else None
+        except ValueError:
+            return Response({'error': 'department_id must be a number'}, status=400)
+        today = timezone.localdate()
+
+        if granularity == 'day':
+            try:
+                days = int(request.query_params.get('days', 365))
+            except ValueError:
+                return Response({'error': 'days must be an integer'}, status=400)
+            if days > self.max_days:
+                return Response({'error': f'days must be at most {self.max_days}'}, status=400)
+            since = today - timedelta(days=max(days, 1) - 1)
+        else:
+            month = today.replace(day=1)
+            for _ in range(11):
+                month = (month - timedelta(days=1)).replace(day=1)
+            since = month
+
+        daily = AlertSnapshotService.daily_totals(since, department_id)
+        if granularity != 'day':
+            # Keep the last snapshot of each month
+            by_month = {}
+            for row in daily:
+                by_month[row['day'].strftime('%Y-%m')] = row
+            points = sorted(by_month.items())
+        else:
+            points = [(row['day'].isoformat(), row) for row in daily]
+
+        trends = [
+            {
+                'period': period,
+                'below_par_count': row['below_par_count'],
+                'at_risk_count': row['at_risk_count'],
+                'total_alerts': row['below_par_count'] + row['at_risk_count'],
+                'stock_value': float(row['stock_value'] or 0)
+            }
+            for period, row in points
+        ]
+
+        locations = Location.objects.filter(department_id=department_id) if department_id else None
+        current = AlertSnapshotService.current_counts(locations)
+
         below_par_counts = [t['below_par_count'] for t in trends]
         average_below_par = sum(below_par_counts) / len(below_par_counts) if below_par_counts else 0
         peak_below_par = max(below_par_counts) if below_par_counts else 0
-        
+
         return Response({
             'trends': trends,
-            'current_below_par': current_below_par,
-            'current_at_risk': current_at_risk,
+            'current_below_par': current['below_par'],
+            'current_at_risk': current['at_risk'],
             'average_below_par': average_below_par,
             'peak_below_par': peak_below_par
         })
@@ -278,20 +244,27 @@ class EnvironmentalImpactView(APIView):
     permission_classes = [IsAuthenticated, create_permission_class('reports', 'view')]
     
     def get(self, request):
-        # Get system start date (when first transaction was recorded)
-        first_transaction = InventoryTransaction.objects.order_by('timestamp').first()
-        if not first_transaction:
+        # Ledger totals from the daily usage rollup, which also covers archived months
+        usage = DailyUsage.objects.aggregate(
+            first_day=Min('day'),
+            transactions=Sum('txn_count'),
+            receives=Sum('txn_count', filter=Q(type='RECEIVE')),
+            cost_total=Sum('cost'),
+            cost_count=Sum('cost_count')
+        )
+        if usage['first_day'] is None:
             return Response({
                 'error': 'No transaction data available'
             }, status=404)
         
-        system_start_date = first_transaction.timestamp
-        days_active = (timezone.now() - system_start_date).days
+        # System start date: the first day with a recorded transaction
+        system_start_date = datetime.combine(usage['first_day'], time.min, tzinfo=DailyUsageService.site_timezone())
+        days_active = (DailyUsageService.today() - usage['first_day']).days
         days_active = max(days_active, 1)  # Avoid division by zero
         
         # 1. PAPER SAVINGS
         # Each transaction represents a paper form saved
-        total_transactions = InventoryTransaction.objects.count()
+        total_transactions = usage['transactions'] or 0
         # Estimate: 2 pages per transaction (form + receipt)
         pages_saved = total_transactions * 2
         # Average tree produces ~8,333 sheets of paper
@@ -309,10 +282,7 @@ class EnvironmentalImpactView(APIView):
         
         # Estimate: 15% waste reduction from better tracking
         # Average item value for waste calculation
-        avg_item_cost = InventoryTransaction.objects.filter(
-            cost__isnull=False,
-            cost__gt=0
-        ).aggregate(avg=Avg('cost'))['avg'] or 0
+        avg_item_cost = usage['cost_total'] / usage['cost_count'] if usage['cost_count'] else 0
         
         # Waste reduction estimate (items that would have been overstocked)
         waste_reduction_percentage = 0.15
@@ -325,7 +295,7 @@ class EnvironmentalImpactView(APIView):
         
         # Count transactions that represent planned vs emergency
         # (This is simplified - in reality you'd track order types)
-        total_receives = InventoryTransaction.objects.filter(type='RECEIVE').count()
+        total_receives = usage['receives'] or 0
         
         # Estimate: 30% reduction in delivery trips due to better planning
         # Average delivery truck emits ~0.5 kg CO2 per km
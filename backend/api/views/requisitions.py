@@ -9,6 +9,7 @@ from imh_ims.models import Requisition, Item, Location, UserProfile
 from api.serializers import RequisitionSerializer
 from imh_ims.services.requisition_service import RequisitionService
 from api.permissions import create_permission_class
+from api.pagination import StandardPagination
 
 
 class RequisitionViewSet(viewsets.ModelViewSet):
@@ -16,6 +17,8 @@ class RequisitionViewSet(viewsets.ModelViewSet):
     queryset = Requisition.objects.all()
     serializer_class = RequisitionSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = StandardPagination
+    cursor_ordering = ('-created_at', '-id')
 
     def get_permissions(self):
         """Apply permission checks based on action"""
@@ -30,7 +33,12 @@ class RequisitionViewSet(viewsets.ModelViewSet):
         return super().get_permissions()
 
     def get_queryset(self):
-        queryset = Requisition.objects.all()
+        queryset = Requisition.objects.select_related(
+            'from_location', 'to_location', 'requested_by', 'approved_by', 'denied_by'
+        )
+        # Nested lines are skipped entirely when the client omits them (?omit=lines, ?profile=slim)
+        if RequisitionSerializer.includes(self.request, 'lines'):
+            queryset = queryset.prefetch_related('lines__item')
         
         status_filter = self.request.query_params.get('status', None)
         location_id = self.request.query_params.get('location_id', None)
@@ -3,11 +3,16 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from datetime import datetime, time
 from decimal import Decimal
 from imh_ims.models import StockLevel, Item, Location
 from api.serializers import StockLevelSerializer, InventoryTransactionSerializer
 from imh_ims.services.stock_service import StockService
+from imh_ims.services.ledger_service import LedgerService
 from api.permissions import create_permission_class
+from api.pagination import StandardPagination
 
 
 class StockViewSet(viewsets.ReadOnlyModelViewSet):
@@ -15,9 +20,12 @@ class StockViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = StockLevel.objects.all()
     serializer_class = StockLevelSerializer
     permission_classes = [IsAuthenticated, create_permission_class('stock', 'view')]
+    pagination_class = StandardPagination
+    # ?paginate=cursor walks a storeroom by (location, item) on its composite index
+    cursor_ordering = ('location_id', 'item_id')
 
     def get_queryset(self):
-        queryset = StockLevel.objects.all()
+        queryset = StockLevel.objects.select_related('item', 'location')
         
         item_id = self.request.query_params.get('item_id', None)
         location_id = self.request.query_params.get('location_id', None)
@@ -29,6 +37,50 @@ class StockViewSet(viewsets.ReadOnlyModelViewSet):
         
         return queryset
 
+    @staticmethod
+    def parse_as_of(value):
+        """Parse an as_of value; a bare date means the end of that day"""
+        when = parse_datetime(value)
+        if when is None:
+            day = parse_date(value)
+            if day is None:
+                raise ValueError(f"Invalid as_of value: {value}. Use YYYY-MM-DD or an ISO datetime")
+            when = datetime.combine(day, time.max)
+        if timezone.is_naive(when):
+            when = timezone.make_aware(when)
+        return when
+
+    def list(self, request, *args, **kwargs):
+        as_of = request.query_params.get('as_of')
+        if not as_of:
+            return super().list(request, *args, **kwargs)
+
+        try:
+            when = self.parse_as_of(as_of)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        stock_levels = page if page is not None else list(queryset)
+
+        # Replace current quantities with the reconstructed ones for this page only
+        quantities = LedgerService.stock_as_of(
+            when,
+            item_ids={stock.item_id for stock in stock_levels},
+            location_ids={stock.location_id for stock in stock_levels}
+        )
+        for stock in stock_levels:
+            stock.on_hand_qty = quantities.get((stock.item_id, stock.location_id), Decimal('0'))
+
+        serializer = self.get_serializer(stock_levels, many=True)
+        if page is not None:
+            response = self.get_paginated_response(serializer.data)
+        else:
+            response = Response(serializer.data)
+        response['X-Stock-As-Of'] = when.isoformat()
+        return response
+
     @action(detail=False, methods=['get'])
     def by_item(self, request):
         """Get stock for an item across all locations"""
@@ -40,14 +92,14 @@ class StockViewSet(viewsets.ReadOnlyModelViewSet):
             )
         
         try:
-            item = Item.objects.get(id=item_id)
+            item = Item.objects.select_related('stock_summary').get(id=item_id)
         except Item.DoesNotExist:
             return Response(
                 {'error': 'Item not found'},
                 status=status.HTTP_404_NOT_FOUND
             )
         
-        stock_levels = StockLevel.objects.filter(item=item)
+        stock_levels = StockLevel.objects.filter(item=item).select_related('item', 'location')
         serializer = StockLevelSerializer(stock_levels, many=True)
         
         return Response({
@@ -172,3 +224,27 @@ class StockAdjustView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
+
+
+class StockBatchView(APIView):
+    """Apply many stock movements (issues, transfers, receipts) in one request"""
+    permission_classes = [IsAuthenticated, create_permission_class('stock', 'edit')]
+
+    def post(self, request):
+        movements = request.data.get('movements', [])
+        atomic = str(request.data.get('atomic', 'true')).lower() not in ['false', '0', 'no']
+
+        if not isinstance(movements, list) or not movements:
+            return Response(
+                {'error': 'movements must be a non-empty list'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        result = StockService.apply_movements(movements, request.user, atomic=atomic)
+        result['atomic'] = atomic
+
+        if result['failed'] and not result['applied']:
+            return Response(result, status=status.HTTP_400_BAD_REQUEST)
+        elif result['failed']:
+            return Response(result, status=status.HTTP_207_MULTI_STATUS)
+        return Response(result, status=status.HTTP_201_CREATED)
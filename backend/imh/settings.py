@@ -82,6 +82,23 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            # Take the write lock when a transaction starts instead of upgrading
+            # mid-transaction, which is what produced "database is locked" errors
+            # when several workers moved stock at the same time.
+            'transaction_mode': 'IMMEDIATE',
+            'timeout': 20,
+        },
+    }
+}
+
+# A cache every process shares (gunicorn workers and the import worker), so
+# the stock version that keys cached reports moves for all of them at once.
+# Create the table with `python manage.py createcachetable` after migrate.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'imh_cache',
     }
 }
 
@@ -116,6 +133,10 @@ USE_I18N = True
 
 USE_TZ = True
 
+# Day boundaries of the daily usage rollup and the usage reports built on it.
+# Run manage.py backfill_daily_usage after changing it
+SITE_TIME_ZONE = TIME_ZONE
+
 
 # Static files (CSS, JavaScript, Images)
 # https://docs.djangoproject.com/en/6.0/howto/static-files/
@@ -127,6 +148,69 @@ STATIC_ROOT = BASE_DIR / 'staticfiles'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Ledger archival (manage.py archive_ledger): transactions older than the horizon
+# move to compressed monthly files under LEDGER_ARCHIVE_ROOT
+LEDGER_ARCHIVE_ROOT = MEDIA_ROOT / 'archive'
+LEDGER_ARCHIVE_HORIZON_DAYS = 365
+
+# Bulk item imports commit in chunks of this many rows. Uploads are queued as
+# ImportJobs and processed by `manage.py run_import_worker`; a RUNNING job with
+# no checkpoint for IMPORT_JOB_STALE_SECONDS is handed to another worker
+IMPORT_CHUNK_SIZE = 2000
+IMPORT_WORKER_THREADS = 1
+IMPORT_JOB_STALE_SECONDS = 900
+
+# Import rows past the first IMPORT_VALIDATION_PARALLEL_AFTER are validated in
+# batches on a process pool of this many workers (None: one per CPU). Import
+# previews return at most IMPORT_PREVIEW_LIMIT valid rows and as many errors;
+# their counts always cover the whole file
+IMPORT_VALIDATION_WORKERS = None
+IMPORT_VALIDATION_BATCH_SIZE = 5000
+IMPORT_VALIDATION_PARALLEL_AFTER = 50000
+IMPORT_PREVIEW_LIMIT = 100
+
+# Rendered QR codes: an in-process LRU of QR_CACHE_ENTRIES codes in front of
+# files under QR_CACHE_ROOT. Requested sizes outside QR_MIN_SIZE..QR_MAX_SIZE
+# are rejected so arbitrary sizes cannot fill the cache
+QR_CACHE_ROOT = MEDIA_ROOT / 'qr'
+QR_CACHE_ENTRIES = 1024
+QR_MIN_SIZE = 50
+QR_MAX_SIZE = 2000
+
+# /api/items/labels/ draws sheets at LABEL_DPI. Jobs of more than
+# LABEL_PARALLEL_PAGES pages are drawn on a process pool of
+# LABEL_RENDER_WORKERS (None: one per CPU); one job prints at most LABEL_MAX labels
+LABEL_DPI = 300
+LABEL_RENDER_WORKERS = None
+LABEL_PARALLEL_PAGES = 4
+LABEL_MAX = 5000
+
+# /api/reports/alerts/ responses are cached for this many seconds (0: off). Keys
+# include a stock version bumped on every stock change and kept in the shared
+# cache above, so no process serves an entry older than the last stock change.
+ALERTS_CACHE_SECONDS = 60
+
+# /api/dashboard/stats/ responses, cached the same way and under the same
+# shared stock version (0: off)
+DASHBOARD_CACHE_SECONDS = 60
+
+# Demand forecasts (manage.py forecast_demand, run nightly): fitted on the last
+# FORECAST_HISTORY_DAYS days of issues, FORECAST_CHUNK_SERIES item-locations at a
+# time, for FORECAST_HORIZON_DAYS days with FORECAST_INTERVAL prediction bounds.
+# Order suggestions use forecasts younger than FORECAST_MAX_AGE_HOURS, and a
+# 30-day average otherwise
+FORECAST_HISTORY_DAYS = 112
+FORECAST_HORIZON_DAYS = 28
+FORECAST_INTERVAL = 0.8
+FORECAST_CHUNK_SERIES = 20000
+FORECAST_MAX_AGE_HOURS = 48
+
+# /api/export/ endpoints read rows from the database in batches of this size
+EXPORT_CHUNK_SIZE = 2000
+
+# Log per-filter COUNT(*) diagnostics in list endpoints (costs a full count per stage)
+API_QUERY_DIAGNOSTICS = False
+
 # REST Framework configuration
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
@@ -25,6 +25,10 @@ DATABASES = {
     ) if os.environ.get('DATABASE_URL') else {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            'transaction_mode': 'IMMEDIATE',
+            'timeout': 20,
+        },
     }
 }
 
@@ -35,6 +39,8 @@ STATIC_ROOT = BASE_DIR / 'staticfiles'
 # Media files (S3 or local storage)
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
+LEDGER_ARCHIVE_ROOT = MEDIA_ROOT / 'archive'
+LEDGER_ARCHIVE_HORIZON_DAYS = int(os.environ.get('LEDGER_ARCHIVE_HORIZON_DAYS', LEDGER_ARCHIVE_HORIZON_DAYS))
 
 # AWS S3 Configuration (Optional - for static/media files)
 USE_S3 = os.environ.get('USE_S3', 'False').lower() == 'true'
@@ -4,7 +4,7 @@ from .models import (
     InventoryTransaction, Requisition, RequisitionLine,
     CountSession, CountLine, PurchaseRequest, PurchaseRequestLine,
     Department, PhysicalChangeRequest, PhysicalChangeRequestLine,
-    RequestedItem, UserProfile
+    RequestedItem, UserProfile, ItemStockSummary, LedgerArchivePartition, ImportJob, DemandForecast
 )
 
 
@@ -24,8 +24,8 @@ class VendorAdmin(admin.ModelAdmin):
 
 @admin.register(Location)
 class LocationAdmin(admin.ModelAdmin):
-    list_display = ['name', 'type', 'parent_location', 'is_active']
-    list_filter = ['type', 'is_active']
+    list_display = ['name', 'type', 'parent_location', 'department', 'is_active']
+    list_filter = ['type', 'department', 'is_active']
     search_fields = ['name', 'property_id']
 
 
@@ -111,3 +111,30 @@ class UserProfileAdmin(admin.ModelAdmin):
     list_display = ['user', 'role', 'department', 'created_at']
     list_filter = ['role', 'department']
     search_fields = ['user__username', 'user__email']
+
+
+@admin.register(ItemStockSummary)
+class ItemStockSummaryAdmin(admin.ModelAdmin):
+    list_display = ['item', 'global_on_hand', 'location_count', 'primary_property_id', 'updated_at']
+    search_fields = ['item__name', 'item__short_code']
+
+
+@admin.register(LedgerArchivePartition)
+class LedgerArchivePartitionAdmin(admin.ModelAdmin):
+    list_display = ['month', 'part', 'row_count', 'item_count', 'size_bytes', 'created_at']
+    readonly_fields = ['path', 'index_path', 'first_timestamp', 'last_timestamp']
+
+
+@admin.register(ImportJob)
+class ImportJobAdmin(admin.ModelAdmin):
+    list_display = ['id', 'original_name', 'status', 'rows_done', 'total_rows', 'created_by', 'created_at', 'finished_at']
+    list_filter = ['status']
+    readonly_fields = ['results', 'processing_seconds', 'worker', 'started_at', 'heartbeat_at', 'finished_at']
+
+
+@admin.register(DemandForecast)
+class DemandForecastAdmin(admin.ModelAdmin):
+    list_display = ['item', 'location', 'method', 'start_day', 'sigma', 'demand_days', 'generated_at']
+    list_filter = ['method', 'location']
+    search_fields = ['item__name', 'item__short_code']
+    readonly_fields = ['forecast', 'lower', 'upper']
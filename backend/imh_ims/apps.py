@@ -1,5 +1,10 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class ImhImsConfig(AppConfig):
     name = 'imh_ims'
+
+    def ready(self):
+        from imh_ims import signals
+        post_migrate.connect(signals.ensure_search_index, sender=self)
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand, CommandError
+import time
+
+from imh_ims.services.archive_service import LedgerArchiveService
+
+
+class Command(BaseCommand):
+    help = 'Move InventoryTransaction rows older than the archive horizon into compressed monthly archive files'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--horizon-days',
+            type=int,
+            default=None,
+            help='Keep this many days in the hot table (default: settings.LEDGER_ARCHIVE_HORIZON_DAYS)'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Report what would be archived without writing anything'
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        try:
+            stats = LedgerArchiveService.archive(options['horizon_days'], dry_run=options['dry_run'])
+        except ValueError as e:
+            raise CommandError(str(e))
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write(f'  Cutoff:  {stats["cutoff"].isoformat()}')
+        self.stdout.write(f'  Months:  {stats["months"]}')
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING(f'Dry run: {stats["rows"]} rows would be archived'))
+            return
+        self.stdout.write(f'  Size:    {stats["bytes"] / 1024:.1f} KiB')
+        self.stdout.write(self.style.SUCCESS(f'Archived {stats["rows"]} rows in {elapsed:.2f}s'))
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+import time
+
+from imh_ims.services.usage_service import DailyUsageService
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the DailyUsage rollup from the ledger and its archive (after deploying it or changing SITE_TIME_ZONE)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--item',
+            type=int,
+            action='append',
+            dest='item_ids',
+            help='Rebuild only this item id (repeatable; default: every item)'
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        count = DailyUsageService.rebuild(options['item_ids'])
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Wrote {count} daily usage rows ({DailyUsageService.site_timezone()} days) in {elapsed:.2f}s'
+        ))
@@ -0,0 +1,87 @@
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from decimal import Decimal
+from random import Random
+import time
+
+from imh_ims.models import Category, Vendor, Item, Location, StockLevel
+from imh_ims.services.catalog_service import CatalogService
+from imh_ims.services.rollup_service import StockRollupService
+from api.serializers import ItemSerializer
+
+
+class Command(BaseCommand):
+    help = 'Compare serializing catalog pages with the annotated queryset against per-item lookups'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--items',
+            type=int,
+            default=10000,
+            help='Number of benchmark items to create (default: 10000)'
+        )
+        parser.add_argument(
+            '--locations',
+            type=int,
+            default=50,
+            help='Stock lines per item, one per benchmark location (default: 50)'
+        )
+        parser.add_argument(
+            '--page-sizes',
+            default='50,500',
+            help='Comma separated page sizes to measure (default: 50,500)'
+        )
+        parser.add_argument(
+            '--keep',
+            action='store_true',
+            help='Commit the benchmark items and locations instead of rolling them back'
+        )
+
+    def handle(self, *args, **options):
+        page_sizes = [int(size) for size in options['page_sizes'].split(',')]
+        suffix = timezone.now().strftime('%Y%m%d%H%M%S')
+        prefix = f'BENCH-CAT-{suffix}-'
+        rng = Random(suffix)
+
+        # Everything runs in one transaction that is rolled back afterwards, so
+        # cleanup does not fire the per-row StockLevel rollup signals
+        with transaction.atomic():
+            started = time.perf_counter()
+            category = Category.objects.create(name=f'Benchmark Category {suffix}')
+            vendor = Vendor.objects.create(name=f'Benchmark Vendor {suffix}')
+            locations = Location.objects.bulk_create([
+                Location(name=f'Benchmark Location {suffix}-{n}', type='CLOSET', property_id=f'BENCH{n % 3}')
+                for n in range(options['locations'])
+            ])
+            items = Item.objects.bulk_create([
+                Item(name=f'Benchmark Item {n:06d}', short_code=f'{prefix}{n:06d}', category=category, default_vendor=vendor)
+                for n in range(options['items'])
+            ], batch_size=1000)
+            StockLevel.objects.bulk_create([
+                StockLevel(item=item, location=location, on_hand_qty=Decimal(rng.randint(0, 40)), par=Decimal(rng.randint(0, 30)))
+                for item in items
+                for location in locations
+            ], batch_size=5000)
+            StockRollupService.refresh_items([item.id for item in items])
+            self.stdout.write(
+                f'Created {len(items)} items x {len(locations)} locations in {time.perf_counter() - started:.1f}s'
+            )
+
+            base = Item.objects.filter(short_code__startswith=prefix).order_by('name')
+            for page_size in page_sizes:
+                for label, queryset in (('annotated', CatalogService.annotate(base)), ('per-item', base)):
+                    with CaptureQueriesContext(connection) as queries:
+                        started = time.perf_counter()
+                        data = ItemSerializer(queryset[:page_size], many=True).data
+                        elapsed = time.perf_counter() - started
+                    self.stdout.write(
+                        f'  page={page_size:<5} {label:<10} {len(data):>5} rows  '
+                        f'{len(queries):>6} queries  {elapsed * 1000:9.1f} ms'
+                    )
+
+            if not options['keep']:
+                transaction.set_rollback(True)
+
+        self.stdout.write(self.style.SUCCESS('Catalog benchmark complete'))
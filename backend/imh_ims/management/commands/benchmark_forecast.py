@@ -0,0 +1,49 @@
+from django.core.management.base import BaseCommand
+import time
+
+import numpy as np
+
+from imh_ims.services.forecast_service import ForecastService
+
+
+class Command(BaseCommand):
+    help = 'Time the demand-forecast fit on synthetic daily usage, without touching the database'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--series',
+            type=int,
+            default=100000,
+            help='Item-locations to forecast (default: 100000)'
+        )
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=112,
+            help='Days of history per series (default: 112)'
+        )
+
+    def handle(self, *args, **options):
+        rng = np.random.default_rng(0)
+        series, days = options['series'], options['days']
+
+        # Weekly-seasonal Poisson demand at rates from 0.05/day (intermittent) to 20/day
+        rate = rng.lognormal(0, 1.5, (series, 1)).clip(0.05, 20)
+        weekday = 1 + 0.5 * np.sin(2 * np.pi * np.arange(days) / 7)
+        started = time.perf_counter()
+        usage = rng.poisson(rate * weekday[None, :]).astype(float)
+        self.stdout.write(
+            f'{series} series x {days} days ({usage.nbytes / 2 ** 20:.0f} MiB) '
+            f'generated in {time.perf_counter() - started:.2f}s'
+        )
+
+        started = time.perf_counter()
+        forecasts = ForecastService.fit(usage)
+        elapsed = time.perf_counter() - started
+
+        methods, counts = np.unique(forecasts['method'], return_counts=True)
+        for method, count in zip(methods, counts):
+            self.stdout.write(f'  {method:<13} {count:>8}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Fit {series} series in {elapsed:.2f}s ({series / elapsed:,.0f} series/s)'
+        ))
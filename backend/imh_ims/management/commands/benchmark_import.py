@@ -0,0 +1,95 @@
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+from decimal import Decimal
+from random import Random
+import time
+
+from imh_ims.models import Category
+from imh_ims.services.import_service import ItemImportService
+
+
+class Command(BaseCommand):
+    help = 'Time the bulk item import engine on generated rows (first import, then an unchanged re-import of the same rows)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rows',
+            default='1000,10000,100000',
+            help='Comma separated row counts to measure (default: 1000,10000,100000)'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=None,
+            help='Rows per committed chunk (default: settings.IMPORT_CHUNK_SIZE)'
+        )
+        parser.add_argument(
+            '--vendors',
+            type=int,
+            default=50,
+            help='Distinct vendor names referenced by the rows (default: 50)'
+        )
+        parser.add_argument(
+            '--locations',
+            type=int,
+            default=20,
+            help='Distinct location names referenced by the rows (default: 20)'
+        )
+
+    def handle(self, *args, **options):
+        row_counts = [int(count) for count in options['rows'].split(',')]
+        chunk_size = options['chunk_size'] or ItemImportService.chunk_size()
+        self.stdout.write(f'Chunk size {chunk_size}')
+
+        for count in row_counts:
+            suffix = timezone.now().strftime('%Y%m%d%H%M%S%f')
+            rows = self.build_rows(count, suffix, options['vendors'], options['locations'])
+
+            # Everything is rolled back afterwards; each chunk's atomic block
+            # becomes a savepoint inside this transaction
+            with transaction.atomic():
+                Category.objects.create(name=f'Benchmark Import Category {suffix}')
+                for label in ('create', 're-import'):
+                    queries = [0]
+
+                    def count_queries(execute, sql, params, many, context):
+                        queries[0] += 1
+                        return execute(sql, params, many, context)
+
+                    with connection.execute_wrapper(count_queries):
+                        started = time.perf_counter()
+                        results = ItemImportService.import_rows(rows, None, chunk_size=chunk_size)
+                        elapsed = time.perf_counter() - started
+                    self.stdout.write(
+                        f'  rows={count:<7} {label:<10} {elapsed:8.2f}s  {count / elapsed:9.0f} rows/s  '
+                        f'{queries[0]:>6} queries  items +{results["items_created"]}/~{results["items_updated"]}'
+                        f'/={results["items_unchanged"]}  stock +{results["stock_levels_created"]}'
+                        f'/={results["stock_levels_unchanged"]}  errors {len(results["errors"])}'
+                    )
+                transaction.set_rollback(True)
+
+        self.stdout.write(self.style.SUCCESS('Benchmark data rolled back'))
+
+    def build_rows(self, count, suffix, vendors, locations):
+        """Rows shaped like validate_row() output"""
+        rng = Random(suffix)
+        return [
+            {
+                'row_number': n + 2,
+                'data': {
+                    'short_code': f'BENCH-IMP-{suffix}-{n:06d}',
+                    'name': f'Benchmark Import Item {n:06d}',
+                    'category': f'Benchmark Import Category {suffix}',
+                    'default_vendor': f'Benchmark Import Vendor {suffix}-{rng.randrange(vendors)}',
+                    'unit_of_measure': 'ea',
+                    'cost': Decimal(rng.randint(100, 10000)) / 100,
+                    'lead_time_days': rng.randint(0, 14),
+                    'is_active': True,
+                    'location_name': f'Benchmark Import Location {suffix}-{rng.randrange(locations)}',
+                    'on_hand_qty': Decimal(rng.randint(0, 40)),
+                    'par': Decimal(rng.randint(0, 30))
+                }
+            }
+            for n in range(count)
+        ]
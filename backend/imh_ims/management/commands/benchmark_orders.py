@@ -0,0 +1,116 @@
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Sum
+from django.utils import timezone
+from datetime import timedelta
+from decimal import Decimal
+from random import Random
+import time
+
+from imh_ims.models import Vendor, Item, Location, StockLevel, InventoryTransaction
+from imh_ims.services.order_service import OrderSuggestionService
+
+
+class Command(BaseCommand):
+    help = 'Compare the vectorized order-suggestion engine against the per-item loop it replaced'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--items',
+            type=int,
+            default=10000,
+            help='Number of benchmark items to create (default: 10000)'
+        )
+        parser.add_argument(
+            '--locations',
+            type=int,
+            default=5,
+            help='Stock lines per item, one per benchmark location (default: 5)'
+        )
+        parser.add_argument(
+            '--keep',
+            action='store_true',
+            help='Commit the benchmark data instead of rolling it back'
+        )
+
+    def handle(self, *args, **options):
+        suffix = timezone.now().strftime('%Y%m%d%H%M%S')
+        rng = Random(suffix)
+
+        with transaction.atomic():
+            started = time.perf_counter()
+            # A vendor of its own keeps existing items out of both runs
+            vendor = Vendor.objects.create(name=f'Benchmark Vendor {suffix}')
+            locations = Location.objects.bulk_create([
+                Location(name=f'Benchmark Location {suffix}-{n}', type='CLOSET')
+                for n in range(options['locations'])
+            ])
+            items = Item.objects.bulk_create([
+                Item(
+                    name=f'Benchmark Order Item {n:06d}', short_code=f'BENCH-ORD-{suffix}-{n:06d}',
+                    default_vendor=vendor, lead_time_days=rng.choice([1, 2, 5, 7, 14])
+                )
+                for n in range(options['items'])
+            ], batch_size=1000)
+            StockLevel.objects.bulk_create([
+                StockLevel(
+                    item=item, location=location,
+                    on_hand_qty=Decimal(rng.randint(0, 40)), par=Decimal(rng.choice([0, 5, 10, 20, 30]))
+                )
+                for item in items
+                for location in locations
+            ], batch_size=5000)
+            issues = InventoryTransaction.objects.bulk_create([
+                InventoryTransaction(item=item, type='ISSUE', qty=Decimal(rng.randint(1, 12)))
+                for item in items
+                for _ in range(rng.randint(0, 4))
+            ], batch_size=5000)
+            now = timezone.now()
+            for days_ago in range(0, 45, 3):
+                InventoryTransaction.objects.filter(
+                    pk__in=[issue.pk for issue in issues[days_ago // 3::15]]
+                ).update(timestamp=now - timedelta(days=days_ago))
+            self.stdout.write(
+                f'Created {len(items)} items x {len(locations)} locations and {len(issues)} issues '
+                f'in {time.perf_counter() - started:.1f}s'
+            )
+
+            timings = {}
+            for label, suggest in (('engine', OrderSuggestionService.calculate_suggested_orders),
+                                   ('per-item', self.per_item_suggestions)):
+                # Counted with a wrapper: the query log keeps only the last 9000
+                queries = []
+                with connection.execute_wrapper(lambda execute, *args: queries.append(1) or execute(*args)):
+                    started = time.perf_counter()
+                    suggestions = suggest(vendor=vendor.id)
+                    timings[label] = time.perf_counter() - started
+                self.stdout.write(
+                    f'  {label:<9} {len(suggestions):>6} suggestions  {len(queries):>7} queries  '
+                    f'{timings[label]:8.2f}s'
+                )
+
+            if not options['keep']:
+                transaction.set_rollback(True)
+
+        self.stdout.write(self.style.SUCCESS(f"Speedup: {timings['per-item'] / timings['engine']:.0f}x"))
+
+    @staticmethod
+    def per_item_suggestions(vendor=None, lead_time_buffer_days=3, days=30):
+        """The original loop: one usage aggregate per stock line of every item"""
+        items = Item.objects.filter(is_active=True)
+        if vendor:
+            items = items.filter(default_vendor=vendor)
+        cutoff_date = timezone.now() - timedelta(days=days)
+        suggestions = []
+        for item in items:
+            for stock in StockLevel.objects.filter(item=item).select_related('location'):
+                if stock.par == 0:
+                    continue
+                total_issued = InventoryTransaction.objects.filter(
+                    item=item, type='ISSUE', timestamp__gte=cutoff_date
+                ).aggregate(total=Sum('qty'))['total'] or Decimal('0')
+                avg_daily_usage = total_issued / Decimal(str(days))
+                projected_on_hand = stock.on_hand_qty - avg_daily_usage * Decimal(str(item.lead_time_days + lead_time_buffer_days))
+                if projected_on_hand < stock.par:
+                    suggestions.append((item, stock.location, stock.par - projected_on_hand))
+        return suggestions
@@ -0,0 +1,72 @@
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+from io import BytesIO
+import base64
+import tempfile
+import time
+
+import qrcode
+from PIL import Image
+
+from imh_ims.services.qr_service import (
+    cached_qr_code_png, cached_qr_code_svg, generate_qr_code, generate_qr_code_base64, generate_qr_code_svg, qr_cache
+)
+
+
+class Command(BaseCommand):
+    help = 'Time QR rendering as PNG, SVG and base64, uncached and from the cache'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--codes',
+            type=int,
+            default=500,
+            help='Distinct codes to render per format (default: 500)'
+        )
+        parser.add_argument(
+            '--size',
+            type=int,
+            default=300,
+            help='Image size in pixels (default: 300)'
+        )
+
+    def handle(self, *args, **options):
+        size = options['size']
+        codes = [f'BENCH-QR-{n:06d}' for n in range(options['codes'])]
+        self.stdout.write(f'{len(codes)} codes at {size}px')
+
+        with tempfile.TemporaryDirectory() as cache_root, override_settings(QR_CACHE_ROOT=cache_root):
+            qr_cache.clear()
+            runs = [
+                ('png (box 10 + resize)', lambda code: self.png_bytes(self.resized_qr_code(code, size))),
+                ('png', lambda code: self.png_bytes(generate_qr_code(code, size))),
+                ('svg', lambda code: generate_qr_code_svg(code, size).encode('utf-8')),
+                ('base64', lambda code: base64.b64encode(self.png_bytes(generate_qr_code(code, size)))),
+                ('png, cache miss', lambda code: cached_qr_code_png(code, size)),
+                ('svg, cache miss', lambda code: cached_qr_code_svg(code, size)),
+                ('png, memory hit', lambda code: cached_qr_code_png(code, size)),
+                ('base64, memory hit', lambda code: generate_qr_code_base64(code, size)),
+            ]
+            for label, render in runs:
+                started = time.perf_counter()
+                total_bytes = sum(len(render(code)) for code in codes)
+                elapsed = time.perf_counter() - started
+                self.stdout.write(
+                    f'  {label:<22} {len(codes) / elapsed:9.0f} codes/s  '
+                    f'{elapsed / len(codes) * 1000:7.2f} ms/code  {total_bytes / len(codes) / 1024:6.1f} KB/code'
+                )
+            qr_cache.clear()
+
+    @staticmethod
+    def png_bytes(image):
+        buffer = BytesIO()
+        image.save(buffer, format='PNG')
+        return buffer.getvalue()
+
+    @staticmethod
+    def resized_qr_code(data, size):
+        """The previous renderer, for comparison: 10px modules, then a LANCZOS resize"""
+        qr = qrcode.QRCode(error_correction=qrcode.constants.ERROR_CORRECT_M, box_size=10, border=4)
+        qr.add_data(data)
+        qr.make(fit=True)
+        return qr.make_image(fill_color='black', back_color='white').resize((size, size), Image.Resampling.LANCZOS)
@@ -0,0 +1,128 @@
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction, OperationalError
+from django.db.models import Sum
+from django.contrib.auth.models import User
+from django.utils import timezone
+from decimal import Decimal
+from random import Random
+from threading import Thread, Lock
+import time
+
+from imh_ims.models import Item, Location, StockLevel, InventoryTransaction
+from imh_ims.services.stock_service import StockService
+
+
+class Command(BaseCommand):
+    help = 'Hammer one hot item from many threads and verify the ledger still matches StockLevel'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--threads',
+            type=int,
+            default=8,
+            help='Number of concurrent worker threads (default: 8)'
+        )
+        parser.add_argument(
+            '--ops',
+            type=int,
+            default=200,
+            help='Stock operations per thread (default: 200)'
+        )
+        parser.add_argument(
+            '--initial-qty',
+            type=int,
+            default=500,
+            help='Starting on-hand quantity at each benchmark location (default: 500)'
+        )
+        parser.add_argument(
+            '--keep',
+            action='store_true',
+            help='Keep the benchmark item, locations and ledger rows afterwards'
+        )
+
+    def handle(self, *args, **options):
+        threads = options['threads']
+        ops = options['ops']
+        initial_qty = Decimal(options['initial_qty'])
+
+        suffix = timezone.now().strftime('%Y%m%d%H%M%S')
+        user, _ = User.objects.get_or_create(username='benchmark_user')
+        with transaction.atomic():
+            item = Item.objects.create(name=f'Benchmark Hot Item {suffix}', short_code=f'BENCH-HOT-{suffix}')
+            locations = [
+                Location.objects.create(name=f'Benchmark Storeroom {suffix}', type='STOREROOM'),
+                Location.objects.create(name=f'Benchmark Closet {suffix}', type='CLOSET'),
+            ]
+            for location in locations:
+                StockLevel.objects.create(item=item, location=location, on_hand_qty=initial_qty)
+
+        stats = {'ok': 0, 'rejected': 0, 'locked': 0, 'errors': 0}
+        stats_lock = Lock()
+
+        def worker(seed):
+            rng = Random(seed)
+            local = {'ok': 0, 'rejected': 0, 'locked': 0, 'errors': 0}
+            try:
+                for _ in range(ops):
+                    qty = Decimal(rng.randint(1, 5))
+                    source, destination = rng.sample(locations, 2)
+                    op = rng.random()
+                    try:
+                        if op < 0.45:
+                            StockService.issue_stock(item, source, qty, user, notes='benchmark')
+                        elif op < 0.8:
+                            StockService.transfer_stock(item, source, destination, qty, user, notes='benchmark')
+                        else:
+                            StockService.receive_stock(item, destination, qty, user, notes='benchmark')
+                        local['ok'] += 1
+                    except ValueError:
+                        local['rejected'] += 1
+                    except OperationalError:
+                        local['locked'] += 1
+                    except Exception:
+                        local['errors'] += 1
+            finally:
+                connection.close()
+                with stats_lock:
+                    for key, value in local.items():
+                        stats[key] += value
+
+        self.stdout.write(f'Running {threads} threads x {ops} operations against {item.short_code}...')
+        workers = [Thread(target=worker, args=(seed,)) for seed in range(threads)]
+        started = time.perf_counter()
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        total = threads * ops
+        self.stdout.write(f'  Elapsed:            {elapsed:.2f}s ({total / elapsed:.0f} ops/s)')
+        self.stdout.write(f'  Applied:            {stats["ok"]}')
+        self.stdout.write(f'  Insufficient stock: {stats["rejected"]}')
+        self.stdout.write(f'  Lock timeouts:      {stats["locked"]}')
+        self.stdout.write(f'  Other errors:       {stats["errors"]}')
+
+        consistent = True
+        ledger = InventoryTransaction.objects.filter(item=item)
+        for location in locations:
+            inflow = ledger.filter(to_location=location).aggregate(total=Sum('qty'))['total'] or Decimal('0')
+            outflow = ledger.filter(from_location=location).aggregate(total=Sum('qty'))['total'] or Decimal('0')
+            expected = initial_qty + inflow - outflow
+            actual = StockLevel.objects.get(item=item, location=location).on_hand_qty
+            matches = expected == actual and actual >= 0
+            consistent = consistent and matches
+            label = self.style.SUCCESS('OK') if matches else self.style.ERROR('MISMATCH')
+            self.stdout.write(f'  {location.name}: ledger={expected} stock={actual} [{label}]')
+
+        if not options['keep']:
+            with transaction.atomic():
+                InventoryTransaction.objects.filter(item=item).delete()
+                item.delete()
+                for location in locations:
+                    location.delete()
+
+        if consistent:
+            self.stdout.write(self.style.SUCCESS('Ledger matches StockLevel - no lost updates'))
+        else:
+            self.stdout.write(self.style.ERROR('Ledger and StockLevel disagree - lost updates detected'))
@@ -0,0 +1,78 @@
+from django.core.management.base import BaseCommand
+from random import Random
+import time
+
+from imh_ims.services.import_service import validate_rows, validation_workers
+
+
+class Command(BaseCommand):
+    help = 'Time import row validation serially and on the process pool over generated spreadsheet rows'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rows',
+            type=int,
+            default=100000,
+            help='Rows to validate (default: 100000)'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=None,
+            help='Pool size for the parallel run (default: settings.IMPORT_VALIDATION_WORKERS or the CPU count)'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=None,
+            help='Rows per batch (default: settings.IMPORT_VALIDATION_BATCH_SIZE)'
+        )
+
+    def handle(self, *args, **options):
+        rows = self.build_rows(options['rows'])
+        workers = options['workers'] or validation_workers()
+        self.stdout.write(f'{len(rows)} rows, {workers} worker(s)')
+
+        timings = {}
+        for label, pool_size in (('serial', 1), ('parallel', workers)):
+            started = time.perf_counter()
+            invalid = 0
+            last = 1
+            # parallel_after=0 puts every batch on the pool
+            validated = validate_rows(rows, workers=pool_size, batch_size=options['batch_size'], parallel_after=0)
+            for row_number, row, result in validated:
+                if row_number != last + 1:
+                    raise AssertionError(f'Row {row_number} returned after row {last}')
+                last = row_number
+                invalid += not result['valid']
+            timings[label] = time.perf_counter() - started
+            self.stdout.write(
+                f'  {label:<9} {timings[label]:8.2f}s  {len(rows) / timings[label]:9.0f} rows/s  {invalid} invalid'
+            )
+
+        speedup = timings['serial'] / timings['parallel']
+        style = self.style.SUCCESS if speedup > 1 else self.style.WARNING
+        self.stdout.write(style(f'Parallel speedup: {speedup:.2f}x'))
+
+    def build_rows(self, count):
+        """Rows shaped like SpreadsheetReader output; about 2% carry a validation error"""
+        rng = Random(count)
+        rows = []
+        for n in range(count):
+            row = {
+                'name': f'Benchmark Validation Item {n:06d}',
+                'short_code': f'BENCH-VAL-{n:06d}',
+                'category': 'Benchmark Validation',
+                'default_vendor': f'Benchmark Vendor {rng.randrange(50)}',
+                'unit_of_measure': 'ea',
+                'cost': f'{rng.randint(100, 10000) / 100:.2f}',
+                'lead_time_days': str(rng.randint(0, 14)),
+                'is_active': 'true',
+                'location_name': f'Benchmark Location {rng.randrange(20)}',
+                'on_hand_qty': str(rng.randint(0, 40)),
+                'par': str(rng.randint(0, 30))
+            }
+            if rng.random() < 0.02:
+                row['cost'] = 'n/a'
+            rows.append(row)
+        return rows
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand, CommandError
+import time
+
+from imh_ims.services.search_service import ItemSearchService
+
+
+class Command(BaseCommand):
+    help = 'Create the item search index if it is missing and reindex every item'
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        if ItemSearchService.ensure_index():
+            self.stdout.write('Created the item search index')
+        if not ItemSearchService.available():
+            raise CommandError(
+                f'No search index on this database ({ItemSearchService.vendor()}); '
+                'searches use the unindexed fallback'
+            )
+        count = ItemSearchService.rebuild()
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f'Indexed {count} items in {elapsed:.2f}s'))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+import time
+
+from imh_ims.services.rollup_service import StockRollupService
+
+
+class Command(BaseCommand):
+    help = 'Recompute the per-item and per-property on-hand rollups from StockLevel'
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        count = StockRollupService.rebuild()
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt stock rollups for {count} items in {elapsed:.2f}s'))
@@ -0,0 +1,79 @@
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connections
+import time
+
+from imh_ims.services.import_job_service import ImportJobService
+
+
+class Command(BaseCommand):
+    help = 'Process queued spreadsheet import jobs in a local thread pool'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--threads',
+            type=int,
+            default=None,
+            help='Jobs processed at once (default: settings.IMPORT_WORKER_THREADS)'
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=2.0,
+            help='Seconds between checks for new jobs (default: 2)'
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Exit once the queue is empty instead of waiting for new jobs'
+        )
+
+    def handle(self, *args, **options):
+        threads = options['threads'] or getattr(settings, 'IMPORT_WORKER_THREADS', 1)
+        worker = ImportJobService.worker_name()
+        self.stdout.write(f'Import worker {worker} with {threads} thread(s)')
+
+        running = set()
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            try:
+                while True:
+                    requeued = ImportJobService.requeue_abandoned()
+                    if requeued:
+                        self.stdout.write(self.style.WARNING(f'Re-queued {requeued} interrupted job(s)'))
+
+                    while len(running) < threads:
+                        job = ImportJobService.claim_next(worker)
+                        if job is None:
+                            break
+                        self.stdout.write(f'  Job {job.id}: {job.original_name} (resuming after row {job.rows_done})')
+                        running.add(pool.submit(self.run_job, job))
+
+                    if not running:
+                        if options['once']:
+                            break
+                        close_old_connections()
+                        time.sleep(options['poll_interval'])
+                        continue
+
+                    done, running = wait(running, timeout=options['poll_interval'], return_when=FIRST_COMPLETED)
+                    running = set(running)
+                    for future in done:
+                        job = future.result()
+                        style = self.style.SUCCESS if job.status == 'COMPLETED' else self.style.ERROR
+                        self.stdout.write(style(
+                            f'  Job {job.id}: {job.status} {job.rows_done}/{job.total_rows} rows, '
+                            f'{job.error_count} errors, {job.rows_per_second or 0} rows/s'
+                        ))
+            except KeyboardInterrupt:
+                # Jobs cut short by a second interrupt resume from their last checkpoint on the next start
+                self.stdout.write(self.style.WARNING('Stopping after the running jobs finish (interrupt again to abort)'))
+                for future in running:
+                    future.cancel()
+
+    @staticmethod
+    def run_job(job):
+        try:
+            return ImportJobService.run(job)
+        finally:
+            connections.close_all()
@@ -19,6 +19,7 @@ from imh_ims.models import (
     PurchaseRequest, PurchaseRequestLine, InventoryTransaction,
     UserProfile
 )
+from imh_ims.services.usage_service import DailyUsageService
 
 fake = Faker()
 
@@ -586,6 +587,9 @@ class Command(BaseCommand):
             InventoryTransaction.objects.bulk_create(batch)
             transactions.extend(batch)
         
+        # bulk_create skips the writers that keep the usage rollup current
+        DailyUsageService.rebuild()
+        
         self.stdout.write(self.style.SUCCESS(f'  [OK] Created {len(transactions)} transactions'))
         return transactions
 
@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from datetime import timedelta
+import time
+
+from imh_ims.services.alert_snapshot_service import AlertSnapshotService
+
+
+class Command(BaseCommand):
+    help = (
+        "Write today's DailyAlertSnapshot rows from current stock (schedule nightly, "
+        "shortly before midnight). --backfill-days derives earlier days from the ledger."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--backfill-days',
+            type=int,
+            default=0,
+            help='Also rebuild the previous N days from the transaction ledger'
+        )
+        parser.add_argument(
+            '--skip-today',
+            action='store_true',
+            help='Only run the backfill, do not snapshot today'
+        )
+
+    def handle(self, *args, **options):
+        today = timezone.localdate()
+        backfill_days = options['backfill_days']
+        if backfill_days < 0:
+            raise CommandError('--backfill-days must be zero or positive')
+
+        if backfill_days:
+            started = time.perf_counter()
+            written = AlertSnapshotService.backfill(today - timedelta(days=backfill_days), today - timedelta(days=1))
+            elapsed = time.perf_counter() - started
+            self.stdout.write(f'Backfilled {backfill_days} days ({written} location rows) in {elapsed:.2f}s')
+
+        if not options['skip_today']:
+            started = time.perf_counter()
+            written = AlertSnapshotService.snapshot_day(today)
+            elapsed = time.perf_counter() - started
+            self.stdout.write(self.style.SUCCESS(f'Snapshot for {today}: {written} location rows in {elapsed:.2f}s'))
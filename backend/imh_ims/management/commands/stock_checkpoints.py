@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand
+import time
+
+from imh_ims.services.ledger_service import LedgerService
+
+
+class Command(BaseCommand):
+    help = (
+        'Write stock checkpoints used by as-of stock queries. '
+        'By default snapshots current StockLevel (schedule this periodically); '
+        'use --rebuild to replay the whole ledger into historical checkpoints.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rebuild',
+            action='store_true',
+            help='Replay the full ledger into checkpoints every --interval-days'
+        )
+        parser.add_argument(
+            '--interval-days',
+            type=int,
+            default=30,
+            help='Days between replayed checkpoints (default: 30)'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=None,
+            help='Replay worker processes (default: CPU count)'
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        if not options['rebuild']:
+            written = LedgerService.create_snapshot()
+            elapsed = time.perf_counter() - started
+            self.stdout.write(self.style.SUCCESS(f'Wrote {written} snapshot checkpoints in {elapsed:.2f}s'))
+            return
+
+        stats = LedgerService.rebuild_checkpoints(
+            interval_days=options['interval_days'],
+            workers=options['workers']
+        )
+        elapsed = time.perf_counter() - started
+        self.stdout.write(f'  Items replayed:        {stats["items"]}')
+        self.stdout.write(f'  Ledger rows replayed:  {stats["transactions"]}')
+        self.stdout.write(f'  Checkpoint times:      {stats["boundaries"]}')
+        self.stdout.write(f'  Adjustments backfilled: {stats["backfilled"]}')
+        self.stdout.write(self.style.SUCCESS(f'Wrote {stats["checkpoints"]} replay checkpoints in {elapsed:.2f}s'))
@@ -0,0 +1,90 @@
+# Generated migration for per-item stock rollups
+
+import django.db.models.deletion
+from collections import defaultdict
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import Sum, Count
+
+
+def populate_rollups(apps, schema_editor):
+    """Build the initial rollups from existing StockLevel rows in one GROUP BY"""
+    Item = apps.get_model('imh_ims', 'Item')
+    StockLevel = apps.get_model('imh_ims', 'StockLevel')
+    ItemPropertyStock = apps.get_model('imh_ims', 'ItemPropertyStock')
+    ItemStockSummary = apps.get_model('imh_ims', 'ItemStockSummary')
+
+    totals = defaultdict(dict)
+    rows = []
+    grouped = StockLevel.objects.values('item_id', 'location__property_id').annotate(
+        on_hand=Sum('on_hand_qty'),
+        reserved=Sum('reserved_qty'),
+        locations=Count('id')
+    ).order_by()
+    for row in grouped:
+        prop_id = row['location__property_id'] or ''
+        rows.append(ItemPropertyStock(
+            item_id=row['item_id'],
+            property_id=prop_id,
+            on_hand_qty=row['on_hand'] or Decimal('0'),
+            reserved_qty=row['reserved'] or Decimal('0'),
+            location_count=row['locations']
+        ))
+        totals[row['item_id']][prop_id] = rows[-1]
+    ItemPropertyStock.objects.bulk_create(rows, batch_size=1000)
+
+    summaries = []
+    for item_id in Item.objects.values_list('id', flat=True):
+        by_property = totals.get(item_id, {})
+        primary = min(by_property, key=lambda p: (-by_property[p].on_hand_qty, p)) if by_property else ''
+        summaries.append(ItemStockSummary(
+            item_id=item_id,
+            global_on_hand=sum((r.on_hand_qty for r in by_property.values()), Decimal('0')),
+            global_reserved=sum((r.reserved_qty for r in by_property.values()), Decimal('0')),
+            location_count=sum(r.location_count for r in by_property.values()),
+            primary_property_id=primary,
+            primary_property_on_hand=by_property[primary].on_hand_qty if by_property else Decimal('0')
+        ))
+    ItemStockSummary.objects.bulk_create(summaries, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('imh_ims', '0006_rename_imh_ims_module_module_8a1b2d_idx_imh_ims_mod_module_1b05b6_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ItemPropertyStock',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('property_id', models.CharField(blank=True, max_length=50)),
+                ('on_hand_qty', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('reserved_qty', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('location_count', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='property_stock', to='imh_ims.item')),
+            ],
+            options={
+                'ordering': ['item', 'property_id'],
+                'unique_together': {('item', 'property_id')},
+            },
+        ),
+        migrations.CreateModel(
+            name='ItemStockSummary',
+            fields=[
+                ('item', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stock_summary', serialize=False, to='imh_ims.item')),
+                ('global_on_hand', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('global_reserved', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('location_count', models.IntegerField(default=0)),
+                ('primary_property_id', models.CharField(blank=True, help_text='Property holding the most stock for this item', max_length=50)),
+                ('primary_property_on_hand', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'Item stock summaries',
+            },
+        ),
+        migrations.RunPython(populate_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,35 @@
+# Generated migration for signed ledger deltas and stock checkpoints
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('imh_ims', '0007_stock_rollups'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='inventorytransaction',
+            name='qty_delta',
+            field=models.DecimalField(blank=True, decimal_places=2, help_text='Signed on-hand change at the adjusted location (adjustments only)', max_digits=10, null=True),
+        ),
+        migrations.CreateModel(
+            name='StockCheckpoint',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('as_of', models.DateTimeField()),
+                ('on_hand_qty', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('source', models.CharField(choices=[('SNAPSHOT', 'Snapshot'), ('REPLAY', 'Ledger Replay')], default='SNAPSHOT', max_length=10)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_checkpoints', to='imh_ims.item')),
+                ('location', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_checkpoints', to='imh_ims.location')),
+            ],
+            options={
+                'ordering': ['-as_of', 'item', 'location'],
+                'unique_together': {('as_of', 'item', 'location')},
+            },
+        ),
+    ]
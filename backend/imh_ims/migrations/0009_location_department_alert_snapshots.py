@@ -0,0 +1,85 @@
+# Generated migration for location departments and daily alert snapshots
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def create_missing_department_schema(apps, schema_editor):
+    """
+    Department and UserProfile.department were added to the models without a
+    migration, so some databases already have them and some do not.
+    Create the table/column only where they are missing.
+    """
+    connection = schema_editor.connection
+    Department = apps.get_model('imh_ims', 'Department')
+    UserProfile = apps.get_model('imh_ims', 'UserProfile')
+
+    if Department._meta.db_table not in connection.introspection.table_names():
+        schema_editor.create_model(Department)
+
+    with connection.cursor() as cursor:
+        columns = [
+            column.name
+            for column in connection.introspection.get_table_description(cursor, UserProfile._meta.db_table)
+        ]
+    if 'department_id' not in columns:
+        schema_editor.add_field(UserProfile, UserProfile._meta.get_field('department'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('imh_ims', '0008_ledger_checkpoints'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.CreateModel(
+                    name='Department',
+                    fields=[
+                        ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                        ('name', models.CharField(max_length=200, unique=True)),
+                        ('code', models.CharField(blank=True, help_text='Department code', max_length=50, unique=True)),
+                        ('description', models.TextField(blank=True)),
+                        ('is_active', models.BooleanField(default=True)),
+                        ('created_at', models.DateTimeField(auto_now_add=True)),
+                        ('updated_at', models.DateTimeField(auto_now=True)),
+                    ],
+                    options={
+                        'ordering': ['name'],
+                    },
+                ),
+                migrations.AddField(
+                    model_name='userprofile',
+                    name='department',
+                    field=models.ForeignKey(blank=True, help_text="User's department assignment", null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='members', to='imh_ims.department'),
+                ),
+            ],
+        ),
+        migrations.RunPython(create_missing_department_schema, migrations.RunPython.noop),
+        migrations.AddField(
+            model_name='location',
+            name='department',
+            field=models.ForeignKey(blank=True, help_text='Department that owns this location', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='locations', to='imh_ims.department'),
+        ),
+        migrations.CreateModel(
+            name='DailyAlertSnapshot',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('stock_lines', models.IntegerField(default=0, help_text='Active-item stock lines at the location')),
+                ('below_par_count', models.IntegerField(default=0)),
+                ('at_risk_count', models.IntegerField(default=0)),
+                ('stock_value', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('location', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='alert_snapshots', to='imh_ims.location')),
+                ('department', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='alert_snapshots', to='imh_ims.department')),
+            ],
+            options={
+                'ordering': ['-day', 'location'],
+                'indexes': [models.Index(fields=['department', 'day'], name='imh_ims_dai_departm_0dd70d_idx')],
+                'unique_together': {('day', 'location')},
+            },
+        ),
+    ]
@@ -0,0 +1,64 @@
+# Generated migration for ledger archival
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('imh_ims', '0009_location_department_alert_snapshots'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='stockcheckpoint',
+            name='source',
+            field=models.CharField(choices=[('SNAPSHOT', 'Snapshot'), ('REPLAY', 'Ledger Replay'), ('ARCHIVE', 'Archive Boundary')], default='SNAPSHOT', max_length=10),
+        ),
+        migrations.CreateModel(
+            name='LedgerArchivePartition',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(help_text='First day of the archived month')),
+                ('part', models.PositiveIntegerField(default=1)),
+                ('path', models.CharField(help_text='Archive file path relative to LEDGER_ARCHIVE_ROOT', max_length=255)),
+                ('index_path', models.CharField(help_text='Index file path relative to LEDGER_ARCHIVE_ROOT', max_length=255)),
+                ('row_count', models.IntegerField(default=0)),
+                ('item_count', models.IntegerField(default=0)),
+                ('size_bytes', models.BigIntegerField(default=0)),
+                ('first_timestamp', models.DateTimeField(blank=True, null=True)),
+                ('last_timestamp', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['-month', '-part'],
+                'unique_together': {('month', 'part')},
+            },
+        ),
+        migrations.CreateModel(
+            name='LedgerMonthlySummary',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(help_text='First day of the summarized month')),
+                ('transaction_count', models.IntegerField(default=0)),
+                ('issue_count', models.IntegerField(default=0)),
+                ('receive_count', models.IntegerField(default=0)),
+                ('issued_qty', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('received_qty', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('transferred_in_qty', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('transferred_out_qty', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('adjusted_qty', models.DecimalField(decimal_places=2, default=0, help_text='Net signed change from adjustments', max_digits=14)),
+                ('cost_total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('cost_count', models.IntegerField(default=0, help_text='Rows with a positive recorded cost')),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ledger_summaries', to='imh_ims.item')),
+                ('location', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='ledger_summaries', to='imh_ims.location')),
+            ],
+            options={
+                'verbose_name_plural': 'Ledger monthly summaries',
+                'ordering': ['-month', 'item'],
+                'indexes': [models.Index(fields=['month'], name='imh_ims_led_month_6d7c3c_idx')],
+                'unique_together': {('item', 'location', 'month')},
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated migration for keyset pagination indexes
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('imh_ims', '0010_ledger_archive'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='countsession',
+            index=models.Index(fields=['-started_at', '-id'], name='imh_ims_cou_started_06da72_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='item',
+            index=models.Index(fields=['name', 'id'], name='imh_ims_ite_name_ae41a7_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='requisition',
+            index=models.Index(fields=['-created_at', '-id'], name='imh_ims_req_created_101c30_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='stocklevel',
+            index=models.Index(fields=['location', 'item'], name='imh_ims_sto_locatio_15af91_idx'),
+        ),
+    ]
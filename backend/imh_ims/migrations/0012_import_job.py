@@ -0,0 +1,41 @@
+# Generated migration for background import jobs
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('imh_ims', '0011_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportJob',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file', models.FileField(upload_to='imports/%Y/%m/')),
+                ('original_name', models.CharField(max_length=255)),
+                ('column_mapping', models.JSONField(blank=True, null=True)),
+                ('status', models.CharField(choices=[('QUEUED', 'Queued'), ('RUNNING', 'Running'), ('COMPLETED', 'Completed'), ('FAILED', 'Failed')], default='QUEUED', max_length=20)),
+                ('total_rows', models.IntegerField(blank=True, help_text='Data rows in the file, once parsed', null=True)),
+                ('rows_done', models.IntegerField(default=0, help_text='File rows covered by committed chunks')),
+                ('results', models.JSONField(blank=True, default=dict, help_text='Import counters and row errors so far')),
+                ('processing_seconds', models.FloatField(default=0, help_text='Worker time spent on committed chunks')),
+                ('failure', models.TextField(blank=True)),
+                ('worker', models.CharField(blank=True, max_length=100)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('heartbeat_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='import_jobs', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', 'created_at'], name='imh_ims_imp_status_815ca2_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated migration for stored demand forecasts
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('imh_ims', '0012_import_job'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DemandForecast',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('method', models.CharField(choices=[('HOLT_WINTERS', 'Holt-Winters'), ('CROSTON', 'Croston')], max_length=20)),
+                ('start_day', models.DateField(help_text='Day of the first forecast value')),
+                ('forecast', models.JSONField(default=list)),
+                ('lower', models.JSONField(default=list)),
+                ('upper', models.JSONField(default=list)),
+                ('sigma', models.FloatField(default=0, help_text="Standard deviation of the fit's one-day errors")),
+                ('demand_days', models.IntegerField(default=0, help_text='Days with issues in the history window')),
+                ('generated_at', models.DateTimeField()),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='demand_forecasts', to='imh_ims.item')),
+                ('location', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='demand_forecasts', to='imh_ims.location')),
+            ],
+            options={
+                'ordering': ['item', 'location'],
+                'indexes': [models.Index(fields=['generated_at'], name='imh_ims_dem_generat_01bd18_idx')],
+                'unique_together': {('item', 'location')},
+            },
+        ),
+    ]
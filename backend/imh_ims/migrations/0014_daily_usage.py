@@ -0,0 +1,124 @@
+# Generated migration for the daily usage rollup
+
+import django.db.models.deletion
+import gzip
+import json
+from collections import defaultdict
+from decimal import Decimal
+from pathlib import Path
+from zoneinfo import ZoneInfo
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Case, Count, DecimalField, F, Q, Sum, Value, When
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+ADJUST_TYPES = ('ADJUST', 'COUNT_ADJUST')
+
+
+def _empty_usage():
+    return {'qty': Decimal('0'), 'cost': Decimal('0'), 'cost_count': 0, 'txn_count': 0}
+
+
+def _archived_usage(LedgerArchivePartition, site_tz, totals):
+    """Fold every archived ledger row into totals, as DailyUsageService.rebuild() does"""
+    root = Path(getattr(settings, 'LEDGER_ARCHIVE_ROOT', Path(settings.MEDIA_ROOT) / 'archive'))
+    for partition in LedgerArchivePartition.objects.order_by('month', 'part'):
+        with gzip.open(root / partition.path, 'rt', encoding='utf-8') as archive_file:
+            for line in archive_file:
+                if not line.strip():
+                    continue
+                row = json.loads(line)
+                trans_type = row['type']
+                if trans_type in ('ISSUE', 'TRANSFER'):
+                    location_id = row['from_location_id']
+                elif trans_type in ADJUST_TYPES:
+                    location_id = row['to_location_id'] or row['from_location_id']
+                else:
+                    location_id = row['to_location_id']
+                day = timezone.localtime(parse_datetime(row['timestamp']), site_tz).date()
+                usage = totals[(row['item_id'], location_id, trans_type, day)]
+                if trans_type in ADJUST_TYPES:
+                    usage['qty'] += Decimal(row['qty_delta'] or 0)
+                else:
+                    usage['qty'] += Decimal(row['qty'])
+                usage['txn_count'] += 1
+                if row['cost'] is not None and Decimal(row['cost']) > 0:
+                    usage['cost'] += Decimal(row['cost'])
+                    usage['cost_count'] += 1
+
+
+def populate_daily_usage(apps, schema_editor):
+    """Build the initial rollup from the archive and the hot ledger in one GROUP BY"""
+    InventoryTransaction = apps.get_model('imh_ims', 'InventoryTransaction')
+    LedgerArchivePartition = apps.get_model('imh_ims', 'LedgerArchivePartition')
+    DailyUsage = apps.get_model('imh_ims', 'DailyUsage')
+    site_tz = ZoneInfo(getattr(settings, 'SITE_TIME_ZONE', settings.TIME_ZONE))
+
+    totals = defaultdict(_empty_usage)
+    _archived_usage(LedgerArchivePartition, site_tz, totals)
+
+    positive_cost = Q(cost__gt=0)
+    grouped = InventoryTransaction.objects.annotate(
+        location=Case(
+            When(type__in=('ISSUE', 'TRANSFER'), then=F('from_location_id')),
+            When(type__in=ADJUST_TYPES, then=Coalesce('to_location_id', 'from_location_id')),
+            default=F('to_location_id')
+        ),
+        day=TruncDate('timestamp', tzinfo=site_tz)
+    ).values('item_id', 'location', 'type', 'day').annotate(
+        moved=Sum(Case(
+            When(type__in=ADJUST_TYPES, then=Coalesce('qty_delta', Value(Decimal('0')))),
+            default=F('qty'),
+            output_field=DecimalField(max_digits=14, decimal_places=2)
+        )),
+        cost_total=Sum('cost', filter=positive_cost),
+        costed=Count('id', filter=positive_cost),
+        rows=Count('id')
+    ).order_by()
+    for row in grouped.iterator(chunk_size=10000):
+        usage = totals[(row['item_id'], row['location'], row['type'], row['day'])]
+        usage['qty'] += row['moved'] or 0
+        usage['cost'] += row['cost_total'] or 0
+        usage['cost_count'] += row['costed']
+        usage['txn_count'] += row['rows']
+
+    DailyUsage.objects.bulk_create(
+        (
+            DailyUsage(item_id=item_id, location_id=location_id, type=trans_type, day=day, **usage)
+            for (item_id, location_id, trans_type, day), usage in totals.items()
+        ),
+        batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('imh_ims', '0013_demand_forecast'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyUsage',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('type', models.CharField(choices=[('RECEIVE', 'Receive'), ('ISSUE', 'Issue'), ('TRANSFER', 'Transfer'), ('ADJUST', 'Adjust'), ('COUNT_ADJUST', 'Count Adjust')], max_length=20)),
+                ('day', models.DateField(help_text='Calendar day in SITE_TIME_ZONE')),
+                ('qty', models.DecimalField(decimal_places=2, default=0, help_text='Quantity moved; the net signed change for adjustments', max_digits=14)),
+                ('cost', models.DecimalField(decimal_places=2, default=0, help_text='Sum of positive recorded costs', max_digits=14)),
+                ('cost_count', models.IntegerField(default=0, help_text='Rows with a positive recorded cost')),
+                ('txn_count', models.IntegerField(default=0)),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_usage', to='imh_ims.item')),
+                ('location', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='daily_usage', to='imh_ims.location')),
+            ],
+            options={
+                'verbose_name_plural': 'Daily usage',
+                'ordering': ['-day', 'item'],
+                'indexes': [models.Index(fields=['type', 'day'], name='imh_ims_dai_type_7429a2_idx')],
+                'unique_together': {('item', 'location', 'type', 'day')},
+            },
+        ),
+        migrations.RunPython(populate_daily_usage, migrations.RunPython.noop),
+    ]
@@ -12,6 +12,13 @@ from .permission import ModulePermission, UserPermission
 from .department import Department
 from .physical_change_request import PhysicalChangeRequest, PhysicalChangeRequestLine
 from .requested_item import RequestedItem
+from .rollup import ItemPropertyStock, ItemStockSummary
+from .checkpoint import StockCheckpoint
+from .snapshot import DailyAlertSnapshot
+from .archive import LedgerArchivePartition, LedgerMonthlySummary
+from .import_job import ImportJob
+from .forecast import DemandForecast
+from .usage import DailyUsage
 
 __all__ = [
     'Category',
@@ -33,5 +40,14 @@ __all__ = [
     'PhysicalChangeRequest',
     'PhysicalChangeRequestLine',
     'RequestedItem',
+    'ItemPropertyStock',
+    'ItemStockSummary',
+    'StockCheckpoint',
+    'DailyAlertSnapshot',
+    'LedgerArchivePartition',
+    'LedgerMonthlySummary',
+    'ImportJob',
+    'DemandForecast',
+    'DailyUsage',
 ]
 
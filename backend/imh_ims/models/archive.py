@@ -0,0 +1,75 @@
+from django.db import models
+
+
+class LedgerArchivePartition(models.Model):
+    """
+    One compressed archive file of InventoryTransaction rows for a calendar month.
+    The file is a sequence of gzip members, one per item, and the sidecar index
+    maps item_id -> (offset, length) so one item's rows can be read alone.
+    A month archived more than once (late, back-dated rows) gets another part.
+    """
+    month = models.DateField(help_text="First day of the archived month")
+    part = models.PositiveIntegerField(default=1)
+    path = models.CharField(max_length=255, help_text="Archive file path relative to LEDGER_ARCHIVE_ROOT")
+    index_path = models.CharField(max_length=255, help_text="Index file path relative to LEDGER_ARCHIVE_ROOT")
+    row_count = models.IntegerField(default=0)
+    item_count = models.IntegerField(default=0)
+    size_bytes = models.BigIntegerField(default=0)
+    first_timestamp = models.DateTimeField(null=True, blank=True)
+    last_timestamp = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = [['month', 'part']]
+        ordering = ['-month', '-part']
+
+    def __str__(self):
+        return f"Ledger archive {self.month:%Y-%m} part {self.part} ({self.row_count} rows)"
+
+
+class LedgerMonthlySummary(models.Model):
+    """
+    Rolled-up ledger activity per (item, location, month) for archived months,
+    so reports keep their history after the raw rows leave the hot table.
+    Each ledger row is counted once, at its primary location (the source of
+    issues and transfers, the destination of receipts, the adjusted location).
+    """
+    item = models.ForeignKey(
+        'Item',
+        on_delete=models.CASCADE,
+        related_name='ledger_summaries'
+    )
+    location = models.ForeignKey(
+        'Location',
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='ledger_summaries'
+    )
+    month = models.DateField(help_text="First day of the summarized month")
+    transaction_count = models.IntegerField(default=0)
+    issue_count = models.IntegerField(default=0)
+    receive_count = models.IntegerField(default=0)
+    issued_qty = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    received_qty = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    transferred_in_qty = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    transferred_out_qty = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    adjusted_qty = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        default=0,
+        help_text="Net signed change from adjustments"
+    )
+    cost_total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    cost_count = models.IntegerField(default=0, help_text="Rows with a positive recorded cost")
+
+    class Meta:
+        unique_together = [['item', 'location', 'month']]
+        ordering = ['-month', 'item']
+        indexes = [
+            models.Index(fields=['month']),
+        ]
+        verbose_name_plural = "Ledger monthly summaries"
+
+    def __str__(self):
+        return f"{self.item_id} @ {self.location_id} {self.month:%Y-%m}: {self.transaction_count} rows"
@@ -0,0 +1,36 @@
+from django.db import models
+
+
+class StockCheckpoint(models.Model):
+    """
+    On-hand quantity of an item at a location as of a point in time.
+    Checkpoints are written in complete batches sharing one as_of timestamp:
+    an (item, location) pair missing from a batch had nothing on hand then.
+    """
+    SOURCE_CHOICES = [
+        ('SNAPSHOT', 'Snapshot'),
+        ('REPLAY', 'Ledger Replay'),
+        ('ARCHIVE', 'Archive Boundary'),
+    ]
+
+    item = models.ForeignKey(
+        'Item',
+        on_delete=models.CASCADE,
+        related_name='stock_checkpoints'
+    )
+    location = models.ForeignKey(
+        'Location',
+        on_delete=models.CASCADE,
+        related_name='stock_checkpoints'
+    )
+    as_of = models.DateTimeField()
+    on_hand_qty = models.DecimalField(max_digits=12, decimal_places=2)
+    source = models.CharField(max_length=10, choices=SOURCE_CHOICES, default='SNAPSHOT')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = [['as_of', 'item', 'location']]
+        ordering = ['-as_of', 'item', 'location']
+
+    def __str__(self):
+        return f"{self.item_id} @ {self.location_id} as of {self.as_of}: {self.on_hand_qty}"
@@ -36,6 +36,9 @@ class CountSession(models.Model):
 
     class Meta:
         ordering = ['-started_at']
+        indexes = [
+            models.Index(fields=['-started_at', '-id']),
+        ]
 
     def __str__(self):
         return f"Count #{self.id}: {self.location.name} ({self.status})"
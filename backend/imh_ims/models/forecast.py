@@ -0,0 +1,42 @@
+from django.db import models
+
+
+class DemandForecast(models.Model):
+    """
+    Daily issue forecast for one item at one location, replaced in bulk by
+    `manage.py forecast_demand`. forecast, lower and upper hold one value per
+    day from start_day: the expected quantity and the prediction bounds.
+    """
+    METHODS = [
+        ('HOLT_WINTERS', 'Holt-Winters'),
+        ('CROSTON', 'Croston'),
+    ]
+
+    item = models.ForeignKey(
+        'Item',
+        on_delete=models.CASCADE,
+        related_name='demand_forecasts'
+    )
+    location = models.ForeignKey(
+        'Location',
+        on_delete=models.CASCADE,
+        related_name='demand_forecasts'
+    )
+    method = models.CharField(max_length=20, choices=METHODS)
+    start_day = models.DateField(help_text="Day of the first forecast value")
+    forecast = models.JSONField(default=list)
+    lower = models.JSONField(default=list)
+    upper = models.JSONField(default=list)
+    sigma = models.FloatField(default=0, help_text="Standard deviation of the fit's one-day errors")
+    demand_days = models.IntegerField(default=0, help_text="Days with issues in the history window")
+    generated_at = models.DateTimeField()
+
+    class Meta:
+        unique_together = [['item', 'location']]
+        ordering = ['item', 'location']
+        indexes = [
+            models.Index(fields=['generated_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.item_id}@{self.location_id} from {self.start_day} ({self.method})"
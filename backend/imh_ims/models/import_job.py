@@ -0,0 +1,58 @@
+from django.db import models
+from django.contrib.auth.models import User
+
+
+class ImportJob(models.Model):
+    """
+    A spreadsheet upload waiting for or being processed by the import worker
+    (`manage.py run_import_worker`). `rows_done` and `results` are saved in
+    the same transaction as each imported chunk, so a restarted worker picks
+    up after the last committed chunk.
+    """
+    STATUS_CHOICES = [
+        ('QUEUED', 'Queued'),
+        ('RUNNING', 'Running'),
+        ('COMPLETED', 'Completed'),
+        ('FAILED', 'Failed'),
+    ]
+
+    file = models.FileField(upload_to='imports/%Y/%m/')
+    original_name = models.CharField(max_length=255)
+    column_mapping = models.JSONField(null=True, blank=True)
+    created_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='import_jobs'
+    )
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='QUEUED')
+    total_rows = models.IntegerField(null=True, blank=True, help_text="Data rows in the file, once parsed")
+    rows_done = models.IntegerField(default=0, help_text="File rows covered by committed chunks")
+    results = models.JSONField(default=dict, blank=True, help_text="Import counters and row errors so far")
+    processing_seconds = models.FloatField(default=0, help_text="Worker time spent on committed chunks")
+    failure = models.TextField(blank=True)
+    worker = models.CharField(max_length=100, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"Import {self.id} ({self.original_name}): {self.status}"
+
+    @property
+    def error_count(self):
+        return len(self.results.get('errors', []))
+
+    @property
+    def rows_per_second(self):
+        if not self.processing_seconds:
+            return None
+        return round(self.rows_done / self.processing_seconds, 1)
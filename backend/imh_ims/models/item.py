@@ -44,6 +44,9 @@ class Item(models.Model):
 
     class Meta:
         ordering = ['name']
+        indexes = [
+            models.Index(fields=['name', 'id']),
+        ]
 
     def __str__(self):
         return f"{self.name} ({self.short_code})"
@@ -23,6 +23,14 @@ class Location(models.Model):
         related_name='child_locations',
         help_text="For hierarchical structure (e.g., Floor -> Closet)"
     )
+    department = models.ForeignKey(
+        'Department',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='locations',
+        help_text="Department that owns this location"
+    )
     floorplan_id = models.CharField(max_length=100, blank=True, help_text="Link to Floor Plan IMS")
     coordinates = models.CharField(max_length=100, blank=True, help_text="Coordinates on floor plan")
     is_active = models.BooleanField(default=True)
@@ -55,6 +55,9 @@ class Requisition(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at', '-id']),
+        ]
 
     def __str__(self):
         return f"Req #{self.id}: {self.from_location.name} -> {self.to_location.name} ({self.status})"
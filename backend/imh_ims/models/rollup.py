@@ -0,0 +1,52 @@
+from django.db import models
+
+
+class ItemPropertyStock(models.Model):
+    """
+    Per-property stock rollup for an item.
+    Maintained by StockService in the same transaction as each stock mutation;
+    rebuild with `manage.py rebuild_stock_rollups`.
+    """
+    item = models.ForeignKey(
+        'Item',
+        on_delete=models.CASCADE,
+        related_name='property_stock'
+    )
+    property_id = models.CharField(max_length=50, blank=True)
+    on_hand_qty = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    reserved_qty = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    location_count = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = [['item', 'property_id']]
+        ordering = ['item', 'property_id']
+
+    def __str__(self):
+        return f"{self.item_id} @ {self.property_id or '(none)'}: {self.on_hand_qty}"
+
+
+class ItemStockSummary(models.Model):
+    """Global on-hand total and primary property for an item"""
+    item = models.OneToOneField(
+        'Item',
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stock_summary'
+    )
+    global_on_hand = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    global_reserved = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    location_count = models.IntegerField(default=0)
+    primary_property_id = models.CharField(
+        max_length=50,
+        blank=True,
+        help_text="Property holding the most stock for this item"
+    )
+    primary_property_on_hand = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = "Item stock summaries"
+
+    def __str__(self):
+        return f"{self.item_id}: {self.global_on_hand}"
@@ -0,0 +1,37 @@
+from django.db import models
+
+
+class DailyAlertSnapshot(models.Model):
+    """
+    End-of-day alert and value totals for one location.
+    Written set-based by `manage.py snapshot_alerts`; the department is copied
+    from the location at snapshot time so history survives reassignments.
+    """
+    day = models.DateField()
+    location = models.ForeignKey(
+        'Location',
+        on_delete=models.CASCADE,
+        related_name='alert_snapshots'
+    )
+    department = models.ForeignKey(
+        'Department',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='alert_snapshots'
+    )
+    stock_lines = models.IntegerField(default=0, help_text="Active-item stock lines at the location")
+    below_par_count = models.IntegerField(default=0)
+    at_risk_count = models.IntegerField(default=0)
+    stock_value = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = [['day', 'location']]
+        ordering = ['-day', 'location']
+        indexes = [
+            models.Index(fields=['department', 'day']),
+        ]
+
+    def __str__(self):
+        return f"{self.day} {self.location_id}: {self.below_par_count} below par"
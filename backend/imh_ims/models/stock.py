@@ -48,6 +48,9 @@ class StockLevel(models.Model):
     class Meta:
         unique_together = [['item', 'location']]
         ordering = ['item__name']
+        indexes = [
+            models.Index(fields=['location', 'item']),
+        ]
 
     def __str__(self):
         return f"{self.item.name} at {self.location.name}: {self.on_hand_qty}"
@@ -37,6 +37,15 @@ class InventoryTransaction(models.Model):
         decimal_places=2,
         validators=[MinValueValidator(0)]
     )
+    # ADJUST/COUNT_ADJUST rows store the absolute new quantity in qty; the signed
+    # change it caused is kept here so the ledger can be replayed
+    qty_delta = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        null=True,
+        blank=True,
+        help_text="Signed on-hand change at the adjusted location (adjustments only)"
+    )
     type = models.CharField(max_length=20, choices=TRANSACTION_TYPES)
     timestamp = models.DateTimeField(auto_now_add=True)
     user = models.ForeignKey(
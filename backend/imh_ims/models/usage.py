@@ -0,0 +1,47 @@
+from django.db import models
+
+from .transaction import InventoryTransaction
+
+
+class DailyUsage(models.Model):
+    """
+    Ledger activity per (item, location, type, site-local day), kept current
+    by StockService in the same transaction as the ledger rows, and rebuilt
+    from the hot ledger and its archives by `manage.py backfill_daily_usage`.
+    Each row is counted once, at its primary location, as in
+    LedgerMonthlySummary.
+    """
+    item = models.ForeignKey(
+        'Item',
+        on_delete=models.CASCADE,
+        related_name='daily_usage'
+    )
+    location = models.ForeignKey(
+        'Location',
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='daily_usage'
+    )
+    type = models.CharField(max_length=20, choices=InventoryTransaction.TRANSACTION_TYPES)
+    day = models.DateField(help_text="Calendar day in SITE_TIME_ZONE")
+    qty = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        default=0,
+        help_text="Quantity moved; the net signed change for adjustments"
+    )
+    cost = models.DecimalField(max_digits=14, decimal_places=2, default=0, help_text="Sum of positive recorded costs")
+    cost_count = models.IntegerField(default=0, help_text="Rows with a positive recorded cost")
+    txn_count = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = [['item', 'location', 'type', 'day']]
+        ordering = ['-day', 'item']
+        indexes = [
+            models.Index(fields=['type', 'day']),
+        ]
+        verbose_name_plural = "Daily usage"
+
+    def __str__(self):
+        return f"{self.item_id} @ {self.location_id} {self.day} {self.type}: {self.qty}"
@@ -0,0 +1,85 @@
+from decimal import Decimal
+
+from django.conf import settings
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, FloatField, Sum
+from django.db.models.functions import Cast, Coalesce
+from imh_ims.models import StockLevel
+from .alert_snapshot_service import AT_RISK, BELOW_PAR
+from .stock_version_service import StockVersionService
+
+
+ALERT_STATUSES = {'below_par': BELOW_PAR, 'at_risk': AT_RISK}
+
+# ?ordering= values; severity is shortfall / par, so "-severity" puts the emptiest shelves first
+ALERT_ORDERINGS = {
+    '-severity': ('-severity', 'item__name', 'id'),
+    'severity': ('severity', 'item__name', 'id'),
+    'item': ('item__name', 'location__name', 'id'),
+    'location': ('location__name', 'item__name', 'id'),
+}
+
+
+class AlertService:
+    """
+    Below-par and at-risk stock lines for the alerts report.
+
+    summary() classifies every active stock line with conditional aggregates
+    grouped by location, so counts never load the lines themselves; page()
+    reads one ordered, filtered slice of a list. cached() keeps results for
+    ALERTS_CACHE_SECONDS under a key that includes the stock version.
+    """
+
+    @staticmethod
+    def queryset(location_id=None, category_id=None):
+        queryset = StockLevel.objects.filter(item__is_active=True)
+        if location_id:
+            queryset = queryset.filter(location_id=location_id)
+        if category_id:
+            queryset = queryset.filter(item__category_id=category_id)
+        return queryset
+
+    @staticmethod
+    def summary(queryset) -> dict:
+        """Counts and total shortfall, overall and per location with any alerts, in one query"""
+        shortfall = ExpressionWrapper(
+            F('par') - F('on_hand_qty'), output_field=DecimalField(max_digits=12, decimal_places=2)
+        )
+        grouped = queryset.filter(BELOW_PAR).values('location_id', 'location__name').annotate(
+            below_par=Count('id'),
+            at_risk=Count('id', filter=AT_RISK),
+            shortfall=Coalesce(Sum(shortfall), Decimal('0'), output_field=DecimalField())
+        ).order_by('location__name', 'location_id')
+
+        locations = [
+            {
+                'location_id': row['location_id'],
+                'location_name': row['location__name'],
+                'below_par': row['below_par'],
+                'at_risk': row['at_risk'],
+                'shortfall': float(row['shortfall']),
+            }
+            for row in grouped
+        ]
+        return {
+            'below_par_count': sum(row['below_par'] for row in locations),
+            'at_risk_count': sum(row['at_risk'] for row in locations),
+            'below_par_shortfall': sum(row['shortfall'] for row in locations),
+            'locations': locations,
+        }
+
+    @staticmethod
+    def page(queryset, status: str, ordering: str, offset: int, limit: int) -> list:
+        """StockLevels of one alert list, with `severity` annotated, ordered and sliced"""
+        # Cast first: SQLite keeps whole-number decimals as integers and would divide them as such
+        severity = Cast(F('par') - F('on_hand_qty'), FloatField()) / Cast('par', FloatField())
+        return list(
+            queryset.filter(ALERT_STATUSES[status])
+            .select_related('item', 'location')
+            .annotate(severity=severity)
+            .order_by(*ALERT_ORDERINGS[ordering])[offset:offset + limit]
+        )
+
+    @staticmethod
+    def cached(name: str, params: dict, build):
+        """build()'s result, cached per stock version and request parameters"""
+        return StockVersionService.cached(name, params, build, getattr(settings, 'ALERTS_CACHE_SECONDS', 60))
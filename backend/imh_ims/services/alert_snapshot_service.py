@@ -0,0 +1,172 @@
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+
+from django.db import connection, transaction
+from django.db.models import Count, Sum, Q, F, DecimalField, ExpressionWrapper
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from imh_ims.models import DailyAlertSnapshot, StockLevel, Location
+from .ledger_service import LedgerService
+
+
+AT_RISK_RATIO = Decimal('0.8')
+
+# Same definitions the reports have always used (at-risk is a subset of below-par)
+BELOW_PAR = Q(par__gt=0, on_hand_qty__lt=F('par'))
+AT_RISK = Q(par__gt=0, on_hand_qty__gte=F('par') * AT_RISK_RATIO, on_hand_qty__lt=F('par'))
+
+
+class AlertSnapshotService:
+    """Service writing and reading DailyAlertSnapshot rows"""
+
+    @staticmethod
+    def current_counts(locations=None) -> dict:
+        """Live below-par and at-risk counts in a single conditional aggregate"""
+        queryset = StockLevel.objects.filter(item__is_active=True)
+        if locations is not None:
+            queryset = queryset.filter(location__in=locations)
+        return queryset.aggregate(
+            below_par=Count('id', filter=BELOW_PAR),
+            at_risk=Count('id', filter=AT_RISK)
+        )
+
+    @staticmethod
+    @transaction.atomic
+    def snapshot_day(day: date = None) -> int:
+        """
+        Snapshot current StockLevel for `day` (default: today) with one
+        INSERT ... SELECT ... GROUP BY location. Re-running replaces the day.
+        Returns the number of location rows written.
+        """
+        day = day or timezone.localdate()
+        DailyAlertSnapshot.objects.filter(day=day).delete()
+
+        value = ExpressionWrapper(
+            F('on_hand_qty') * F('item__cost'),
+            output_field=DecimalField(max_digits=14, decimal_places=2)
+        )
+        grouped = StockLevel.objects.filter(item__is_active=True).values(
+            'location_id', 'location__department_id'
+        ).annotate(
+            lines=Count('id'),
+            below_par=Count('id', filter=BELOW_PAR),
+            at_risk=Count('id', filter=AT_RISK),
+            value=Coalesce(Sum(value, filter=Q(on_hand_qty__gt=0)), Decimal('0'), output_field=DecimalField())
+        ).order_by()
+        select_sql, select_params = grouped.query.sql_with_params()
+
+        ops = connection.ops
+        meta = DailyAlertSnapshot._meta
+        columns = ', '.join(
+            ops.quote_name(meta.get_field(name).column)
+            for name in (
+                'day', 'created_at', 'location', 'department',
+                'stock_lines', 'below_par_count', 'at_risk_count', 'stock_value'
+            )
+        )
+        selected = ', '.join(
+            f'grouped.{ops.quote_name(alias)}'
+            for alias in ('location_id', 'location__department_id', 'lines', 'below_par', 'at_risk', 'value')
+        )
+        sql = (
+            f'INSERT INTO {ops.quote_name(meta.db_table)} ({columns}) '
+            f'SELECT %s, %s, {selected} FROM ({select_sql}) grouped'
+        )
+        params = [ops.adapt_datefield_value(day), ops.adapt_datetimefield_value(timezone.now())] + list(select_params)
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return cursor.rowcount
+
+    @staticmethod
+    def _end_of_day(day: date) -> datetime:
+        return timezone.make_aware(datetime.combine(day + timedelta(days=1), time.min))
+
+    @staticmethod
+    def backfill(start: date, end: date) -> int:
+        """
+        Derive snapshots for start..end (inclusive) from the transaction ledger.
+
+        Stock at the end of `start` is reconstructed with LedgerService, then
+        rolled forward one day of grouped ledger deltas at a time, updating only
+        the locations whose lines changed. Par levels and item costs are not
+        versioned, so past days are evaluated against today's values.
+        Returns the number of location rows written.
+        """
+        if start > end:
+            return 0
+
+        lines = {}
+        for item_id, location_id, par, cost in StockLevel.objects.filter(item__is_active=True).values_list(
+            'item_id', 'location_id', 'par', 'item__cost'
+        ):
+            lines[(item_id, location_id)] = (par, cost)
+        departments = dict(Location.objects.values_list('id', 'department_id'))
+
+        def contribution(key, qty):
+            par, cost = lines[key]
+            below = par > 0 and qty < par
+            at_risk = below and qty >= par * AT_RISK_RATIO
+            value = qty * cost if cost and qty > 0 else Decimal('0')
+            return int(below), int(at_risk), value
+
+        state = LedgerService.stock_as_of(AlertSnapshotService._end_of_day(start))
+        totals = defaultdict(lambda: [0, 0, 0, Decimal('0')])
+        for key in lines:
+            below, at_risk, value = contribution(key, state.get(key, Decimal('0')))
+            location_totals = totals[key[1]]
+            location_totals[0] += 1
+            location_totals[1] += below
+            location_totals[2] += at_risk
+            location_totals[3] += value
+
+        rows = []
+        now = timezone.now()
+        day = start
+        while day <= end:
+            if day > start:
+                deltas = LedgerService.ledger_deltas(
+                    AlertSnapshotService._end_of_day(day - timedelta(days=1)),
+                    AlertSnapshotService._end_of_day(day)
+                )
+                for key, delta in deltas.items():
+                    if key not in lines:
+                        continue
+                    before = state.get(key, Decimal('0'))
+                    state[key] = before + delta
+                    old, new = contribution(key, before), contribution(key, state[key])
+                    location_totals = totals[key[1]]
+                    for index in range(3):
+                        location_totals[index + 1] += new[index] - old[index]
+
+            for location_id, (stock_lines, below, at_risk, value) in totals.items():
+                rows.append(DailyAlertSnapshot(
+                    day=day,
+                    location_id=location_id,
+                    department_id=departments.get(location_id),
+                    stock_lines=stock_lines,
+                    below_par_count=below,
+                    at_risk_count=at_risk,
+                    stock_value=value,
+                    created_at=now
+                ))
+            day += timedelta(days=1)
+
+        with transaction.atomic():
+            DailyAlertSnapshot.objects.filter(day__gte=start, day__lte=end).delete()
+            DailyAlertSnapshot.objects.bulk_create(rows, batch_size=1000)
+        return len(rows)
+
+    @staticmethod
+    def daily_totals(since: date, department_id=None) -> list:
+        """Per-day totals across locations (optionally one department), oldest first"""
+        snapshots = DailyAlertSnapshot.objects.filter(day__gte=since)
+        if department_id:
+            snapshots = snapshots.filter(department_id=department_id)
+        return list(
+            snapshots.values('day').annotate(
+                below_par_count=Sum('below_par_count'),
+                at_risk_count=Sum('at_risk_count'),
+                stock_value=Sum('stock_value')
+            ).order_by('day')
+        )
@@ -0,0 +1,334 @@
+from bisect import bisect_left
+from collections import defaultdict
+from datetime import datetime, timedelta
+from decimal import Decimal
+from functools import lru_cache
+from itertools import groupby
+from operator import itemgetter
+from pathlib import Path
+import gzip
+import json
+import os
+import struct
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from imh_ims.models import (
+    InventoryTransaction, LedgerArchivePartition, LedgerMonthlySummary, StockCheckpoint,
+    Item, Location
+)
+from django.contrib.auth.models import User
+from .ledger_service import LedgerService, ADJUST_TYPES
+
+
+ARCHIVE_FIELDS = (
+    'id', 'item_id', 'from_location_id', 'to_location_id', 'qty', 'qty_delta', 'type', 'timestamp',
+    'user_id', 'cost', 'notes', 'requisition_id', 'receipt_id', 'work_order_id', 'count_session_id'
+)
+DECIMAL_FIELDS = ('qty', 'qty_delta', 'cost')
+
+INDEX_MAGIC = b'IMHLIDX1'
+INDEX_HEADER = struct.Struct('<8sI')
+INDEX_ENTRY = struct.Struct('<IQII')  # item_id, byte offset, byte length, row count
+
+# Order suggestions and the dashboard look back 30 days; never archive anything they read
+MIN_HORIZON_DAYS = 90
+
+
+def _empty_summary():
+    return defaultdict(Decimal, {'transaction_count': 0, 'issue_count': 0, 'receive_count': 0, 'cost_count': 0})
+
+
+@lru_cache(maxsize=256)
+def _load_index(path: str, mtime: float):
+    """Read a partition index into (sorted item ids, entries); cached per file version"""
+    with open(path, 'rb') as index_file:
+        magic, count = INDEX_HEADER.unpack(index_file.read(INDEX_HEADER.size))
+        if magic != INDEX_MAGIC:
+            raise ValueError(f"Not a ledger archive index: {path}")
+        entries = [INDEX_ENTRY.unpack(chunk) for chunk in iter(lambda: index_file.read(INDEX_ENTRY.size), b'')]
+    if len(entries) != count:
+        raise ValueError(f"Truncated ledger archive index: {path}")
+    return [entry[0] for entry in entries], entries
+
+
+class LedgerArchiveService:
+    """
+    Moves old InventoryTransaction rows into compressed monthly archive files.
+
+    Each partition file is a series of gzip members, one per item, holding that
+    item's rows as JSON lines (the whole file still reads as one gzip stream).
+    A sidecar index of fixed-size (item_id, offset, length, rows) entries lets
+    a single item's history be read with one seek. Archived months are rolled
+    up into LedgerMonthlySummary for reports, and an ARCHIVE checkpoint is
+    written at the cutoff so as-of queries still have an anchor; as-of answers
+    inside archived months resolve to checkpoint granularity.
+    """
+
+    @staticmethod
+    def archive_root() -> Path:
+        return Path(getattr(settings, 'LEDGER_ARCHIVE_ROOT', Path(settings.MEDIA_ROOT) / 'archive'))
+
+    @staticmethod
+    def cutoff(horizon_days: int = None) -> datetime:
+        """Start of the month containing now - horizon; only whole earlier months are archived"""
+        if horizon_days is None:
+            horizon_days = getattr(settings, 'LEDGER_ARCHIVE_HORIZON_DAYS', 365)
+        if horizon_days < MIN_HORIZON_DAYS:
+            raise ValueError(f"Archive horizon must be at least {MIN_HORIZON_DAYS} days. Requested: {horizon_days}")
+        edge = timezone.localtime(timezone.now() - timedelta(days=horizon_days))
+        return timezone.make_aware(datetime(edge.year, edge.month, 1))
+
+    @staticmethod
+    def pending_months(cutoff: datetime) -> list:
+        """Months (as aware datetimes) that still have hot rows older than the cutoff"""
+        return list(
+            InventoryTransaction.objects.filter(timestamp__lt=cutoff).annotate(
+                month=TruncMonth('timestamp')
+            ).values_list('month', flat=True).distinct().order_by('month')
+        )
+
+    @staticmethod
+    def archive(horizon_days: int = None, dry_run: bool = False) -> dict:
+        """Archive every whole month older than the horizon. Returns per-run totals."""
+        cutoff = LedgerArchiveService.cutoff(horizon_days)
+        months = LedgerArchiveService.pending_months(cutoff)
+        stats = {'cutoff': cutoff, 'months': len(months), 'rows': 0, 'bytes': 0}
+        if dry_run or not months:
+            stats['rows'] = InventoryTransaction.objects.filter(timestamp__lt=cutoff).count()
+            return stats
+
+        LedgerArchiveService._checkpoint_cutoff(cutoff)
+        for month in months:
+            partition = LedgerArchiveService._archive_month(month, cutoff)
+            stats['rows'] += partition.row_count
+            stats['bytes'] += partition.size_bytes
+        return stats
+
+    @staticmethod
+    @transaction.atomic
+    def _checkpoint_cutoff(cutoff: datetime) -> None:
+        """Record stock at the cutoff while the full ledger is still available"""
+        if StockCheckpoint.objects.filter(as_of=cutoff).exists():
+            return
+        state = LedgerService.stock_as_of(cutoff)
+        StockCheckpoint.objects.bulk_create(
+            [
+                StockCheckpoint(item_id=item_id, location_id=location_id, as_of=cutoff, on_hand_qty=qty, source='ARCHIVE')
+                for (item_id, location_id), qty in state.items()
+                if qty
+            ],
+            batch_size=LedgerService.BATCH_SIZE
+        )
+
+    @staticmethod
+    def _encode(row: tuple) -> dict:
+        record = dict(zip(ARCHIVE_FIELDS, row))
+        for field in DECIMAL_FIELDS:
+            if record[field] is not None:
+                record[field] = str(record[field])
+        record['timestamp'] = record['timestamp'].isoformat()
+        return record
+
+    @staticmethod
+    def _summarize(summaries: dict, record: dict) -> None:
+        """Fold one ledger row into the (item, location) summaries of its month"""
+        qty = Decimal(record['qty'])
+        trans_type = record['type']
+        if trans_type in ('ISSUE', 'TRANSFER'):
+            primary = record['from_location_id']
+        elif trans_type in ADJUST_TYPES:
+            primary = record['to_location_id'] or record['from_location_id']
+        else:
+            primary = record['to_location_id']
+
+        summary = summaries[(record['item_id'], primary)]
+        summary['transaction_count'] += 1
+        if record['cost'] is not None and Decimal(record['cost']) > 0:
+            summary['cost_total'] += Decimal(record['cost'])
+            summary['cost_count'] += 1
+        if trans_type == 'ISSUE':
+            summary['issue_count'] += 1
+            summary['issued_qty'] += qty
+        elif trans_type == 'RECEIVE':
+            summary['receive_count'] += 1
+            summary['received_qty'] += qty
+        elif trans_type == 'TRANSFER':
+            summary['transferred_out_qty'] += qty
+            summaries[(record['item_id'], record['to_location_id'])]['transferred_in_qty'] += qty
+        elif trans_type in ADJUST_TYPES:
+            summary['adjusted_qty'] += Decimal(record['qty_delta'] or 0)
+
+    @staticmethod
+    def _archive_month(month: datetime, cutoff: datetime) -> LedgerArchivePartition:
+        month_start = month
+        month_end = min(
+            timezone.make_aware(datetime(month.year + month.month // 12, month.month % 12 + 1, 1)),
+            cutoff
+        )
+        month_date = timezone.localtime(month_start).date()
+        part = (LedgerArchivePartition.objects.filter(month=month_date).aggregate(last=Max('part'))['last'] or 0) + 1
+
+        relative = Path('ledger') / f'{month_date:%Y}' / f'ledger-{month_date:%Y-%m}-p{part}'
+        root = LedgerArchiveService.archive_root()
+        data_path = root / relative.with_suffix('.jsonl.gz')
+        index_path = root / relative.with_suffix('.idx')
+        data_path.parent.mkdir(parents=True, exist_ok=True)
+
+        rows = InventoryTransaction.objects.filter(
+            timestamp__gte=month_start,
+            timestamp__lt=month_end
+        ).order_by('item_id', 'timestamp', 'id').values_list(*ARCHIVE_FIELDS)
+
+        summaries = defaultdict(_empty_summary)
+        entries = []
+        row_count = 0
+        max_id = 0
+        first_timestamp = last_timestamp = None
+
+        tmp_data = data_path.with_name(data_path.name + '.tmp')
+        tmp_index = index_path.with_name(index_path.name + '.tmp')
+        try:
+            with open(tmp_data, 'wb') as out:
+                for item_id, group in groupby(rows.iterator(chunk_size=5000), key=itemgetter(1)):
+                    lines = []
+                    for row in group:
+                        record = LedgerArchiveService._encode(row)
+                        LedgerArchiveService._summarize(summaries, record)
+                        lines.append(json.dumps(record, separators=(',', ':')))
+                        max_id = max(max_id, row[0])
+                        timestamp = row[7]
+                        first_timestamp = timestamp if first_timestamp is None else min(first_timestamp, timestamp)
+                        last_timestamp = timestamp if last_timestamp is None else max(last_timestamp, timestamp)
+                    payload = gzip.compress(('\n'.join(lines) + '\n').encode('utf-8'), mtime=0)
+                    entries.append((item_id, out.tell(), len(payload), len(lines)))
+                    out.write(payload)
+                    row_count += len(lines)
+
+            with open(tmp_index, 'wb') as out:
+                out.write(INDEX_HEADER.pack(INDEX_MAGIC, len(entries)))
+                for entry in entries:
+                    out.write(INDEX_ENTRY.pack(*entry))
+
+            os.replace(tmp_data, data_path)
+            os.replace(tmp_index, index_path)
+
+            with transaction.atomic():
+                partition = LedgerArchivePartition.objects.create(
+                    month=month_date,
+                    part=part,
+                    path=data_path.relative_to(root).as_posix(),
+                    index_path=index_path.relative_to(root).as_posix(),
+                    row_count=row_count,
+                    item_count=len(entries),
+                    size_bytes=data_path.stat().st_size,
+                    first_timestamp=first_timestamp,
+                    last_timestamp=last_timestamp
+                )
+                LedgerArchiveService._store_summaries(month_date, summaries)
+                InventoryTransaction.objects.filter(
+                    timestamp__gte=month_start,
+                    timestamp__lt=month_end,
+                    id__lte=max_id
+                ).delete()
+        except Exception:
+            for path in (tmp_data, tmp_index, data_path, index_path):
+                if path.exists():
+                    path.unlink()
+            raise
+        return partition
+
+    @staticmethod
+    def _store_summaries(month_date, summaries: dict) -> None:
+        fields = [
+            'transaction_count', 'issue_count', 'receive_count', 'issued_qty', 'received_qty',
+            'transferred_in_qty', 'transferred_out_qty', 'adjusted_qty', 'cost_total', 'cost_count'
+        ]
+        existing = {
+            (summary.item_id, summary.location_id): summary
+            for summary in LedgerMonthlySummary.objects.filter(month=month_date)
+        }
+        created, updated = [], []
+        for (item_id, location_id), values in summaries.items():
+            summary = existing.get((item_id, location_id))
+            if summary is None:
+                created.append(LedgerMonthlySummary(
+                    item_id=item_id,
+                    location_id=location_id,
+                    month=month_date,
+                    **{field: values[field] for field in fields}
+                ))
+            else:
+                for field in fields:
+                    setattr(summary, field, getattr(summary, field) + values[field])
+                updated.append(summary)
+        LedgerMonthlySummary.objects.bulk_create(created, batch_size=LedgerService.BATCH_SIZE)
+        LedgerMonthlySummary.objects.bulk_update(updated, fields, batch_size=LedgerService.BATCH_SIZE)
+
+    @staticmethod
+    def read_item(partition: LedgerArchivePartition, item_id: int) -> list:
+        """Decode one item's rows from a partition using its index (one seek, one gzip member)"""
+        root = LedgerArchiveService.archive_root()
+        index_path = root / partition.index_path
+        item_ids, entries = _load_index(str(index_path), index_path.stat().st_mtime)
+        position = bisect_left(item_ids, item_id)
+        if position == len(item_ids) or item_ids[position] != item_id:
+            return []
+        _, offset, length, _ = entries[position]
+        with open(root / partition.path, 'rb') as archive_file:
+            archive_file.seek(offset)
+            payload = gzip.decompress(archive_file.read(length))
+        return [json.loads(line) for line in payload.decode('utf-8').splitlines() if line]
+
+    @staticmethod
+    def item_transactions(item_id: int, before: datetime = None, limit: int = 50) -> list:
+        """Archived rows for an item older than `before`, newest first"""
+        partitions = LedgerArchivePartition.objects.order_by('-month', '-part')
+        if before is not None:
+            partitions = partitions.filter(first_timestamp__lt=before)
+
+        results = []
+        for _, month_partitions in groupby(partitions, key=lambda partition: partition.month):
+            rows = []
+            for partition in month_partitions:
+                rows.extend(LedgerArchiveService.read_item(partition, item_id))
+            for row in rows:
+                row['timestamp'] = parse_datetime(row['timestamp'])
+            if before is not None:
+                rows = [row for row in rows if row['timestamp'] < before]
+            rows.sort(key=lambda row: (row['timestamp'], row['id']), reverse=True)
+            results.extend(rows)
+            if len(results) >= limit:
+                break
+        return results[:limit]
+
+    @staticmethod
+    def to_transactions(rows: list) -> list:
+        """
+        Turn archived rows into unsaved InventoryTransaction instances with their
+        item, locations and user attached, so existing serializers can render them.
+        """
+        items = Item.objects.in_bulk({row['item_id'] for row in rows})
+        locations = Location.objects.in_bulk(
+            {row[field] for row in rows for field in ('from_location_id', 'to_location_id') if row[field]}
+        )
+        users = User.objects.in_bulk({row['user_id'] for row in rows if row['user_id']})
+
+        transactions = []
+        for row in rows:
+            values = dict(row)
+            for field in DECIMAL_FIELDS:
+                if values[field] is not None:
+                    values[field] = Decimal(values[field])
+            trans = InventoryTransaction(**values)
+            cache = trans._state.fields_cache
+            cache['item'] = items.get(row['item_id'])
+            cache['from_location'] = locations.get(row['from_location_id'])
+            cache['to_location'] = locations.get(row['to_location_id'])
+            cache['user'] = users.get(row['user_id'])
+            transactions.append(trans)
+        return transactions
@@ -0,0 +1,33 @@
+from decimal import Decimal
+from django.db.models import F, Value, Exists, OuterRef, DecimalField, CharField
+from django.db.models.functions import Coalesce
+from imh_ims.models import StockLevel
+
+
+class CatalogService:
+    """Read-side helpers for the item catalog"""
+
+    @staticmethod
+    def annotate(queryset):
+        """
+        Add everything ItemSerializer computes per item as SQL on the page query:
+        category/vendor names via joins, the primary property and its on-hand
+        from the ItemStockSummary rollup, and an EXISTS for below par anywhere.
+        Items without a rollup row have no stock, so they read as 0 / ''.
+        """
+        return queryset.select_related('category', 'default_vendor').annotate(
+            catalog_property_on_hand=Coalesce(
+                F('stock_summary__primary_property_on_hand'),
+                Value(Decimal('0')),
+                output_field=DecimalField(max_digits=12, decimal_places=2)
+            ),
+            catalog_property_id=Coalesce(
+                F('stock_summary__primary_property_id'),
+                Value(''),
+                output_field=CharField()
+            ),
+            catalog_below_par=Exists(StockLevel.objects.filter(
+                item=OuterRef('pk'),
+                on_hand_qty__lt=F('par')
+            ))
+        )
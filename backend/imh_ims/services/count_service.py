@@ -92,15 +92,15 @@ class CountService:
                     reason=line.reason_code or 'Count variance'
                 )
 
-                # Update stock level's last counted info
-                stock, _ = StockLevel.objects.get_or_create(
+                # Update stock level's last counted info (only those columns,
+                # so a concurrent movement's on_hand_qty is never overwritten)
+                StockLevel.objects.filter(
                     item=line.item,
-                    location=count_session.location,
-                    defaults={'on_hand_qty': 0, 'par_min': 0, 'par_max': 0}
+                    location=count_session.location
+                ).update(
+                    last_counted_at=timezone.now(),
+                    last_counted_by=approved_by
                 )
-                stock.last_counted_at = timezone.now()
-                stock.last_counted_by = approved_by
-                stock.save()
 
         count_session.status = 'APPROVED'
         count_session.approved_by = approved_by
@@ -0,0 +1,96 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, Q, Sum
+from imh_ims.models import DailyUsage, StockLevel
+from .alert_snapshot_service import BELOW_PAR
+from .stock_version_service import StockVersionService
+from .usage_service import DailyUsageService
+
+
+class DashboardService:
+    """
+    Figures for the dashboard, over every location or one department's.
+
+    Issue statistics come from DailyUsage (one grouped query for the top
+    items, one aggregate for the totals) and stock figures from one
+    conditional aggregate over StockLevel, with the valuation summed in SQL.
+    cached() keeps the result for DASHBOARD_CACHE_SECONDS per stock version,
+    department, period and day.
+    """
+
+    TOP_ITEMS = 5
+
+    @staticmethod
+    def stats(department=None, days: int = 30) -> dict:
+        cutoff_day = DailyUsageService.today() - timedelta(days=days)
+        issues = DailyUsage.objects.filter(type='ISSUE', day__gte=cutoff_day)
+        stock = StockLevel.objects.filter(item__is_active=True)
+        if department is not None:
+            issues = issues.filter(location__department=department)
+            stock = stock.filter(location__department=department)
+
+        top_items = issues.values(
+            'item_id', 'item__name', 'item__short_code', 'item__photo_url', 'item__unit_of_measure'
+        ).annotate(
+            total_qty_used=Sum('qty'),
+            transaction_count=Sum('txn_count')
+        ).order_by('-total_qty_used', 'item__name')[:DashboardService.TOP_ITEMS]
+
+        issue_totals = issues.aggregate(
+            total_qty=Sum('qty'),
+            unique_items=Count('item_id', distinct=True),
+            transactions=Sum('txn_count')
+        )
+
+        in_stock = Q(on_hand_qty__gt=0)
+        value = ExpressionWrapper(
+            F('on_hand_qty') * F('item__cost'), output_field=DecimalField(max_digits=20, decimal_places=4)
+        )
+        stock_totals = stock.aggregate(
+            value=Sum(value, filter=in_stock),
+            in_stock=Count('id', filter=in_stock),
+            below_par=Count('id', filter=BELOW_PAR)
+        )
+
+        total_qty = float(issue_totals['total_qty'] or 0)
+        transactions = issue_totals['transactions'] or 0
+        return {
+            'top_5_items_used': [
+                {
+                    'item_id': row['item_id'],
+                    'item_name': row['item__name'],
+                    'item_short_code': row['item__short_code'],
+                    'item_photo_url': row['item__photo_url'] or '',
+                    'unit_of_measure': row['item__unit_of_measure'],
+                    'total_qty_used': float(row['total_qty_used'] or 0),
+                    'transaction_count': row['transaction_count']
+                }
+                for row in top_items
+            ],
+            'overall_inventory_usage': {
+                'total_qty_used': total_qty,
+                'unique_items_used': issue_totals['unique_items'],
+                'total_transactions': transactions,
+                'avg_qty_per_transaction': round(total_qty / transactions, 2) if transactions else 0,
+                'current_inventory_value': float(round(stock_totals['value'] or Decimal('0'), 2)),
+                'total_items_in_stock': stock_totals['in_stock'],
+                'items_below_par': stock_totals['below_par'],
+                'period_days': days
+            },
+            'department_filter': department.name if department is not None else None
+        }
+
+    @staticmethod
+    def cached(department=None, days: int = 30) -> dict:
+        """stats(), cached per stock version, department, period and (site-local) day"""
+        params = {
+            'department_id': department.pk if department is not None else None,
+            'days': days,
+            'today': DailyUsageService.today().isoformat(),
+        }
+        return StockVersionService.cached(
+            'dashboard', params, lambda: DashboardService.stats(department, days),
+            getattr(settings, 'DASHBOARD_CACHE_SECONDS', 60)
+        )
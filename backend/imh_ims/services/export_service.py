@@ -0,0 +1,135 @@
+import csv
+import io
+from datetime import datetime
+
+from django.conf import settings
+from django.utils import timezone
+import openpyxl
+from openpyxl.cell import WriteOnlyCell
+
+
+# (header, values_list lookup) per export. Item and stock headers use the
+# import column names, so an export can be edited and imported again.
+ITEM_COLUMNS = [
+    ('short_code', 'short_code'),
+    ('name', 'name'),
+    ('category', 'category__name'),
+    ('default_vendor', 'default_vendor__name'),
+    ('unit_of_measure', 'unit_of_measure'),
+    ('cost', 'cost'),
+    ('lead_time_days', 'lead_time_days'),
+    ('is_active', 'is_active'),
+    ('property_id', 'catalog_property_id'),
+    ('property_on_hand', 'catalog_property_on_hand'),
+    ('below_par_anywhere', 'catalog_below_par'),
+    ('updated_at', 'updated_at'),
+]
+STOCK_COLUMNS = [
+    ('short_code', 'item__short_code'),
+    ('name', 'item__name'),
+    ('location_name', 'location__name'),
+    ('location_property_id', 'location__property_id'),
+    ('on_hand_qty', 'on_hand_qty'),
+    ('reserved_qty', 'reserved_qty'),
+    ('par', 'par'),
+    ('last_counted_at', 'last_counted_at'),
+    ('updated_at', 'updated_at'),
+]
+TRANSACTION_COLUMNS = [
+    ('id', 'id'),
+    ('timestamp', 'timestamp'),
+    ('type', 'type'),
+    ('short_code', 'item__short_code'),
+    ('item_name', 'item__name'),
+    ('from_location', 'from_location__name'),
+    ('to_location', 'to_location__name'),
+    ('qty', 'qty'),
+    ('qty_delta', 'qty_delta'),
+    ('cost', 'cost'),
+    ('user', 'user__username'),
+    ('requisition_id', 'requisition_id'),
+    ('receipt_id', 'receipt_id'),
+    ('work_order_id', 'work_order_id'),
+    ('notes', 'notes'),
+]
+
+# Excel's row limit, less the header row
+XLSX_SHEET_ROWS = 1048575
+
+# CSV text starting with these is run as a formula when opened in a spreadsheet program
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+class ExportService:
+    """
+    Stream list querysets out as CSV or XLSX in constant memory.
+
+    Rows are read with values_list().iterator(chunk_size=...), so neither
+    model instances nor the full result are ever held. CSV bytes are
+    produced as the rows arrive; XLSX rows go through openpyxl's write_only
+    mode into a temporary file, which is sent once the workbook is closed,
+    so large exports are quicker to start as CSV.
+    """
+
+    @staticmethod
+    def chunk_size() -> int:
+        return getattr(settings, 'EXPORT_CHUNK_SIZE', 2000)
+
+    @staticmethod
+    def rows(queryset, columns):
+        lookups = [lookup for _, lookup in columns]
+        return queryset.values_list(*lookups).iterator(chunk_size=ExportService.chunk_size())
+
+    @staticmethod
+    def csv_stream(queryset, columns, flush_bytes: int = 64 * 1024):
+        """Yield a UTF-8 CSV (with BOM, for Excel) in blocks of about flush_bytes"""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        buffer.write('\ufeff')
+        writer.writerow([header for header, _ in columns])
+        for row in ExportService.rows(queryset, columns):
+            writer.writerow([ExportService._csv_value(value) for value in row])
+            if buffer.tell() >= flush_bytes:
+                yield buffer.getvalue().encode('utf-8')
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue().encode('utf-8')
+
+    @staticmethod
+    def write_xlsx(queryset, columns, file, title: str, sheet_rows: int = XLSX_SHEET_ROWS) -> None:
+        """Write the rows to `file` as a workbook, starting a new sheet every sheet_rows rows"""
+        workbook = openpyxl.Workbook(write_only=True)
+        headers = [header for header, _ in columns]
+        sheet, written = None, sheet_rows
+        for row in ExportService.rows(queryset, columns):
+            if written == sheet_rows:
+                sheet = workbook.create_sheet(title if sheet is None else f'{title} {len(workbook.worksheets) + 1}')
+                sheet.append(headers)
+                written = 0
+            sheet.append([ExportService._xlsx_value(sheet, value) for value in row])
+            written += 1
+        if sheet is None:
+            workbook.create_sheet(title).append(headers)
+        workbook.save(file)
+
+    @staticmethod
+    def _csv_value(value):
+        if value is None:
+            return ''
+        if isinstance(value, datetime):
+            return timezone.localtime(value).isoformat() if timezone.is_aware(value) else value.isoformat()
+        if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+            return "'" + value
+        return value
+
+    @staticmethod
+    def _xlsx_value(sheet, value):
+        # Excel has no time zones; cells show local time
+        if isinstance(value, datetime) and timezone.is_aware(value):
+            return timezone.localtime(value).replace(tzinfo=None)
+        if isinstance(value, str) and value.startswith('='):
+            # Keep it a text cell rather than a formula
+            cell = WriteOnlyCell(sheet, value=value)
+            cell.data_type = 's'
+            return cell
+        return value
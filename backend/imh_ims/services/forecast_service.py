@@ -0,0 +1,273 @@
+from datetime import timedelta
+from itertools import product
+from statistics import NormalDist
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+from imh_ims.models import DailyUsage, DemandForecast
+from .usage_service import DailyUsageService
+
+
+SEASON_DAYS = 7
+
+# Average days between demands above which a series is treated as intermittent (Syntetos-Boylan)
+INTERMITTENT_ADI = 1.32
+
+# Holt-Winters smoothing parameters tried for every series; each keeps the set with the lowest error
+HOLT_WINTERS_GRID = list(product((0.1, 0.3, 0.5), (0.01, 0.1), (0.05, 0.2)))
+HOLT_WINTERS_DAMPING = 0.9
+CROSTON_ALPHA = 0.1
+
+
+class ForecastService:
+    """
+    Daily issue forecasts for every item-location with recent demand.
+
+    run() reads the last FORECAST_HISTORY_DAYS complete days of issues from
+    DailyUsage into a dense (series x day) matrix, fits every series at
+    once with array operations, FORECAST_CHUNK_SERIES series at a time, and
+    replaces the DemandForecast table. Smooth series get a damped additive
+    Holt-Winters model with a weekly season; intermittent ones (mostly days
+    without demand) get Croston's method with the Syntetos-Boylan correction.
+
+    Each row holds FORECAST_HORIZON_DAYS daily means starting at start_day and
+    per-day prediction bounds at the FORECAST_INTERVAL level, taken from the
+    one-step errors of the fit. Readers use forecasts younger than
+    FORECAST_MAX_AGE_HOURS and fall back to plain averages otherwise.
+    """
+
+    @staticmethod
+    def setting(name: str, default):
+        return getattr(settings, name, default)
+
+    @staticmethod
+    def run(today=None) -> int:
+        """Fit and store forecasts from the ledger; returns the number of series written"""
+        today = today or DailyUsageService.today()
+        history_days = ForecastService.setting('FORECAST_HISTORY_DAYS', 112)
+        keys, usage = ForecastService.usage_matrix(today - timedelta(days=history_days), today)
+        forecasts = ForecastService.fit(usage)
+        ForecastService.store(keys, forecasts, today)
+        return len(keys)
+
+    @staticmethod
+    def usage_matrix(start, end) -> tuple:
+        """
+        Issued quantities per (item_id, location_id) and day in [start, end),
+        read from the DailyUsage rollup, as (keys, float array of shape
+        (len(keys), days)). Only series with at least one issue in the window
+        are included.
+        """
+        days = (end - start).days
+        daily = DailyUsage.objects.filter(
+            type='ISSUE', item__is_active=True, location__isnull=False, day__gte=start, day__lt=end
+        ).order_by().values_list('item_id', 'location_id', 'day', 'qty')
+
+        index = {}
+        rows, columns, values = [], [], []
+        for item_id, location_id, day, qty in daily.iterator(chunk_size=10000):
+            rows.append(index.setdefault((item_id, location_id), len(index)))
+            columns.append((day - start).days)
+            values.append(float(qty))
+
+        usage = np.zeros((len(index), days))
+        if index:
+            np.add.at(usage, (np.array(rows), np.array(columns)), np.array(values))
+        return list(index), usage
+
+    @staticmethod
+    def fit(usage: np.ndarray, horizon: int = None, interval: float = None) -> dict:
+        """
+        Forecast every row of `usage` (series x day). Returns arrays indexed
+        like the rows: method (str), forecast, lower and upper (series x
+        horizon), and sigma (one-step error standard deviation).
+        """
+        horizon = horizon or ForecastService.setting('FORECAST_HORIZON_DAYS', 28)
+        interval = interval or ForecastService.setting('FORECAST_INTERVAL', 0.8)
+        chunk = ForecastService.setting('FORECAST_CHUNK_SERIES', 20000)
+        z = NormalDist().inv_cdf(0.5 + interval / 2)
+
+        series, days = usage.shape
+        has_demand = usage > 0
+        demand_days = has_demand.sum(axis=1)
+        # Average gap from the first demand on, so lines that started mid-window aren't called intermittent
+        active_days = days - has_demand.argmax(axis=1)
+        intermittent = (demand_days == 0) | (active_days / np.maximum(demand_days, 1) > INTERMITTENT_ADI)
+        # Holt-Winters needs two seasons from the first demand to start from
+        intermittent |= active_days < 2 * SEASON_DAYS
+
+        forecast = np.zeros((series, horizon))
+        sigma = np.zeros(series)
+        for start in range(0, series, chunk):
+            rows = np.arange(start, min(start + chunk, series))
+            for use_croston, fitter in ((True, ForecastService._croston), (False, ForecastService._holt_winters)):
+                selected = rows[intermittent[rows] == use_croston]
+                if len(selected):
+                    forecast[selected], sigma[selected] = fitter(usage[selected], horizon)
+
+        forecast = np.maximum(forecast, 0)
+        return {
+            'method': np.where(intermittent, 'CROSTON', 'HOLT_WINTERS'),
+            'forecast': forecast,
+            'lower': np.maximum(forecast - z * sigma[:, None], 0),
+            'upper': forecast + z * sigma[:, None],
+            'sigma': sigma,
+            'demand_days': demand_days,
+        }
+
+    @staticmethod
+    def _holt_winters(y: np.ndarray, horizon: int) -> tuple:
+        """
+        Damped additive Holt-Winters for each row of y, every grid setting at
+        once. Each row starts at its first demand: level, trend and season come
+        from the two weeks from there, and earlier days are skipped.
+        """
+        series, days = y.shape
+        m, phi = SEASON_DAYS, HOLT_WINTERS_DAMPING
+        alpha, beta, gamma = (np.array(values)[None, :] for values in zip(*HOLT_WINTERS_GRID))
+        settings_count = alpha.shape[1]
+
+        pick = np.arange(series)
+        start = (y > 0).argmax(axis=1)
+        first_weeks = y[pick[:, None], start[:, None] + np.arange(2 * m)]
+        first, second = first_weeks[:, :m].mean(axis=1), first_weeks[:, m:].mean(axis=1)
+        # Season slots are indexed by day % m, so rotate the first week's deviations into place
+        slots = (start[:, None] + np.arange(m)) % m
+        initial_season = np.empty((series, m))
+        initial_season[pick[:, None], slots] = first_weeks[:, :m] - first[:, None]
+
+        level = np.repeat(first[:, None], settings_count, axis=1)
+        trend = np.repeat(((second - first) / m)[:, None], settings_count, axis=1)
+        season = np.repeat(initial_season[:, None, :], settings_count, axis=1)
+        sse = np.zeros((series, settings_count))
+
+        for t in range(m, days):
+            active = (t >= start + m)[:, None]
+            observed = y[:, t:t + 1]
+            s = season[:, :, t % m]
+            error = observed - (level + phi * trend + s)
+            sse += np.where(active, error * error, 0)
+            new_level = alpha * (observed - s) + (1 - alpha) * (level + phi * trend)
+            trend = np.where(active, beta * (new_level - level) + (1 - beta) * phi * trend, trend)
+            season[:, :, t % m] = np.where(active, gamma * (observed - new_level) + (1 - gamma) * s, s)
+            level = np.where(active, new_level, level)
+
+        best = sse.argmin(axis=1)
+        level, trend, season = level[pick, best], trend[pick, best], season[pick, best]
+        sigma = np.sqrt(sse[pick, best] / (days - start - m))
+
+        steps = np.arange(1, horizon + 1)
+        damped = np.cumsum(phi ** steps)
+        forecast = level[:, None] + damped[None, :] * trend[:, None] + season[:, (days + steps - 1) % m]
+        return forecast, sigma
+
+    @staticmethod
+    def _croston(y: np.ndarray, horizon: int) -> tuple:
+        """Croston's method with the Syntetos-Boylan bias correction; flat forecasts"""
+        series, days = y.shape
+        a = CROSTON_ALPHA
+        has_demand = y > 0
+        first = has_demand.argmax(axis=1)
+        pick = np.arange(series)
+        size = y[pick, first]
+        # Seeded with the mean gap rather than the first one, which short histories never smooth away
+        interval = days / np.maximum(has_demand.sum(axis=1), 1)
+        since = np.zeros(series)
+        sse = np.zeros(series)
+        errors = np.zeros(series)
+
+        for t in range(days):
+            started = t > first
+            since = np.where(started, since + 1, since)
+            predicted = (1 - a / 2) * size / interval
+            error = np.where(started, y[:, t] - predicted, 0)
+            sse += error * error
+            errors += started
+            demand = started & has_demand[:, t]
+            size = np.where(demand, size + a * (y[:, t] - size), size)
+            interval = np.where(demand, interval + a * (since - interval), interval)
+            since = np.where(demand, 0, since)
+
+        rate = np.where(has_demand.any(axis=1), (1 - a / 2) * size / interval, 0)
+        sigma = np.sqrt(sse / np.maximum(errors, 1))
+        return np.repeat(rate[:, None], horizon, axis=1), sigma
+
+    @staticmethod
+    @transaction.atomic
+    def store(keys: list, forecasts: dict, start_day) -> None:
+        """Replace the DemandForecast table with one row per series"""
+        DemandForecast.objects.all().delete()
+        now = timezone.now()
+        rounded = {name: np.round(forecasts[name], 4).tolist() for name in ('forecast', 'lower', 'upper')}
+        DemandForecast.objects.bulk_create((
+            DemandForecast(
+                item_id=item_id,
+                location_id=location_id,
+                method=str(forecasts['method'][n]),
+                start_day=start_day,
+                forecast=rounded['forecast'][n],
+                lower=rounded['lower'][n],
+                upper=rounded['upper'][n],
+                sigma=float(forecasts['sigma'][n]),
+                demand_days=int(forecasts['demand_days'][n]),
+                generated_at=now
+            )
+            for n, (item_id, location_id) in enumerate(keys)
+        ), batch_size=2000)
+
+    @staticmethod
+    def is_fresh() -> bool:
+        """True when a forecast run finished within FORECAST_MAX_AGE_HOURS"""
+        latest = DemandForecast.objects.aggregate(latest=Max('generated_at'))['latest']
+        max_age = timedelta(hours=ForecastService.setting('FORECAST_MAX_AGE_HOURS', 48))
+        return latest is not None and latest >= timezone.now() - max_age
+
+    @staticmethod
+    def fresh_forecast(item, location):
+        """The DemandForecast for one item-location from a fresh run, or None"""
+        if not ForecastService.is_fresh():
+            return None
+        return DemandForecast.objects.filter(item=item, location=location).first()
+
+    @staticmethod
+    def lead_time_usage(items, item_ids, location_ids, lead_times) -> np.ndarray:
+        """
+        Forecast usage over each line's lead time, from today. item_ids,
+        location_ids and lead_times describe the lines in parallel; `items` is
+        a queryset covering their items. Lines without a forecast had no
+        demand in the history window and get 0; lead times past the horizon
+        continue at the last week's daily mean.
+        """
+        line_index = {key: n for n, key in enumerate(zip(item_ids, location_ids))}
+        horizon = ForecastService.setting('FORECAST_HORIZON_DAYS', 28)
+        forecast = np.zeros((len(line_index), horizon))
+        offset = np.zeros(len(line_index), dtype=np.int64)
+        today = DailyUsageService.today()
+        for item_id, location_id, start_day, values in DemandForecast.objects.filter(item__in=items).values_list(
+            'item_id', 'location_id', 'start_day', 'forecast'
+        ).iterator(chunk_size=5000):
+            n = line_index.get((item_id, location_id))
+            if n is not None and len(values) == horizon:
+                forecast[n] = values
+                offset[n] = min(max((today - start_day).days, 0), horizon)
+
+        # Sum of days offset..offset+lead_time via the running total
+        running = np.concatenate([np.zeros((len(forecast), 1)), np.cumsum(forecast, axis=1)], axis=1)
+        lead_time = np.asarray(lead_times, dtype=np.int64)
+        end = offset + lead_time
+        rows = np.arange(len(forecast))
+        usage = running[rows, np.minimum(end, horizon)] - running[rows, offset]
+        beyond = np.maximum(end - horizon, 0)
+        return usage + beyond * forecast[:, -SEASON_DAYS:].mean(axis=1)
+
+    @staticmethod
+    def usage_between(forecast: list, offset: int, days: int) -> float:
+        """Sum of `days` daily values from `offset` on, extending past the end at the last week's mean"""
+        offset = max(offset, 0)
+        inside = forecast[offset:offset + days]
+        tail = forecast[-SEASON_DAYS:]
+        extra = days - len(inside)
+        return float(sum(inside) + (extra * sum(tail) / len(tail) if extra > 0 and tail else 0))
@@ -0,0 +1,155 @@
+import os
+import socket
+import time
+from datetime import timedelta
+from itertools import islice
+
+from django.conf import settings
+from django.utils import timezone
+from imh_ims.models import ImportJob
+from .import_service import ItemImportService, SpreadsheetReader, validate_rows
+
+
+class ImportJobService:
+    """
+    Queue and run spreadsheet imports outside the request cycle.
+
+    The upload endpoint stores the file and queues an ImportJob; the worker
+    (`manage.py run_import_worker`) claims queued jobs and feeds their rows
+    through ItemImportService. Each chunk's checkpoint (rows_done, results)
+    is saved in the chunk's own transaction, so a job interrupted by a
+    restart is re-queued and resumes after its last committed chunk.
+    """
+
+    @staticmethod
+    def worker_name() -> str:
+        return f'{socket.gethostname()}:{os.getpid()}'
+
+    @staticmethod
+    def submit(uploaded_file, user, column_mapping=None) -> ImportJob:
+        job = ImportJob(
+            original_name=uploaded_file.name,
+            column_mapping=column_mapping,
+            created_by=user if user is not None and user.is_authenticated else None
+        )
+        job.file.save(uploaded_file.name, uploaded_file, save=False)
+        job.save()
+        return job
+
+    @staticmethod
+    def claim_next(worker: str):
+        """Atomically move the oldest queued job to RUNNING for `worker`; None if the queue is empty"""
+        queued = ImportJob.objects.filter(status='QUEUED').order_by('created_at', 'id').values_list('id', flat=True)
+        for job_id in queued[:10]:
+            now = timezone.now()
+            claimed = ImportJob.objects.filter(id=job_id, status='QUEUED').update(
+                status='RUNNING', worker=worker, heartbeat_at=now
+            )
+            if claimed:
+                job = ImportJob.objects.get(id=job_id)
+                if job.started_at is None:
+                    job.started_at = now
+                    job.save(update_fields=['started_at'])
+                return job
+        return None
+
+    @staticmethod
+    def requeue_abandoned() -> int:
+        """
+        Re-queue RUNNING jobs whose worker is gone: a process on this host that
+        no longer exists, or any worker whose heartbeat is older than
+        settings.IMPORT_JOB_STALE_SECONDS. Returns the number re-queued.
+        """
+        stale_before = timezone.now() - timedelta(seconds=getattr(settings, 'IMPORT_JOB_STALE_SECONDS', 900))
+        host = socket.gethostname()
+        abandoned = []
+        for job in ImportJob.objects.filter(status='RUNNING').only('id', 'worker', 'heartbeat_at'):
+            worker_host, _, pid = job.worker.rpartition(':')
+            if job.heartbeat_at is None or job.heartbeat_at < stale_before:
+                abandoned.append(job.id)
+            elif worker_host == host and pid.isdigit() and not ImportJobService._process_alive(int(pid)):
+                abandoned.append(job.id)
+        if not abandoned:
+            return 0
+        return ImportJob.objects.filter(id__in=abandoned, status='RUNNING').update(status='QUEUED', worker='')
+
+    @staticmethod
+    def _process_alive(pid: int) -> bool:
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            return True
+        return True
+
+    @staticmethod
+    def run(job: ImportJob) -> ImportJob:
+        """Process a claimed job from its last checkpoint to the end of the file"""
+        clock = {'last': time.perf_counter()}
+
+        def checkpoint(chunk, results):
+            now = time.perf_counter()
+            job.rows_done = chunk[-1]['row_number'] - 1
+            job.results = results
+            job.processing_seconds += now - clock['last']
+            job.heartbeat_at = timezone.now()
+            job.save(update_fields=['rows_done', 'results', 'processing_seconds', 'heartbeat_at'])
+            clock['last'] = now
+
+        try:
+            with job.file.open('rb') as file, SpreadsheetReader(file, job.column_mapping) as reader:
+                job.total_rows = reader.estimate_rows()
+                job.save(update_fields=['total_rows'])
+
+                # The engine continues these counters and shares the errors list with _pending_rows
+                job.results.setdefault('errors', [])
+                counter = {'rows': 0}
+                seen_codes = set()
+
+                results = ItemImportService.import_rows(
+                    ImportJobService._pending_rows(reader, job, counter, seen_codes),
+                    job.created_by,
+                    on_chunk=checkpoint,
+                    results=job.results,
+                    seen_codes=seen_codes
+                )
+        except Exception as e:
+            job.status = 'FAILED'
+            job.failure = str(e)
+            job.finished_at = timezone.now()
+            job.save(update_fields=['status', 'failure', 'finished_at'])
+            return job
+
+        job.total_rows = job.rows_done = counter['rows']
+        job.results = results
+        job.processing_seconds += time.perf_counter() - clock['last']
+        job.status = 'COMPLETED'
+        job.finished_at = timezone.now()
+        job.heartbeat_at = job.finished_at
+        job.save(update_fields=[
+            'total_rows', 'rows_done', 'results', 'processing_seconds', 'status', 'finished_at', 'heartbeat_at'
+        ])
+        return job
+
+    @staticmethod
+    def _pending_rows(rows, job, counter, seen_codes):
+        """
+        Validated rows after the job's checkpoint. Invalid rows are reported in
+        job.results['errors'] as they are passed, so they are checkpointed with
+        the chunk that follows them. counter['rows'] ends as the file's row count,
+        and the short codes of rows before the checkpoint are added to seen_codes.
+        """
+        def counted():
+            for counter['rows'], row in enumerate(rows, start=1):
+                yield row
+
+        remaining = counted()
+        # Rows before the checkpoint were imported already; skip them unvalidated
+        for row in islice(remaining, job.rows_done):
+            seen_codes.add(str(row.get('short_code', '')).strip())
+        for row_number, row, validation_result in validate_rows(remaining, start=job.rows_done + 2):
+            if validation_result['valid']:
+                yield {'row_number': row_number, 'data': validation_result['data']}
+            else:
+                job.results['errors'].append({'row_number': row_number, 'errors': validation_result['errors']})
@@ -0,0 +1,824 @@
+import codecs
+import csv
+import hashlib
+import io
+import multiprocessing
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+
+import django
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+import openpyxl
+from imh_ims.models import Item, Category, Vendor, Location, StockLevel
+from .rollup_service import StockRollupService
+from .search_service import ItemSearchService
+
+
+ITEM_UPDATE_FIELDS = [
+    'name', 'category', 'default_vendor', 'photo_url', 'unit_of_measure',
+    'cost', 'lead_time_days', 'is_active', 'updated_at'
+]
+STOCK_UPDATE_FIELDS = ['on_hand_qty', 'par', 'updated_at']
+
+
+def _empty_results():
+    return {
+        'items_created': 0,
+        'items_updated': 0,
+        'items_unchanged': 0,
+        'items_removed': 0,
+        'vendors_created': 0,
+        'locations_created': 0,
+        'stock_levels_created': 0,
+        'stock_levels_updated': 0,
+        'stock_levels_unchanged': 0,
+        'errors': []
+    }
+
+
+def content_hash(*values) -> str:
+    """Digest of a row's import-managed values; decimals compare at the columns' two places"""
+    normalized = [f'{value:.2f}' if isinstance(value, Decimal) else value for value in values]
+    return hashlib.blake2b(repr(normalized).encode(), digest_size=16).hexdigest()
+
+
+class _ImportState:
+    """Lookup tables shared by every chunk of one import, keyed the way the row-by-row importer matched"""
+
+    def __init__(self):
+        self.load()
+
+    def load(self) -> None:
+        self.categories_by_id = {}
+        self.categories_by_name = {}
+        for category in Category.objects.filter(is_active=True).order_by('name', 'id'):
+            self.categories_by_id[category.id] = category
+            self.categories_by_name.setdefault(category.name.lower(), category)
+
+        self.vendors_by_id = {}
+        self.vendors_by_name = {}
+        for vendor in Vendor.objects.filter(is_active=True).order_by('name', 'id'):
+            self.vendors_by_id[vendor.id] = vendor
+            self.vendors_by_name.setdefault(vendor.name.lower(), vendor)
+
+        self.locations = {}
+        for location in Location.objects.filter(is_active=True).order_by('name', 'id'):
+            self.locations.setdefault(location.name, location)
+
+        # Reset for every chunk so memory stays bounded on large files:
+        # short_code -> Item, (item_id, location_id) -> StockLevel
+        self.items = {}
+        self.stock = {}
+
+
+class ItemImportService:
+    """
+    Set-based engine behind the items bulk import.
+
+    Categories, vendors and locations are preloaded once; each chunk of rows
+    then resolves against those dictionaries in memory, loads the existing
+    items and stock levels it touches with one query each, and writes with
+    upserting bulk_create calls. Every chunk commits on its own, so a large
+    file never holds one long transaction, and a chunk that fails is rolled
+    back and reported against each of its rows.
+
+    Re-imports are diffed rather than rewritten: each row's item and stock
+    level are hashed (content_hash) before and after the row is applied,
+    and only new and changed rows are written, so unchanged rows keep their
+    updated_at. Items not in the file are counted as removed but left
+    alone. With dry_run the same classification is made without writing.
+
+    As in the row-by-row importer it replaced, a row without a location
+    still reports that stock fields need one.
+    """
+
+    @staticmethod
+    def chunk_size() -> int:
+        return getattr(settings, 'IMPORT_CHUNK_SIZE', 2000)
+
+    @staticmethod
+    def import_rows(rows, user, chunk_size: int = None, on_chunk=None, results: dict = None,
+                    seen_codes: set = None, dry_run: bool = False) -> dict:
+        """
+        Import validated rows ({'row_number', 'data'} dicts, any iterable).
+
+        Args:
+            chunk_size: rows per transaction (default settings.IMPORT_CHUNK_SIZE)
+            on_chunk: optional callback(chunk, results), run inside the chunk's
+                transaction so checkpoints commit with the rows they cover (after
+                the rollback when the chunk failed)
+            results: counters to continue from, e.g. when resuming an import
+            seen_codes: short codes of the file's rows imported before a resume,
+                so they are not counted as removed
+            dry_run: classify the rows (new, changed, unchanged, removed) and
+                return the counters without writing anything
+        """
+        chunk_size = chunk_size or ItemImportService.chunk_size()
+        results = {**_empty_results(), **(results or {})}
+        seen_codes = set() if seen_codes is None else seen_codes
+        state = _ImportState()
+        rows = iter(rows)
+
+        while True:
+            chunk = list(islice(rows, chunk_size))
+            if not chunk:
+                break
+            seen_codes.update(row_info['data']['short_code'] for row_info in chunk)
+            if dry_run:
+                ItemImportService._write_chunk(chunk, state, results, dry_run=True)
+            else:
+                ItemImportService._import_chunk(chunk, state, results, on_chunk)
+
+        results['items_removed'] = ItemImportService.removed_count(seen_codes)
+        return results
+
+    @staticmethod
+    def removed_count(seen_codes) -> int:
+        """Active items whose short code is not among the imported rows"""
+        return sum(
+            1 for short_code in Item.objects.filter(is_active=True).values_list('short_code', flat=True).iterator()
+            if short_code not in seen_codes
+        )
+
+    @staticmethod
+    def _import_chunk(chunk, state, results, on_chunk=None) -> None:
+        before = {key: value for key, value in results.items() if key != 'errors'}
+        error_count = len(results['errors'])
+        try:
+            with transaction.atomic():
+                touched_items = ItemImportService._write_chunk(chunk, state, results)
+                # Bulk writes skip the model signals, so refresh derived data with the rows it describes
+                StockRollupService.refresh_items(touched_items['stock'])
+                ItemSearchService.index_items(touched_items['items'])
+                if on_chunk is not None:
+                    on_chunk(chunk, results)
+        except Exception as e:
+            # Undo the chunk's counters and drop lookups that may point at rolled-back rows
+            results.update(before)
+            del results['errors'][error_count:]
+            state.load()
+            for row_info in chunk:
+                results['errors'].append({
+                    'row_number': row_info['row_number'],
+                    'errors': [f"Row {row_info['row_number']}: {e}"]
+                })
+            if on_chunk is not None:
+                on_chunk(chunk, results)
+            return
+
+    @staticmethod
+    def _write_chunk(chunk, state, results, dry_run=False) -> dict:
+        now = timezone.now()
+        state.items, state.stock = {}, {}
+        codes = {row_info['data']['short_code'] for row_info in chunk}
+        for item in Item.objects.filter(short_code__in=codes):
+            state.items[item.short_code] = item
+
+        new_vendors, new_locations, new_items = [], [], []
+        changed_items = {}
+        stock_rows = []
+
+        for row_info in chunk:
+            data = row_info['data']
+            row_errors = []
+
+            category = ItemImportService._category(state, data.get('category'))
+            vendor = None
+            if 'default_vendor' in data:
+                vendor = ItemImportService._vendor(state, data, new_vendors, results)
+
+            item = state.items.get(data['short_code'])
+            if item is None:
+                item = Item(
+                    short_code=data['short_code'],
+                    name=data['name'],
+                    category=category,
+                    default_vendor=vendor,
+                    photo_url=data.get('photo_url', ''),
+                    unit_of_measure=data.get('unit_of_measure', 'ea'),
+                    cost=data.get('cost'),
+                    lead_time_days=data.get('lead_time_days', 0),
+                    is_active=data.get('is_active', True)
+                )
+                state.items[item.short_code] = item
+                new_items.append(item)
+                results['items_created'] += 1
+            else:
+                before = ItemImportService._item_hash(item)
+                item.name = data['name']
+                if category:
+                    item.category = category
+                if vendor:
+                    item.default_vendor = vendor
+                if 'photo_url' in data:
+                    item.photo_url = data.get('photo_url', '')
+                item.unit_of_measure = data.get('unit_of_measure', 'ea')
+                if 'cost' in data:
+                    item.cost = data.get('cost')
+                item.lead_time_days = data.get('lead_time_days', 0)
+                if 'is_active' in data:
+                    item.is_active = data.get('is_active', True)
+                if ItemImportService._item_hash(item) != before:
+                    item.updated_at = now
+                    if item.pk is not None:
+                        changed_items[item.short_code] = item
+                    results['items_updated'] += 1
+                else:
+                    results['items_unchanged'] += 1
+
+            has_location_name = bool(data.get('location_name'))
+            has_stock_data = 'on_hand_qty' in data or 'par' in data
+            if has_stock_data and not has_location_name:
+                row_errors.append('location_name is required when stock fields (on_hand_qty, par) are provided')
+            elif has_location_name:
+                location = ItemImportService._location(state, data, new_locations, results)
+                if has_stock_data:
+                    stock_rows.append((item, location, data))
+
+            if row_errors:
+                results['errors'].append({'row_number': row_info['row_number'], 'errors': row_errors})
+
+        if dry_run:
+            ItemImportService._save_stock(stock_rows, state, results, now, dry_run=True)
+            return {'items': [], 'stock': set()}
+
+        ItemImportService._save_locations(new_locations)
+        Vendor.objects.bulk_create(new_vendors)
+        for item in new_items:
+            # Related objects created in this chunk only received their pk just now
+            item.category_id = item.category.pk if item.category else None
+            item.default_vendor_id = item.default_vendor.pk if item.default_vendor else None
+        ItemImportService._upsert(Item, new_items, ['short_code'], ITEM_UPDATE_FIELDS)
+        for item in changed_items.values():
+            item.default_vendor_id = item.default_vendor.pk if item.default_vendor else None
+        ItemImportService._upsert(Item, list(changed_items.values()), ['id'], ITEM_UPDATE_FIELDS)
+
+        stock_items = ItemImportService._save_stock(stock_rows, state, results, now)
+        return {
+            'items': [item.pk for item in new_items] + [item.pk for item in changed_items.values()],
+            'stock': stock_items
+        }
+
+    @staticmethod
+    def _item_hash(item) -> str:
+        # A vendor created by this chunk has no pk yet; its name stands in for it
+        vendor_field = Item._meta.get_field('default_vendor')
+        vendor = item.default_vendor_id
+        if vendor_field.is_cached(item) and item.default_vendor is not None and item.default_vendor.pk is None:
+            vendor = ('new', item.default_vendor.name)
+        return content_hash(
+            item.name, item.category_id, vendor, item.photo_url, item.unit_of_measure,
+            item.cost, item.lead_time_days, item.is_active
+        )
+
+    @staticmethod
+    def _stock_hash(stock_level) -> str:
+        return content_hash(stock_level.on_hand_qty, stock_level.par)
+
+    @staticmethod
+    def _stock_key(item, location):
+        # Without pks (a dry run's new items and locations) the natural keys stand in
+        if item.pk is None or location.pk is None:
+            return (item.short_code, location.name)
+        return (item.pk, location.pk)
+
+    @staticmethod
+    def _upsert(model, objs, unique_fields, update_fields) -> None:
+        """
+        INSERT ... ON CONFLICT DO UPDATE. Rows that already exist are written
+        this way too (conflicting on id): bulk_update() builds a CASE
+        expression per field and row, which costs far more than the write.
+        """
+        model.objects.bulk_create(
+            objs,
+            batch_size=500,
+            update_conflicts=True,
+            unique_fields=unique_fields,
+            update_fields=update_fields
+        )
+
+    @staticmethod
+    def _category(state, category_name_or_id):
+        if not category_name_or_id:
+            return None
+        category = None
+        try:
+            category = state.categories_by_id.get(int(category_name_or_id))
+        except (ValueError, TypeError):
+            pass
+        return category or state.categories_by_name.get(str(category_name_or_id).lower())
+
+    @staticmethod
+    def _vendor(state, data, new_vendors, results):
+        vendor_name_or_id = data['default_vendor']
+        if not vendor_name_or_id:
+            return None
+        vendor = None
+        try:
+            vendor = state.vendors_by_id.get(int(vendor_name_or_id))
+        except (ValueError, TypeError):
+            pass
+        vendor = vendor or state.vendors_by_name.get(str(vendor_name_or_id).lower())
+        if vendor is None:
+            vendor = Vendor(
+                name=str(vendor_name_or_id),
+                contact_info=data.get('vendor_contact_info', ''),
+                phone=data.get('vendor_phone', ''),
+                email=data.get('vendor_email', ''),
+                is_active=True
+            )
+            state.vendors_by_name[vendor.name.lower()] = vendor
+            new_vendors.append(vendor)
+            results['vendors_created'] += 1
+        return vendor
+
+    @staticmethod
+    def _location(state, data, new_locations, results):
+        location = state.locations.get(data['location_name'])
+        if location is not None:
+            return location
+
+        location = Location(
+            name=data['location_name'],
+            type=data.get('location_type', 'STOREROOM'),
+            property_id=data.get('location_property_id', ''),
+            is_active=True
+        )
+        state.locations[location.name] = location
+        new_locations.append(location)
+        results['locations_created'] += 1
+
+        parent_name = data.get('parent_location_name')
+        if parent_name:
+            parent = state.locations.get(parent_name)
+            if parent is None:
+                # Parents created on the fly are not counted, as before
+                parent = Location(name=parent_name, type='STOREROOM', is_active=True)
+                state.locations[parent_name] = parent
+                new_locations.append(parent)
+            location.parent_location = parent
+        return location
+
+    @staticmethod
+    def _save_locations(new_locations) -> None:
+        """Insert new locations, then link parents that were themselves new"""
+        if not new_locations:
+            return
+        parents = [(location, location.parent_location) for location in new_locations]
+        for location in new_locations:
+            location.parent_location = None
+        Location.objects.bulk_create(new_locations)
+        linked = []
+        for location, parent in parents:
+            if parent is not None:
+                location.parent_location = parent
+                linked.append(location)
+        Location.objects.bulk_update(linked, ['parent_location'])
+
+    @staticmethod
+    def _save_stock(stock_rows, state, results, now, dry_run=False) -> set:
+        """
+        Create or update one StockLevel per (item, location) row, writing only
+        new and changed levels; returns the ids of items whose stock was written
+        """
+        if not stock_rows:
+            return set()
+
+        keys = {ItemImportService._stock_key(item, location) for item, location, _ in stock_rows}
+        saved_keys = {key for key in keys if isinstance(key[0], int)}
+        existing = StockLevel.objects.filter(
+            item_id__in={item_id for item_id, _ in saved_keys},
+            location_id__in={location_id for _, location_id in saved_keys}
+        )
+        for stock_level in existing:
+            if (stock_level.item_id, stock_level.location_id) in saved_keys:
+                state.stock[(stock_level.item_id, stock_level.location_id)] = stock_level
+
+        created, updated = {}, {}
+        for item, location, data in stock_rows:
+            key = ItemImportService._stock_key(item, location)
+            stock_level = state.stock.get(key)
+            if stock_level is None:
+                on_hand = data.get('on_hand_qty')
+                par_val = data.get('par')
+                if par_val is None:
+                    par_val = data.get('par_min')
+                stock_level = StockLevel(
+                    item_id=item.pk,
+                    location_id=location.pk,
+                    on_hand_qty=on_hand if on_hand is not None else Decimal('0'),
+                    par=par_val if par_val is not None else Decimal('0')
+                )
+                state.stock[key] = stock_level
+                created[key] = stock_level
+                results['stock_levels_created'] += 1
+                continue
+
+            before = ItemImportService._stock_hash(stock_level)
+            if data.get('on_hand_qty') is not None:
+                stock_level.on_hand_qty = data['on_hand_qty']
+            if data.get('par') is not None:
+                stock_level.par = data['par']
+            elif data.get('par_min') is not None:
+                stock_level.par = data['par_min']
+            if ItemImportService._stock_hash(stock_level) == before:
+                results['stock_levels_unchanged'] += 1
+                continue
+            stock_level.updated_at = now
+            if key not in created:
+                updated[key] = stock_level
+            results['stock_levels_updated'] += 1
+
+        if dry_run:
+            return set()
+        ItemImportService._upsert(StockLevel, list(created.values()), ['item', 'location'], STOCK_UPDATE_FIELDS)
+        ItemImportService._upsert(StockLevel, list(updated.values()), ['id'], STOCK_UPDATE_FIELDS)
+        return {key[0] for key in list(created) + list(updated)}
+
+
+# Common export column names -> system column names (applied after normalization)
+COLUMN_ALIASES = {
+    'item_name': 'name',
+    'product_name': 'name',
+    'description': 'name',
+    'item_code': 'short_code',
+    'sku': 'short_code',
+    'product_code': 'short_code',
+    'item_number': 'short_code',
+    'part_number': 'short_code',
+    'qty': 'on_hand_qty',
+    'quantity': 'on_hand_qty',
+    'stock': 'on_hand_qty',
+    'inventory': 'on_hand_qty',
+    'on_hand': 'on_hand_qty',
+    'par_level': 'par',
+    'min_stock': 'par',
+    'reorder_point': 'par',
+    'reorder_level': 'par',
+    'location': 'location_name',
+    'warehouse': 'location_name',
+    'store': 'location_name',
+    'bin': 'location_name',
+    'supplier': 'default_vendor',
+    'vendor_name': 'default_vendor',
+    'manufacturer': 'default_vendor',
+}
+
+# Bytes read up front to pick a CSV encoding
+ENCODING_SAMPLE_BYTES = 1024 * 1024
+
+
+def normalize_column(column, column_mapping=None) -> str:
+    """System column name for a spreadsheet header cell"""
+    column = '' if column is None else str(column)
+    if column_mapping and column in column_mapping:
+        column = column_mapping[column]
+    # More flexible normalization for foreign system exports
+    key = column.strip().lower().replace(' ', '_').replace('-', '_').replace('.', '_')
+    return COLUMN_ALIASES.get(key, key)
+
+
+def detect_encoding(sample: bytes) -> str:
+    """UTF-8 (with or without BOM) when the sample decodes as such, else Windows-1252, else Latin-1"""
+    if sample.startswith(codecs.BOM_UTF8):
+        return 'utf-8-sig'
+    try:
+        # A multi-byte character may be cut off at the end of the sample
+        codecs.getincrementaldecoder('utf-8')().decode(sample, final=False)
+        return 'utf-8'
+    except UnicodeDecodeError:
+        pass
+    try:
+        sample.decode('cp1252')
+        return 'cp1252'
+    except UnicodeDecodeError:
+        return 'latin-1'
+
+
+class SpreadsheetReader:
+    """
+    Streams the data rows of an uploaded CSV or Excel file as dicts keyed by
+    normalized column names, without loading the file into memory.
+
+    CSV files are read with the csv module after picking the encoding from
+    the first ENCODING_SAMPLE_BYTES; cells stay text, so codes such as
+    "00123" keep their leading zeros. XLSX files are read with openpyxl in
+    read_only mode. Header names are normalized once, and fully blank lines
+    are skipped. Iterating again restarts from the first data row.
+
+    Raises ValueError for unsupported or unreadable files.
+    """
+
+    def __init__(self, file, column_mapping=None):
+        self.file = file
+        self.encoding = None
+        self._workbook = None
+        file_extension = file.name.lower().split('.')[-1]
+
+        try:
+            if file_extension in ['xlsx', 'xls']:
+                self.kind = 'excel'
+                self._workbook = openpyxl.load_workbook(file, read_only=True, data_only=True)
+                header = next(self._workbook.active.iter_rows(max_row=1, values_only=True), ())
+            elif file_extension == 'csv':
+                self.kind = 'csv'
+                file.seek(0)
+                self.encoding = detect_encoding(file.read(ENCODING_SAMPLE_BYTES))
+                header = next(self._csv_rows(), [])
+            else:
+                raise ValueError(f'Unsupported file type: {file_extension}. Supported: CSV, XLSX, XLS')
+        except ValueError:
+            raise
+        except Exception as e:
+            raise ValueError(str(e)) from e
+
+        # Excel sheets often carry trailing empty header cells
+        while header and header[-1] in (None, ''):
+            header = header[:-1]
+        self.original_columns = ['' if column is None else str(column) for column in header]
+        self.columns = [normalize_column(column, column_mapping) for column in self.original_columns]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self) -> None:
+        if self._workbook is not None:
+            self._workbook.close()
+            self._workbook = None
+
+    def _csv_rows(self):
+        self.file.seek(0)
+        text = io.TextIOWrapper(self.file, encoding=self.encoding, errors='replace', newline='')
+        try:
+            for cells in csv.reader(text):
+                if any(cells):
+                    yield cells
+        finally:
+            # Leave the underlying file open for the caller
+            text.detach()
+
+    def _raw_rows(self):
+        """Data rows as cell sequences, header excluded"""
+        if self.kind == 'csv':
+            rows = self._csv_rows()
+            next(rows, None)
+            return rows
+        return (
+            cells for cells in self._workbook.active.iter_rows(min_row=2, values_only=True)
+            if any(cell not in (None, '') for cell in cells)
+        )
+
+    def __iter__(self):
+        columns = self.columns
+        width = len(columns)
+        for cells in self._raw_rows():
+            cells = list(cells[:width])
+            if len(cells) < width:
+                cells.extend([''] * (width - len(cells)))
+            yield {column: '' if cell is None else cell for column, cell in zip(columns, cells)}
+
+    def estimate_rows(self):
+        """
+        Data rows in the file: counted for CSV (a quick second pass), taken
+        from the sheet dimensions for Excel, where it may include blank rows.
+        None if unknown.
+        """
+        if self.kind == 'csv':
+            return sum(1 for _ in self._raw_rows())
+        max_row = self._workbook.active.max_row
+        return max_row - 1 if max_row else None
+
+
+def validate_row(row, row_number):
+    """Validate a single row of import data"""
+    errors = []
+    data = {}
+    
+    # Required fields
+    name = str(row.get('name', '')).strip()
+    short_code = str(row.get('short_code', '')).strip()
+    
+    if not name:
+        errors.append('name is required')
+    else:
+        data['name'] = name
+    
+    if not short_code:
+        errors.append('short_code is required')
+    else:
+        data['short_code'] = short_code
+    
+    # Optional item fields
+    category = str(row.get('category', '')).strip()
+    if category:
+        data['category'] = category
+    
+    default_vendor = str(row.get('default_vendor', '')).strip()
+    if default_vendor:
+        data['default_vendor'] = default_vendor
+        # Also extract optional vendor details if provided
+        vendor_email = str(row.get('vendor_email', '')).strip()
+        if vendor_email:
+            data['vendor_email'] = vendor_email
+        
+        vendor_phone = str(row.get('vendor_phone', '')).strip()
+        if vendor_phone:
+            data['vendor_phone'] = vendor_phone
+        
+        vendor_contact_info = str(row.get('vendor_contact_info', '')).strip()
+        if vendor_contact_info:
+            data['vendor_contact_info'] = vendor_contact_info
+    
+    photo_url = str(row.get('photo_url', '')).strip()
+    if photo_url:
+        data['photo_url'] = photo_url
+    
+    unit_of_measure = str(row.get('unit_of_measure', '')).strip() or 'ea'
+    data['unit_of_measure'] = unit_of_measure
+    
+    cost = str(row.get('cost', '')).strip()
+    if cost:
+        try:
+            data['cost'] = Decimal(str(cost))
+        except (InvalidOperation, ValueError):
+            errors.append(f'Invalid cost value: {cost}')
+    
+    lead_time_days = str(row.get('lead_time_days', '')).strip()
+    if lead_time_days:
+        try:
+            data['lead_time_days'] = int(lead_time_days)
+            if data['lead_time_days'] < 0:
+                errors.append('lead_time_days must be >= 0')
+        except ValueError:
+            errors.append(f'Invalid lead_time_days value: {lead_time_days}')
+    else:
+        data['lead_time_days'] = 0
+    
+    is_active = str(row.get('is_active', '')).strip().lower()
+    if is_active in ['true', '1', 'yes']:
+        data['is_active'] = True
+    elif is_active in ['false', '0', 'no']:
+        data['is_active'] = False
+    else:
+        data['is_active'] = True  # Default
+    
+    # Location fields - always try to extract, even if empty (for preview)
+    # Try multiple possible column name variations
+    location_name = ''
+    for key in ['location_name', 'location', 'locationname', 'loc_name']:
+        if key in row:
+            location_name = str(row.get(key, '')).strip()
+            if location_name:
+                break
+    
+    if location_name:
+        data['location_name'] = location_name
+        
+        location_type = str(row.get('location_type', '')).strip().upper()
+        valid_types = ['STOREROOM', 'CLOSET', 'CART', 'ROOM', 'OTHER']
+        if location_type in valid_types:
+            data['location_type'] = location_type
+        else:
+            data['location_type'] = 'STOREROOM'  # Default
+        
+        location_property_id = str(row.get('location_property_id', '')).strip()
+        if location_property_id:
+            data['location_property_id'] = location_property_id
+        
+        parent_location_name = str(row.get('parent_location_name', '')).strip()
+        if parent_location_name:
+            data['parent_location_name'] = parent_location_name
+    else:
+        # Still add empty location_name for preview display
+        data['location_name'] = ''
+    
+    # Stock fields - try multiple column name variations and always extract for preview
+    # Try various possible column names (prioritize common variations like 'qty' and 'min_par')
+    on_hand_qty_str = ''
+    for key in ['qty', 'quantity', 'on_hand_qty', 'on_hand', 'qty_on_hand', 'onhand_qty', 'stock', 'current_stock']:
+        if key in row:
+            val = str(row.get(key, '')).strip()
+            if val:  # Check if not empty
+                on_hand_qty_str = val
+                break
+    
+    par_str = ''
+    for key in ['par', 'par_level', 'min_par', 'par_min', 'parmin', 'minimum_par', 'par_minimum', 'min', 'minimum']:
+        if key in row:
+            val = str(row.get(key, '')).strip()
+            if val:  # Check if not empty
+                par_str = val
+                break
+    
+    has_location = bool(location_name)
+    has_stock_data = any([on_hand_qty_str, par_str])
+    
+    # Always add stock fields to data for preview (even if empty)
+    if has_stock_data and not has_location:
+        errors.append('location_name is required when stock fields (on_hand_qty, par) are provided')
+    
+    # Process on_hand_qty
+    if on_hand_qty_str:
+        try:
+            qty = Decimal(str(on_hand_qty_str))
+            if qty < 0:
+                errors.append('on_hand_qty must be >= 0')
+            else:
+                data['on_hand_qty'] = qty
+        except (InvalidOperation, ValueError):
+            errors.append(f'Invalid on_hand_qty value: {on_hand_qty_str}')
+    else:
+        # Add empty for preview
+        data['on_hand_qty'] = None
+    
+    # Process par
+    if par_str:
+        try:
+            par_val = Decimal(str(par_str))
+            if par_val < 0:
+                errors.append('par must be >= 0')
+            else:
+                data['par'] = par_val
+        except (InvalidOperation, ValueError):
+            errors.append(f'Invalid par value: {par_str}')
+    else:
+        # Add empty for preview
+        data['par'] = None
+    
+    return {
+        'valid': len(errors) == 0,
+        'data': data,
+        'errors': errors
+    }
+
+
+def _validate_batch(batch):
+    return [(row_number, row, validate_row(row, row_number)) for row_number, row in batch]
+
+
+def validation_workers() -> int:
+    """Processes used by validate_rows(): settings.IMPORT_VALIDATION_WORKERS, else the CPU count"""
+    return getattr(settings, 'IMPORT_VALIDATION_WORKERS', None) or os.cpu_count() or 1
+
+
+def validate_rows(rows, start=2, workers=None, batch_size=None, parallel_after=None):
+    """
+    Validate spreadsheet rows, yielding (row_number, row, result) in file
+    order, numbering rows from `start` (row 1 is the header).
+
+    The first settings.IMPORT_VALIDATION_PARALLEL_AFTER rows are validated in
+    this process: starting workers costs about a second each, while a row
+    takes microseconds. Past that, with more than one worker, batches of
+    settings.IMPORT_VALIDATION_BATCH_SIZE rows run on a process pool while
+    the next ones are read; at most two batches per worker are in flight, so
+    memory stays bounded on very large files. Workers are spawned rather
+    than forked (the import worker is threaded) and run django.setup()
+    before their first batch.
+    """
+    workers = workers or validation_workers()
+    batch_size = batch_size or getattr(settings, 'IMPORT_VALIDATION_BATCH_SIZE', 5000)
+    if parallel_after is None:
+        parallel_after = getattr(settings, 'IMPORT_VALIDATION_PARALLEL_AFTER', 50000)
+    numbered = enumerate(rows, start=start)
+    batches = iter(lambda: list(islice(numbered, batch_size)), [])
+
+    if workers <= 1:
+        for batch in batches:
+            yield from _validate_batch(batch)
+        return
+
+    for row_number, row in numbered:
+        yield row_number, row, validate_row(row, row_number)
+        if row_number - start + 1 >= parallel_after:
+            break
+    else:
+        return
+
+    first = next(batches, None)
+    if first is None:
+        return
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context('spawn'),
+        initializer=django.setup
+    ) as pool:
+        pending = deque([pool.submit(_validate_batch, first)])
+        try:
+            for batch in batches:
+                if len(pending) >= workers * 2:
+                    yield from pending.popleft().result()
+                pending.append(pool.submit(_validate_batch, batch))
+            while pending:
+                yield from pending.popleft().result()
+        finally:
+            # The consumer may stop early (or fail); drop batches nobody will read
+            for future in pending:
+                future.cancel()
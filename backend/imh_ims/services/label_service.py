@@ -0,0 +1,196 @@
+import multiprocessing
+import os
+from collections import deque
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+
+import django
+from django.conf import settings
+from PIL import Image, ImageDraw, ImageFont
+
+from .qr_service import generate_qr_code
+
+
+# Avery-style sheets, in inches: page size, grid, label size, first label's
+# top-left corner and the pitch (label size plus gap) between labels
+LABEL_LAYOUTS = {
+    'avery-5160': {
+        'description': 'Letter, 3 x 10 address labels, 2.625" x 1"',
+        'page': (8.5, 11), 'columns': 3, 'rows': 10, 'label': (2.625, 1.0),
+        'margin': (0.1875, 0.5), 'pitch': (2.75, 1.0),
+    },
+    'avery-5163': {
+        'description': 'Letter, 2 x 5 shipping labels, 4" x 2"',
+        'page': (8.5, 11), 'columns': 2, 'rows': 5, 'label': (4.0, 2.0),
+        'margin': (0.15625, 0.5), 'pitch': (4.1875, 2.0),
+    },
+    'avery-22806': {
+        'description': 'Letter, 3 x 4 square labels, 2" x 2"',
+        'page': (8.5, 11), 'columns': 3, 'rows': 4, 'label': (2.0, 2.0),
+        'margin': (0.625, 0.625), 'pitch': (2.625, 2.5),
+    },
+    'avery-l7160': {
+        'description': 'A4, 3 x 7 labels, 63.5 x 38.1 mm',
+        'page': (8.27, 11.69), 'columns': 3, 'rows': 7, 'label': (2.5, 1.5),
+        'margin': (0.28, 0.6), 'pitch': (2.6, 1.5),
+    },
+}
+DEFAULT_LABEL_LAYOUT = 'avery-5160'
+
+
+def _render_page(layout: dict, labels: list, dpi: int) -> bytes:
+    """One sheet as the raw bits of a mode "1" image (cheap to pass between processes)"""
+    return LabelSheetService.render_page(layout, labels, dpi).tobytes()
+
+
+class LabelSheetService:
+    """
+    Printable sheets of item labels (QR code, name, short code) on an
+    Avery-style grid, as a multi-page PDF or a single PNG page.
+
+    Pages are drawn in 1-bit at settings.LABEL_DPI so QR modules stay sharp
+    and the PDF can use fax compression. When a job has more than
+    settings.LABEL_PARALLEL_PAGES pages and more than one worker is
+    configured (LABEL_RENDER_WORKERS, default one per CPU), pages are drawn
+    on a spawned process pool; starting a worker costs about a second, so
+    small sheets are drawn in this process.
+    """
+
+    @staticmethod
+    def layout(name: str) -> dict:
+        try:
+            return LABEL_LAYOUTS[name or DEFAULT_LABEL_LAYOUT]
+        except KeyError:
+            raise ValueError(f"Unknown layout: {name}. Choose from {', '.join(LABEL_LAYOUTS)}")
+
+    @staticmethod
+    def dpi() -> int:
+        return getattr(settings, 'LABEL_DPI', 300)
+
+    @staticmethod
+    def paginate(labels: list, layout: dict) -> list:
+        per_page = layout['columns'] * layout['rows']
+        return [labels[start:start + per_page] for start in range(0, len(labels), per_page)]
+
+    @staticmethod
+    def render_pdf(labels: list, layout_name: str = None, workers: int = None) -> bytes:
+        """All pages as one PDF. labels: (name, short_code) pairs in print order"""
+        layout = LabelSheetService.layout(layout_name)
+        dpi = LabelSheetService.dpi()
+        pages = LabelSheetService.paginate(labels, layout) or [[]]
+        images = list(LabelSheetService._render_pages(layout, pages, dpi, workers))
+        buffer = BytesIO()
+        images[0].save(buffer, format='PDF', save_all=True, append_images=images[1:], resolution=dpi)
+        return buffer.getvalue()
+
+    @staticmethod
+    def render_png(labels: list, layout_name: str = None, page: int = 1) -> tuple:
+        """One page as PNG; returns (png bytes, page count). Raises ValueError for a page out of range"""
+        layout = LabelSheetService.layout(layout_name)
+        pages = LabelSheetService.paginate(labels, layout) or [[]]
+        if not 1 <= page <= len(pages):
+            raise ValueError(f"page must be between 1 and {len(pages)}")
+        image = LabelSheetService.render_page(layout, pages[page - 1], LabelSheetService.dpi())
+        buffer = BytesIO()
+        image.save(buffer, format='PNG', dpi=(LabelSheetService.dpi(), LabelSheetService.dpi()))
+        return buffer.getvalue(), len(pages)
+
+    @staticmethod
+    def _render_pages(layout: dict, pages: list, dpi: int, workers: int = None):
+        size = LabelSheetService._pixels(layout['page'], dpi)
+        workers = workers or getattr(settings, 'LABEL_RENDER_WORKERS', None) or os.cpu_count() or 1
+        if workers <= 1 or len(pages) <= getattr(settings, 'LABEL_PARALLEL_PAGES', 4):
+            for labels in pages:
+                yield LabelSheetService.render_page(layout, labels, dpi)
+            return
+
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=django.setup
+        ) as pool:
+            # Pages come back in order; at most two per worker are in flight
+            pending = deque()
+            for labels in pages:
+                if len(pending) >= workers * 2:
+                    yield Image.frombytes('1', size, pending.popleft().result())
+                pending.append(pool.submit(_render_page, layout, labels, dpi))
+            while pending:
+                yield Image.frombytes('1', size, pending.popleft().result())
+
+    @staticmethod
+    def render_page(layout: dict, labels: list, dpi: int) -> Image.Image:
+        page = Image.new('1', LabelSheetService._pixels(layout['page'], dpi), 1)
+        label_size = LabelSheetService._pixels(layout['label'], dpi)
+        for index, (name, short_code) in enumerate(labels):
+            row, column = divmod(index, layout['columns'])
+            left = round((layout['margin'][0] + column * layout['pitch'][0]) * dpi)
+            top = round((layout['margin'][1] + row * layout['pitch'][1]) * dpi)
+            page.paste(LabelSheetService.render_label(name, short_code, label_size), (left, top))
+        return page
+
+    @staticmethod
+    def render_label(name: str, short_code: str, size: tuple) -> Image.Image:
+        """
+        QR code beside the text on wide labels, above it on squarish ones.
+        The code is set smaller until it fits; the name is cut to fit.
+        """
+        width, height = size
+        pad = max(4, min(width, height) // 16)
+        label = Image.new('1', size, 1)
+        draw = ImageDraw.Draw(label)
+
+        wide = width >= height * 1.6
+        if wide:
+            qr_side = height - 2 * pad
+            text_box = (qr_side + 2 * pad, pad, width - pad, height - pad)
+        else:
+            qr_side = round(height * 0.7) - 2 * pad
+            text_box = (pad, qr_side + pad, width - pad, height - pad)
+        qr = generate_qr_code(short_code, qr_side).convert('1')
+        label.paste(qr, ((width - qr_side) // 2 if not wide else pad, pad))
+
+        box_width = text_box[2] - text_box[0]
+        box_height = text_box[3] - text_box[1]
+        line_height = max(8, min(box_height // (2 if wide else 3), box_width // 8))
+        code_size = line_height
+        code_font = LabelSheetService._font(code_size)
+        while code_size > 8 and draw.textlength(short_code, font=code_font) > box_width:
+            code_size -= 2
+            code_font = LabelSheetService._font(code_size)
+        name_font = LabelSheetService._font(max(8, round(line_height * 0.8)))
+        name = LabelSheetService._fit(draw, name, name_font, box_width)
+        code = short_code
+        if wide:
+            draw.text((text_box[0], text_box[1]), code, font=code_font, fill=0)
+            draw.text((text_box[0], text_box[1] + line_height + pad), name, font=name_font, fill=0)
+        else:
+            draw.text((width // 2, text_box[1]), code, font=code_font, fill=0, anchor='ma')
+            draw.text((width // 2, text_box[1] + line_height + pad // 2), name, font=name_font, fill=0, anchor='ma')
+        return label
+
+    @staticmethod
+    @lru_cache(maxsize=32)
+    def _font(size: int):
+        return ImageFont.load_default(size=size)
+
+    @staticmethod
+    def _fit(draw, text: str, font, width: int) -> str:
+        """text, shortened with an ellipsis until it fits width"""
+        text = str(text or '')
+        if draw.textlength(text, font=font) <= width:
+            return text
+        # Longest prefix that fits with the ellipsis, by bisection
+        low, high = 0, len(text)
+        while low < high:
+            middle = (low + high + 1) // 2
+            if draw.textlength(text[:middle] + '…', font=font) <= width:
+                low = middle
+            else:
+                high = middle - 1
+        return text[:low].rstrip() + '…'
+
+    @staticmethod
+    def _pixels(inches: tuple, dpi: int) -> tuple:
+        return (round(inches[0] * dpi), round(inches[1] * dpi))
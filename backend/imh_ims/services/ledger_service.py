@@ -0,0 +1,321 @@
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+import os
+
+from django.db import transaction, connection, connections
+from django.db.models import Sum, Max, Min, Q
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from imh_ims.models import InventoryTransaction, StockCheckpoint, StockLevel, Item
+
+
+ADJUST_TYPES = ('ADJUST', 'COUNT_ADJUST')
+
+
+def _init_replay_worker():
+    """Prepare a replay worker process: set Django up (spawn) and drop inherited connections (fork)"""
+    import django
+    from django.apps import apps
+    if not apps.ready:
+        django.setup()
+    connections.close_all()
+
+
+def _replay_partition(start_id: int, end_id: int, boundaries: list) -> dict:
+    """
+    Replay the ledger of items with start_id <= id < end_id from an empty
+    stock state, returning checkpoint rows at each boundary and the deltas of
+    legacy adjustments that only recorded an absolute quantity.
+
+    Stock not explained by the ledger (rows created outside StockService) is
+    treated as an opening balance present before the first boundary, unless
+    the pair has an absolute adjustment which pins its value.
+    """
+    current = defaultdict(dict)
+    for item_id, location_id, on_hand in StockLevel.objects.filter(
+        item_id__gte=start_id, item_id__lt=end_id
+    ).values_list('item_id', 'location_id', 'on_hand_qty').iterator():
+        current[item_id][location_id] = on_hand
+
+    ledger = InventoryTransaction.objects.filter(
+        item_id__gte=start_id, item_id__lt=end_id
+    ).order_by('item_id', 'timestamp', 'id').values_list(
+        'id', 'item_id', 'type', 'qty', 'qty_delta', 'from_location_id', 'to_location_id', 'timestamp'
+    )
+
+    # Quantities are adapted for the database here so the parent only has to insert
+    adapt_qty = connections['default'].ops.adapt_decimalfield_value
+    checkpoints = []
+    backfill = []
+    stats = {'items': 0, 'transactions': 0}
+
+    def flush(item_id, values, snapshots, pinned):
+        for location_id in set(values) | set(current.get(item_id, {})):
+            offset = Decimal('0')
+            if location_id not in pinned:
+                offset = current.get(item_id, {}).get(location_id, Decimal('0')) - values.get(location_id, Decimal('0'))
+            for index, snapshot in enumerate(snapshots):
+                qty = snapshot.get(location_id, Decimal('0')) + offset
+                if qty:
+                    checkpoints.append((item_id, location_id, index, adapt_qty(qty, 12, 2)))
+        stats['items'] += 1
+
+    def finish(item_id, values, snapshots, pinned):
+        while len(snapshots) < len(boundaries):
+            snapshots.append(dict(values))
+        flush(item_id, values, snapshots, pinned)
+        current.pop(item_id, None)
+
+    item_id = None
+    values, snapshots, pinned = {}, [], set()
+    for trans_id, trans_item, trans_type, qty, qty_delta, from_id, to_id, timestamp in ledger.iterator(chunk_size=5000):
+        if trans_item != item_id:
+            if item_id is not None:
+                finish(item_id, values, snapshots, pinned)
+            item_id = trans_item
+            values, snapshots, pinned = {}, [], set()
+
+        while len(snapshots) < len(boundaries) and timestamp > boundaries[len(snapshots)]:
+            snapshots.append(dict(values))
+
+        if trans_type in ADJUST_TYPES:
+            location_id = to_id or from_id
+            if location_id is None:
+                continue
+            if qty_delta is None:
+                qty_delta = qty - values.get(location_id, Decimal('0'))
+                backfill.append((trans_id, qty_delta))
+                pinned.add(location_id)
+            values[location_id] = values.get(location_id, Decimal('0')) + qty_delta
+        else:
+            if from_id is not None:
+                values[from_id] = values.get(from_id, Decimal('0')) - qty
+            if to_id is not None:
+                values[to_id] = values.get(to_id, Decimal('0')) + qty
+        stats['transactions'] += 1
+
+    if item_id is not None:
+        finish(item_id, values, snapshots, pinned)
+
+    # Items with stock but no ledger at all keep their current quantity throughout
+    for item_id in list(current):
+        finish(item_id, {}, [], set())
+
+    return {'checkpoints': checkpoints, 'backfill': backfill, 'stats': stats}
+
+
+class LedgerService:
+    """Service for ledger checkpoints and point-in-time ("as-of") stock queries"""
+
+    BATCH_SIZE = 1000
+
+    @staticmethod
+    @transaction.atomic
+    def create_snapshot(as_of: datetime = None) -> int:
+        """
+        Checkpoint every StockLevel row at the current moment.
+        Returns the number of checkpoint rows written.
+        """
+        as_of = as_of or timezone.now()
+        batch = []
+        written = 0
+        rows = StockLevel.objects.exclude(on_hand_qty=0).values_list('item_id', 'location_id', 'on_hand_qty')
+        for item_id, location_id, on_hand in rows.iterator(chunk_size=LedgerService.BATCH_SIZE):
+            batch.append(StockCheckpoint(
+                item_id=item_id,
+                location_id=location_id,
+                as_of=as_of,
+                on_hand_qty=on_hand,
+                source='SNAPSHOT'
+            ))
+            if len(batch) >= LedgerService.BATCH_SIZE:
+                StockCheckpoint.objects.bulk_create(batch)
+                written += len(batch)
+                batch = []
+        if batch:
+            StockCheckpoint.objects.bulk_create(batch)
+            written += len(batch)
+        return written
+
+    @staticmethod
+    def replay_boundaries(interval_days: int = 30, until: datetime = None) -> list:
+        """Checkpoint times from the first ledger day to `until`, every interval_days at midnight"""
+        until = until or timezone.now()
+        first = InventoryTransaction.objects.aggregate(first=Min('timestamp'))['first']
+        if first is None:
+            return []
+        tz = timezone.get_current_timezone()
+        boundary = timezone.make_aware(datetime.combine(timezone.localtime(first).date(), time.min), tz)
+        boundaries = []
+        while boundary < until:
+            boundaries.append(boundary)
+            boundary += timedelta(days=interval_days)
+        return boundaries
+
+    @staticmethod
+    def _item_partitions(parts: int) -> list:
+        """Split the item id space into roughly equal contiguous ranges"""
+        ids = list(Item.objects.order_by('id').values_list('id', flat=True))
+        if not ids:
+            return []
+        size = max(1, -(-len(ids) // parts))
+        ranges = []
+        for start in range(0, len(ids), size):
+            end = start + size
+            ranges.append((ids[start], ids[end] if end < len(ids) else ids[-1] + 1))
+        return ranges
+
+    @staticmethod
+    def rebuild_checkpoints(interval_days: int = 30, workers: int = None, until: datetime = None) -> dict:
+        """
+        Replay the whole ledger into REPLAY checkpoints every interval_days.
+
+        Items are split into id ranges replayed in parallel worker processes
+        (workers=1 replays in-process). Legacy adjustments without qty_delta get
+        their delta backfilled. Snapshot checkpoints are left untouched.
+        """
+        workers = workers or os.cpu_count() or 1
+        boundaries = LedgerService.replay_boundaries(interval_days, until)
+        partitions = LedgerService._item_partitions(workers * 4 if workers > 1 else 1)
+        stats = {'items': 0, 'transactions': 0, 'checkpoints': 0, 'backfilled': 0, 'boundaries': len(boundaries)}
+
+        # Never collide with a snapshot batch taken at exactly a boundary
+        taken = set(StockCheckpoint.objects.filter(as_of__in=boundaries, source='SNAPSHOT').values_list('as_of', flat=True))
+        boundaries = [boundary for boundary in boundaries if boundary not in taken]
+        if not boundaries:
+            StockCheckpoint.objects.filter(source='REPLAY').delete()
+            return stats
+
+        if workers == 1:
+            results = [_replay_partition(start, end, boundaries) for start, end in partitions]
+        else:
+            # Child processes must not share the parent's open database connection
+            connections.close_all()
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_replay_worker) as pool:
+                futures = [pool.submit(_replay_partition, start, end, boundaries) for start, end in partitions]
+                results = [future.result() for future in as_completed(futures)]
+
+        with transaction.atomic():
+            # Older replay checkpoints may predate archived ledger rows; keep those
+            StockCheckpoint.objects.filter(source='REPLAY', as_of__gte=boundaries[0]).delete()
+            for result in results:
+                LedgerService._store_replay(result, boundaries, stats)
+        return stats
+
+    @staticmethod
+    def _store_replay(result: dict, boundaries: list, stats: dict) -> None:
+        """
+        Insert replayed checkpoints with executemany. Rows arrive already adapted
+        by the workers, which skips per-row model instantiation and SQL compiling
+        that otherwise dominate a multi-million row rebuild.
+        """
+        ops = connection.ops
+        as_of_values = [ops.adapt_datetimefield_value(boundary) for boundary in boundaries]
+        created_at = ops.adapt_datetimefield_value(timezone.now())
+        meta = StockCheckpoint._meta
+        columns = ', '.join(
+            ops.quote_name(meta.get_field(name).column)
+            for name in ('item', 'location', 'as_of', 'on_hand_qty', 'source', 'created_at')
+        )
+        sql = f"INSERT INTO {ops.quote_name(meta.db_table)} ({columns}) VALUES (%s, %s, %s, %s, %s, %s)"
+
+        rows = result['checkpoints']
+        with connection.cursor() as cursor:
+            for start in range(0, len(rows), LedgerService.BATCH_SIZE * 5):
+                cursor.executemany(sql, [
+                    (item_id, location_id, as_of_values[index], qty, 'REPLAY', created_at)
+                    for item_id, location_id, index, qty in rows[start:start + LedgerService.BATCH_SIZE * 5]
+                ])
+
+        backfill = [InventoryTransaction(id=trans_id, qty_delta=delta) for trans_id, delta in result['backfill']]
+        InventoryTransaction.objects.bulk_update(backfill, ['qty_delta'], batch_size=LedgerService.BATCH_SIZE)
+
+        stats['items'] += result['stats']['items']
+        stats['transactions'] += result['stats']['transactions']
+        stats['checkpoints'] += len(rows)
+        stats['backfilled'] += len(backfill)
+
+    @staticmethod
+    def ledger_deltas(after: datetime = None, through: datetime = None, item_ids=None, location_ids=None) -> dict:
+        """
+        Net signed on-hand change per (item_id, location_id) for ledger rows
+        with after < timestamp <= through, computed with GROUP BY queries.
+        """
+        ledger = InventoryTransaction.objects.all()
+        if after is not None:
+            ledger = ledger.filter(timestamp__gt=after)
+        if through is not None:
+            ledger = ledger.filter(timestamp__lte=through)
+        if item_ids is not None:
+            ledger = ledger.filter(item_id__in=item_ids)
+
+        movements = ledger.exclude(type__in=ADJUST_TYPES)
+        adjustments = ledger.filter(type__in=ADJUST_TYPES).annotate(
+            adjusted_location=Coalesce('to_location_id', 'from_location_id')
+        )
+        if location_ids is not None:
+            inflow = movements.filter(to_location_id__in=location_ids)
+            outflow = movements.filter(from_location_id__in=location_ids)
+            adjustments = adjustments.filter(adjusted_location__in=location_ids)
+        else:
+            inflow = movements.filter(to_location__isnull=False)
+            outflow = movements.filter(from_location__isnull=False)
+
+        deltas = defaultdict(Decimal)
+        grouped = [
+            (inflow, 'to_location_id', 'qty', 1),
+            (outflow, 'from_location_id', 'qty', -1),
+            (adjustments, 'adjusted_location', 'qty_delta', 1),
+        ]
+        for queryset, location_field, qty_field, sign in grouped:
+            rows = queryset.values('item_id', location_field).annotate(total=Sum(qty_field)).order_by()
+            for row in rows:
+                if row[location_field] is not None and row['total']:
+                    deltas[(row['item_id'], row[location_field])] += sign * row['total']
+        return deltas
+
+    @staticmethod
+    def stock_as_of(when: datetime, item_ids=None, location_ids=None) -> dict:
+        """
+        On-hand quantity per (item_id, location_id) at `when`.
+
+        Starts from whichever anchor is nearest in time - the latest checkpoint
+        batch before `when`, the first one after it, or current StockLevel - and
+        applies only the ledger deltas between the anchor and `when`.
+        """
+        now = timezone.now()
+        bounds = StockCheckpoint.objects.aggregate(
+            before=Max('as_of', filter=Q(as_of__lte=when)),
+            after=Min('as_of', filter=Q(as_of__gt=when))
+        )
+        anchors = [(now, None)]
+        if bounds['before'] is not None:
+            anchors.append((bounds['before'], 'checkpoint'))
+        if bounds['after'] is not None:
+            anchors.append((bounds['after'], 'checkpoint'))
+        anchor_time, anchor_kind = min(anchors, key=lambda anchor: abs(anchor[0] - when))
+
+        if anchor_kind == 'checkpoint':
+            base = StockCheckpoint.objects.filter(as_of=anchor_time)
+        else:
+            base = StockLevel.objects.all()
+        if item_ids is not None:
+            base = base.filter(item_id__in=item_ids)
+        if location_ids is not None:
+            base = base.filter(location_id__in=location_ids)
+
+        state = defaultdict(Decimal)
+        for item_id, location_id, on_hand in base.values_list('item_id', 'location_id', 'on_hand_qty'):
+            state[(item_id, location_id)] = on_hand
+
+        if anchor_time <= when:
+            deltas = LedgerService.ledger_deltas(anchor_time, when, item_ids, location_ids)
+            sign = 1
+        else:
+            deltas = LedgerService.ledger_deltas(when, None if anchor_kind is None else anchor_time, item_ids, location_ids)
+            sign = -1
+        for key, delta in deltas.items():
+            state[key] += sign * delta
+        return dict(state)
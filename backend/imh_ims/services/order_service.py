@@ -1,8 +1,10 @@
 from decimal import Decimal
 from datetime import timedelta
-from django.utils import timezone
+import numpy as np
 from django.db.models import Sum, Avg, F
-from imh_ims.models import Item, StockLevel, InventoryTransaction
+from imh_ims.models import Item, StockLevel, DailyUsage
+from .forecast_service import ForecastService
+from .usage_service import DailyUsageService
 
 
 class OrderSuggestionService:
@@ -10,24 +12,21 @@ class OrderSuggestionService:
 
     @staticmethod
     def calculate_avg_daily_usage(item: Item, days: int = 30) -> Decimal:
-        """Calculate average daily usage over the last N days"""
-        cutoff_date = timezone.now() - timedelta(days=days)
-        
-        # Get all issue transactions in the period
-        issues = InventoryTransaction.objects.filter(
+        """Calculate average daily usage over the last N days (site-local, today included)"""
+        total_issued = DailyUsage.objects.filter(
             item=item,
             type='ISSUE',
-            timestamp__gte=cutoff_date
-        )
-        
-        total_issued = issues.aggregate(total=Sum('qty'))['total'] or Decimal('0')
+            day__gt=DailyUsageService.today() - timedelta(days=days)
+        ).aggregate(total=Sum('qty'))['total'] or Decimal('0')
         return total_issued / Decimal(str(days))
 
     @staticmethod
     def project_stock_levels(item: Item, location, days_ahead: int = 7) -> dict:
-        """Project stock levels N days ahead based on usage"""
-        avg_daily_usage = OrderSuggestionService.calculate_avg_daily_usage(item)
-        
+        """
+        Project stock levels N days ahead based on usage: the line's demand
+        forecast when a fresh one exists, with projected_low and projected_high
+        from its prediction bounds, and the item's 30-day average otherwise.
+        """
         try:
             stock = StockLevel.objects.get(item=item, location=location)
             current_qty = stock.on_hand_qty
@@ -36,59 +35,163 @@ class OrderSuggestionService:
             current_qty = Decimal('0')
             par = Decimal('0')
 
-        projected_qty = current_qty - (avg_daily_usage * Decimal(str(days_ahead)))
+        forecast = ForecastService.fresh_forecast(item, location)
+        if forecast is not None:
+            offset = (DailyUsageService.today() - forecast.start_day).days
+            usage, low, high = (
+                Decimal(str(round(ForecastService.usage_between(values, offset, days_ahead), 2)))
+                for values in (forecast.forecast, forecast.lower, forecast.upper)
+            )
+            avg_daily_usage = usage / Decimal(str(days_ahead)) if days_ahead > 0 else Decimal('0')
+            bounds = {'projected_low': current_qty - high, 'projected_high': current_qty - low}
+        else:
+            avg_daily_usage = OrderSuggestionService.calculate_avg_daily_usage(item)
+            usage = avg_daily_usage * Decimal(str(days_ahead))
+            bounds = {}
+
+        projected_qty = current_qty - usage
         
         return {
             'current_qty': current_qty,
             'projected_qty': projected_qty,
             'avg_daily_usage': avg_daily_usage,
             'days_until_below_par': None if par == 0 else int((current_qty - par) / avg_daily_usage) if avg_daily_usage > 0 else None,
-            'will_go_below_par': projected_qty < par if par > 0 else False
+            'will_go_below_par': projected_qty < par if par > 0 else False,
+            'usage_basis': 'forecast' if forecast is not None else 'average',
+            **bounds
         }
 
     @staticmethod
-    def calculate_suggested_orders(vendor=None, lead_time_buffer_days: int = 3) -> list:
-        """Calculate suggested order quantities for items"""
+    def calculate_suggested_orders(vendor=None, lead_time_buffer_days: int = 3, days: int = 30) -> list:
+        """
+        Calculate suggested order quantities for the par-bearing stock lines of
+        active items (of one vendor, if given).
+
+        A line is suggested when its on-hand, less the usage expected over the
+        lead time (plus lead_time_buffer_days), falls below par; the order
+        brings it back to par.
+
+        Expected usage comes from the line's demand forecast when a fresh
+        forecast run exists (see ForecastService). Otherwise it is the item's
+        average daily usage over the last `days` days times the lead time:
+        issue totals come from one GROUP BY over the DailyUsage rollup, and the
+        arithmetic runs on NumPy arrays
+        in integer hundredths (the precision of the quantity fields), so the
+        below-par test and days_until_below_par are exact.
+
+        Returns one dict per suggestion, ordered by item and location name, with
+        item and location ids and names, the figures as floats, and usage_basis
+        ('forecast' or 'average').
+        """
         items = Item.objects.filter(is_active=True)
         if vendor:
             items = items.filter(default_vendor=vendor)
 
-        suggestions = []
-        
-        for item in items:
-            # Get stock levels for this item
-            stock_levels = StockLevel.objects.filter(item=item)
-            
-            for stock in stock_levels:
-                if stock.par == 0:
-                    continue  # Skip items without par levels
-                
-                avg_daily_usage = OrderSuggestionService.calculate_avg_daily_usage(item)
-                lead_time_days = item.lead_time_days + lead_time_buffer_days
-                
-                # Calculate projected usage during lead time
-                projected_usage = avg_daily_usage * Decimal(str(lead_time_days))
-                
-                # Calculate how much we'll have when order arrives
-                projected_on_hand = stock.on_hand_qty - projected_usage
-                
-                # If projected to go below par, suggest order
-                if projected_on_hand < stock.par:
-                    # Order enough to bring back to par level
-                    order_qty = stock.par - projected_on_hand
-                    
-                    if order_qty > 0:
-                        suggestions.append({
-                            'item': item,
-                            'location': stock.location,
-                            'current_on_hand': stock.on_hand_qty,
-                            'par': stock.par,
-                            'avg_daily_usage': avg_daily_usage,
-                            'lead_time_days': lead_time_days,
-                            'projected_on_hand': projected_on_hand,
-                            'suggested_order_qty': order_qty,
-                            'days_until_below_par': int((stock.on_hand_qty - stock.par) / avg_daily_usage) if avg_daily_usage > 0 else None
-                        })
+        lines = list(
+            StockLevel.objects.filter(item__in=items).exclude(par=0).order_by(
+                'item__name', 'item_id', 'location__name', 'location_id'
+            ).values_list(
+                'item_id', 'item__name', 'item__short_code', 'item__lead_time_days',
+                'location_id', 'location__name', 'on_hand_qty', 'par'
+            )
+        )
+        if not lines:
+            return []
+
+        item_ids, names, codes, lead_times, location_ids, location_names, on_hands, pars = zip(*lines)
+        on_hand = OrderSuggestionService._hundredths(on_hands)
+        par = OrderSuggestionService._hundredths(pars)
+        lead_time = np.array(lead_times, dtype=np.int64) + lead_time_buffer_days
 
+        if ForecastService.is_fresh():
+            usage_basis = 'forecast'
+            columns, selected, has_usage = OrderSuggestionService._forecast_columns(
+                items, item_ids, location_ids, on_hand, par, lead_time
+            )
+        else:
+            usage_basis = 'average'
+            columns, selected, has_usage = OrderSuggestionService._average_columns(
+                items, item_ids, on_hand, par, lead_time, days
+            )
+
+        suggestions = []
+        for n, index in enumerate(selected.tolist()):
+            suggestion = {
+                'item_id': item_ids[index],
+                'item_name': names[index],
+                'item_short_code': codes[index],
+                'location_id': location_ids[index],
+                'location_name': location_names[index],
+            }
+            suggestion.update({name: values[n] for name, values in columns.items()})
+            if not has_usage[n]:
+                suggestion['days_until_below_par'] = None
+            suggestion['usage_basis'] = usage_basis
+            suggestions.append(suggestion)
         return suggestions
 
+    @staticmethod
+    def _average_columns(items, item_ids, on_hand, par, lead_time, days) -> tuple:
+        """Suggestion figures from each item's average daily usage, in exact integer hundredths"""
+        cutoff_day = DailyUsageService.today() - timedelta(days=days)
+        issued = dict(
+            DailyUsage.objects.filter(
+                item__in=items, type='ISSUE', day__gt=cutoff_day
+            ).values('item_id').annotate(total=Sum('qty')).order_by().values_list('item_id', 'total')
+        )
+
+        issued_total = OrderSuggestionService._hundredths([issued.get(item_id) for item_id in item_ids])
+
+        # projected_on_hand < par, multiplied through by `days` to stay in integers
+        shortfall = issued_total * lead_time - (on_hand - par) * days
+        selected = np.flatnonzero(shortfall > 0)
+
+        scale = 100 * days
+        avg_daily_usage = issued_total / scale
+        projected_on_hand = (on_hand * days - issued_total * lead_time) / scale
+        suggested_order_qty = shortfall / scale
+        # int((on_hand - par) / avg_daily_usage), truncated toward zero as int() does
+        margin = (on_hand - par) * days
+        days_until_below_par = np.sign(margin) * (np.abs(margin) // np.maximum(issued_total, 1))
+
+        columns = {
+            'current_on_hand': (on_hand / 100)[selected].tolist(),
+            'par': (par / 100)[selected].tolist(),
+            'avg_daily_usage': avg_daily_usage[selected].tolist(),
+            'lead_time_days': lead_time[selected].tolist(),
+            'projected_on_hand': projected_on_hand[selected].tolist(),
+            'suggested_order_qty': suggested_order_qty[selected].tolist(),
+            'days_until_below_par': days_until_below_par[selected].tolist(),
+        }
+        return columns, selected, (issued_total > 0)[selected].tolist()
+
+    @staticmethod
+    def _forecast_columns(items, item_ids, location_ids, on_hand, par, lead_time) -> tuple:
+        """Suggestion figures from each line's forecast usage over its lead time, rounded to hundredths"""
+        usage = ForecastService.lead_time_usage(items, item_ids, location_ids, lead_time)
+        projected_on_hand = on_hand / 100 - usage
+        suggested_order_qty = par / 100 - projected_on_hand
+        # Forecasts are floats; ignore shortfalls smaller than the quantity fields can hold
+        selected = np.flatnonzero(suggested_order_qty >= 0.005)
+
+        avg_daily_usage = usage / np.maximum(lead_time, 1)
+        has_usage = avg_daily_usage > 0
+        days_until_below_par = np.trunc((on_hand - par) / 100 / np.where(has_usage, avg_daily_usage, 1))
+
+        columns = {
+            'current_on_hand': (on_hand / 100)[selected].tolist(),
+            'par': (par / 100)[selected].tolist(),
+            'avg_daily_usage': np.round(avg_daily_usage, 2)[selected].tolist(),
+            'lead_time_days': lead_time[selected].tolist(),
+            'projected_on_hand': np.round(projected_on_hand, 2)[selected].tolist(),
+            'suggested_order_qty': np.round(suggested_order_qty, 2)[selected].tolist(),
+            'days_until_below_par': days_until_below_par.astype(np.int64)[selected].tolist(),
+        }
+        return columns, selected, has_usage[selected].tolist()
+
+    @staticmethod
+    def _hundredths(values) -> np.ndarray:
+        """Decimal quantities (None as 0) as an int64 array of hundredths"""
+        return np.fromiter(
+            (int((value or 0) * 100) for value in values), dtype=np.int64, count=len(values)
+        )
@@ -1,23 +1,30 @@
 """
 QR Code generation service using industry-standard qrcode library
 """
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
 import qrcode
 from io import BytesIO
-from django.http import HttpResponse
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseNotModified
 from PIL import Image
 
+# Part of every cache key and ETag; bump when the rendered output changes
+QR_RENDER_VERSION = 2
+ERROR_CORRECTION_LEVELS = ('L', 'M', 'Q', 'H')
+QR_CONTENT_TYPES = {'png': 'image/png', 'svg': 'image/svg+xml'}
 
-def generate_qr_code(data: str, size: int = 200, error_correction: str = 'M') -> Image.Image:
+
+def build_qr_matrix(data: str, error_correction: str = 'M') -> list:
     """
-    Generate QR code image from data using industry-standard settings.
-    
-    Args:
-        data: String data to encode (typically item short_code)
-        size: Output image size in pixels (default: 200)
-        error_correction: Error correction level - L, M, Q, H (default: M)
-    
-    Returns:
-        PIL Image object
+    Module matrix for data, including the 4-module quiet zone: rows of
+    booleans, True for a dark module.
     """
     # Map error correction string to constants
     error_map = {
@@ -26,28 +33,99 @@ def generate_qr_code(data: str, size: int = 200, error_correction: str = 'M') ->
         'Q': qrcode.constants.ERROR_CORRECT_Q,  # ~25% error correction
         'H': qrcode.constants.ERROR_CORRECT_H,  # ~30% error correction
     }
-    
+
     error_level = error_map.get(error_correction.upper(), qrcode.constants.ERROR_CORRECT_M)
-    
+
     # Create QR code with industry-standard settings
     qr = qrcode.QRCode(
         version=1,  # Auto-detect version based on data
         error_correction=error_level,
-        box_size=10,  # Pixels per box
         border=4,  # Border boxes (industry standard: 4)
     )
-    
+
     qr.add_data(data)
     qr.make(fit=True)
-    
-    # Generate image with standard black/white colors
-    img = qr.make_image(fill_color="black", back_color="white")
-    
-    # Resize if needed (maintains quality)
-    if size != 200:
-        img = img.resize((size, size), Image.Resampling.LANCZOS)
-    
-    return img
+    return qr.get_matrix()
+
+
+def generate_qr_code(data: str, size: int = 200, error_correction: str = 'M') -> Image.Image:
+    """
+    Generate QR code image from data using industry-standard settings.
+
+    Modules are drawn a whole number of pixels wide, the largest that fits
+    `size`, and the code is centred on a white square of exactly size x size
+    (the extra pixels widen the quiet zone). Nothing is resampled, so module
+    edges stay sharp. Only when size is smaller than the module count are
+    modules drawn 1 pixel wide and scaled down by nearest neighbour.
+
+    Args:
+        data: String data to encode (typically item short_code)
+        size: Output image size in pixels (default: 200)
+        error_correction: Error correction level - L, M, Q, H (default: M)
+
+    Returns:
+        PIL Image object (mode "1")
+    """
+    matrix = build_qr_matrix(data, error_correction)
+    modules = len(matrix)
+
+    # One pixel per module, then whole-pixel enlargement
+    img = Image.frombytes('1', (modules, modules), _pack_rows(matrix))
+    box_size = size // modules
+    if box_size < 1:
+        return img.resize((size, size), Image.Resampling.NEAREST)
+    if box_size > 1:
+        img = img.resize((modules * box_size, modules * box_size), Image.Resampling.NEAREST)
+    if img.width == size:
+        return img
+
+    canvas = Image.new('1', (size, size), 1)
+    offset = (size - img.width) // 2
+    canvas.paste(img, (offset, offset))
+    return canvas
+
+
+def _pack_rows(matrix: list) -> bytes:
+    """Mode "1" raw bytes for the matrix: 1 bit per module, rows padded to whole bytes, set bits white"""
+    modules = len(matrix)
+    row_bytes = (modules + 7) // 8
+    packed = bytearray()
+    for row in matrix:
+        bits = 0
+        for dark in row:
+            bits = (bits << 1) | (not dark)
+        # Pad the row with white bits to a byte boundary
+        padding = row_bytes * 8 - modules
+        packed += ((bits << padding) | ((1 << padding) - 1)).to_bytes(row_bytes, 'big')
+    return bytes(packed)
+
+
+def generate_qr_code_svg(data: str, size: int = 200, error_correction: str = 'M') -> str:
+    """
+    QR code as an SVG document, size x size pixels by default but scalable
+    to any size without loss (for print). Each run of dark modules in a row
+    is one segment of a single path.
+    """
+    matrix = build_qr_matrix(data, error_correction)
+    modules = len(matrix)
+    segments = []
+    for y, row in enumerate(matrix):
+        x = 0
+        while x < modules:
+            if row[x]:
+                start = x
+                while x < modules and row[x]:
+                    x += 1
+                segments.append(f'M{start} {y}h{x - start}v1h-{x - start}z')
+            else:
+                x += 1
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{size}" height="{size}" '
+        f'viewBox="0 0 {modules} {modules}" shape-rendering="crispEdges">'
+        f'<rect width="{modules}" height="{modules}" fill="#fff"/>'
+        f'<path fill="#000" d="{"".join(segments)}"/></svg>\n'
+    )
 
 
 def generate_qr_code_response(data: str, size: int = 200, error_correction: str = 'M') -> HttpResponse:
@@ -62,12 +140,7 @@ def generate_qr_code_response(data: str, size: int = 200, error_correction: str
     Returns:
         HttpResponse with PNG image
     """
-    img = generate_qr_code(data, size, error_correction)
-    buffer = BytesIO()
-    img.save(buffer, format='PNG')
-    buffer.seek(0)
-    
-    response = HttpResponse(buffer.read(), content_type='image/png')
+    response = HttpResponse(cached_qr_code_png(data, size, error_correction), content_type='image/png')
     response['Content-Disposition'] = f'inline; filename="qr-{data}.png"'
     response['Cache-Control'] = 'public, max-age=3600'  # Cache for 1 hour
     return response
@@ -88,9 +161,160 @@ def generate_qr_code_base64(data: str, size: int = 200, error_correction: str =
     """
     import base64
     
-    img = generate_qr_code(data, size, error_correction)
-    buffer = BytesIO()
-    img.save(buffer, format='PNG')
-    buffer.seek(0)
-    
-    return base64.b64encode(buffer.getvalue()).decode('utf-8')
+    return base64.b64encode(cached_qr_code_png(data, size, error_correction)).decode('utf-8')
+
+
+class QRCodeCache:
+    """
+    Rendered QR codes keyed by (data, size, error_correction, format).
+
+    Lookups go to an in-process LRU of settings.QR_CACHE_ENTRIES entries,
+    then to files under settings.QR_CACHE_ROOT (shared by every worker
+    process), and only then render. Keys are content addresses, so an entry
+    never goes stale: an item whose short_code changes simply asks for a new
+    key. evict() drops the old code's entries to keep the cache from
+    collecting them. Files are grouped in one directory per data value.
+    """
+
+    def __init__(self, max_entries: int = None):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(data: str, size: int, error_correction: str, fmt: str = 'png') -> tuple:
+        return (data, size, error_correction.upper(), fmt)
+
+    @staticmethod
+    def etag(key: tuple) -> str:
+        """Strong validator for the bytes a key renders to"""
+        digest = hashlib.sha256(repr((QR_RENDER_VERSION,) + key).encode('utf-8')).hexdigest()
+        return f'"{digest[:40]}"'
+
+    @staticmethod
+    def root() -> Path:
+        return Path(getattr(settings, 'QR_CACHE_ROOT', Path(settings.MEDIA_ROOT) / 'qr'))
+
+    @staticmethod
+    def data_dir(data: str) -> Path:
+        digest = hashlib.sha256(data.encode('utf-8')).hexdigest()
+        return QRCodeCache.root() / digest[:2] / digest
+
+    @staticmethod
+    def path(key: tuple) -> Path:
+        _, size, error_correction, fmt = key
+        return QRCodeCache.data_dir(key[0]) / f'v{QR_RENDER_VERSION}-{size}-{error_correction}.{fmt}'
+
+    def get(self, key: tuple, render) -> bytes:
+        """Cached bytes for key, calling render() and storing the result on a miss"""
+        with self._lock:
+            content = self._entries.get(key)
+            if content is not None:
+                self._entries.move_to_end(key)
+                return content
+
+        path = self.path(key)
+        try:
+            content = path.read_bytes()
+        except OSError:
+            content = render()
+            self._write(path, content)
+        self._remember(key, content)
+        return content
+
+    def evict(self, data: str) -> None:
+        """Forget every rendering of data, in this process and on disk"""
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == data]:
+                del self._entries[key]
+        shutil.rmtree(self.data_dir(data), ignore_errors=True)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def _remember(self, key: tuple, content: bytes) -> None:
+        max_entries = self.max_entries or getattr(settings, 'QR_CACHE_ENTRIES', 1024)
+        with self._lock:
+            self._entries[key] = content
+            self._entries.move_to_end(key)
+            while len(self._entries) > max_entries:
+                self._entries.popitem(last=False)
+
+    @staticmethod
+    def _write(path: Path, content: bytes) -> None:
+        # Written under a temporary name and renamed, so readers never see part of a file
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as tmp_file:
+                tmp_file.write(content)
+            os.replace(tmp, path)
+        except OSError:
+            # The cache is an optimization; a read-only or full disk only costs renders
+            pass
+
+
+qr_cache = QRCodeCache()
+
+
+def normalize_qr_params(size, error_correction) -> tuple:
+    """
+    Validate request parameters, returning (size, error_correction).
+    Raises ValueError for sizes outside settings.QR_MIN_SIZE..QR_MAX_SIZE,
+    so arbitrary sizes cannot fill the cache.
+    """
+    try:
+        size = int(size)
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid size: {size}")
+    min_size = getattr(settings, 'QR_MIN_SIZE', 50)
+    max_size = getattr(settings, 'QR_MAX_SIZE', 2000)
+    if not min_size <= size <= max_size:
+        raise ValueError(f"size must be between {min_size} and {max_size}")
+    error_correction = str(error_correction or 'M').upper()
+    if error_correction not in ERROR_CORRECTION_LEVELS:
+        error_correction = 'M'  # as generate_qr_code falls back
+    return size, error_correction
+
+
+def cached_qr_code_png(data: str, size: int = 200, error_correction: str = 'M') -> bytes:
+    """PNG bytes for a QR code, from qr_cache when it has been rendered before"""
+    def render():
+        buffer = BytesIO()
+        generate_qr_code(data, size, error_correction).save(buffer, format='PNG')
+        return buffer.getvalue()
+
+    return qr_cache.get(QRCodeCache.key(data, size, error_correction, 'png'), render)
+
+
+def cached_qr_code_svg(data: str, size: int = 200, error_correction: str = 'M') -> bytes:
+    """SVG bytes for a QR code, from qr_cache when it has been rendered before"""
+    def render():
+        return generate_qr_code_svg(data, size, error_correction).encode('utf-8')
+
+    return qr_cache.get(QRCodeCache.key(data, size, error_correction, 'svg'), render)
+
+
+def if_none_match(request, etag: str) -> bool:
+    """True when the request's If-None-Match already names etag"""
+    header = request.META.get('HTTP_IF_NONE_MATCH', '')
+    return header.strip() == '*' or etag in [tag.strip() for tag in header.split(',')]
+
+
+def cached_qr_code_response(request, data: str, size: int = 200, error_correction: str = 'M',
+                            fmt: str = 'png') -> HttpResponse:
+    """
+    PNG or SVG response for a QR code with a strong ETag; 304 Not Modified
+    when the client already holds it, without touching the cache.
+    """
+    etag = QRCodeCache.etag(QRCodeCache.key(data, size, error_correction, fmt))
+    if if_none_match(request, etag):
+        response = HttpResponseNotModified()
+    else:
+        render = cached_qr_code_svg if fmt == 'svg' else cached_qr_code_png
+        response = HttpResponse(render(data, size, error_correction), content_type=QR_CONTENT_TYPES[fmt])
+        response['Content-Disposition'] = f'inline; filename="qr-{data}.{fmt}"'
+    response['ETag'] = etag
+    response['Cache-Control'] = 'private, max-age=3600'
+    return response
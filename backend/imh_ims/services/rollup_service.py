@@ -0,0 +1,151 @@
+from decimal import Decimal
+from collections import defaultdict
+from django.db import transaction
+from django.db.models import Sum, Count
+from django.utils import timezone
+from imh_ims.models import StockLevel, Item, ItemPropertyStock, ItemStockSummary
+from .stock_version_service import StockVersionService
+
+
+class StockRollupService:
+    """Service maintaining the per-item on-hand rollups (global and per property)"""
+
+    BATCH_SIZE = 1000
+
+    @staticmethod
+    def pick_primary_property(property_totals: dict):
+        """
+        Choose the primary property from {property_id: on_hand}.
+        Mirrors the original rule: the single property if there is only one,
+        otherwise the property with the most stock (ties broken by property_id).
+        """
+        if not property_totals:
+            return '', Decimal('0')
+        prop_id = min(property_totals, key=lambda p: (-property_totals[p], p))
+        return prop_id, property_totals[prop_id]
+
+    @staticmethod
+    @transaction.atomic
+    def apply_deltas(deltas: dict) -> None:
+        """
+        Incrementally apply on-hand changes to the rollups.
+
+        Args:
+            deltas: {(item_id, property_id): on_hand_delta}
+
+        The affected rollup rows are locked and read once, adjusted in memory
+        and written back with bulk updates, so the cost does not grow with the
+        number of stock lines. Items whose property row does not exist yet
+        (first stock at that property) are recomputed from StockLevel instead.
+        """
+        deltas = {(item_id, property_id or ''): delta for (item_id, property_id), delta in deltas.items() if delta}
+        if not deltas:
+            return
+        # Every stock write reaches the rollups, so this is where cached stock reports go stale
+        StockVersionService.bump()
+
+        now = timezone.now()
+        item_ids = {item_id for item_id, _ in deltas}
+        rows = {
+            (row.item_id, row.property_id): row
+            for row in ItemPropertyStock.objects.select_for_update().filter(item_id__in=item_ids).order_by('pk')
+        }
+        to_refresh = {item_id for item_id, property_id in deltas if (item_id, property_id) not in rows}
+
+        changed_rows = []
+        item_deltas = defaultdict(Decimal)
+        for (item_id, property_id), delta in deltas.items():
+            if item_id in to_refresh:
+                continue
+            row = rows[(item_id, property_id)]
+            row.on_hand_qty += delta
+            row.updated_at = now
+            changed_rows.append(row)
+            item_deltas[item_id] += delta
+        ItemPropertyStock.objects.bulk_update(changed_rows, ['on_hand_qty', 'updated_at'])
+
+        totals = defaultdict(dict)
+        for (item_id, property_id), row in rows.items():
+            totals[item_id][property_id] = row.on_hand_qty
+
+        summaries = list(
+            ItemStockSummary.objects.select_for_update().filter(item_id__in=list(item_deltas)).order_by('pk')
+        ) if item_deltas else []
+        for summary in summaries:
+            summary.global_on_hand += item_deltas[summary.item_id]
+            summary.primary_property_id, summary.primary_property_on_hand = (
+                StockRollupService.pick_primary_property(totals[summary.item_id])
+            )
+            summary.updated_at = now
+        ItemStockSummary.objects.bulk_update(
+            summaries, ['global_on_hand', 'primary_property_id', 'primary_property_on_hand', 'updated_at']
+        )
+        to_refresh.update(set(item_deltas) - {summary.item_id for summary in summaries})
+
+        if to_refresh:
+            StockRollupService.refresh_items(to_refresh)
+
+    @staticmethod
+    @transaction.atomic
+    def refresh_items(item_ids) -> None:
+        """Recompute the rollups of the given items from StockLevel in one GROUP BY"""
+        item_ids = list(set(item_ids))
+        for start in range(0, len(item_ids), StockRollupService.BATCH_SIZE):
+            batch = item_ids[start:start + StockRollupService.BATCH_SIZE]
+            StockRollupService._rebuild(
+                StockLevel.objects.filter(item_id__in=batch),
+                batch
+            )
+
+    @staticmethod
+    @transaction.atomic
+    def rebuild() -> int:
+        """Recompute every rollup from StockLevel. Returns the number of items summarized."""
+        item_ids = list(Item.objects.values_list('id', flat=True))
+        ItemPropertyStock.objects.all().delete()
+        ItemStockSummary.objects.all().delete()
+        StockRollupService._rebuild(StockLevel.objects.all(), item_ids, clear=False)
+        return len(item_ids)
+
+    @staticmethod
+    def _rebuild(stock_queryset, item_ids, clear=True) -> None:
+        StockVersionService.bump()
+        grouped = stock_queryset.values('item_id', 'location__property_id').annotate(
+            on_hand=Sum('on_hand_qty'),
+            reserved=Sum('reserved_qty'),
+            locations=Count('id')
+        ).order_by()
+
+        property_rows = []
+        totals = defaultdict(dict)
+        for row in grouped:
+            prop_id = row['location__property_id'] or ''
+            property_rows.append(ItemPropertyStock(
+                item_id=row['item_id'],
+                property_id=prop_id,
+                on_hand_qty=row['on_hand'] or Decimal('0'),
+                reserved_qty=row['reserved'] or Decimal('0'),
+                location_count=row['locations']
+            ))
+            totals[row['item_id']][prop_id] = property_rows[-1]
+
+        summaries = []
+        for item_id in item_ids:
+            rows = totals.get(item_id, {})
+            prop_id, on_hand = StockRollupService.pick_primary_property(
+                {p: r.on_hand_qty for p, r in rows.items()}
+            )
+            summaries.append(ItemStockSummary(
+                item_id=item_id,
+                global_on_hand=sum((r.on_hand_qty for r in rows.values()), Decimal('0')),
+                global_reserved=sum((r.reserved_qty for r in rows.values()), Decimal('0')),
+                location_count=sum(r.location_count for r in rows.values()),
+                primary_property_id=prop_id,
+                primary_property_on_hand=on_hand
+            ))
+
+        if clear:
+            ItemPropertyStock.objects.filter(item_id__in=item_ids).delete()
+            ItemStockSummary.objects.filter(item_id__in=item_ids).delete()
+        ItemPropertyStock.objects.bulk_create(property_rows, batch_size=StockRollupService.BATCH_SIZE)
+        ItemStockSummary.objects.bulk_create(summaries, batch_size=StockRollupService.BATCH_SIZE)
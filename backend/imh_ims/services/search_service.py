@@ -0,0 +1,225 @@
+import re
+
+from django.db import connection, transaction, DatabaseError
+from django.db.models import Q, Value, CharField
+from django.db.models.functions import StrIndex, Concat, Cast
+from imh_ims.models import Item
+
+
+SEARCH_TABLE = 'imh_ims_item_search'
+
+# Columns indexed for every item, in index order, with their ranking weights
+SEARCH_COLUMNS = (
+    ('name', 'name', 10.0),
+    ('short_code', 'short_code', 10.0),
+    ('category', 'category__name', 2.0),
+    ('vendor', 'default_vendor__name', 2.0),
+    ('unit', 'unit_of_measure', 1.0),
+)
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+class ItemSearchService:
+    """
+    Ranked item search backed by a database-native index.
+
+    SQLite keeps an FTS5 virtual table keyed by item id (rowid); PostgreSQL
+    keeps a table with a weighted tsvector plus pg_trgm indexes for fuzzy
+    matching. Neither can be expressed as a Django model, so the index is
+    created by ensure_index() (run after every migrate) rather than a
+    migration. Other backends, or a SQLite build without FTS5, fall back to
+    the old icontains filter.
+    """
+
+    # Ranked search returns at most this many items
+    MAX_RESULTS = 1000
+    BATCH_SIZE = 500
+
+    _available = {}
+
+    @staticmethod
+    def vendor() -> str:
+        return connection.vendor
+
+    @staticmethod
+    def table_exists() -> bool:
+        return SEARCH_TABLE in connection.introspection.table_names()
+
+    @staticmethod
+    def available() -> bool:
+        """Whether the search index exists on the current database (cached per database)"""
+        key = connection.settings_dict['NAME']
+        if key not in ItemSearchService._available:
+            ItemSearchService._available[key] = (
+                ItemSearchService.vendor() in ('sqlite', 'postgresql') and ItemSearchService.table_exists()
+            )
+        return ItemSearchService._available[key]
+
+    @staticmethod
+    def ensure_index() -> bool:
+        """
+        Create the search index if it is missing and populate it.
+        Returns True if the index was created.
+        """
+        vendor = ItemSearchService.vendor()
+        if vendor not in ('sqlite', 'postgresql') or ItemSearchService.table_exists():
+            return False
+
+        columns = ', '.join(column for column, _, _ in SEARCH_COLUMNS)
+        try:
+            with transaction.atomic(), connection.cursor() as cursor:
+                if vendor == 'sqlite':
+                    cursor.execute(
+                        f"CREATE VIRTUAL TABLE {SEARCH_TABLE} USING fts5("
+                        f"{columns}, tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+                    )
+                else:
+                    cursor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+                    text_columns = ', '.join(f'{column} text NOT NULL' for column, _, _ in SEARCH_COLUMNS)
+                    cursor.execute(
+                        f'CREATE TABLE {SEARCH_TABLE} ('
+                        f'item_id integer PRIMARY KEY REFERENCES imh_ims_item (id) ON DELETE CASCADE, '
+                        f'{text_columns}, document tsvector NOT NULL)'
+                    )
+                    cursor.execute(f'CREATE INDEX {SEARCH_TABLE}_document ON {SEARCH_TABLE} USING gin (document)')
+                    cursor.execute(f'CREATE INDEX {SEARCH_TABLE}_name_trgm ON {SEARCH_TABLE} USING gin (name gin_trgm_ops)')
+                    cursor.execute(
+                        f'CREATE INDEX {SEARCH_TABLE}_code_trgm ON {SEARCH_TABLE} USING gin (short_code gin_trgm_ops)'
+                    )
+        except DatabaseError:
+            # e.g. SQLite compiled without FTS5, or no rights to create pg_trgm
+            return False
+
+        ItemSearchService._available.pop(connection.settings_dict['NAME'], None)
+        ItemSearchService.rebuild()
+        return True
+
+    @staticmethod
+    def _source_sql(item_ids=None):
+        """SELECT producing one (id, name, short_code, category, vendor, unit) row per item"""
+        queryset = Item.objects.all()
+        if item_ids is not None:
+            queryset = queryset.filter(id__in=list(item_ids))
+        return queryset.values_list('id', *(field for _, field, _ in SEARCH_COLUMNS)).order_by().query.sql_with_params()
+
+    @staticmethod
+    def index_items(item_ids) -> None:
+        """(Re)index the given items with one DELETE and one INSERT ... SELECT"""
+        item_ids = list(item_ids)
+        if not item_ids or not ItemSearchService.available():
+            return
+        for start in range(0, len(item_ids), ItemSearchService.BATCH_SIZE):
+            ItemSearchService._write(item_ids[start:start + ItemSearchService.BATCH_SIZE])
+
+    @staticmethod
+    def remove_items(item_ids) -> None:
+        item_ids = list(item_ids)
+        if not item_ids or not ItemSearchService.available():
+            return
+        key = 'rowid' if ItemSearchService.vendor() == 'sqlite' else 'item_id'
+        placeholders = ', '.join(['%s'] * len(item_ids))
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {SEARCH_TABLE} WHERE {key} IN ({placeholders})', item_ids)
+
+    @staticmethod
+    @transaction.atomic
+    def rebuild() -> int:
+        """Reindex every item. Returns the number of items indexed."""
+        if not ItemSearchService.available():
+            return 0
+        ItemSearchService._write(None)
+        return Item.objects.count()
+
+    @staticmethod
+    def _write(item_ids) -> None:
+        select_sql, select_params = ItemSearchService._source_sql(item_ids)
+        names = [column for column, _, _ in SEARCH_COLUMNS]
+        selected = ', '.join(f'COALESCE(source.col{n}, \'\')' for n in range(1, len(names) + 1))
+        source_columns = ', '.join(['id'] + [f'col{n}' for n in range(1, len(names) + 1)])
+
+        if item_ids is None:
+            delete_sql, delete_params = f'DELETE FROM {SEARCH_TABLE}', []
+        else:
+            key = 'rowid' if ItemSearchService.vendor() == 'sqlite' else 'item_id'
+            delete_sql = f'DELETE FROM {SEARCH_TABLE} WHERE {key} IN ({", ".join(["%s"] * len(item_ids))})'
+            delete_params = list(item_ids)
+
+        # The source query's column aliases differ per backend, so rename them positionally
+        source = f'SELECT * FROM ({select_sql}) AS raw_source'
+        if ItemSearchService.vendor() == 'sqlite':
+            insert_sql = (
+                f'WITH source({source_columns}) AS ({source}) '
+                f'INSERT INTO {SEARCH_TABLE} (rowid, {", ".join(names)}) SELECT source.id, {selected} FROM source'
+            )
+        else:
+            weights = {'name': 'A', 'short_code': 'A', 'category': 'B', 'vendor': 'B', 'unit': 'C'}
+            document = ' || '.join(
+                f"setweight(to_tsvector('simple', COALESCE(source.col{n}, '')), '{weights[column]}')"
+                for n, column in enumerate(names, start=1)
+            )
+            insert_sql = (
+                f'WITH source({source_columns}) AS ({source}) '
+                f'INSERT INTO {SEARCH_TABLE} (item_id, {", ".join(names)}, document) '
+                f'SELECT source.id, {selected}, {document} FROM source'
+            )
+
+        with connection.cursor() as cursor:
+            cursor.execute(delete_sql, delete_params)
+            cursor.execute(insert_sql, list(select_params))
+
+    @staticmethod
+    def tokens(term: str) -> list:
+        return TOKEN_RE.findall(term.lower())
+
+    @staticmethod
+    def ranked_ids(term: str, limit: int = None):
+        """
+        Item ids matching every token of `term` (each as a prefix), best first.
+        Returns None when no search index is available.
+        """
+        if not ItemSearchService.available():
+            return None
+        tokens = ItemSearchService.tokens(term)
+        if not tokens:
+            return []
+        limit = limit or ItemSearchService.MAX_RESULTS
+
+        with connection.cursor() as cursor:
+            if ItemSearchService.vendor() == 'sqlite':
+                match = ' AND '.join(f'"{token}"*' for token in tokens)
+                weights = ', '.join(str(weight) for _, _, weight in SEARCH_COLUMNS)
+                cursor.execute(
+                    f'SELECT rowid FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s '
+                    f'ORDER BY bm25({SEARCH_TABLE}, {weights}) LIMIT %s',
+                    [match, limit]
+                )
+            else:
+                query = ' & '.join(f'{token}:*' for token in tokens)
+                phrase = ' '.join(tokens)
+                cursor.execute(
+                    f"SELECT item_id FROM {SEARCH_TABLE} "
+                    f"WHERE document @@ to_tsquery('simple', %s) OR name %% %s OR short_code ILIKE %s "
+                    f"ORDER BY ts_rank(document, to_tsquery('simple', %s)) + similarity(name, %s) DESC "
+                    f"LIMIT %s",
+                    [query, phrase, f'{phrase}%', query, phrase, limit]
+                )
+            return [row[0] for row in cursor.fetchall()]
+
+    @staticmethod
+    def rank_expression(ranked_ids: list):
+        """
+        Expression ordering rows by their position in `ranked_ids`. The ids are
+        packed into one ',1,5,3,' string parameter and located with INSTR/STRPOS,
+        which stays cheap to build and run for the full MAX_RESULTS list.
+        """
+        packed = ',' + ','.join(str(item_id) for item_id in ranked_ids) + ','
+        return StrIndex(
+            Value(packed, output_field=CharField()),
+            Concat(Value(','), Cast('id', CharField()), Value(','), output_field=CharField())
+        )
+
+    @staticmethod
+    def fallback_filter(term: str) -> Q:
+        """The unindexed match used when no search index is available"""
+        return Q(name__icontains=term) | Q(short_code__icontains=term)
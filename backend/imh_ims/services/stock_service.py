@@ -1,19 +1,32 @@
-from decimal import Decimal
+from decimal import Decimal, InvalidOperation
 from typing import Tuple
 from django.db import transaction, models
 from django.utils import timezone
-from imh_ims.models import StockLevel, InventoryTransaction, Item, Location
+from imh_ims.models import StockLevel, InventoryTransaction, Item, Location, ItemPropertyStock, ItemStockSummary
+from .rollup_service import StockRollupService
+from .usage_service import DailyUsageService
 
 
 class StockService:
     """Service for stock operations and calculations"""
 
+    @staticmethod
+    def get_stock_summary(item: Item):
+        """Return the item's ItemStockSummary rollup, or None if it has not been built"""
+        try:
+            return item.stock_summary
+        except ItemStockSummary.DoesNotExist:
+            return None
+
     @staticmethod
     def get_global_on_hand(item: Item) -> Decimal:
         """Calculate total on-hand quantity across all locations"""
-        return sum(
-            stock.on_hand_qty for stock in StockLevel.objects.filter(item=item)
-        )
+        summary = StockService.get_stock_summary(item)
+        if summary is not None:
+            return summary.global_on_hand
+        return StockLevel.objects.filter(item=item).aggregate(
+            total=models.Sum('on_hand_qty')
+        )['total'] or Decimal(0)
 
     @staticmethod
     def get_property_on_hand(item: Item, property_id: str = None) -> Tuple[Decimal, str]:
@@ -21,36 +34,29 @@ class StockService:
         Calculate total on-hand quantity for a specific property.
         Returns tuple of (on_hand_qty, property_id).
         If property_id is None, determines primary property (property with most stock).
+        Reads the maintained rollups; falls back to scanning StockLevel when the
+        rollups have not been built yet.
         """
-        stock_levels = StockLevel.objects.filter(item=item).select_related('location')
-        
-        if not stock_levels.exists():
-            return Decimal(0), property_id or ''
-        
-        # Group stock by property_id
+        if property_id is not None:
+            rollup = ItemPropertyStock.objects.filter(item=item, property_id=property_id).first()
+            if rollup is not None:
+                return rollup.on_hand_qty, property_id
+        else:
+            summary = StockService.get_stock_summary(item)
+            if summary is not None:
+                return summary.primary_property_on_hand, summary.primary_property_id
+
         property_stock = {}
-        for stock in stock_levels:
-            prop_id = stock.location.property_id or ''
-            if prop_id not in property_stock:
-                property_stock[prop_id] = Decimal(0)
-            property_stock[prop_id] += stock.on_hand_qty
-        
-        # If property_id is provided, use it
+        stock_levels = StockLevel.objects.filter(item=item).values_list('location__property_id', 'on_hand_qty')
+        for prop_id, on_hand_qty in stock_levels:
+            prop_id = prop_id or ''
+            property_stock[prop_id] = property_stock.get(prop_id, Decimal(0)) + on_hand_qty
+
         if property_id is not None:
             return property_stock.get(property_id, Decimal(0)), property_id
-        
-        # Determine primary property (property with most stock)
-        if not property_stock:
-            return Decimal(0), ''
-        
-        # If all locations share the same property_id, use that
-        if len(property_stock) == 1:
-            prop_id = list(property_stock.keys())[0]
-            return property_stock[prop_id], prop_id
-        
-        # Find property with most stock
-        primary_property = max(property_stock.items(), key=lambda x: x[1])
-        return primary_property[1], primary_property[0]
+
+        prop_id, on_hand = StockRollupService.pick_primary_property(property_stock)
+        return on_hand, prop_id
 
     @staticmethod
     def check_par_levels(item: Item = None, location: Location = None):
@@ -71,6 +77,72 @@ class StockService:
             'above_par': queryset.filter(on_hand_qty__gte=models.F('par_max'))
         }
 
+
+    @staticmethod
+    def _get_stock_level(item: Item, location: Location) -> StockLevel:
+        """Get or create the stock row for an item at a location"""
+        stock, _ = StockLevel.objects.get_or_create(
+            item=item,
+            location=location,
+            defaults={'on_hand_qty': 0, 'par': 0}
+        )
+        return stock
+
+    @staticmethod
+    def _lock_stock_levels(*stocks: StockLevel) -> dict:
+        """
+        Lock stock rows in primary key order and return {pk: on_hand_qty}.
+        Every writer takes its locks in the same order, so two transfers
+        moving stock in opposite directions cannot deadlock each other.
+        """
+        pks = sorted({stock.pk for stock in stocks})
+        return dict(
+            StockLevel.objects.select_for_update().filter(pk__in=pks).order_by('pk').values_list('pk', 'on_hand_qty')
+        )
+
+    @staticmethod
+    def _update_rollups(item: Item, changes) -> None:
+        """Apply (location, on_hand_delta) changes for one item to the stock rollups"""
+        deltas = {}
+        for location, delta in changes:
+            key = (item.pk, location.property_id or '')
+            deltas[key] = deltas.get(key, Decimal(0)) + delta
+        StockRollupService.apply_deltas(deltas)
+        # Drop a summary cached on this instance so later reads see the new totals
+        item._state.fields_cache.pop('stock_summary', None)
+
+    @staticmethod
+    def _decrement(stock: StockLevel, qty: Decimal) -> None:
+        """
+        Atomically remove qty from a stock row.
+        The guard runs inside the UPDATE itself, so concurrent issues can never
+        drive available stock below zero or overwrite each other's result.
+        """
+        updated = StockLevel.objects.filter(
+            pk=stock.pk,
+            on_hand_qty__gte=models.F('reserved_qty') + qty
+        ).update(
+            on_hand_qty=models.F('on_hand_qty') - qty,
+            updated_at=timezone.now()
+        )
+        if not updated:
+            stock.refresh_from_db(fields=['on_hand_qty', 'reserved_qty'])
+            raise ValueError(f"Insufficient stock. Available: {stock.available_qty}, Requested: {qty}")
+
+    @staticmethod
+    def _increment(stock: StockLevel, qty: Decimal) -> None:
+        """Atomically add qty to a stock row"""
+        StockLevel.objects.filter(pk=stock.pk).update(
+            on_hand_qty=models.F('on_hand_qty') + qty,
+            updated_at=timezone.now()
+        )
+
+    @staticmethod
+    def _validate_qty(qty: Decimal) -> None:
+        """Reject zero or negative movement quantities"""
+        if qty is None or qty <= 0:
+            raise ValueError(f"Quantity must be greater than zero. Requested: {qty}")
+
     @staticmethod
     @transaction.atomic
     def transfer_stock(
@@ -83,30 +155,18 @@ class StockService:
         requisition=None
     ) -> InventoryTransaction:
         """Transfer stock between locations"""
-        # Get or create stock levels
-        from_stock, _ = StockLevel.objects.get_or_create(
-            item=item,
-            location=from_location,
-            defaults={'on_hand_qty': 0, 'par_min': 0, 'par_max': 0}
-        )
-        to_stock, _ = StockLevel.objects.get_or_create(
-            item=item,
-            location=to_location,
-            defaults={'on_hand_qty': 0, 'par_min': 0, 'par_max': 0}
-        )
+        StockService._validate_qty(qty)
+        if from_location.pk == to_location.pk:
+            raise ValueError("Source and destination locations must be different")
 
-        # Validate available quantity
-        if from_stock.available_qty < qty:
-            raise ValueError(f"Insufficient stock. Available: {from_stock.available_qty}, Requested: {qty}")
+        from_stock = StockService._get_stock_level(item, from_location)
+        to_stock = StockService._get_stock_level(item, to_location)
+        StockService._lock_stock_levels(from_stock, to_stock)
 
-        # Update stock levels
-        from_stock.on_hand_qty -= qty
-        from_stock.save()
-        
-        to_stock.on_hand_qty += qty
-        to_stock.save()
+        StockService._decrement(from_stock, qty)
+        StockService._increment(to_stock, qty)
+        StockService._update_rollups(item, [(from_location, -qty), (to_location, qty)])
 
-        # Create transaction record
         trans = InventoryTransaction.objects.create(
             item=item,
             from_location=from_location,
@@ -117,6 +177,7 @@ class StockService:
             notes=notes,
             requisition=requisition
         )
+        DailyUsageService.record([trans])
 
         return trans
 
@@ -132,17 +193,10 @@ class StockService:
         work_order_id: str = ''
     ) -> InventoryTransaction:
         """Issue stock from a location (removes from inventory)"""
-        stock, _ = StockLevel.objects.get_or_create(
-            item=item,
-            location=from_location,
-            defaults={'on_hand_qty': 0, 'par_min': 0, 'par_max': 0}
-        )
-
-        if stock.available_qty < qty:
-            raise ValueError(f"Insufficient stock. Available: {stock.available_qty}, Requested: {qty}")
-
-        stock.on_hand_qty -= qty
-        stock.save()
+        StockService._validate_qty(qty)
+        stock = StockService._get_stock_level(item, from_location)
+        StockService._decrement(stock, qty)
+        StockService._update_rollups(item, [(from_location, -qty)])
 
         trans = InventoryTransaction.objects.create(
             item=item,
@@ -154,6 +208,7 @@ class StockService:
             requisition=requisition,
             work_order_id=work_order_id
         )
+        DailyUsageService.record([trans])
 
         return trans
 
@@ -170,14 +225,10 @@ class StockService:
         vendor=None
     ) -> InventoryTransaction:
         """Receive stock into a location"""
-        stock, _ = StockLevel.objects.get_or_create(
-            item=item,
-            location=to_location,
-            defaults={'on_hand_qty': 0, 'par_min': 0, 'par_max': 0}
-        )
-
-        stock.on_hand_qty += qty
-        stock.save()
+        StockService._validate_qty(qty)
+        stock = StockService._get_stock_level(item, to_location)
+        StockService._increment(stock, qty)
+        StockService._update_rollups(item, [(to_location, qty)])
 
         trans = InventoryTransaction.objects.create(
             item=item,
@@ -189,6 +240,7 @@ class StockService:
             notes=notes,
             receipt_id=receipt_id
         )
+        DailyUsageService.record([trans])
 
         return trans
 
@@ -203,23 +255,258 @@ class StockService:
         reason: str = ''
     ) -> InventoryTransaction:
         """Manually adjust stock level"""
-        stock, _ = StockLevel.objects.get_or_create(
-            item=item,
-            location=location,
-            defaults={'on_hand_qty': 0, 'par_min': 0, 'par_max': 0}
-        )
+        if qty is None or qty < 0:
+            raise ValueError(f"Adjusted quantity cannot be negative. Requested: {qty}")
 
-        stock.on_hand_qty = qty
-        stock.save()
+        stock = StockService._get_stock_level(item, location)
+        previous_qty = StockService._lock_stock_levels(stock)[stock.pk]
+        StockLevel.objects.filter(pk=stock.pk).update(
+            on_hand_qty=qty,
+            updated_at=timezone.now()
+        )
+        StockService._update_rollups(item, [(location, qty - previous_qty)])
 
         trans = InventoryTransaction.objects.create(
             item=item,
             to_location=location,
             qty=qty,
+            qty_delta=qty - previous_qty,
             type='ADJUST',
             user=user,
             notes=f"{notes} (Reason: {reason})" if reason else notes
         )
+        DailyUsageService.record([trans])
 
         return trans
 
+    MOVEMENT_TYPES = ('ISSUE', 'TRANSFER', 'RECEIVE')
+
+    @staticmethod
+    def _parse_movement(raw: dict) -> dict:
+        """Normalize one movement line, raising ValueError for malformed input"""
+        movement_type = str(raw.get('type', '')).strip().upper()
+        if movement_type not in StockService.MOVEMENT_TYPES:
+            raise ValueError(f"Invalid movement type: {raw.get('type')}. Expected one of {', '.join(StockService.MOVEMENT_TYPES)}")
+
+        try:
+            qty = Decimal(str(raw.get('qty')))
+        except (InvalidOperation, ValueError, TypeError):
+            raise ValueError(f"Invalid qty value: {raw.get('qty')}")
+        StockService._validate_qty(qty)
+
+        def as_id(key):
+            value = raw.get(key)
+            if value in (None, ''):
+                return None
+            try:
+                return int(value)
+            except (ValueError, TypeError):
+                raise ValueError(f"Invalid {key}: {value}")
+
+        movement = {
+            'type': movement_type,
+            'item_id': as_id('item_id'),
+            'from_location_id': as_id('from_location_id'),
+            'to_location_id': as_id('to_location_id'),
+            'qty': qty,
+            'notes': raw.get('notes', '') or '',
+            'work_order_id': raw.get('work_order_id', '') or '',
+            'receipt_id': raw.get('receipt_id', '') or raw.get('po_number', '') or '',
+            'cost': None,
+        }
+        if raw.get('cost') not in (None, ''):
+            try:
+                movement['cost'] = Decimal(str(raw.get('cost')))
+            except (InvalidOperation, ValueError, TypeError):
+                raise ValueError(f"Invalid cost value: {raw.get('cost')}")
+
+        if movement['item_id'] is None:
+            raise ValueError("item_id is required")
+        if movement_type in ('ISSUE', 'TRANSFER') and movement['from_location_id'] is None:
+            raise ValueError(f"from_location_id is required for {movement_type}")
+        if movement_type in ('RECEIVE', 'TRANSFER') and movement['to_location_id'] is None:
+            raise ValueError(f"to_location_id is required for {movement_type}")
+        if movement_type == 'TRANSFER' and movement['from_location_id'] == movement['to_location_id']:
+            raise ValueError("Source and destination locations must be different")
+        if movement_type == 'ISSUE':
+            movement['to_location_id'] = None
+        if movement_type == 'RECEIVE':
+            movement['from_location_id'] = None
+        return movement
+
+    @staticmethod
+    def _reject_batch(failures: list, untouched_indexes: list) -> dict:
+        """Build the result of an atomic batch that was rejected as a whole"""
+        results = failures + [
+            {'index': index, 'status': 'not_applied', 'error': 'Batch rejected because another line failed'}
+            for index in untouched_indexes
+        ]
+        results.sort(key=lambda r: r['index'])
+        return {'applied': 0, 'failed': len(failures), 'results': results}
+
+    @staticmethod
+    @transaction.atomic
+    def apply_movements(movements: list, user, atomic: bool = True) -> dict:
+        """
+        Apply many issues/transfers/receipts in one transaction.
+
+        Items and locations are resolved with in_bulk, every affected stock row is
+        locked once, deltas are written with bulk_update and the ledger with
+        bulk_create, so the query count does not grow with the number of lines.
+
+        Lines are applied in order, so a receipt earlier in the batch can feed an
+        issue later in it. With atomic=True a single failing line rejects the whole
+        batch; otherwise valid lines are applied and failures reported per line.
+
+        Returns dict with 'applied', 'failed' and per-line 'results'.
+        """
+        results = []
+        parsed = []
+        for index, raw in enumerate(movements):
+            try:
+                parsed.append((index, StockService._parse_movement(raw or {})))
+            except ValueError as e:
+                results.append({'index': index, 'status': 'failed', 'error': str(e)})
+
+        item_ids = {movement['item_id'] for _, movement in parsed}
+        location_ids = {
+            location_id
+            for _, movement in parsed
+            for location_id in (movement['from_location_id'], movement['to_location_id'])
+            if location_id is not None
+        }
+        items = Item.objects.in_bulk(item_ids)
+        locations = Location.objects.in_bulk(location_ids)
+
+        valid = []
+        for index, movement in parsed:
+            missing = []
+            if movement['item_id'] not in items:
+                missing.append(f"Item {movement['item_id']} not found")
+            for key in ('from_location_id', 'to_location_id'):
+                if movement[key] is not None and movement[key] not in locations:
+                    missing.append(f"Location {movement[key]} not found")
+            if missing:
+                results.append({'index': index, 'status': 'failed', 'error': '; '.join(missing)})
+            else:
+                valid.append((index, movement))
+
+        if atomic and results:
+            return StockService._reject_batch(results, [index for index, _ in valid])
+
+        # Make sure every destination row exists, then lock all affected rows at once
+        pairs = set()
+        destination_pairs = set()
+        for _, movement in valid:
+            if movement['from_location_id'] is not None:
+                pairs.add((movement['item_id'], movement['from_location_id']))
+            if movement['to_location_id'] is not None:
+                pair = (movement['item_id'], movement['to_location_id'])
+                pairs.add(pair)
+                destination_pairs.add(pair)
+
+        stocks = {}
+        created_pairs = set()
+        if pairs:
+            pair_items = {item_id for item_id, _ in pairs}
+            pair_locations = {location_id for _, location_id in pairs}
+            locked = StockLevel.objects.select_for_update().filter(
+                item_id__in=pair_items,
+                location_id__in=pair_locations
+            ).order_by('pk')
+            stocks = {
+                (stock.item_id, stock.location_id): stock
+                for stock in locked
+                if (stock.item_id, stock.location_id) in pairs
+            }
+            created_pairs = destination_pairs - set(stocks)
+            if created_pairs:
+                StockLevel.objects.bulk_create(
+                    [
+                        StockLevel(item_id=item_id, location_id=location_id, on_hand_qty=0, par=0)
+                        for item_id, location_id in created_pairs
+                    ],
+                    ignore_conflicts=True
+                )
+                for stock in StockLevel.objects.select_for_update().filter(
+                    item_id__in={item_id for item_id, _ in created_pairs},
+                    location_id__in={location_id for _, location_id in created_pairs}
+                ).order_by('pk'):
+                    if (stock.item_id, stock.location_id) in created_pairs:
+                        stocks[(stock.item_id, stock.location_id)] = stock
+
+        now = timezone.now()
+        changed = {}
+        ledger = []
+        for index, movement in valid:
+            qty = movement['qty']
+            source = stocks.get((movement['item_id'], movement['from_location_id']))
+            destination = stocks.get((movement['item_id'], movement['to_location_id']))
+
+            if movement['from_location_id'] is not None:
+                available = source.available_qty if source else Decimal('0')
+                if available < qty:
+                    results.append({
+                        'index': index,
+                        'status': 'failed',
+                        'error': f"Insufficient stock. Available: {available}, Requested: {qty}"
+                    })
+                    continue
+                source.on_hand_qty -= qty
+                source.updated_at = now
+                changed[source.pk] = source
+            if destination is not None:
+                destination.on_hand_qty += qty
+                destination.updated_at = now
+                changed[destination.pk] = destination
+
+            ledger.append((index, InventoryTransaction(
+                item_id=movement['item_id'],
+                from_location_id=movement['from_location_id'],
+                to_location_id=movement['to_location_id'],
+                qty=qty,
+                type=movement['type'],
+                user=user,
+                cost=movement['cost'] if movement['type'] == 'RECEIVE' else None,
+                notes=movement['notes'],
+                receipt_id=movement['receipt_id'] if movement['type'] == 'RECEIVE' else '',
+                work_order_id=movement['work_order_id'] if movement['type'] == 'ISSUE' else ''
+            )))
+
+        failed = [result for result in results if result['status'] == 'failed']
+        if atomic and failed:
+            transaction.set_rollback(True)
+            return StockService._reject_batch(results, [index for index, _ in ledger])
+
+        if changed:
+            StockLevel.objects.bulk_update(list(changed.values()), ['on_hand_qty', 'updated_at'])
+        created = InventoryTransaction.objects.bulk_create([trans for _, trans in ledger])
+        DailyUsageService.record(created)
+
+        # New stock rows change location counts, so those items are recomputed;
+        # everything else gets incremental on-hand deltas
+        refreshed_items = {item_id for item_id, _ in created_pairs}
+        rollup_deltas = {}
+        for _, trans in ledger:
+            if trans.item_id in refreshed_items:
+                continue
+            for location_id, sign in ((trans.from_location_id, -1), (trans.to_location_id, 1)):
+                if location_id is None:
+                    continue
+                key = (trans.item_id, locations[location_id].property_id or '')
+                rollup_deltas[key] = rollup_deltas.get(key, Decimal(0)) + sign * trans.qty
+        StockRollupService.apply_deltas(rollup_deltas)
+        if refreshed_items:
+            StockRollupService.refresh_items(refreshed_items)
+
+        for (index, _), trans in zip(ledger, created):
+            results.append({
+                'index': index,
+                'status': 'applied',
+                'type': trans.type,
+                'item_id': trans.item_id,
+                'transaction_id': trans.pk
+            })
+
+        results.sort(key=lambda r: r['index'])
+        return {'applied': len(created), 'failed': len(failed), 'results': results}
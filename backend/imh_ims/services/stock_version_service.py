@@ -0,0 +1,53 @@
+import hashlib
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+
+
+STOCK_VERSION_KEY = 'imh:stock-version'
+
+
+class StockVersionService:
+    """
+    A version that moves on every committed change that can alter stock
+    reports: quantities, pars, and item or location details. Cached report
+    payloads put it in their key, so a change makes old entries unreachable
+    rather than having to find and delete them.
+
+    The version lives in the default cache, which settings.CACHES points at a
+    backend every process shares. A bump sets it to the clock rather than
+    incrementing it: the database cache's incr() is a read then a write, so
+    two concurrent bumps could both land on the same value.
+    """
+
+    @staticmethod
+    def current() -> int:
+        version = cache.get(STOCK_VERSION_KEY)
+        if version is None:
+            # Start from the clock, so a counter lost to eviction never repeats an old version
+            cache.add(STOCK_VERSION_KEY, time.time_ns(), timeout=None)
+            version = cache.get(STOCK_VERSION_KEY, 0)
+        return version
+
+    @staticmethod
+    def cached(name: str, params: dict, build, timeout: int):
+        """build()'s result, cached for `timeout` seconds (0: not at all) per stock version and parameters"""
+        if not timeout:
+            return build()
+        digest = hashlib.sha256(repr(sorted(params.items())).encode('utf-8')).hexdigest()[:32]
+        key = f'imh:{name}:{StockVersionService.current()}:{digest}'
+        result = cache.get(key)
+        if result is None:
+            result = build()
+            cache.set(key, result, timeout)
+        return result
+
+    @staticmethod
+    def bump() -> None:
+        """Move the version once the current transaction commits (immediately outside one)"""
+        transaction.on_commit(StockVersionService._advance)
+
+    @staticmethod
+    def _advance() -> None:
+        cache.set(STOCK_VERSION_KEY, time.time_ns(), timeout=None)
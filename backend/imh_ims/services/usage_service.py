@@ -0,0 +1,180 @@
+from collections import defaultdict
+from decimal import Decimal
+from zoneinfo import ZoneInfo
+import gzip
+import json
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, Count, DecimalField, F, Q, Sum, Value, When
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from imh_ims.models import DailyUsage, InventoryTransaction, LedgerArchivePartition
+from .archive_service import LedgerArchiveService
+from .ledger_service import ADJUST_TYPES
+
+
+USAGE_FIELDS = ('qty', 'cost', 'cost_count', 'txn_count')
+
+
+def _empty_usage():
+    return {'qty': Decimal('0'), 'cost': Decimal('0'), 'cost_count': 0, 'txn_count': 0}
+
+
+class DailyUsageService:
+    """
+    Maintains DailyUsage, the per-day ledger rollup the usage reports read.
+
+    record() folds new ledger rows into their (item, location, type, day)
+    rows inside the writer's transaction. Writers hold the stock row of every
+    item-location they touch, so two transactions never create the same rollup
+    row at once. rebuild() recomputes the rollup from the hot ledger (one
+    GROUP BY) and the archive partitions. Days are calendar days in
+    SITE_TIME_ZONE.
+    """
+
+    BATCH_SIZE = 1000
+
+    @staticmethod
+    def site_timezone() -> ZoneInfo:
+        return ZoneInfo(getattr(settings, 'SITE_TIME_ZONE', settings.TIME_ZONE))
+
+    @staticmethod
+    def today():
+        return timezone.localdate(timezone=DailyUsageService.site_timezone())
+
+    @staticmethod
+    def day_of(timestamp):
+        return timezone.localtime(timestamp, DailyUsageService.site_timezone()).date()
+
+    @staticmethod
+    def primary_location(trans_type: str, from_location_id, to_location_id):
+        """The location a ledger row counts at: the source of issues and transfers, else the destination"""
+        if trans_type in ('ISSUE', 'TRANSFER'):
+            return from_location_id
+        if trans_type in ADJUST_TYPES:
+            return to_location_id or from_location_id
+        return to_location_id
+
+    @staticmethod
+    def _fold(totals: dict, row: dict) -> None:
+        """Add one ledger row (a dict of InventoryTransaction fields) to the totals of its day"""
+        trans_type = row['type']
+        key = (
+            row['item_id'],
+            DailyUsageService.primary_location(trans_type, row['from_location_id'], row['to_location_id']),
+            trans_type,
+            DailyUsageService.day_of(row['timestamp'])
+        )
+        usage = totals[key]
+        usage['qty'] += (row['qty_delta'] or 0) if trans_type in ADJUST_TYPES else row['qty']
+        usage['txn_count'] += 1
+        if row['cost'] is not None and row['cost'] > 0:
+            usage['cost'] += row['cost']
+            usage['cost_count'] += 1
+
+    @staticmethod
+    @transaction.atomic
+    def record(transactions) -> None:
+        """Add saved InventoryTransactions to the rollup"""
+        totals = defaultdict(_empty_usage)
+        for trans in transactions:
+            DailyUsageService._fold(totals, {
+                'item_id': trans.item_id, 'from_location_id': trans.from_location_id,
+                'to_location_id': trans.to_location_id, 'type': trans.type, 'timestamp': trans.timestamp,
+                'qty': trans.qty, 'qty_delta': trans.qty_delta, 'cost': trans.cost,
+            })
+        if not totals:
+            return
+
+        existing = {
+            (row.item_id, row.location_id, row.type, row.day): row
+            for row in DailyUsage.objects.select_for_update().filter(
+                item_id__in={key[0] for key in totals}, day__in={key[3] for key in totals}
+            ).order_by('pk')
+        }
+        changed, created = [], []
+        for key, usage in totals.items():
+            row = existing.get(key)
+            if row is None:
+                item_id, location_id, trans_type, day = key
+                created.append(DailyUsage(item_id=item_id, location_id=location_id, type=trans_type, day=day, **usage))
+                continue
+            for field in USAGE_FIELDS:
+                setattr(row, field, getattr(row, field) + usage[field])
+            changed.append(row)
+        DailyUsage.objects.bulk_update(changed, USAGE_FIELDS, batch_size=DailyUsageService.BATCH_SIZE)
+        DailyUsage.objects.bulk_create(created, batch_size=DailyUsageService.BATCH_SIZE)
+
+    @staticmethod
+    @transaction.atomic
+    def rebuild(item_ids=None) -> int:
+        """
+        Recompute the rollup, for every item or only the given ones, from the
+        hot ledger and the archive. Returns the number of rows written.
+        """
+        rows = DailyUsage.objects.all()
+        ledger = InventoryTransaction.objects.all()
+        if item_ids is not None:
+            item_ids = sorted(set(item_ids))
+            rows = rows.filter(item_id__in=item_ids)
+            ledger = ledger.filter(item_id__in=item_ids)
+        rows.delete()
+
+        totals = defaultdict(_empty_usage)
+        for row in DailyUsageService._archived_rows(item_ids):
+            row['timestamp'] = parse_datetime(row['timestamp'])
+            for field in ('qty', 'qty_delta', 'cost'):
+                if row[field] is not None:
+                    row[field] = Decimal(row[field])
+            DailyUsageService._fold(totals, row)
+
+        positive_cost = Q(cost__gt=0)
+        grouped = ledger.annotate(
+            location=Case(
+                When(type__in=('ISSUE', 'TRANSFER'), then=F('from_location_id')),
+                When(type__in=ADJUST_TYPES, then=Coalesce('to_location_id', 'from_location_id')),
+                default=F('to_location_id')
+            ),
+            day=TruncDate('timestamp', tzinfo=DailyUsageService.site_timezone())
+        ).values('item_id', 'location', 'type', 'day').annotate(
+            moved=Sum(Case(
+                When(type__in=ADJUST_TYPES, then=Coalesce('qty_delta', Value(Decimal('0')))),
+                default=F('qty'),
+                output_field=DecimalField(max_digits=14, decimal_places=2)
+            )),
+            cost_total=Sum('cost', filter=positive_cost),
+            costed=Count('id', filter=positive_cost),
+            rows=Count('id')
+        ).order_by()
+        for row in grouped.iterator(chunk_size=10000):
+            # A site day can straddle an archived month's edge, so add rather than assign
+            usage = totals[(row['item_id'], row['location'], row['type'], row['day'])]
+            usage['qty'] += row['moved'] or 0
+            usage['cost'] += row['cost_total'] or 0
+            usage['cost_count'] += row['costed']
+            usage['txn_count'] += row['rows']
+
+        DailyUsage.objects.bulk_create(
+            (
+                DailyUsage(item_id=item_id, location_id=location_id, type=trans_type, day=day, **usage)
+                for (item_id, location_id, trans_type, day), usage in totals.items()
+            ),
+            batch_size=DailyUsageService.BATCH_SIZE
+        )
+        return len(totals)
+
+    @staticmethod
+    def _archived_rows(item_ids=None):
+        """Every archived ledger row as a dict, or only those of the given items (read through the index)"""
+        root = LedgerArchiveService.archive_root()
+        for partition in LedgerArchivePartition.objects.order_by('month', 'part'):
+            if item_ids is not None:
+                for item_id in item_ids:
+                    yield from LedgerArchiveService.read_item(partition, item_id)
+                continue
+            with gzip.open(root / partition.path, 'rt', encoding='utf-8') as archive_file:
+                for line in archive_file:
+                    if line.strip():
+                        yield json.loads(line)
@@ -0,0 +1,98 @@
+from django.db.models.signals import post_save, post_delete, pre_save
+from django.dispatch import receiver
+from imh_ims.models import StockLevel, Location, Item, Category, Vendor
+from imh_ims.services.rollup_service import StockRollupService
+from imh_ims.services.search_service import ItemSearchService
+from imh_ims.services.qr_service import qr_cache
+from imh_ims.services.stock_version_service import StockVersionService
+
+
+ROLLUP_FIELDS = {'on_hand_qty', 'reserved_qty', 'item', 'item_id', 'location', 'location_id'}
+
+
+@receiver(post_save, sender=StockLevel)
+def stock_level_saved(sender, instance, created, update_fields=None, raw=False, **kwargs):
+    """Keep the item's stock rollups in step with direct StockLevel saves"""
+    if raw:
+        return
+    # Par edits leave the rollups alone but change the stock reports
+    StockVersionService.bump()
+    if update_fields is not None and not ROLLUP_FIELDS.intersection(update_fields):
+        return
+    StockRollupService.refresh_items([instance.item_id])
+
+
+@receiver(post_delete, sender=StockLevel)
+def stock_level_deleted(sender, instance, **kwargs):
+    StockRollupService.refresh_items([instance.item_id])
+
+
+@receiver(pre_save, sender=Location)
+def location_pre_save(sender, instance, raw=False, **kwargs):
+    """Remember the previous property so a move between properties can be detected"""
+    instance._previous_property_id = None
+    if raw or instance.pk is None:
+        return
+    instance._previous_property_id = (
+        Location.objects.filter(pk=instance.pk).values_list('property_id', flat=True).first()
+    )
+
+
+@receiver(post_save, sender=Location)
+def location_saved(sender, instance, created, raw=False, **kwargs):
+    """Re-bucket every item stocked at a location whose property changed"""
+    if raw or created:
+        return
+    StockVersionService.bump()
+    previous = getattr(instance, '_previous_property_id', None)
+    if (previous or '') == (instance.property_id or ''):
+        return
+    item_ids = StockLevel.objects.filter(location=instance).values_list('item_id', flat=True)
+    StockRollupService.refresh_items(item_ids)
+
+
+@receiver(pre_save, sender=Item)
+def item_pre_save(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Remember the previous short_code so its cached QR codes can be dropped"""
+    instance._previous_short_code = None
+    if raw or instance.pk is None:
+        return
+    if update_fields is not None and 'short_code' not in update_fields:
+        return
+    instance._previous_short_code = (
+        Item.objects.filter(pk=instance.pk).values_list('short_code', flat=True).first()
+    )
+
+
+@receiver(post_save, sender=Item)
+def item_saved(sender, instance, raw=False, **kwargs):
+    """Keep the item search index, QR cache and stock reports in step with item edits"""
+    if raw:
+        return
+    StockVersionService.bump()
+    ItemSearchService.index_items([instance.pk])
+    previous = getattr(instance, '_previous_short_code', None)
+    if previous and previous != instance.short_code:
+        qr_cache.evict(previous)
+
+
+@receiver(post_delete, sender=Item)
+def item_deleted(sender, instance, **kwargs):
+    StockVersionService.bump()
+    ItemSearchService.remove_items([instance.pk])
+    qr_cache.evict(instance.short_code)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=Vendor)
+def item_owner_saved(sender, instance, created, raw=False, **kwargs):
+    """Category and vendor names are indexed with each item, so reindex their items"""
+    if raw or created:
+        return
+    ItemSearchService.index_items(instance.items.values_list('id', flat=True))
+
+
+def ensure_search_index(sender, **kwargs):
+    """post_migrate: create and fill the item search index if this database lacks it"""
+    ItemSearchService.ensure_index()
+
@@ -1,3 +1,865 @@
-from django.test import TestCase
+from django.test import TestCase, override_settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+from django.db.models import Sum
+from django.contrib.auth.models import User
+from django.utils import timezone
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+import io
+import json
+import tempfile
+from pathlib import Path
+from zoneinfo import ZoneInfo
+from decimal import Decimal
+import numpy as np
+import openpyxl
 
-# Create your tests here.
+from imh_ims.models import (
+    Item, Location, StockLevel, InventoryTransaction, ItemPropertyStock, ItemStockSummary, StockCheckpoint,
+    Department, DailyAlertSnapshot, LedgerArchivePartition, LedgerMonthlySummary, Category, Vendor, ImportJob,
+    DemandForecast, DailyUsage
+)
+from imh_ims.services.stock_service import StockService
+from imh_ims.services.rollup_service import StockRollupService
+from imh_ims.services.ledger_service import LedgerService
+from imh_ims.services.alert_snapshot_service import AlertSnapshotService
+from imh_ims.services.archive_service import LedgerArchiveService
+from imh_ims.services.search_service import ItemSearchService
+from imh_ims.services.import_service import ItemImportService, SpreadsheetReader, validate_row, validate_rows
+from imh_ims.services.import_job_service import ImportJobService
+from imh_ims.services.order_service import OrderSuggestionService
+from imh_ims.services.forecast_service import ForecastService
+from imh_ims.services.usage_service import DailyUsageService
+
+
+class StockMutationTests(TestCase):
+    """Tests for the conditional, column-scoped stock mutations"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="stockuser", password="testpass")
+        self.item = Item.objects.create(name="Hand Soap", short_code="SOAP-001")
+        self.storeroom = Location.objects.create(property_id="PROP-001", name="Main Storeroom", type="STOREROOM")
+        self.closet = Location.objects.create(property_id="PROP-001", name="3W Closet", type="CLOSET")
+        self.stock = StockLevel.objects.create(
+            item=self.item,
+            location=self.storeroom,
+            on_hand_qty=Decimal("10.00"),
+            reserved_qty=Decimal("2.00"),
+            par=Decimal("5.00")
+        )
+
+    def test_issue_does_not_lose_concurrent_updates(self):
+        """Two issues against the same row both land even when callers hold stale copies"""
+        stale = StockLevel.objects.get(pk=self.stock.pk)
+        StockService.issue_stock(self.item, self.storeroom, Decimal("3"), self.user)
+        StockService.issue_stock(self.item, self.storeroom, Decimal("4"), self.user)
+        stale.refresh_from_db()
+        self.assertEqual(stale.on_hand_qty, Decimal("3.00"))
+
+    def test_issue_respects_reserved_quantity(self):
+        """Issuing more than on_hand - reserved is rejected and leaves no ledger row"""
+        with self.assertRaises(ValueError):
+            StockService.issue_stock(self.item, self.storeroom, Decimal("9"), self.user)
+        self.stock.refresh_from_db()
+        self.assertEqual(self.stock.on_hand_qty, Decimal("10.00"))
+        self.assertFalse(InventoryTransaction.objects.exists())
+
+    def test_transfer_creates_destination_row(self):
+        StockService.transfer_stock(self.item, self.storeroom, self.closet, Decimal("8"), self.user)
+        self.assertEqual(StockLevel.objects.get(item=self.item, location=self.closet).on_hand_qty, Decimal("8.00"))
+        self.assertEqual(StockLevel.objects.get(item=self.item, location=self.storeroom).on_hand_qty, Decimal("2.00"))
+
+    def test_transfer_to_same_location_rejected(self):
+        with self.assertRaises(ValueError):
+            StockService.transfer_stock(self.item, self.storeroom, self.storeroom, Decimal("1"), self.user)
+
+    def test_adjust_only_touches_on_hand(self):
+        """A par change made elsewhere survives a stock adjustment"""
+        StockLevel.objects.filter(pk=self.stock.pk).update(par=Decimal("7.00"))
+        StockService.adjust_stock(self.item, self.storeroom, Decimal("12"), self.user, reason="Recount")
+        self.stock.refresh_from_db()
+        self.assertEqual(self.stock.on_hand_qty, Decimal("12.00"))
+        self.assertEqual(self.stock.par, Decimal("7.00"))
+
+
+class BatchMovementTests(TestCase):
+    """Tests for StockService.apply_movements"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="batchuser", password="testpass")
+        self.storeroom = Location.objects.create(name="Main Storeroom", type="STOREROOM")
+        self.cart = Location.objects.create(name="Cart 1", type="CART")
+        self.items = [
+            Item.objects.create(name=f"Item {i}", short_code=f"BATCH-{i:03d}")
+            for i in range(60)
+        ]
+        StockLevel.objects.bulk_create([
+            StockLevel(item=item, location=self.storeroom, on_hand_qty=Decimal("20"))
+            for item in self.items
+        ])
+
+    def test_cart_restock_uses_constant_queries(self):
+        movements = [
+            {'type': 'TRANSFER', 'item_id': item.id, 'from_location_id': self.storeroom.id,
+             'to_location_id': self.cart.id, 'qty': '5'}
+            for item in self.items
+        ]
+        with CaptureQueriesContext(connection) as ctx:
+            result = StockService.apply_movements(movements, self.user)
+        self.assertEqual(result['applied'], 60)
+        # Movement engine, the constant-cost rollup refresh for the new cart rows and the daily usage upsert
+        self.assertLessEqual(len(ctx.captured_queries), 22)
+        self.assertEqual(StockLevel.objects.filter(location=self.cart, on_hand_qty=Decimal("5")).count(), 60)
+        self.assertEqual(InventoryTransaction.objects.filter(type='TRANSFER').count(), 60)
+
+    def test_atomic_batch_rejects_all_lines_on_failure(self):
+        movements = [
+            {'type': 'ISSUE', 'item_id': self.items[0].id, 'from_location_id': self.storeroom.id, 'qty': '5'},
+            {'type': 'ISSUE', 'item_id': self.items[1].id, 'from_location_id': self.storeroom.id, 'qty': '50'},
+        ]
+        result = StockService.apply_movements(movements, self.user)
+        self.assertEqual(result['applied'], 0)
+        self.assertEqual([r['status'] for r in result['results']], ['not_applied', 'failed'])
+        self.assertEqual(StockLevel.objects.get(item=self.items[0], location=self.storeroom).on_hand_qty, Decimal("20"))
+        self.assertFalse(InventoryTransaction.objects.exists())
+
+    def test_partial_batch_applies_lines_in_order(self):
+        movements = [
+            {'type': 'RECEIVE', 'item_id': self.items[0].id, 'to_location_id': self.cart.id, 'qty': '3'},
+            {'type': 'ISSUE', 'item_id': self.items[0].id, 'from_location_id': self.cart.id, 'qty': '2'},
+            {'type': 'ISSUE', 'item_id': self.items[0].id, 'from_location_id': self.cart.id, 'qty': '2'},
+            {'type': 'SCRAP', 'item_id': self.items[0].id, 'qty': '1'},
+        ]
+        result = StockService.apply_movements(movements, self.user, atomic=False)
+        self.assertEqual(result['applied'], 2)
+        self.assertEqual([r['status'] for r in result['results']], ['applied', 'applied', 'failed', 'failed'])
+        self.assertEqual(StockLevel.objects.get(item=self.items[0], location=self.cart).on_hand_qty, Decimal("1"))
+
+
+class StockRollupTests(TestCase):
+    """Tests that the on-hand rollups track every kind of stock change"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="rollupuser", password="testpass")
+        self.item = Item.objects.create(name="Paper Towels", short_code="TOWEL-001")
+        self.storeroom = Location.objects.create(property_id="PROP-001", name="Main Storeroom", type="STOREROOM")
+        self.closet = Location.objects.create(property_id="PROP-001", name="3W Closet", type="CLOSET")
+        self.annex = Location.objects.create(property_id="PROP-002", name="Annex Storeroom", type="STOREROOM")
+        StockLevel.objects.create(item=self.item, location=self.storeroom, on_hand_qty=Decimal("10"))
+
+    def assertRollupsMatchStock(self):
+        """Incrementally maintained rollups must equal a fresh GROUP BY"""
+        summary = ItemStockSummary.objects.get(item=self.item)
+        rows = dict(ItemPropertyStock.objects.filter(item=self.item).values_list("property_id", "on_hand_qty"))
+        StockRollupService.rebuild()
+        rebuilt = ItemStockSummary.objects.get(item=self.item)
+        self.assertEqual(summary.global_on_hand, rebuilt.global_on_hand)
+        self.assertEqual(summary.location_count, rebuilt.location_count)
+        self.assertEqual(summary.primary_property_id, rebuilt.primary_property_id)
+        self.assertEqual(
+            rows,
+            dict(ItemPropertyStock.objects.filter(item=self.item).values_list("property_id", "on_hand_qty"))
+        )
+
+    def test_mutations_keep_rollups_in_step(self):
+        StockService.transfer_stock(self.item, self.storeroom, self.annex, Decimal("7"), self.user)
+        StockService.issue_stock(self.item, self.annex, Decimal("1"), self.user)
+        StockService.receive_stock(self.item, self.closet, Decimal("4"), self.user)
+        StockService.adjust_stock(self.item, self.storeroom, Decimal("5"), self.user)
+
+        on_hand, property_id = StockService.get_property_on_hand(self.item)
+        self.assertEqual(StockService.get_global_on_hand(self.item), Decimal("15"))
+        self.assertEqual((on_hand, property_id), (Decimal("9"), "PROP-001"))
+        self.assertEqual(StockService.get_property_on_hand(self.item, "PROP-002")[0], Decimal("6"))
+        self.assertRollupsMatchStock()
+
+    def test_batch_movements_update_rollups(self):
+        StockService.apply_movements([
+            {"type": "TRANSFER", "item_id": self.item.id, "from_location_id": self.storeroom.id,
+             "to_location_id": self.annex.id, "qty": "6"},
+            {"type": "RECEIVE", "item_id": self.item.id, "to_location_id": self.storeroom.id, "qty": "2"},
+        ], self.user)
+        self.assertEqual(StockService.get_property_on_hand(self.item), (Decimal("6"), "PROP-001"))
+        self.assertRollupsMatchStock()
+
+    def test_location_property_change_moves_stock(self):
+        self.storeroom.property_id = "PROP-003"
+        self.storeroom.save()
+        self.assertEqual(StockService.get_property_on_hand(self.item), (Decimal("10"), "PROP-003"))
+        self.assertFalse(ItemPropertyStock.objects.filter(item=self.item, property_id="PROP-001").exists())
+
+    def test_direct_delete_refreshes_rollups(self):
+        StockLevel.objects.filter(item=self.item).delete()
+        self.assertEqual(StockService.get_global_on_hand(self.item), Decimal("0"))
+
+
+class LedgerCheckpointTests(TestCase):
+    """Tests for signed adjustment deltas, checkpoints and as-of stock"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="ledgeruser", password="testpass")
+        self.item = Item.objects.create(name="Gloves", short_code="GLOVE-001")
+        self.storeroom = Location.objects.create(name="Main Storeroom", type="STOREROOM")
+        self.closet = Location.objects.create(name="3W Closet", type="CLOSET")
+        self.start = timezone.now() - timedelta(days=10)
+
+        # Day 1: receive 10, day 3: move 4 to the closet, day 5: recount storeroom to 5
+        self.at(StockService.receive_stock(self.item, self.storeroom, Decimal("10"), self.user), 1)
+        self.at(StockService.transfer_stock(self.item, self.storeroom, self.closet, Decimal("4"), self.user), 3)
+        self.at(StockService.adjust_stock(self.item, self.storeroom, Decimal("5"), self.user), 5)
+
+    def at(self, trans, day):
+        InventoryTransaction.objects.filter(pk=trans.pk).update(timestamp=self.start + timedelta(days=day))
+
+    def history(self):
+        return [
+            (day, LedgerService.stock_as_of(self.start + timedelta(days=day, hours=12)))
+            for day in (0, 1, 3, 5)
+        ]
+
+    def assertHistory(self, history):
+        expected = {
+            0: {},
+            1: {self.storeroom.id: Decimal("10")},
+            3: {self.storeroom.id: Decimal("6"), self.closet.id: Decimal("4")},
+            5: {self.storeroom.id: Decimal("5"), self.closet.id: Decimal("4")},
+        }
+        for day, state in history:
+            actual = {location_id: qty for (_, location_id), qty in state.items() if qty}
+            self.assertEqual(actual, expected[day], f"day {day}")
+
+    def test_adjust_records_signed_delta(self):
+        adjust = InventoryTransaction.objects.get(type="ADJUST")
+        self.assertEqual(adjust.qty, Decimal("5.00"))
+        self.assertEqual(adjust.qty_delta, Decimal("-1.00"))
+
+    def test_as_of_from_current_stock(self):
+        self.assertHistory(self.history())
+
+    def test_as_of_from_replayed_checkpoints(self):
+        stats = LedgerService.rebuild_checkpoints(interval_days=1, workers=1)
+        self.assertGreater(stats["checkpoints"], 0)
+        self.assertHistory(self.history())
+
+    def test_as_of_prefers_nearest_snapshot(self):
+        snapshot_at = timezone.now()
+        LedgerService.create_snapshot(as_of=snapshot_at)
+        self.assertEqual(StockCheckpoint.objects.filter(source="SNAPSHOT").count(), 2)
+        # Drift in StockLevel after the snapshot must not leak into earlier as-of answers
+        StockLevel.objects.filter(location=self.storeroom).update(on_hand_qty=Decimal("999"))
+        state = LedgerService.stock_as_of(snapshot_at - timedelta(minutes=1))
+        self.assertEqual(state[(self.item.id, self.storeroom.id)], Decimal("5"))
+
+    def test_replay_backfills_legacy_adjustments(self):
+        InventoryTransaction.objects.filter(type="ADJUST").update(qty_delta=None)
+        stats = LedgerService.rebuild_checkpoints(interval_days=1, workers=1)
+        self.assertEqual(stats["backfilled"], 1)
+        self.assertEqual(InventoryTransaction.objects.get(type="ADJUST").qty_delta, Decimal("-1.00"))
+
+
+class AlertSnapshotTests(TestCase):
+    """Tests for the daily alert snapshots"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="snapshotuser", password="testpass")
+        self.department = Department.objects.create(name="Housekeeping", code="HK")
+        self.closet = Location.objects.create(name="3W Closet", type="CLOSET", department=self.department)
+        self.storeroom = Location.objects.create(name="Main Storeroom", type="STOREROOM")
+        self.soap = Item.objects.create(name="Soap", short_code="SNAP-001", cost=Decimal("2.50"))
+        self.towels = Item.objects.create(name="Towels", short_code="SNAP-002", cost=Decimal("4.00"))
+        StockLevel.objects.create(item=self.soap, location=self.closet, on_hand_qty=Decimal("9"), par=Decimal("10"))
+        StockLevel.objects.create(item=self.towels, location=self.closet, on_hand_qty=Decimal("2"), par=Decimal("10"))
+        StockLevel.objects.create(item=self.towels, location=self.storeroom, on_hand_qty=Decimal("50"), par=Decimal("10"))
+
+    def test_snapshot_day_groups_by_location(self):
+        self.assertEqual(AlertSnapshotService.snapshot_day(), 2)
+        closet = DailyAlertSnapshot.objects.get(location=self.closet)
+        self.assertEqual(closet.department, self.department)
+        self.assertEqual((closet.stock_lines, closet.below_par_count, closet.at_risk_count), (2, 2, 1))
+        self.assertEqual(closet.stock_value, Decimal("30.50"))
+        storeroom = DailyAlertSnapshot.objects.get(location=self.storeroom)
+        self.assertEqual((storeroom.below_par_count, storeroom.stock_value), (0, Decimal("200.00")))
+
+        # Re-running replaces the day instead of duplicating it
+        AlertSnapshotService.snapshot_day()
+        self.assertEqual(DailyAlertSnapshot.objects.count(), 2)
+
+    def test_backfill_replays_ledger(self):
+        today = timezone.localdate()
+        receipt = StockService.receive_stock(self.towels, self.closet, Decimal("8"), self.user)
+        InventoryTransaction.objects.filter(pk=receipt.pk).update(timestamp=timezone.now() - timedelta(days=1))
+
+        AlertSnapshotService.backfill(today - timedelta(days=3), today - timedelta(days=1))
+        AlertSnapshotService.snapshot_day(today)
+        closet = dict(
+            DailyAlertSnapshot.objects.filter(location=self.closet).values_list("day", "below_par_count")
+        )
+        self.assertEqual(closet[today - timedelta(days=2)], 2)
+        self.assertEqual(closet[today - timedelta(days=1)], 1)
+        self.assertEqual(closet[today], 1)
+
+
+class LedgerArchiveTests(TestCase):
+    """Tests for moving old ledger rows into archive partitions"""
+
+    def setUp(self):
+        self.archive_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.archive_dir.cleanup)
+        settings_override = override_settings(LEDGER_ARCHIVE_ROOT=self.archive_dir.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.user = User.objects.create_user(username="archiveuser", password="testpass")
+        self.soap = Item.objects.create(name="Soap", short_code="ARCH-001")
+        self.towels = Item.objects.create(name="Towels", short_code="ARCH-002")
+        self.storeroom = Location.objects.create(name="Main Storeroom", type="STOREROOM")
+        self.closet = Location.objects.create(name="3W Closet", type="CLOSET")
+        self.old = timezone.now() - timedelta(days=500)
+
+        self.at(StockService.receive_stock(self.soap, self.storeroom, Decimal("20"), self.user, cost=Decimal("3.00")), 0)
+        self.at(StockService.receive_stock(self.towels, self.storeroom, Decimal("8"), self.user), 1)
+        self.at(StockService.transfer_stock(self.soap, self.storeroom, self.closet, Decimal("5"), self.user), 2)
+        self.at(StockService.issue_stock(self.soap, self.closet, Decimal("2"), self.user), 3)
+        # Recent activity stays in the hot table
+        StockService.issue_stock(self.soap, self.closet, Decimal("1"), self.user)
+
+    def at(self, trans, days):
+        InventoryTransaction.objects.filter(pk=trans.pk).update(timestamp=self.old + timedelta(days=days, hours=1))
+
+    def test_archive_moves_old_rows(self):
+        cutoff = LedgerArchiveService.cutoff(365)
+        stats = LedgerArchiveService.archive(365)
+        self.assertEqual(stats["rows"], 4)
+        self.assertEqual(InventoryTransaction.objects.count(), 1)
+        self.assertEqual(sum(p.row_count for p in LedgerArchivePartition.objects.all()), 4)
+        self.assertTrue(StockCheckpoint.objects.filter(as_of=cutoff, source="ARCHIVE").exists())
+
+        # A second run has nothing left to move
+        self.assertEqual(LedgerArchiveService.archive(365)["rows"], 0)
+
+    def test_monthly_summaries(self):
+        LedgerArchiveService.archive(365)
+        totals = LedgerMonthlySummary.objects.filter(item=self.soap).aggregate(
+            issued=Sum("issued_qty"), received=Sum("received_qty"),
+            moved_in=Sum("transferred_in_qty"), moved_out=Sum("transferred_out_qty"),
+            cost_total=Sum("cost_total"), cost_count=Sum("cost_count")
+        )
+        self.assertEqual(totals["issued"], Decimal("2"))
+        self.assertEqual(totals["received"], Decimal("20"))
+        self.assertEqual((totals["moved_in"], totals["moved_out"]), (Decimal("5"), Decimal("5")))
+        self.assertEqual((totals["cost_total"], totals["cost_count"]), (Decimal("3.00"), 1))
+
+    def test_item_history_reads_through_archive(self):
+        LedgerArchiveService.archive(365)
+        partition = LedgerArchivePartition.objects.order_by("month").first()
+        self.assertEqual([row["type"] for row in LedgerArchiveService.read_item(partition, self.towels.id)], ["RECEIVE"])
+        self.assertEqual(LedgerArchiveService.read_item(partition, 999999), [])
+
+        rows = LedgerArchiveService.item_transactions(self.soap.id, limit=10)
+        self.assertEqual([row["type"] for row in rows], ["ISSUE", "TRANSFER", "RECEIVE"])
+        transactions = LedgerArchiveService.to_transactions(rows)
+        self.assertEqual(transactions[0].from_location, self.closet)
+        self.assertEqual(transactions[0].qty, Decimal("2.00"))
+
+    def test_as_of_after_archive(self):
+        cutoff = LedgerArchiveService.cutoff(365)
+        before = LedgerService.stock_as_of(cutoff)
+        LedgerArchiveService.archive(365)
+        self.assertEqual(LedgerService.stock_as_of(cutoff), before)
+        self.assertEqual(before[(self.soap.id, self.closet.id)], Decimal("3"))
+
+
+class DailyUsageTests(TestCase):
+    """Stock writes keep the daily usage rollup current; rebuild() recomputes it from the ledger and archive"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="usageuser", password="testpass")
+        self.soap = Item.objects.create(name="Soap", short_code="USE-001")
+        self.storeroom = Location.objects.create(name="Main Storeroom", type="STOREROOM")
+        self.closet = Location.objects.create(name="3W Closet", type="CLOSET")
+
+    def usage(self):
+        return {
+            (row.location_id, row.type, row.day): (row.qty, row.cost, row.cost_count, row.txn_count)
+            for row in DailyUsage.objects.all()
+        }
+
+    def test_writes_update_the_rollup(self):
+        today = DailyUsageService.today()
+        StockService.receive_stock(self.soap, self.storeroom, Decimal("20"), self.user, cost=Decimal("3.00"))
+        StockService.transfer_stock(self.soap, self.storeroom, self.closet, Decimal("5"), self.user)
+        StockService.issue_stock(self.soap, self.closet, Decimal("2"), self.user)
+        StockService.apply_movements([
+            {'type': 'ISSUE', 'item_id': self.soap.id, 'from_location_id': self.closet.id, 'qty': '1'},
+            {'type': 'ISSUE', 'item_id': self.soap.id, 'from_location_id': self.storeroom.id, 'qty': '4'},
+        ], self.user)
+        StockService.adjust_stock(self.soap, self.closet, Decimal("1"), self.user)
+
+        expected = {
+            (self.storeroom.id, 'RECEIVE', today): (Decimal("20"), Decimal("3.00"), 1, 1),
+            (self.storeroom.id, 'TRANSFER', today): (Decimal("5"), Decimal("0"), 0, 1),
+            (self.closet.id, 'ISSUE', today): (Decimal("3"), Decimal("0"), 0, 2),
+            (self.storeroom.id, 'ISSUE', today): (Decimal("4"), Decimal("0"), 0, 1),
+            (self.closet.id, 'ADJUST', today): (Decimal("-1"), Decimal("0"), 0, 1),
+        }
+        self.assertEqual(self.usage(), expected)
+        self.assertEqual(DailyUsageService.rebuild(), 5)
+        self.assertEqual(self.usage(), expected)
+
+    @override_settings(SITE_TIME_ZONE='America/New_York')
+    def test_days_follow_the_site_time_zone(self):
+        StockService.receive_stock(self.soap, self.storeroom, Decimal("5"), self.user)
+        self.assertEqual(DailyUsage.objects.get(type='RECEIVE').day, timezone.localdate(timezone=ZoneInfo('America/New_York')))
+
+        trans = StockService.issue_stock(self.soap, self.storeroom, Decimal("2"), self.user)
+        # 21:30 on March 1st in New York
+        InventoryTransaction.objects.filter(pk=trans.pk).update(timestamp=datetime(2026, 3, 2, 2, 30, tzinfo=dt_timezone.utc))
+        DailyUsageService.rebuild([self.soap.id])
+        self.assertEqual(DailyUsage.objects.get(type='ISSUE').day, date(2026, 3, 1))
+
+    def test_rebuild_reads_archived_months(self):
+        archive_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(archive_dir.cleanup)
+        old = timezone.now() - timedelta(days=500)
+        with override_settings(LEDGER_ARCHIVE_ROOT=archive_dir.name):
+            StockService.receive_stock(self.soap, self.storeroom, Decimal("20"), self.user, cost=Decimal("3.00"))
+            for qty in ("2", "3"):
+                trans = StockService.issue_stock(self.soap, self.storeroom, Decimal(qty), self.user)
+                InventoryTransaction.objects.filter(pk=trans.pk).update(timestamp=old)
+            self.assertEqual(LedgerArchiveService.archive(365)["rows"], 2)
+
+            self.assertEqual(DailyUsageService.rebuild(), 2)
+            self.assertEqual(self.usage(), {
+                (self.storeroom.id, 'RECEIVE', DailyUsageService.today()): (Decimal("20"), Decimal("3.00"), 1, 1),
+                (self.storeroom.id, 'ISSUE', DailyUsageService.day_of(old)): (Decimal("5"), Decimal("0"), 0, 2),
+            })
+            DailyUsageService.rebuild([self.soap.id])
+            self.assertEqual(DailyUsage.objects.get(type='ISSUE').qty, Decimal("5"))
+
+
+class ItemSearchTests(TestCase):
+    """Tests for the ranked item search index"""
+
+    def setUp(self):
+        if not ItemSearchService.available():
+            self.skipTest("no search index on this database backend")
+        self.linen = Category.objects.create(name="Linen")
+        self.vendor = Vendor.objects.create(name="Acme Supply")
+        self.towel = Item.objects.create(name="Bath Towel", short_code="TWL-100", category=self.linen)
+        self.hand_towel = Item.objects.create(name="Hand Towel White", short_code="TWL-200", category=self.linen)
+        self.soap = Item.objects.create(name="Soap Bar", short_code="SOAP-1", default_vendor=self.vendor)
+
+    def test_prefix_match_and_ranking(self):
+        self.assertEqual(set(ItemSearchService.ranked_ids("tow")), {self.towel.id, self.hand_towel.id})
+        self.assertEqual(ItemSearchService.ranked_ids("hand tow"), [self.hand_towel.id])
+        self.assertEqual(ItemSearchService.ranked_ids("twl 100"), [self.towel.id])
+        # A name hit outranks a category-only hit
+        blanket = Item.objects.create(name="Blanket", short_code="BLK-1", category=self.linen)
+        Item.objects.create(name="Linen Spray", short_code="SPR-1")
+        ranked = ItemSearchService.ranked_ids("linen")
+        self.assertEqual(len(ranked), 4)
+        self.assertNotEqual(ranked[0], blanket.id)
+
+    def test_index_follows_edits(self):
+        self.soap.name = "Liquid Soap"
+        self.soap.save()
+        self.assertEqual(ItemSearchService.ranked_ids("liquid"), [self.soap.id])
+
+        self.vendor.name = "Brightwell"
+        self.vendor.save()
+        self.assertEqual(ItemSearchService.ranked_ids("bright"), [self.soap.id])
+        self.assertEqual(ItemSearchService.ranked_ids("acme"), [])
+
+        self.soap.delete()
+        self.assertEqual(ItemSearchService.ranked_ids("soap"), [])
+
+    def test_rebuild(self):
+        self.assertEqual(ItemSearchService.rebuild(), 3)
+        self.assertEqual(len(ItemSearchService.ranked_ids("towel")), 2)
+
+
+class ItemImportTests(TestCase):
+    """Tests for the set-based bulk item import"""
+
+    def setUp(self):
+        self.category = Category.objects.create(name="Linen")
+        self.vendor = Vendor.objects.create(name="Acme Supply")
+        self.closet = Location.objects.create(name="Closet 1", type="CLOSET", property_id="P1")
+
+    def row(self, row_number, short_code, **data):
+        data.setdefault('name', f"Item {short_code}")
+        data.setdefault('location_name', '')
+        data.setdefault('on_hand_qty', None)
+        data.setdefault('par', None)
+        return {'row_number': row_number, 'data': {'short_code': short_code, **data}}
+
+    def test_counters_match_row_by_row_import(self):
+        rows = [
+            self.row(2, "TWL-1", category=str(self.category.id), default_vendor="acme supply",
+                     location_name="Closet 1", on_hand_qty=Decimal("5"), par=Decimal("10")),
+            self.row(3, "TWL-2", category="linen", default_vendor="New Vendor",
+                     location_name="Closet 9", parent_location_name="Storeroom B", on_hand_qty=Decimal("2")),
+            # Same code again in one file is diffed against the row above
+            self.row(4, "TWL-2", location_name="Closet 9", on_hand_qty=Decimal("7")),
+            self.row(5, "TWL-3"),
+        ]
+        results = ItemImportService.import_rows(rows, None)
+
+        self.assertEqual(results['items_created'], 3)
+        self.assertEqual((results['items_updated'], results['items_unchanged']), (0, 1))
+        self.assertEqual(results['vendors_created'], 1)
+        # The auto-created parent location is not counted
+        self.assertEqual(results['locations_created'], 1)
+        self.assertEqual(results['stock_levels_created'], 2)
+        self.assertEqual(results['stock_levels_updated'], 1)
+        # A row without a location still saves the item but reports the stock fields
+        self.assertEqual([error['row_number'] for error in results['errors']], [5])
+        self.assertTrue(Item.objects.filter(short_code="TWL-3").exists())
+
+        first = Item.objects.get(short_code="TWL-1")
+        self.assertEqual(first.category, self.category)
+        self.assertEqual(first.default_vendor, self.vendor)
+        closet_9 = Location.objects.get(name="Closet 9")
+        self.assertEqual(closet_9.parent_location.name, "Storeroom B")
+        stock = StockLevel.objects.get(item__short_code="TWL-2", location=closet_9)
+        self.assertEqual(stock.on_hand_qty, Decimal("7"))
+        self.assertEqual(stock.par, Decimal("0"))
+        self.assertEqual(first.stock_summary.global_on_hand, Decimal("5"))
+
+    def test_reimport_updates_in_place(self):
+        ItemImportService.import_rows(
+            [self.row(2, "TWL-1", location_name="Closet 1", on_hand_qty=Decimal("5"), par=Decimal("10"))], None
+        )
+        results = ItemImportService.import_rows(
+            [self.row(2, "TWL-1", name="Bath Towel", cost=Decimal("3.50"),
+                      location_name="Closet 1", on_hand_qty=Decimal("8"))], None
+        )
+        self.assertEqual((results['items_created'], results['items_updated']), (0, 1))
+        self.assertEqual((results['stock_levels_created'], results['stock_levels_updated']), (0, 1))
+
+        item = Item.objects.get(short_code="TWL-1")
+        self.assertEqual(item.name, "Bath Towel")
+        self.assertEqual(item.cost, Decimal("3.50"))
+        stock = StockLevel.objects.get(item=item, location=self.closet)
+        # par is left alone when the row does not carry it
+        self.assertEqual((stock.on_hand_qty, stock.par), (Decimal("8"), Decimal("10")))
+        if ItemSearchService.available():
+            self.assertEqual(ItemSearchService.ranked_ids("bath"), [item.id])
+
+    def test_unchanged_rows_are_not_written(self):
+        rows = [
+            self.row(2, "DIF-1", cost=Decimal("3.5"), location_name="Closet 1", on_hand_qty=Decimal("5")),
+            self.row(3, "DIF-2", default_vendor="acme supply", location_name="Closet 1", on_hand_qty=Decimal("2")),
+        ]
+        ItemImportService.import_rows(rows, None)
+        Item.objects.create(short_code="OLD-1", name="Discontinued")
+        stamps = dict(Item.objects.values_list('short_code', 'updated_at'))
+
+        rows[1]['data']['on_hand_qty'] = Decimal("4")
+        with CaptureQueriesContext(connection) as queries:
+            results = ItemImportService.import_rows(rows, None)
+        self.assertEqual((results['items_created'], results['items_updated'], results['items_unchanged']), (0, 0, 2))
+        self.assertEqual(
+            (results['stock_levels_created'], results['stock_levels_updated'], results['stock_levels_unchanged']),
+            (0, 1, 1)
+        )
+        self.assertEqual(results['items_removed'], 1)
+        self.assertEqual(dict(Item.objects.values_list('short_code', 'updated_at')), stamps)
+        self.assertFalse([q for q in queries.captured_queries if q['sql'].startswith('INSERT INTO "imh_ims_item"')])
+        self.assertEqual(StockLevel.objects.get(item__short_code="DIF-2").on_hand_qty, Decimal("4"))
+
+    def test_dry_run_classifies_without_writing(self):
+        ItemImportService.import_rows([self.row(2, "DRY-1", location_name="Closet 1", on_hand_qty=Decimal("1"))], None)
+        rows = [
+            self.row(2, "DRY-1", name="Renamed", location_name="Closet 1", on_hand_qty=Decimal("1")),
+            self.row(3, "DRY-2", default_vendor="Brand New Vendor", location_name="Closet 7", on_hand_qty=Decimal("3")),
+            self.row(4, "DRY-3", default_vendor="Brand New Vendor", location_name="Closet 7", on_hand_qty=Decimal("3")),
+        ]
+        results = ItemImportService.import_rows(rows, None, chunk_size=2, dry_run=True)
+
+        self.assertEqual((results['items_created'], results['items_updated'], results['items_unchanged']), (2, 1, 0))
+        self.assertEqual((results['vendors_created'], results['locations_created']), (1, 1))
+        self.assertEqual((results['stock_levels_created'], results['stock_levels_unchanged']), (2, 1))
+        self.assertEqual(Item.objects.get(short_code="DRY-1").name, "Item DRY-1")
+        self.assertFalse(Item.objects.filter(short_code__in=["DRY-2", "DRY-3"]).exists())
+        self.assertFalse(Vendor.objects.filter(name="Brand New Vendor").exists())
+        self.assertFalse(Location.objects.filter(name="Closet 7").exists())
+
+    def test_chunks_commit_independently(self):
+        rows = [self.row(n, f"CH-{n}", location_name="Closet 1", on_hand_qty=Decimal("1")) for n in range(2, 7)]
+        # A NOT NULL violation fails the second chunk only
+        rows[2]['data']['name'] = None
+        progress = []
+        results = ItemImportService.import_rows(
+            rows, None, chunk_size=2, on_chunk=lambda chunk, partial: progress.append(chunk[-1]['row_number'])
+        )
+
+        self.assertEqual(progress, [3, 5, 6])
+        self.assertEqual(results['items_created'], 3)
+        self.assertEqual([error['row_number'] for error in results['errors']], [4, 5])
+        self.assertEqual(
+            set(Item.objects.filter(short_code__startswith="CH-").values_list('short_code', flat=True)),
+            {"CH-2", "CH-3", "CH-6"}
+        )
+
+
+class ImportJobTests(TestCase):
+    """Tests for background import jobs and their checkpoints"""
+
+    CSV = (
+        b"short_code,name,location_name,on_hand_qty\n"
+        b"JOB-1,Towel,Closet 1,5\n"
+        b"JOB-2,Soap,Closet 1,3\n"
+        b",Missing Code,Closet 1,1\n"
+        b"JOB-4,Gloves,Closet 1,8\n"
+        b"JOB-5,Masks,Closet 1,2\n"
+    )
+
+    def setUp(self):
+        self.media_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media_dir.cleanup)
+        settings_override = override_settings(MEDIA_ROOT=self.media_dir.name, IMPORT_CHUNK_SIZE=2)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.user = User.objects.create_user(username="importer", password="testpass")
+
+    def submit(self):
+        return ImportJobService.submit(SimpleUploadedFile("items.csv", self.CSV, "text/csv"), self.user)
+
+    def test_worker_runs_queued_job(self):
+        job = self.submit()
+        self.assertEqual(job.status, "QUEUED")
+        claimed = ImportJobService.claim_next("test:1")
+        self.assertEqual(claimed.id, job.id)
+        self.assertIsNone(ImportJobService.claim_next("test:2"))
+
+        job = ImportJobService.run(claimed)
+        job.refresh_from_db()
+        self.assertEqual(job.status, "COMPLETED")
+        self.assertEqual((job.total_rows, job.rows_done), (5, 5))
+        self.assertEqual(job.results["items_created"], 4)
+        self.assertEqual([error["row_number"] for error in job.results["errors"]], [4])
+        self.assertIsNotNone(job.rows_per_second)
+
+    def test_resume_after_last_committed_chunk(self):
+        # A previous worker committed the first chunk (file rows 1-2) and then died
+        job = self.submit()
+        ItemImportService.import_rows(
+            [{'row_number': n, 'data': {'short_code': f"JOB-{n - 1}", 'name': "Earlier run"}} for n in (2, 3)], None
+        )
+        ImportJob.objects.filter(id=job.id).update(
+            status="RUNNING", worker="gone-host:1", heartbeat_at=timezone.now() - timedelta(hours=1),
+            rows_done=2, results={'items_created': 2, 'errors': []}
+        )
+
+        self.assertEqual(ImportJobService.requeue_abandoned(), 1)
+        job = ImportJobService.run(ImportJobService.claim_next("test:1"))
+
+        self.assertEqual(job.status, "COMPLETED")
+        self.assertEqual(job.results["items_created"], 4)
+        # Rows before the checkpoint are not imported again
+        self.assertEqual(Item.objects.get(short_code="JOB-1").name, "Earlier run")
+        self.assertEqual(Item.objects.get(short_code="JOB-4").name, "Gloves")
+
+    def test_unreadable_file_fails_job(self):
+        job = ImportJobService.submit(SimpleUploadedFile("items.txt", b"x", "text/plain"), self.user)
+        job = ImportJobService.run(ImportJobService.claim_next("test:1"))
+        self.assertEqual(job.status, "FAILED")
+        self.assertIn("Unsupported file type", job.failure)
+
+
+class SpreadsheetReaderTests(TestCase):
+    """Tests for streaming spreadsheet parsing"""
+
+    def test_csv_aliases_and_text_cells(self):
+        upload = SimpleUploadedFile(
+            "items.csv",
+            "﻿SKU,Product Name,Qty,Notes\n00123,Café Cup,5\n\nA-2,Towel,,x,extra\n".encode("utf-8")
+        )
+        with SpreadsheetReader(upload) as reader:
+            self.assertEqual(reader.encoding, "utf-8-sig")
+            self.assertEqual(reader.columns, ["short_code", "name", "on_hand_qty", "notes"])
+            rows = list(reader)
+            self.assertEqual(reader.estimate_rows(), 2)
+        self.assertEqual(rows, [
+            {"short_code": "00123", "name": "Café Cup", "on_hand_qty": "5", "notes": ""},
+            {"short_code": "A-2", "name": "Towel", "on_hand_qty": "", "notes": "x"},
+        ])
+
+    def test_csv_windows_encoding_and_mapping(self):
+        upload = SimpleUploadedFile("items.csv", "Code,Title\nX1,“Deluxe” Mop\n".encode("cp1252"))
+        with SpreadsheetReader(upload, {"Code": "short_code", "Title": "name"}) as reader:
+            self.assertEqual(reader.encoding, "cp1252")
+            self.assertEqual(list(reader), [{"short_code": "X1", "name": "“Deluxe” Mop"}])
+
+    def test_xlsx_rows(self):
+        workbook = openpyxl.Workbook()
+        sheet = workbook.active
+        sheet.append(["short_code", "name", "cost", None])
+        sheet.append([123, "Gloves", 4.5])
+        sheet.append([None, None, None])
+        sheet.append(["B-7", "Masks", None])
+        buffer = io.BytesIO()
+        workbook.save(buffer)
+
+        with SpreadsheetReader(SimpleUploadedFile("items.xlsx", buffer.getvalue())) as reader:
+            self.assertEqual(reader.original_columns, ["short_code", "name", "cost"])
+            rows = list(reader)
+        self.assertEqual(rows, [
+            {"short_code": 123, "name": "Gloves", "cost": 4.5},
+            {"short_code": "B-7", "name": "Masks", "cost": ""},
+        ])
+        self.assertEqual(validate_row(rows[0], 2)["data"]["short_code"], "123")
+
+    def test_unsupported_file(self):
+        with self.assertRaises(ValueError):
+            SpreadsheetReader(SimpleUploadedFile("items.pdf", b"%PDF"))
+
+
+class ValidateRowsTests(TestCase):
+    """Tests for batched and process-pool row validation"""
+
+    def rows(self, count):
+        return [
+            {"short_code": f"V-{n}", "name": f"Item {n}", "cost": "bad" if n % 7 == 0 else "1.50"}
+            for n in range(count)
+        ]
+
+    def test_serial_numbering_from_checkpoint(self):
+        results = list(validate_rows(self.rows(10), start=5, workers=1, batch_size=3))
+        self.assertEqual([row_number for row_number, _, _ in results], list(range(5, 15)))
+        self.assertEqual([result["valid"] for _, _, result in results], [n % 7 != 0 for n in range(10)])
+
+    def test_pool_keeps_file_order(self):
+        rows = self.rows(500)
+        results = list(validate_rows(rows, workers=2, batch_size=40, parallel_after=100))
+        self.assertEqual([row_number for row_number, _, _ in results], list(range(2, 502)))
+        self.assertEqual([row for _, row, _ in results], rows)
+        self.assertEqual(
+            [row_number for row_number, _, result in results if not result["valid"]],
+            [n + 2 for n in range(500) if n % 7 == 0]
+        )
+
+
+ORDER_FIXTURE = Path(__file__).parent / 'test_data' / 'order_suggestions.json'
+
+
+def load_order_fixture():
+    """
+    Build the order-suggestion regression data set. Returns the parsed
+    fixture and the vendors by name. `expected` holds the suggestions the
+    original per-item implementation produced for the same rows.
+    """
+    fixture = json.loads(ORDER_FIXTURE.read_text())
+    vendors = {name: Vendor.objects.create(name=name) for name in fixture['vendors']}
+    locations = {name: Location.objects.create(name=name, type='STOREROOM') for name in fixture['locations']}
+    items = {}
+    for row in fixture['items']:
+        items[row['short_code']] = Item.objects.create(
+            short_code=row['short_code'], name=row['name'], lead_time_days=row['lead_time_days'],
+            default_vendor=vendors.get(row['vendor']), is_active=row['is_active']
+        )
+    StockLevel.objects.bulk_create([
+        StockLevel(
+            item=items[row['item']], location=locations[row['location']],
+            on_hand_qty=Decimal(row['on_hand_qty']), par=Decimal(row['par'])
+        )
+        for row in fixture['stock']
+    ])
+    now = timezone.now()
+    for row in fixture['issues']:
+        issue = InventoryTransaction.objects.create(item=items[row['item']], type='ISSUE', qty=Decimal(row['qty']))
+        InventoryTransaction.objects.filter(pk=issue.pk).update(timestamp=now - timedelta(days=row['days_ago']))
+    # The rows were back-dated after they were written, so build the usage rollup from the ledger
+    DailyUsageService.rebuild()
+    return fixture, vendors
+
+
+class OrderSuggestionTests(TestCase):
+    """The vectorized engine reproduces the original per-item suggestions"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.fixture, cls.vendors = load_order_fixture()
+
+    def assertMatchesExpected(self, suggestions, expected):
+        by_line = {(row['item_short_code'], row['location_name']): row for row in suggestions}
+        self.assertEqual(set(by_line), {(row['item_short_code'], row['location_name']) for row in expected})
+        for row in expected:
+            suggestion = by_line[(row['item_short_code'], row['location_name'])]
+            for field in ('current_on_hand', 'par', 'avg_daily_usage', 'projected_on_hand', 'suggested_order_qty'):
+                self.assertAlmostEqual(suggestion[field], float(row[field]), places=9, msg=(row, field))
+            self.assertEqual(suggestion['lead_time_days'], row['lead_time_days'])
+            self.assertEqual(suggestion['days_until_below_par'], row['days_until_below_par'], msg=row)
+
+    def test_matches_per_item_results(self):
+        # Lines, forecast freshness, issue totals
+        with self.assertNumQueries(3):
+            suggestions = OrderSuggestionService.calculate_suggested_orders()
+        self.assertMatchesExpected(suggestions, self.fixture['expected'])
+        self.assertEqual(
+            [(row['item_name'], row['location_name']) for row in suggestions],
+            sorted((row['item_name'], row['location_name']) for row in suggestions)
+        )
+
+    def test_vendor_filter(self):
+        suggestions = OrderSuggestionService.calculate_suggested_orders(vendor=self.vendors['Acme Linen'].id)
+        self.assertMatchesExpected(suggestions, self.fixture['expected_acme_linen'])
+
+    def test_no_lines(self):
+        StockLevel.objects.all().delete()
+        self.assertEqual(OrderSuggestionService.calculate_suggested_orders(), [])
+
+
+class DemandForecastTests(TestCase):
+    """Batch forecasts pick a model per series and feed order suggestions while fresh"""
+
+    def test_fit_seasonal_and_intermittent_series(self):
+        week = np.array([10, 12, 11, 13, 9, 2, 1], dtype=float)
+        seasonal = np.tile(week, 16) + np.random.default_rng(1).normal(0, 0.3, 112)
+        intermittent = np.zeros(112)
+        intermittent[::9] = 5
+        forecasts = ForecastService.fit(np.vstack([seasonal, intermittent, np.zeros(112)]), horizon=14, interval=0.8)
+
+        self.assertEqual(forecasts['method'].tolist(), ['HOLT_WINTERS', 'CROSTON', 'CROSTON'])
+        # Day 112 continues the weekly cycle at its first weekday
+        np.testing.assert_allclose(forecasts['forecast'][0, :7], week, atol=1)
+        np.testing.assert_allclose(forecasts['forecast'][1], 0.95 * 5 / 9, rtol=0.1)
+        self.assertFalse(forecasts['forecast'][2].any())
+        self.assertTrue((forecasts['lower'] <= forecasts['forecast']).all())
+        self.assertTrue((forecasts['forecast'] <= forecasts['upper']).all())
+
+    def test_suggestions_use_fresh_forecasts(self):
+        user = User.objects.create_user(username="forecaster", password="testpass")
+        item = Item.objects.create(name="Towel", short_code="FC-1", lead_time_days=2)
+        closet = Location.objects.create(name="3W Closet", type="CLOSET")
+        storeroom = Location.objects.create(name="Main Storeroom", type="STOREROOM")
+        StockLevel.objects.create(item=item, location=closet, on_hand_qty=10, par=10)
+        now = timezone.now()
+        for days_ago in range(1, 57):
+            for location, qty in ((closet, 3), (storeroom, 1)):
+                issue = InventoryTransaction.objects.create(
+                    item=item, type='ISSUE', qty=Decimal(qty), from_location=location, user=user
+                )
+                InventoryTransaction.objects.filter(pk=issue.pk).update(timestamp=now - timedelta(days=days_ago))
+        DailyUsageService.rebuild()
+
+        self.assertEqual(ForecastService.run(), 2)
+        forecast = DemandForecast.objects.get(item=item, location=closet)
+        self.assertEqual(forecast.method, 'HOLT_WINTERS')
+        self.assertEqual(len(forecast.forecast), 28)
+
+        # The closet's own 3/day over 5 days, not the item's 4/day across locations
+        suggestion, = OrderSuggestionService.calculate_suggested_orders()
+        self.assertEqual(suggestion['usage_basis'], 'forecast')
+        self.assertAlmostEqual(suggestion['suggested_order_qty'], 15, delta=0.1)
+        projection = OrderSuggestionService.project_stock_levels(item, closet, days_ahead=4)
+        self.assertAlmostEqual(float(projection['projected_qty']), -2, delta=0.1)
+        self.assertLessEqual(projection['projected_low'], projection['projected_qty'])
+
+        DemandForecast.objects.update(generated_at=now - timedelta(hours=49))
+        suggestion, = OrderSuggestionService.calculate_suggested_orders()
+        self.assertEqual(suggestion['usage_basis'], 'average')
+        # 29 days of 4/day inside the 30-day window, over 5 days
+        self.assertAlmostEqual(suggestion['suggested_order_qty'], 29 * 4 / 30 * 5)
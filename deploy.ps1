@@ -132,7 +132,7 @@ if ($LASTEXITCODE -ne 0) {
 
 # Build deployment command with first-time setup check
 # Stash any local changes, pull, then apply stashed changes if needed
-$deployCommand = "cd ~/$REPO_PATH && git stash && git pull origin $BRANCH && cd backend && if [ ! -d 'venv' ] || [ ! -f 'venv/bin/activate' ]; then echo 'Setting up virtual environment for first time...' && if ! python3 -m venv --help >/dev/null 2>&1; then echo 'Installing python3-venv package...' && sudo DEBIAN_FRONTEND=noninteractive apt-get update -qq && (sudo DEBIAN_FRONTEND=noninteractive apt-get install -y python3.12-venv 2>/dev/null || sudo DEBIAN_FRONTEND=noninteractive apt-get install -y python3-venv); fi && rm -rf venv && python3 -m venv venv && source venv/bin/activate && pip install --upgrade pip && pip install -r requirements.txt && pip install gunicorn psycopg2-binary dj-database-url; else source venv/bin/activate; fi && pip install -r requirements.txt --quiet && python manage.py migrate --noinput && python manage.py collectstatic --noinput && if systemctl is-active --quiet imh-ims 2>/dev/null; then sudo systemctl restart imh-ims && sleep 3 && sudo systemctl status imh-ims --no-pager -l; else echo 'Gunicorn service not set up yet. Skipping restart.' && echo 'Run first-time-server-setup.sh to complete server setup.'; fi && echo 'Backend deployment complete'"
+$deployCommand = "cd ~/$REPO_PATH && git stash && git pull origin $BRANCH && cd backend && if [ ! -d 'venv' ] || [ ! -f 'venv/bin/activate' ]; then echo 'Setting up virtual environment for first time...' && if ! python3 -m venv --help >/dev/null 2>&1; then echo 'Installing python3-venv package...' && sudo DEBIAN_FRONTEND=noninteractive apt-get update -qq && (sudo DEBIAN_FRONTEND=noninteractive apt-get install -y python3.12-venv 2>/dev/null || sudo DEBIAN_FRONTEND=noninteractive apt-get install -y python3-venv); fi && rm -rf venv && python3 -m venv venv && source venv/bin/activate && pip install --upgrade pip && pip install -r requirements.txt && pip install gunicorn psycopg2-binary dj-database-url; else source venv/bin/activate; fi && pip install -r requirements.txt --quiet && python manage.py migrate --noinput && python manage.py createcachetable && python manage.py collectstatic --noinput && if systemctl is-active --quiet imh-ims 2>/dev/null; then sudo systemctl restart imh-ims && sleep 3 && sudo systemctl status imh-ims --no-pager -l; else echo 'Gunicorn service not set up yet. Skipping restart.' && echo 'Run first-time-server-setup.sh to complete server setup.'; fi && echo 'Backend deployment complete'"
 
 ssh -i "$SSH_KEY" "$SERVER_HOST" $deployCommand
 
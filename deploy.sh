@@ -69,8 +69,10 @@ cd backend && \
 source venv/bin/activate && \
 pip install -r requirements.txt --quiet && \
 python manage.py migrate --noinput && \
+python manage.py createcachetable && \
 python manage.py collectstatic --noinput && \
 sudo systemctl restart imh-ims && \
+(sudo systemctl restart imh-ims-import-worker || echo 'Import worker service not installed; see first-time-server-setup.sh') && \
 sleep 3 && \
 sudo systemctl status imh-ims --no-pager -l && \
 echo '' && \
@@ -77,6 +77,7 @@ fi
 echo ""
 echo "📦 Step 7: Running database migrations..."
 python manage.py migrate
+python manage.py createcachetable
 
 # Step 8: Collect static files
 echo ""
@@ -106,9 +107,27 @@ ExecStart=/home/ubuntu/SPS-IMH/backend/venv/bin/gunicorn \\
 WantedBy=multi-user.target
 EOF
 
+# Background worker for spreadsheet imports
+sudo tee /etc/systemd/system/imh-ims-import-worker.service > /dev/null << EOF
+[Unit]
+Description=IMH IMS import worker
+After=network.target
+
+[Service]
+User=ubuntu
+Group=www-data
+WorkingDirectory=/home/ubuntu/SPS-IMH/backend
+Environment="PATH=/home/ubuntu/SPS-IMH/backend/venv/bin"
+ExecStart=/home/ubuntu/SPS-IMH/backend/venv/bin/python manage.py run_import_worker
+Restart=always
+
+[Install]
+WantedBy=multi-user.target
+EOF
+
 sudo systemctl daemon-reload
-sudo systemctl start imh-ims
-sudo systemctl enable imh-ims
+sudo systemctl start imh-ims imh-ims-import-worker
+sudo systemctl enable imh-ims imh-ims-import-worker
 
 # Step 10: Configure Nginx
 echo ""
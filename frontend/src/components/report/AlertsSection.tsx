@@ -112,6 +112,11 @@ const AlertsSection: React.FC = () => {
                 <AlertCard key={`${alert.item_id}-${alert.location_id}-${index}`} alert={alert} type="below_par" />
               ))
             )}
+            {alerts.below_par_count > alerts.below_par.length && (
+              <p className="empty-alerts-hint">
+                Showing the {alerts.below_par.length} most severe of {alerts.below_par_count}.
+              </p>
+            )}
           </div>
         )}
 
@@ -129,6 +134,11 @@ const AlertsSection: React.FC = () => {
                 <AlertCard key={`${alert.item_id}-${alert.location_id}-${index}`} alert={alert} type="at_risk" />
               ))
             )}
+            {alerts.at_risk_count > alerts.at_risk.length && (
+              <p className="empty-alerts-hint">
+                Showing the {alerts.at_risk.length} most severe of {alerts.at_risk_count}.
+              </p>
+            )}
           </div>
         )}
       </div>
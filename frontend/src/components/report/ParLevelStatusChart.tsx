@@ -42,51 +42,24 @@ const ParLevelStatusChart: React.FC = () => {
       setLoading(true);
       const alerts = await reportsService.getAlerts();
       
-      // Transform and calculate statistics
-      const belowPar = (alerts.below_par || []).map((stockLevel: any) => ({
-        item_id: Number(stockLevel.item) || 0,
-        location_id: Number(stockLevel.location) || 0,
-        location_name: stockLevel.location_name || 'Unknown Location',
-        par: Number(stockLevel.par) || 0,
-        on_hand_qty: Number(stockLevel.on_hand_qty) || 0,
-      }));
-      
-      const atRisk = (alerts.at_risk || []).map((stockLevel: any) => ({
-        item_id: Number(stockLevel.item) || 0,
-        location_id: Number(stockLevel.location) || 0,
-        location_name: stockLevel.location_name || 'Unknown Location',
-        par: Number(stockLevel.par) || 0,
-        on_hand_qty: Number(stockLevel.on_hand_qty) || 0,
-      }));
-      
-      const totalItems = belowPar.length + atRisk.length;
-      
-      // Calculate average deficit for below par items
-      const belowParDeficit = belowPar.reduce((sum: number, alert: any) => {
-        const par = alert.par || 0;
-        const onHand = alert.on_hand_qty || 0;
-        return sum + Math.max(0, par - onHand);
-      }, 0);
-      const avgDeficit = belowPar.length > 0 ? belowParDeficit / belowPar.length : 0;
-      
+      // Counts, shortfall and per-location figures come from the server over
+      // every alert; the alert lists themselves are only the first page
+      const belowParCount = Number(alerts.below_par_count) || 0;
+      const atRiskCount = Number(alerts.at_risk_count) || 0;
+      const totalItems = belowParCount + atRiskCount;
+      const avgDeficit = belowParCount > 0 ? (Number(alerts.below_par_shortfall) || 0) / belowParCount : 0;
+
       // Group by location
       const locationGroups: { [key: string]: { below: number; atRisk: number } } = {};
-      [...belowPar, ...atRisk].forEach((alert: any) => {
-        const loc = alert.location_name || 'Unknown';
-        if (!locationGroups[loc]) {
-          locationGroups[loc] = { below: 0, atRisk: 0 };
-        }
-        if (belowPar.some((b: any) => b.item_id === alert.item_id && b.location_id === alert.location_id)) {
-          locationGroups[loc].below++;
-        } else {
-          locationGroups[loc].atRisk++;
-        }
+      (alerts.locations || []).forEach((location) => {
+        const loc = location.location_name || 'Unknown';
+        locationGroups[loc] = { below: location.below_par, atRisk: location.at_risk };
       });
       
       setChartData({
         totalItems,
-        belowParCount: belowPar.length,
-        atRiskCount: atRisk.length,
+        belowParCount,
+        atRiskCount,
         avgDeficit,
         locationGroups,
       });
@@ -46,6 +46,11 @@ const SuggestedOrderCard: React.FC<SuggestedOrderCardProps> = ({ suggestion }) =
             <strong>Days Until Below Par:</strong> {suggestion.days_until_below_par}
           </div>
         )}
+        {suggestion.usage_basis && (
+          <div className="detail-row">
+            <strong>Usage Basis:</strong> {suggestion.usage_basis === 'forecast' ? 'Demand forecast' : '30-day average'}
+          </div>
+        )}
         {suggestion.vendor_name && (
           <div className="detail-row">
             <strong>Vendor:</strong> {suggestion.vendor_name}
@@ -1,7 +1,7 @@
 import React, { useState, useRef } from 'react';
 import { useAuth } from '../../contexts/AuthContext';
 import { itemsService } from '../../services/itemsService';
-import { ImportPreviewResponse, ImportResult } from '../../types/item.types';
+import { ImportPreviewResponse, ImportResult, ImportJob } from '../../types/item.types';
 import './ImportItemsTab.css';
 
 const ImportItemsTab: React.FC = () => {
@@ -10,6 +10,7 @@ const ImportItemsTab: React.FC = () => {
   const [preview, setPreview] = useState<ImportPreviewResponse | null>(null);
   const [importResult, setImportResult] = useState<ImportResult | null>(null);
   const [loading, setLoading] = useState(false);
+  const [importJob, setImportJob] = useState<ImportJob | null>(null);
   const [error, setError] = useState<string | null>(null);
   const [columnMapping, setColumnMapping] = useState<Record<string, string>>({});
   const [showColumnMapping, setShowColumnMapping] = useState(false);
@@ -111,14 +112,39 @@ const ImportItemsTab: React.FC = () => {
     setError(null);
     try {
       const result = await itemsService.bulkImport(file, false, Object.keys(columnMapping).length > 0 ? columnMapping : undefined);
-      if ('items_created' in result) {
-        setImportResult(result);
-        setPreview(null);
-        setColumnMapping({});
-        setShowColumnMapping(false);
-      } else {
+      if (!('status' in result)) {
         setError('Unexpected response from server');
+        return;
+      }
+
+      // The import runs in the background; poll the job until it finishes
+      let job: ImportJob = result;
+      setImportJob(job);
+      while (job.status === 'QUEUED' || job.status === 'RUNNING') {
+        await new Promise(resolve => setTimeout(resolve, 1000));
+        job = await itemsService.getImportJob(job.id);
+        setImportJob(job);
       }
+
+      if (job.status === 'FAILED') {
+        setError(`Import failed: ${job.failure}`);
+        return;
+      }
+      setImportResult({
+        items_created: job.results.items_created || 0,
+        items_updated: job.results.items_updated || 0,
+        items_unchanged: job.results.items_unchanged || 0,
+        items_removed: job.results.items_removed || 0,
+        vendors_created: job.results.vendors_created || 0,
+        locations_created: job.results.locations_created || 0,
+        stock_levels_created: job.results.stock_levels_created || 0,
+        stock_levels_updated: job.results.stock_levels_updated || 0,
+        stock_levels_unchanged: job.results.stock_levels_unchanged || 0,
+        errors: job.errors,
+      });
+      setPreview(null);
+      setColumnMapping({});
+      setShowColumnMapping(false);
     } catch (err: any) {
       console.error('Error importing:', err);
       let errorMessage = 'Failed to import items';
@@ -134,6 +160,7 @@ const ImportItemsTab: React.FC = () => {
       setError(errorMessage);
     } finally {
       setLoading(false);
+      setImportJob(null);
     }
   };
 
@@ -206,7 +233,14 @@ const ImportItemsTab: React.FC = () => {
 
         {loading && (
           <div className="loading-message">
-            {preview ? 'Importing items...' : 'Loading preview...'}
+            {!preview
+              ? 'Loading preview...'
+              : importJob && importJob.status === 'RUNNING' && importJob.total_rows
+                ? `Importing items... ${importJob.rows_done} of ${importJob.total_rows} rows` +
+                  (importJob.rows_per_second ? ` (${Math.round(importJob.rows_per_second)} rows/s)` : '')
+                : importJob && importJob.status === 'QUEUED'
+                  ? 'Import queued...'
+                  : 'Importing items...'}
           </div>
         )}
 
@@ -279,6 +313,33 @@ const ImportItemsTab: React.FC = () => {
               </div>
             </div>
 
+            {preview.diff && (
+              <div className="preview-summary">
+                <div className="summary-item">
+                  <span className="summary-label">New Items:</span>
+                  <span className="summary-value">{preview.diff.items_created}</span>
+                </div>
+                <div className="summary-item">
+                  <span className="summary-label">Changed:</span>
+                  <span className="summary-value">{preview.diff.items_updated}</span>
+                </div>
+                <div className="summary-item">
+                  <span className="summary-label">Unchanged:</span>
+                  <span className="summary-value">{preview.diff.items_unchanged || 0}</span>
+                </div>
+                <div className="summary-item">
+                  <span className="summary-label">Not in File:</span>
+                  <span className="summary-value">{preview.diff.items_removed || 0}</span>
+                </div>
+                <div className="summary-item">
+                  <span className="summary-label">Stock New / Changed / Unchanged:</span>
+                  <span className="summary-value">
+                    {preview.diff.stock_levels_created} / {preview.diff.stock_levels_updated} / {preview.diff.stock_levels_unchanged || 0}
+                  </span>
+                </div>
+              </div>
+            )}
+
             {preview.invalid_rows > 0 && (
               <div className="validation-errors">
                 <h4>Validation Errors</h4>
@@ -292,6 +353,11 @@ const ImportItemsTab: React.FC = () => {
                     </ul>
                   </div>
                 ))}
+                {preview.invalid_rows > preview.errors.length && (
+                  <p className="preview-note">
+                    ... and {preview.invalid_rows - preview.errors.length} more rows with errors
+                  </p>
+                )}
               </div>
             )}
 
@@ -326,8 +392,8 @@ const ImportItemsTab: React.FC = () => {
                     ))}
                   </tbody>
                 </table>
-                {preview.rows.length > 20 && (
-                  <p className="preview-note">... and {preview.rows.length - 20} more rows</p>
+                {preview.valid_rows > 20 && (
+                  <p className="preview-note">... and {preview.valid_rows - 20} more rows</p>
                 )}
               </div>
             )}
@@ -365,6 +431,10 @@ const ImportItemsTab: React.FC = () => {
                 <span className="result-label">Items Updated:</span>
                 <span className="result-value">{importResult.items_updated}</span>
               </div>
+              <div className="result-item success">
+                <span className="result-label">Items Unchanged:</span>
+                <span className="result-value">{importResult.items_unchanged || 0}</span>
+              </div>
               <div className="result-item success">
                 <span className="result-label">Vendors Created:</span>
                 <span className="result-value">{importResult.vendors_created || 0}</span>
@@ -381,6 +451,10 @@ const ImportItemsTab: React.FC = () => {
                 <span className="result-label">Stock Levels Updated:</span>
                 <span className="result-value">{importResult.stock_levels_updated}</span>
               </div>
+              <div className="result-item success">
+                <span className="result-label">Stock Levels Unchanged:</span>
+                <span className="result-value">{importResult.stock_levels_unchanged || 0}</span>
+              </div>
             </div>
 
             {importResult.errors.length > 0 && (
@@ -1,5 +1,5 @@
 import api from './api';
-import { Item, ImportPreviewResponse, ImportResult } from '../types/item.types';
+import { Item, ImportPreviewResponse, ImportJob } from '../types/item.types';
 
 export const itemsService = {
   getAll: async (params?: {
@@ -143,7 +143,8 @@ export const itemsService = {
     return response.data;
   },
 
-  bulkImport: async (file: File, preview: boolean = true, columnMapping?: Record<string, string>): Promise<ImportPreviewResponse | ImportResult> => {
+  // With preview=false the file is queued and the new ImportJob is returned; poll getImportJob for progress
+  bulkImport: async (file: File, preview: boolean = true, columnMapping?: Record<string, string>): Promise<ImportPreviewResponse | ImportJob> => {
     const formData = new FormData();
     formData.append('file', file);
     
@@ -160,19 +161,24 @@ export const itemsService = {
     return response.data;
   },
 
+  getImportJob: async (id: number): Promise<ImportJob> => {
+    const response = await api.get(`/items/import-jobs/${id}/`);
+    return response.data;
+  },
+
   lookupByCode: async (shortCode: string): Promise<Item> => {
     const response = await api.get(`/items/lookup/${shortCode}/`);
     return response.data;
   },
 
-  getQRCode: async (id: number, size: number = 200): Promise<string> => {
-    // Returns the QR code image URL
+  getQRCode: async (id: number, size: number = 200, fileFormat: 'png' | 'svg' = 'png'): Promise<string> => {
+    // Returns the QR code image URL (SVG scales cleanly for print)
     // Use relative URL in production, absolute in development
     const hostname = window.location.hostname;
     const baseUrl = (hostname !== 'localhost' && hostname !== '127.0.0.1') 
       ? '/api' 
       : (process.env.REACT_APP_API_URL || 'http://localhost:8000/api');
-    return `${baseUrl}/items/${id}/qr-code/?size=${size}`;
+    return `${baseUrl}/items/${id}/qr-code/?size=${size}&file_format=${fileFormat}`;
   },
 };
 
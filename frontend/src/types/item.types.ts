@@ -106,6 +106,7 @@ export interface ImportPreviewResponse {
   total_rows: number;
   valid_rows: number;
   invalid_rows: number;
+  // First rows and errors only (IMPORT_PREVIEW_LIMIT); the counts cover the whole file
   rows: ImportPreviewRow[];
   errors: Array<{
     row_number: number;
@@ -114,18 +115,41 @@ export interface ImportPreviewResponse {
   }>;
   original_columns?: string[];
   detected_columns?: string[];
+  // What importing the valid rows would write; nothing is saved by a preview
+  diff?: Omit<ImportResult, 'errors'>;
 }
 
 export interface ImportResult {
   items_created: number;
   items_updated: number;
+  items_unchanged?: number;
+  // Active items not in the file; an import leaves them alone
+  items_removed?: number;
   vendors_created?: number;
   locations_created: number;
   stock_levels_created: number;
   stock_levels_updated: number;
+  stock_levels_unchanged?: number;
   errors: Array<{
     row_number: number;
     errors: string[];
   }>;
 }
 
+export interface ImportJob {
+  id: number;
+  original_name: string;
+  status: 'QUEUED' | 'RUNNING' | 'COMPLETED' | 'FAILED';
+  total_rows: number | null;
+  rows_done: number;
+  progress: number | null;
+  error_count: number;
+  errors: ImportResult['errors'];
+  results: Partial<Omit<ImportResult, 'errors'>>;
+  rows_per_second: number | null;
+  failure: string;
+  created_at: string;
+  started_at: string | null;
+  finished_at: string | null;
+}
+
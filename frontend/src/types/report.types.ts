@@ -23,11 +23,25 @@ export interface AtRiskAlert {
   stock_level: StockLevel;
 }
 
+export interface AlertLocationSummary {
+  location_id: number;
+  location_name: string;
+  below_par: number;
+  at_risk: number;
+  shortfall: number;
+}
+
 export interface Alert {
+  // One page of each list, most severe (largest shortfall / par) first
   below_par: BelowParAlert[];
   at_risk: AtRiskAlert[];
+  // Counts and summaries cover every alert, not just the page
   below_par_count: number;
   at_risk_count: number;
+  below_par_shortfall?: number;
+  locations?: AlertLocationSummary[];
+  page?: number;
+  page_size?: number;
 }
 
 export interface SuggestedOrder {
@@ -46,6 +60,7 @@ export interface SuggestedOrder {
   lead_time_days?: number;
   projected_on_hand?: number;
   days_until_below_par?: number;
+  usage_basis?: 'forecast' | 'average';
   vendor_id?: number;
   vendor_name?: string;
 }